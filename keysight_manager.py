@@ -8,16 +8,42 @@ Separate from main.py application
 import pyvisa
 import requests
 import time
+import socket
+import platform
 import subprocess
 import sys
+import os
 import argparse
+import threading
+from collections import deque
 from datetime import datetime
 
+# Per-command VISA statistics from the application's io_stats module
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+try:
+    import io_stats
+    IO_STATS_AVAILABLE = True
+except ImportError:
+    IO_STATS_AVAILABLE = False
+
 # Configuration
 POWER_METER_ADDRESS = "TCPIP0::100.65.16.193::inst0::INSTR"
 POWER_METER_IP = "100.65.16.193"
 WEB_INTERFACE_URL = f"http://{POWER_METER_IP}/pm/index.html"
 PING_TIMEOUT = 5  # seconds
+HEALTH_DEADLINE = 6  # seconds for the whole health check (probes run in parallel)
+WATCH_INTERVAL = 5  # seconds between watch rounds
+WATCH_HISTORY = 60  # rounds kept for the rolling latency figures
+WATCH_PORTS = {'web': 80, 'vxi11': 111}  # TCP connects only, no VISA session
+
+def ping_command(ip, timeout=PING_TIMEOUT):
+    """Single-packet ping for this OS (timeout in seconds)"""
+    system = platform.system()
+    if system == 'Windows':
+        return ['ping', '-n', '1', '-w', str(int(timeout * 1000)), ip]
+    if system == 'Darwin':
+        return ['ping', '-c', '1', '-t', str(max(1, int(round(timeout)))), ip]
+    return ['ping', '-c', '1', '-W', str(max(1, int(round(timeout)))), ip]
 
 class KeysightManager:
     """Keysight Power Meter Management Class"""
@@ -26,18 +52,30 @@ class KeysightManager:
         self.ip = POWER_METER_IP
         self.visa_address = POWER_METER_ADDRESS
         self.web_url = WEB_INTERFACE_URL
+        self._probe_threads = {}  # probe name -> thread of its last run
         
+    def open_meter(self, rm, timeout):
+        """Open the meter session (timed per command when io_stats is available)
+        
+        timeout (ms) bounds opening the session as well as every command.
+        """
+        inst = rm.open_resource(self.visa_address, open_timeout=timeout)
+        inst.timeout = timeout
+        if IO_STATS_AVAILABLE:
+            inst = io_stats.InstrumentedResource(inst, 'meter')
+        return inst
+    
     def log(self, message):
         """Log messages with timestamp"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] {message}")
     
-    def ping_device(self):
+    def ping_device(self, timeout=PING_TIMEOUT):
         """Ping the device to check network connectivity"""
         try:
             result = subprocess.run(
-                ['ping', '-n', '1', '-w', str(PING_TIMEOUT * 1000), self.ip],
-                capture_output=True, text=True, timeout=10
+                ping_command(self.ip, timeout),
+                capture_output=True, text=True, timeout=timeout + 1
             )
             return result.returncode == 0
         except subprocess.TimeoutExpired:
@@ -46,21 +84,20 @@ class KeysightManager:
             self.log(f"Ping failed: {e}")
             return False
     
-    def check_web_interface(self):
+    def check_web_interface(self, timeout=5):
         """Check if web interface is responding"""
         try:
-            response = requests.get(self.web_url, timeout=5)
+            response = requests.get(self.web_url, timeout=timeout)
             return response.status_code == 200
         except requests.RequestException as e:
             self.log(f"Web interface check failed: {e}")
             return False
     
-    def check_visa_connection(self):
+    def check_visa_connection(self, timeout=2):
         """Check VISA instrument connection"""
         try:
             rm = pyvisa.ResourceManager()
-            inst = rm.open_resource(self.visa_address)
-            inst.timeout = 2000
+            inst = self.open_meter(rm, int(timeout * 1000))
             
             # Try to get instrument ID
             idn = inst.query("*IDN?")
@@ -78,8 +115,7 @@ class KeysightManager:
         """Attempt soft reset via VISA commands"""
         try:
             rm = pyvisa.ResourceManager()
-            inst = rm.open_resource(self.visa_address)
-            inst.timeout = 5000
+            inst = self.open_meter(rm, 5000)
             
             # Send reset commands
             inst.write("*RST")
@@ -140,57 +176,133 @@ class KeysightManager:
             self.log(f"SNMP power cycle not available: {e}")
             return False
     
-    def check_device_health(self):
-        """Comprehensive device health check"""
+    def check_tcp_port(self, port, timeout=2):
+        """TCP connect to one of the meter's ports (cheap, no session opened)"""
+        try:
+            with socket.create_connection((self.ip, port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+    
+    def run_probes(self, probes, deadline):
+        """Run {name: callable} concurrently under one shared deadline
+        
+        Returns {name: (ok, seconds)}; a probe still running at the deadline
+        counts as failed with seconds=None. Probes run on daemon threads, so
+        a hung one never holds up the exit of the process, and a probe whose
+        previous run is still hung is not started again (it fails at once).
+        """
+        results = {}
+        
+        def timed(name, probe):
+            start = time.perf_counter()
+            try:
+                ok = bool(probe())
+            except Exception as e:
+                self.log(f"Probe {name} failed: {e}")
+                return
+            results[name] = (ok, time.perf_counter() - start)
+        
+        threads = {}
+        for name, probe in probes.items():
+            previous = self._probe_threads.get(name)
+            if previous is not None and previous.is_alive():
+                continue
+            thread = threading.Thread(target=timed, args=(name, probe), name=f"probe-{name}", daemon=True)
+            thread.start()
+            threads[name] = self._probe_threads[name] = thread
+        
+        end = time.monotonic() + deadline
+        for thread in threads.values():
+            thread.join(max(0.0, end - time.monotonic()))
+        return {name: results.get(name, (False, None)) for name in probes}
+    
+    def check_device_health(self, deadline=HEALTH_DEADLINE):
+        """Comprehensive device health check
+        
+        Ping, web interface and VISA *IDN? run in parallel and the whole
+        check returns within `deadline` seconds, failed or not.
+        """
         self.log("=== Keysight Power Meter Health Check ===")
         
         health_status = {
             'network_ping': False,
             'web_interface': False,
             'visa_connection': False,
-            'overall_status': 'UNKNOWN'
+            'overall_status': 'UNKNOWN',
+            'latency': {}
         }
         
-        # Check network connectivity
-        self.log("Checking network connectivity...")
-        health_status['network_ping'] = self.ping_device()
+        self.log(f"Checking network, web interface and VISA (deadline {deadline} s)...")
+        probe_timeout = max(1, deadline - 1)
+        results = self.run_probes({
+            'network_ping': lambda: self.ping_device(probe_timeout),
+            'web_interface': lambda: self.check_web_interface(probe_timeout),
+            'visa_connection': lambda: self.check_visa_connection(probe_timeout),
+        }, deadline)
         
-        if health_status['network_ping']:
-            self.log("✓ Network ping successful")
-            
-            # Check web interface
-            self.log("Checking web interface...")
-            health_status['web_interface'] = self.check_web_interface()
-            
-            if health_status['web_interface']:
-                self.log("✓ Web interface responding")
-            else:
-                self.log("✗ Web interface not responding")
-            
-            # Check VISA connection
-            self.log("Checking VISA connection...")
-            health_status['visa_connection'] = self.check_visa_connection()
-            
-            if health_status['visa_connection']:
-                self.log("✓ VISA connection successful")
+        labels = {'network_ping': "Network ping", 'web_interface': "Web interface", 'visa_connection': "VISA connection"}
+        for name, (ok, seconds) in results.items():
+            health_status[name] = ok
+            health_status['latency'][name] = seconds
+            if seconds is None:
+                self.log(f"✗ {labels[name]}: no answer within {deadline} s")
             else:
-                self.log("✗ VISA connection failed")
-        else:
-            self.log("✗ Network ping failed")
+                self.log(f"{'✓' if ok else '✗'} {labels[name]} {'OK' if ok else 'failed'} ({seconds * 1000:.0f} ms)")
         
         # Determine overall status
         if all([health_status['network_ping'], health_status['web_interface'], health_status['visa_connection']]):
             health_status['overall_status'] = 'HEALTHY'
             self.log("🟢 Device Status: HEALTHY")
-        elif health_status['network_ping']:
+        elif any([health_status['network_ping'], health_status['web_interface'], health_status['visa_connection']]):
+            # Also covers a network that drops ICMP while the meter itself answers
             health_status['overall_status'] = 'DEGRADED'
-            self.log("🟡 Device Status: DEGRADED (network OK, services failing)")
+            self.log("🟡 Device Status: DEGRADED (reachable, some services failing)")
         else:
             health_status['overall_status'] = 'OFFLINE'
             self.log("🔴 Device Status: OFFLINE")
         
         return health_status
     
+    def watch(self, interval=WATCH_INTERVAL, count=None, history=WATCH_HISTORY, visa=False, timeout=2):
+        """Continuous cheap monitoring with a rolling latency history
+        
+        Every `interval` seconds: ping plus TCP connects to the web and
+        VXI-11 ports (add visa=True for a *IDN? round trip, which opens a
+        session and can compete with a running scan). Each line shows the
+        latest latency per probe and the rolling median and failure rate over
+        the last `history` rounds. Stops after `count` rounds or on Ctrl+C.
+        Returns {probe: deque of seconds or None}.
+        """
+        probes = {'ping': lambda: self.ping_device(timeout)}
+        for name, port in WATCH_PORTS.items():
+            probes[name] = lambda port=port: self.check_tcp_port(port, timeout)
+        if visa:
+            probes['visa'] = lambda: self.check_visa_connection(timeout)
+        latencies = {name: deque(maxlen=history) for name in probes}
+        
+        self.log(f"Watching {self.ip} every {interval} s ({', '.join(probes)}), Ctrl+C to stop")
+        rounds = 0
+        try:
+            while count is None or rounds < count:
+                start = time.monotonic()
+                results = self.run_probes(probes, timeout + 1)
+                parts = []
+                for name, (ok, seconds) in results.items():
+                    latencies[name].append(seconds if ok else None)
+                    answered = sorted(s for s in latencies[name] if s is not None)
+                    failed = 100.0 * (len(latencies[name]) - len(answered)) / len(latencies[name])
+                    median = f"{answered[len(answered) // 2] * 1000:.0f}" if answered else "-"
+                    latest = f"{seconds * 1000:.0f} ms" if ok else "FAIL"
+                    parts.append(f"{name} {latest} (med {median} ms, fail {failed:.0f}%)")
+                self.log(" | ".join(parts))
+                rounds += 1
+                if count is None or rounds < count:
+                    time.sleep(max(0.0, interval - (time.monotonic() - start)))
+        except KeyboardInterrupt:
+            self.log("Watch stopped")
+        return latencies
+    
     def attempt_recovery(self):
         """Attempt progressive recovery steps"""
         self.log("=== Starting Recovery Process ===")
@@ -229,16 +341,24 @@ class KeysightManager:
 
 def main():
     parser = argparse.ArgumentParser(description='Keysight Power Meter Management Utility')
-    parser.add_argument('action', choices=['health', 'reset', 'recover'], 
-                       help='Action to perform: health check, reset, or full recovery')
+    parser.add_argument('action', choices=['health', 'reset', 'recover', 'watch'], 
+                       help='Action to perform: health check, reset, full recovery, or continuous watch')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--deadline', type=float, default=HEALTH_DEADLINE,
+                        help='Seconds allowed for a health check')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, help='Seconds between watch rounds')
+    parser.add_argument('--count', type=int, help='Watch rounds before exiting (default: until Ctrl+C)')
+    parser.add_argument('--visa', action='store_true', help='Include a VISA *IDN? round trip in watch')
     
     args = parser.parse_args()
     
     manager = KeysightManager()
+    if args.verbose and IO_STATS_AVAILABLE:
+        import atexit
+        atexit.register(lambda: print(io_stats.format_summary()))
     
     if args.action == 'health':
-        health = manager.check_device_health()
+        health = manager.check_device_health(args.deadline)
         sys.exit(0 if health['overall_status'] == 'HEALTHY' else 1)
     
     elif args.action == 'reset':
@@ -256,6 +376,9 @@ def main():
         else:
             manager.log("Recovery failed - manual intervention required")
             sys.exit(1)
+    
+    elif args.action == 'watch':
+        manager.watch(args.interval, args.count, visa=args.visa)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,900 @@
+#!/usr/bin/env python3
+"""
+Alignment Primitives and Optimizers for EDWA
+Instrument commands (pump and signal lasers, Keysight power meter, DS102
+stage) and the alignment algorithms built on them: random walks, hill
+climbs, grid scans and the smart climb that follows a scan. Nothing here
+needs Tk, so the same code runs in the GUI, headless, and against the
+simulated rig (rig_simulator).
+
+Waits go through sleep(), which a simulator can redirect to its virtual
+clock with set_sleep().
+"""
+
+import time
+import numpy as np
+
+import tracing
+from scan_trace import ScanTrace
+from scan_checkpoint import build_scan_positions, completed_indices
+
+AXES = ['X', 'Y', 'Z', 'U', 'V', 'W']
+SLEEP_TIME = 0.2
+INITIAL_STEP = 100
+MIN_STEP = 10
+RANDOM_STEPS = 20  # Number of random walk steps before hill climbing
+INDEX_MATCHING = 0  # Set to 0 since power meter readings are already matched
+
+_sleep = time.sleep
+
+def sleep(seconds):
+    """Wait between instrument operations (time.sleep unless redirected)"""
+    _sleep(seconds)
+
+def set_sleep(function):
+    """Redirect sleep() (e.g. to a simulated clock); returns the previous function"""
+    global _sleep
+    previous = _sleep
+    _sleep = function or time.sleep
+    return previous
+
+# Pump laser setup
+@tracing.traced("laser.setup_pump")
+def setup_pump(inst, current_amps):
+    inst.write("*RST")
+    inst.write("OUTP:STAT ON")
+    inst.write("SOUR:FUNC:MODE CURR")
+    inst.write("SOUR:CURR:LIM:AMPL 0.08")
+    inst.write(f"SOUR:CURR:LEV:IMM:AMPL {current_amps:.4f}")
+
+# Signal laser setup
+@tracing.traced("laser.setup_signal")
+def setup_signal(instr, power_dbm):
+    instr.write(":SOUR1:POW:STAT ON")
+    instr.write(f":SOUR1:POW {power_dbm:.2f}")
+
+@tracing.traced("laser.read_pump_current")
+def read_pump_current(inst):
+    """Read current pump laser current setting"""
+    try:
+        current = float(inst.query("SENS3:CURR:DC:DATA?"))
+        return current * 1000  # Convert to mA
+    except Exception as e:
+        print(f"[ERROR] Failed to read pump current: {e}")
+        return 0.0
+
+@tracing.traced("laser.read_signal_power")
+def read_signal_power(instr):
+    """Read current signal laser power setting"""
+    try:
+        power = float(instr.query(":SOUR1:POW?"))
+        return power
+    except Exception as e:
+        print(f"[ERROR] Failed to read signal power: {e}")
+        return 0.0
+
+# Stage control
+@tracing.traced("stage.move_stage")
+def move_stage(ser, axis, pulses):
+    cmd = f"{axis}{pulses:+d}\r\n".encode()
+    ser.write(cmd)
+    sleep(SLEEP_TIME)
+
+@tracing.traced("stage.get_axis_position")
+def get_axis_position(ser, axis):
+    """Read current position of an axis"""
+    try:
+        ser.reset_input_buffer()
+        ser.reset_output_buffer()
+        cmd = f'AXI{axis}:POS?\r'
+        ser.write(cmd.encode('ascii'))
+        sleep(0.1)
+        resp = ser.readline().decode('ascii').strip()
+        if resp:
+            return int(float(resp))
+        return 0
+    except Exception as e:
+        print(f"Error reading position for axis {axis}: {e}")
+        return 0
+
+@tracing.traced("stage.move_axis_to")
+def move_axis_to(ser, axis, pos):
+    """Move axis to absolute position"""
+    try:
+        cmd = f'AXI{axis}:GOABS {int(round(float(pos)))}\r'
+        ser.write(cmd.encode('ascii'))
+        # Wait for motion to complete
+        while True:
+            ser.write(f'AXI{axis}:MOTION?\r'.encode('ascii'))
+            tracing.count("stage.motion_polls")
+            resp = ser.readline().decode('ascii').strip()
+            if resp == '0':
+                break
+            sleep(0.05)
+    except Exception as e:
+        print(f"Error moving axis {axis}: {e}")
+
+def get_all_positions(ser):
+    """Get positions of all axes"""
+    positions = {}
+    for axis in AXES:
+        positions[axis] = get_axis_position(ser, axis)
+    return positions
+
+# Power meter - updated to use channel 1 with debugging
+@tracing.traced("meter.read_power")
+def read_power(inst, debug=False):
+    """Power in dBm, or None if the meter did not answer
+
+    A meter handle with a circuit breaker (meter_breaker.GuardedMeter) reads
+    through it, so a hung meter is recovered in the middle of a run.
+    """
+    breaker = getattr(inst, 'breaker', None)
+    if breaker is not None:
+        return breaker.read_power(debug)
+    return read_power_once(inst, debug)
+
+def read_power_once(inst, debug=False):
+    """One pass over the SCPI read commands, no recovery"""
+    try:
+        # Try multiple SCPI commands to find the correct one
+        commands_to_try = [
+            "READ1:pow?",  # Current command
+            "READ:ch1:pow?",  # Alternative format
+            "meas1:pow?",  # Measurement command
+            "fetch1:pow?",  # Fetch command
+            ":read1:pow?",  # With leading colon
+            "read:pow? (@1)",  # Channel syntax
+        ]
+        
+        raw_reading = None
+        successful_command = None
+        
+        for cmd in commands_to_try:
+            try:
+                if debug:
+                    print(f"[DEBUG] Trying command: {cmd}")
+                inst.write(cmd)
+                raw_reading = float(inst.read())
+                successful_command = cmd
+                break
+            except Exception as cmd_error:
+                tracing.count("meter.command_failures")
+                if debug:
+                    print(f"[DEBUG] Command {cmd} failed: {cmd_error}")
+                continue
+        
+        if raw_reading is None:
+            tracing.count("meter.read_failures")
+            print(f"[ERROR] All power reading commands failed")
+            return None
+            
+        # Apply INDEX_MATCHING offset (investigate if this is correct)
+        adjusted_reading = INDEX_MATCHING + raw_reading
+        
+        if debug:
+            print(f"[DEBUG] Successful command: {successful_command}")
+            print(f"[DEBUG] Raw reading: {raw_reading:.6f} dBm")
+            print(f"[DEBUG] INDEX_MATCHING offset: {INDEX_MATCHING}")
+            print(f"[DEBUG] Final reading: {adjusted_reading:.6f} dBm")
+            
+        return adjusted_reading
+        
+    except Exception as e:
+        print(f"[ERROR] Power read failed: {e}")
+        return None
+
+# Optimization
+@tracing.traced("optimizer.random_walk")
+def random_walk(inst, ser, position, iterations, step_size, stop_check=None):
+    history = []
+    
+    # Record the starting position and power as baseline
+    starting_position = position.copy()
+    starting_power = read_power(inst)
+    best_power = starting_power
+    best_position = starting_position.copy()
+    
+    print(f"[RANDOMWALK] Starting from power: {starting_power:.1f} dBm - this is the minimum baseline")
+    
+    for i in range(iterations):
+        # Check for stop request
+        if stop_check and stop_check():
+            print(f"[INFO] Random walk stopped at iteration {i+1}/{iterations}")
+            break
+            
+        tracing.count("optimizer.walk_steps")
+        axis = np.random.choice(AXES)
+        direction = np.random.choice([-1, 1])
+        move_stage(ser, axis, direction * step_size)
+        power = read_power(inst)
+        if power is not None:
+            position[axis] += direction * step_size
+            history.append((axis, position.copy(), power))
+            
+            # Track the best position found during random walk
+            if power > best_power:
+                best_power = power
+                best_position = position.copy()
+                print(f"[RANDOMWALK] New best: {power:.1f} dBm (improvement: {power - starting_power:+.1f})")
+        else:
+            move_stage(ser, axis, -direction * step_size)
+    
+    # Ensure we end at the best position found (never worse than starting)
+    if best_position != position:
+        print(f"[RANDOMWALK] Moving to best random walk position: {best_power:.1f} dBm")
+        for axis in AXES:
+            if abs(best_position[axis] - position[axis]) > 0.1:
+                move_axis_to(ser, axis, best_position[axis])
+        position.update(best_position)
+        sleep(0.2)
+    
+    return history
+
+@tracing.traced("optimizer.hill_climb")
+def hill_climb(inst, ser, position, step_size, stop_check=None):
+    improved = True
+    history = []
+    base_power = read_power(inst)
+    starting_power = base_power  # Store original power for final comparison
+    
+    # Track the globally best position found - starting position is the minimum baseline
+    global_best_power = base_power
+    global_best_position = position.copy()
+    
+    print(f"[HILLCLIMB] Starting from power: {base_power:.1f} dBm - this is the minimum baseline")
+    
+    while improved and step_size >= MIN_STEP:
+        # Check for stop request
+        if stop_check and stop_check():
+            print(f"[INFO] Hill climb stopped")
+            break
+            
+        improved = False
+        for axis in AXES:
+            # Check for stop request before each axis
+            if stop_check and stop_check():
+                print(f"[INFO] Hill climb stopped during axis {axis} optimization")
+                break
+                
+            for direction in [1, -1]:
+                move_stage(ser, axis, direction * step_size)
+                power = read_power(inst)
+                if power is not None and power > base_power:
+                    position[axis] += direction * step_size
+                    history.append((axis, position.copy(), power))
+                    improved = True
+                    base_power = power
+                    
+                    # Update global best if this is better
+                    if power > global_best_power:
+                        improvement = power - global_best_power
+                        global_best_power = power
+                        global_best_position = position.copy()
+                        print(f"[HILLCLIMB] NEW GLOBAL BEST: {power:.1f} dBm (improvement: +{improvement:.1f} dBm)")
+                else:
+                    move_stage(ser, axis, -direction * step_size)
+        if not improved:
+            step_size = step_size // 2
+    
+    # Move to the globally best position found
+    if global_best_position != position:
+        print(f"[INFO] Moving to globally best position with power {global_best_power:.1f} dBm")
+        for axis in AXES:
+            if abs(global_best_position[axis] - position[axis]) > 0.1:  # Only move if significant difference
+                move_axis_to(ser, axis, global_best_position[axis])
+        position.update(global_best_position)
+        sleep(0.2)  # Allow movement to complete
+    
+    # Show final improvement summary
+    total_improvement = global_best_power - starting_power
+    if total_improvement > 0.1:
+        print(f"[HILLCLIMB COMPLETE] Total improvement: +{total_improvement:.1f} dBm ({starting_power:.1f} → {global_best_power:.1f} dBm)")
+    elif total_improvement < -0.1:
+        print(f"[HILLCLIMB COMPLETE] Power decreased: {total_improvement:.1f} dBm - this should not happen!")
+    else:
+        print(f"[HILLCLIMB COMPLETE] No significant change in power: {global_best_power:.1f} dBm")
+    
+    return history
+
+@tracing.traced("optimizer.hill_climb_all_axes")
+def hill_climb_all_axes(inst, ser, position, step_size, stop_check=None):
+    """Hill climb optimization using ALL 6 axes (XYZUVW) with improved algorithm"""
+    improved = True
+    history = []
+    base_power = read_power(inst)
+    starting_power = base_power  # Store original power for final comparison
+    iteration_count = 0
+    max_iterations = 200  # Prevent infinite loops
+    
+    # Track the globally best position found - starting position is the minimum baseline
+    global_best_power = base_power
+    global_best_position = position.copy()
+    
+    print(f"[INFO] Starting hill climb on all 6 axes from power: {base_power:.1f} dBm - this is the minimum baseline")
+    
+    while improved and step_size >= MIN_STEP and iteration_count < max_iterations:
+        # Check for stop request
+        if stop_check and stop_check():
+            print(f"[INFO] Hill climb stopped at iteration {iteration_count}")
+            break
+            
+        improved = False
+        iteration_count += 1
+        tracing.count("optimizer.hill_iterations")
+        
+        # Try optimization on ALL 6 axes in each iteration
+        for axis in AXES:
+            # Check for stop request before each axis
+            if stop_check and stop_check():
+                print(f"[INFO] Hill climb stopped during axis {axis} optimization")
+                break
+                
+            best_direction = None
+            best_power = base_power
+            
+            # Try both directions for current axis
+            for direction in [1, -1]:
+                move_stage(ser, axis, direction * step_size)
+                sleep(0.05)  # Small delay for stage settling
+                power = read_power(inst)
+                
+                if power is not None and power > best_power:
+                    best_power = power
+                    best_direction = direction
+                
+                # Move back to test the other direction
+                move_stage(ser, axis, -direction * step_size)
+                sleep(0.05)
+            
+            # If we found improvement, make the move permanent
+            if best_direction is not None:
+                move_stage(ser, axis, best_direction * step_size)
+                position[axis] += best_direction * step_size
+                history.append((axis, position.copy(), best_power))
+                improved = True
+                base_power = best_power
+                
+                # Update global best if this is better
+                if best_power > global_best_power:
+                    global_best_power = best_power
+                    global_best_position = position.copy()
+                
+                print(f"[HILLCLIMB] Axis {axis}: {best_direction*step_size:+.0f} → {best_power:.1f} dBm")
+        
+        # If no improvement found, reduce step size
+        if not improved:
+            step_size = step_size // 2
+            print(f"[HILLCLIMB] Reducing step size to {step_size}")
+    
+    # Move to the globally best position found
+    if global_best_position != position:
+        print(f"[INFO] Moving to globally best position with power {global_best_power:.1f} dBm")
+        for axis in AXES:
+            if abs(global_best_position[axis] - position[axis]) > 0.1:  # Only move if significant difference
+                move_axis_to(ser, axis, global_best_position[axis])
+        position.update(global_best_position)
+        sleep(0.2)  # Allow movement to complete
+    
+    # Show final improvement summary
+    total_improvement = global_best_power - starting_power
+    if total_improvement > 0.1:
+        print(f"[HILLCLIMB ALL AXES COMPLETE] Total improvement: +{total_improvement:.1f} dBm ({starting_power:.1f} → {global_best_power:.1f} dBm) after {iteration_count} iterations")
+    elif total_improvement < -0.1:
+        print(f"[HILLCLIMB ALL AXES COMPLETE] Power decreased: {total_improvement:.1f} dBm - this should not happen!")
+    else:
+        print(f"[HILLCLIMB ALL AXES COMPLETE] No significant change in power: {global_best_power:.1f} dBm after {iteration_count} iterations")
+    
+    return history
+
+@tracing.traced("optimizer.random_walk_constrained")
+def random_walk_constrained(inst, ser, position, center_positions, iterations, step_size, stop_check=None):
+    """Random walk with ±100 constraint from center positions for all 6 axes"""
+    history = []
+    
+    # Record the starting position and power as baseline  
+    starting_position = position.copy()
+    starting_power = read_power(inst)
+    best_power = starting_power
+    best_position = starting_position.copy()
+    
+    print(f"[RANDOMWALK] Starting constrained walk from power: {starting_power:.1f} dBm - this is the minimum baseline")
+    
+    for i in range(iterations):
+        # Check for stop request
+        if stop_check and stop_check():
+            print(f"[INFO] Constrained random walk stopped at iteration {i+1}/{iterations}")
+            break
+            
+        tracing.count("optimizer.walk_steps")
+        axis = np.random.choice(AXES)
+        direction = np.random.choice([-1, 1])
+        move_amount = direction * step_size
+        
+        # Calculate new position
+        new_position = position[axis] + move_amount
+        
+        # Check if new position is within ±100 of center position
+        center_pos = center_positions[axis]
+        if abs(new_position - center_pos) <= 100:
+            # Move is allowed
+            move_stage(ser, axis, move_amount)
+            power = read_power(inst)
+            if power is not None:
+                position[axis] = new_position
+                history.append((axis, position.copy(), power))
+                
+                # Track the best position found during random walk
+                if power > best_power:
+                    best_power = power
+                    best_position = position.copy()
+                    print(f"[RANDOMWALK] Axis {axis}: {move_amount:+.0f} → {power:.1f} dBm (NEW BEST, improvement: {power - starting_power:+.1f})")
+                else:
+                    print(f"[RANDOMWALK] Axis {axis}: {move_amount:+.0f} → {power:.1f} dBm (within ±100 range)")
+            else:
+                # Move back if power reading failed
+                move_stage(ser, axis, -move_amount)
+        else:
+            # Move would exceed ±100 range, skip this iteration
+            print(f"[RANDOMWALK] Axis {axis}: {move_amount:+.0f} SKIPPED (would exceed ±100 range)")
+    
+    # Ensure we end at the best position found (never worse than starting)
+    if best_position != position:
+        print(f"[RANDOMWALK] Moving to best constrained walk position: {best_power:.1f} dBm")
+        for axis in AXES:
+            if abs(best_position[axis] - position[axis]) > 0.1:
+                move_axis_to(ser, axis, best_position[axis])
+        position.update(best_position)
+        sleep(0.2)
+    
+    return history
+
+@tracing.traced("optimizer.hill_climb_all_axes_constrained")
+def hill_climb_all_axes_constrained(inst, ser, position, step_size, stop_check=None):
+    """Hill climb optimization using ALL 6 axes with step sizes from 10 down to 1"""
+    improved = True
+    history = []
+    base_power = read_power(inst)
+    starting_power = base_power  # Store original power for final comparison
+    iteration_count = 0
+    max_iterations = 200  # Prevent infinite loops
+    min_step = 1  # Minimum step size is 1
+    
+    # Track the globally best position found - starting position is the minimum baseline
+    global_best_power = base_power
+    global_best_position = position.copy()
+    
+    print(f"[INFO] Starting constrained hill climb on all 6 axes from power: {base_power:.1f} dBm - this is the minimum baseline")
+    
+    while improved and step_size >= min_step and iteration_count < max_iterations:
+        # Check for stop request
+        if stop_check and stop_check():
+            print(f"[INFO] Constrained hill climb stopped at iteration {iteration_count}")
+            break
+            
+        improved = False
+        iteration_count += 1
+        tracing.count("optimizer.hill_iterations")
+        
+        # Try optimization on ALL 6 axes in each iteration
+        for axis in AXES:
+            # Check for stop request before each axis
+            if stop_check and stop_check():
+                print(f"[INFO] Constrained hill climb stopped during axis {axis} optimization")
+                break
+                
+            best_direction = None
+            best_power = base_power
+            
+            # Try both directions for current axis
+            for direction in [1, -1]:
+                move_stage(ser, axis, direction * step_size)
+                sleep(0.05)  # Small delay for stage settling
+                power = read_power(inst)
+                
+                if power is not None and power > best_power:
+                    best_power = power
+                    best_direction = direction
+                
+                # Move back to test the other direction
+                move_stage(ser, axis, -direction * step_size)
+                sleep(0.05)
+            
+            # If we found improvement, make the move permanent
+            if best_direction is not None:
+                move_stage(ser, axis, best_direction * step_size)
+                position[axis] += best_direction * step_size
+                history.append((axis, position.copy(), best_power))
+                improved = True
+                base_power = best_power
+                
+                # Update global best if this is better
+                if best_power > global_best_power:
+                    global_best_power = best_power
+                    global_best_position = position.copy()
+                
+                print(f"[HILLCLIMB] Axis {axis}: {best_direction*step_size:+.0f} → {best_power:.1f} dBm")
+        
+        # If no improvement found, reduce step size
+        if not improved:
+            step_size = step_size // 2
+            if step_size < min_step:
+                step_size = min_step
+            print(f"[HILLCLIMB] Reducing step size to {step_size}")
+            
+            # If we're at minimum step size and no improvement, we're done
+            if step_size == min_step and not improved:
+                print(f"[HILLCLIMB] Reached minimum step size ({min_step}) with no improvement")
+                break
+    
+    # Move to the globally best position found
+    if global_best_position != position:
+        print(f"[INFO] Moving to globally best position with power {global_best_power:.1f} dBm")
+        for axis in AXES:
+            if abs(global_best_position[axis] - position[axis]) > 0.1:  # Only move if significant difference
+                move_axis_to(ser, axis, global_best_position[axis])
+        position.update(global_best_position)
+        sleep(0.2)  # Allow movement to complete
+    
+    # Show final improvement summary
+    total_improvement = global_best_power - starting_power
+    if total_improvement > 0.1:
+        print(f"[CONSTRAINED HILLCLIMB COMPLETE] Total improvement: +{total_improvement:.1f} dBm ({starting_power:.1f} → {global_best_power:.1f} dBm) after {iteration_count} iterations")
+    elif total_improvement < -0.1:
+        print(f"[CONSTRAINED HILLCLIMB COMPLETE] Power decreased: {total_improvement:.1f} dBm - this should not happen!")
+    else:
+        print(f"[CONSTRAINED HILLCLIMB COMPLETE] No significant change in power: {global_best_power:.1f} dBm after {iteration_count} iterations")
+    
+    return history
+
+@tracing.traced("optimizer.systematic_scan")
+def systematic_scan(inst, ser, scan_params, origin_positions):
+    """Perform systematic scan based on selected axes and parameters"""
+    history = []
+    
+    # Create meshgrid for all enabled axes
+    axes = list(scan_params.keys())
+    grids = [scan_params[ax] for ax in axes]
+    positions = np.array(np.meshgrid(*grids, indexing='ij')).reshape(len(axes), -1).T
+    
+    total_positions = len(positions)
+    
+    for idx, pos in enumerate(positions):
+        # Move to scan position
+        current_pos = origin_positions.copy()
+        for ax, val in zip(axes, pos):
+            move_axis_to(ser, ax, val)
+            current_pos[ax] = val
+        
+        # Read power with debugging
+        power = read_power(inst, debug=True)
+        if power is not None:
+            history.append((axes[0], current_pos, power))
+        
+        # Update progress (this would be called from GUI)
+        print(f"Scan progress: {idx+1}/{total_positions}")
+    
+    # Return to origin
+    for ax in axes:
+        move_axis_to(ser, ax, origin_positions[ax])
+    
+    return history
+
+@tracing.traced("optimizer.brute_force_3d_scan")
+def brute_force_3d_scan(inst, ser, scan_params, origin_positions, progress_callback=None, stop_check=None,
+                        point_callback=None, journal=None, resume_from=None):
+    """Perform brute force 3D scanning for DS102
+
+    point_callback(index, position, power) is called for every measured point
+    so the GUI can update live views while the scan runs. If a JournalWriter
+    is given every point is also streamed to it. resume_from is a ScanTrace of
+    points already measured for the same plan: they are kept and their scan
+    indices are skipped. Points whose reading failed are measured again as
+    soon as the meter answers and once more after the grid; while a meter
+    breaker is open the scan waits for it. Indices still without a reading
+    are printed and left in the returned ScanTrace's missed list.
+    """
+    axes = list(scan_params.keys())
+    scan_axes, positions = build_scan_positions(scan_params)
+    if resume_from is not None:
+        scan_data = resume_from
+        skip = completed_indices(resume_from)
+    else:
+        scan_data = ScanTrace(capacity=len(positions) + 1)
+        skip = set()
+    if journal is not None:
+        # A journal that is being continued already holds the resumed points
+        scan_data.attach_journal(journal, write_existing=not journal.appending)
+    
+    if not axes:
+        return scan_data
+    
+    # Always include the starting position as the first data point
+    if resume_from is None:
+        starting_power = read_power(inst, debug=True)
+        if starting_power is not None:
+            # Special index -1 identifies the starting position
+            scan_data.append(-1, starting_power, origin_positions, phase='START')
+            print(f"[SCAN] Starting position recorded: {starting_power:.1f} dBm at {', '.join([f'{a}:{origin_positions[a]:.0f}' for a in ['X','Y','Z','U','V','W']])}")
+    elif skip:
+        print(f"[SCAN] Resuming: {len(skip)}/{len(positions)} points already measured")
+    
+    total_positions = len(positions)
+    current_pos = origin_positions.copy()
+    missed = []  # indices whose reading failed
+    breaker = getattr(inst, 'breaker', None)
+    
+    def measure(idx):
+        for i, ax in enumerate(scan_axes):
+            move_axis_to(ser, ax, positions[idx][i])
+            current_pos[ax] = positions[idx][i]
+        power = read_power(inst, debug=True)
+        if power is None and breaker is not None and breaker.is_open:
+            # Recovery failed: wait for the next one (or STOP) instead of
+            # running through the remaining grid with no readings
+            print("[SCAN] Meter breaker open - waiting for the meter before carrying on")
+            power = breaker.wait_and_read(stop_check, debug=True)
+        if power is not None:
+            scan_data.append(idx, power, current_pos, phase='SCAN')
+            if point_callback:
+                point_callback(idx, current_pos, power)
+        return power
+    
+    def remeasure_missed():
+        print(f"[SCAN] Re-measuring {len(missed)} missed point(s)")
+        still_missed = []
+        for miss in missed:
+            if stop_check and stop_check():
+                still_missed.append(miss)
+                continue
+            if measure(miss) is None:
+                still_missed.append(miss)
+        return still_missed
+    
+    for idx in range(total_positions):
+        if idx in skip:
+            continue
+        
+        # Check for stop request
+        if stop_check and stop_check():
+            print(f"[INFO] Scan stopped at position {idx+1}/{total_positions}")
+            break
+            
+        with tracing.span("optimizer.scan_point"):
+            power = measure(idx)
+        if power is None:
+            missed.append(idx)
+        elif missed:
+            # The meter answers again (e.g. after a breaker recovery): go back
+            # for the points it missed before carrying on
+            missed = remeasure_missed()
+        
+        # Progress callback
+        if progress_callback:
+            progress_callback(idx + 1, total_positions)
+    
+    # One more pass for points that failed at the end of the grid
+    if missed and not (stop_check and stop_check()):
+        missed = remeasure_missed()
+    if missed:
+        print(f"[WARNING] Scan left {len(missed)} point(s) without a reading: {missed} "
+              f"(Resume Last Scan measures them)")
+    scan_data.missed = sorted(missed)
+    
+    # Return to origin
+    for ax in axes:
+        move_axis_to(ser, ax, origin_positions[ax])
+    
+    return scan_data
+
+def verify_scan_points(inst, ser, trace, rows, scan_axes):
+    """Re-measure stored scan points (trace rows) before resuming a scan"""
+    measured = []
+    for row in rows:
+        position = trace.position(row)
+        for ax in scan_axes:
+            move_axis_to(ser, ax, position[ax])
+        power = read_power(inst)
+        measured.append(power)
+        stored = trace.column('power')[row]
+        print(f"[RESUME] Point {trace.column('index')[row]}: stored {stored:.2f} dBm, now "
+              f"{'n/a' if power is None else f'{power:.2f} dBm'}")
+    return measured
+
+@tracing.traced("optimizer.smart_hill_climb")
+def smart_hill_climb(inst, ser, position, best_power, best_position=None, baseline_power=None,
+                     max_tests=400, scan_ranges=None, fine_step=10, stop_check=None,
+                     point_callback=None, status_callback=None):
+    """Smart hill climbing after a scan, limited to max_tests measurements
+
+    Phase 1 scans each axis in 11 steps (±50, or scan_ranges[axis]), phase 2
+    runs 5×5 cross-scans on the three most promising axes and phase 3 is a
+    fine climb starting at fine_step and halving down to 1. position is the
+    current stage position, best_power/best_position the best known so far
+    (baseline_power, default best_power, is what improvements are reported
+    against). point_callback(i, power, label, position) is called for every
+    reading and status_callback(text) at each phase.
+
+    Returns (best_position, best_power, test_count).
+    """
+    position = position.copy()
+    global_best_power = best_power
+    global_best_position = (best_position or position).copy()
+    baseline_power = best_power if baseline_power is None else baseline_power
+    scan_ranges = scan_ranges or {axis: 50 for axis in AXES}
+    
+    def status(text):
+        if status_callback:
+            status_callback(text)
+    
+    def point(i, power, label, test_pos):
+        tracing.count("optimizer.smart_tests")
+        if point_callback:
+            point_callback(i, power, label, test_pos)
+    
+    i = 0
+    test_count = 0
+    
+    # Stop check callback
+    def check_stop():
+        return bool(stop_check and stop_check()) or test_count >= max_tests
+    
+    # Phase 1: 1D scans along each axis (6 × 11 = 66 tests)
+    status("Phase 1: Smart 1D axis scans around maximum...")
+    axis_improvements = {}  # Track which axes show improvement
+    scan_steps = 11
+    
+    for axis in AXES:
+        if check_stop():
+            break
+        scan_range = scan_ranges[axis]
+        
+        status(f"Scanning axis {axis} (±{scan_range:.0f})... Tests: {test_count}/{max_tests}")
+        
+        center = position[axis]
+        best_axis_power = global_best_power
+        best_axis_pos = center
+        
+        # 1D scan along this axis
+        for step in np.linspace(center - scan_range, center + scan_range, scan_steps):
+            if check_stop():
+                break
+                
+            # Move only this axis
+            move_axis_to(ser, axis, step)
+            test_pos = position.copy()
+            test_pos[axis] = step
+            
+            power = read_power(inst)
+            test_count += 1
+            
+            if power is not None:
+                point(i, power, axis, test_pos)
+                i += 1
+                
+                # Track best for this axis
+                if power > best_axis_power:
+                    best_axis_power = power
+                    best_axis_pos = step
+                    
+                # Update global best
+                if power > global_best_power:
+                    global_best_power = power
+                    global_best_position = test_pos.copy()
+                    print(f"[PHASE1] New best on {axis}: {power:.1f} dBm (improvement: +{power - baseline_power:.1f} dBm)")
+        
+        # Record improvement for this axis
+        improvement = best_axis_power - baseline_power
+        axis_improvements[axis] = {
+            'improvement': improvement,
+            'best_pos': best_axis_pos,
+            'best_power': best_axis_power
+        }
+        
+        # Move back to center for next axis scan
+        move_axis_to(ser, axis, center)
+        print(f"[PHASE1] {axis} scan complete: {improvement:+.1f} dBm improvement")
+    
+    # Phase 2: 2D cross-scans on most promising axes (≤120 tests)  
+    if not check_stop() and len(axis_improvements) >= 2:
+        status(f"Phase 2: 2D cross-scans on promising axes... Tests: {test_count}/{max_tests}")
+        
+        # Find top 3 axes with most improvement
+        sorted_axes = sorted(axis_improvements.items(), key=lambda x: x[1]['improvement'], reverse=True)[:3]
+        
+        for i_axis, (axis1, data1) in enumerate(sorted_axes):
+            for axis2, data2 in sorted_axes[i_axis+1:]:
+                if check_stop() or test_count + 25 > max_tests:  # Leave room for phase 3
+                    break
+                    
+                # 2D scan on these two axes (5×5 = 25 tests)
+                steps1 = np.linspace(data1['best_pos'] - 25, data1['best_pos'] + 25, 5)
+                steps2 = np.linspace(data2['best_pos'] - 25, data2['best_pos'] + 25, 5)
+                
+                for pos1 in steps1:
+                    for pos2 in steps2:
+                        if check_stop():
+                            break
+                            
+                        move_axis_to(ser, axis1, pos1)
+                        move_axis_to(ser, axis2, pos2)
+                        
+                        test_pos = position.copy()
+                        test_pos[axis1] = pos1
+                        test_pos[axis2] = pos2
+                        
+                        power = read_power(inst)
+                        test_count += 1
+                        
+                        if power is not None:
+                            point(i, power, f'{axis1}{axis2}', test_pos)
+                            i += 1
+                            
+                            if power > global_best_power:
+                                global_best_power = power
+                                global_best_position = test_pos.copy()
+                                print(f"[PHASE2] New best on {axis1}+{axis2}: {power:.1f} dBm (improvement: +{power - baseline_power:.1f} dBm)")
+                
+                print(f"[PHASE2] {axis1}+{axis2} cross-scan complete")
+                if check_stop():
+                    break
+    
+    # Phase 3: Fine hill climbing (≤200 tests)
+    if not check_stop():
+        status(f"Phase 3: Fine hill climbing... Tests: {test_count}/{max_tests}")
+        
+        # Move to globally best position found so far
+        if global_best_position != position:
+            for axis in AXES:
+                if abs(global_best_position[axis] - position[axis]) > 0.1:
+                    move_axis_to(ser, axis, global_best_position[axis])
+            position = global_best_position.copy()
+            sleep(0.3)
+        
+        # Limited hill climbing with test count limit
+        remaining_tests = max_tests - test_count
+        hill_climb_count = 0
+        step_size = fine_step
+        
+        while not check_stop() and hill_climb_count < remaining_tests and step_size >= 1:
+            improved = False
+            
+            for axis in AXES:
+                if check_stop() or hill_climb_count >= remaining_tests:
+                    break
+                    
+                # Try both directions
+                for direction in [1, -1]:
+                    if check_stop() or hill_climb_count >= remaining_tests:
+                        break
+                        
+                    move_axis_to(ser, axis, position[axis] + direction * step_size)
+                    test_pos = position.copy()
+                    test_pos[axis] = position[axis] + direction * step_size
+                    
+                    power = read_power(inst)
+                    test_count += 1
+                    hill_climb_count += 1
+                    
+                    if power is not None:
+                        point(i, power, axis, test_pos)
+                        i += 1
+                        
+                        if power > global_best_power:
+                            global_best_power = power
+                            global_best_position = test_pos.copy()
+                            position[axis] = test_pos[axis]
+                            improved = True
+                            print(f"[PHASE3] Fine climb {axis}: {power:.1f} dBm (improvement: +{power - baseline_power:.1f} dBm)")
+                        else:
+                            # Move back if no improvement
+                            move_axis_to(ser, axis, position[axis])
+            
+            if not improved:
+                step_size = step_size // 2
+                print(f"[PHASE3] Reducing step size to {step_size}")
+        
+        print(f"[PHASE3] Fine hill climbing complete after {hill_climb_count} tests")
+    
+    print(f"[SMART CLIMB] Total tests used: {test_count}/{max_tests}")
+    return global_best_position, global_best_power, test_count
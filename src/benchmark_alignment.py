@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+EDWA Alignment Benchmark
+Runs the brute force scan, random walk, hill climb and smart climb from
+alignment.py against the simulated rig (rig_simulator) with fixed seeds and
+reports, per path:
+
+    points/s                  readings per second of (rig + host) time
+    measurements to converge  readings until the stage first sits within
+                              0.1 dB of the optimum (and the rig time taken)
+    time split                rig time in move/settle/read/wait (what the
+                              real stage and meter would take) and host time
+                              in optimizer code, live plot and saving
+    final error               dB below the optimum where the path ends
+
+Rig times come from the simulator's clock, host times are measured, so the
+numbers are reproducible for a given seed and comparable between commits.
+Results are written as JSON; --baseline compares against an earlier file
+and flags regressions.
+
+Usage:
+    python benchmark_alignment.py --runs 5 --output bench.json
+    python benchmark_alignment.py --baseline bench.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import alignment
+from alignment import AXES
+from scan_trace import ScanTrace
+from live_plot import LivePowerPlot
+from rig_simulator import SimulatedRig, random_start
+
+CASES = ('scan', 'walk', 'hill', 'smart')
+TOLERANCE_DB = 0.1
+RIG_PHASES = ('move', 'settle', 'read', 'wait')
+HOST_PHASES = ('compute', 'plot', 'save')
+
+# Metrics compared against a baseline: (key, True if higher is better)
+REGRESSION_METRICS = [('points_per_s', True), ('measurements_to_converge', False), ('final_error_db', False)]
+
+class BenchmarkRig(SimulatedRig):
+    """SimulatedRig that records every reading, feeds a live plot and notes convergence"""
+
+    def __init__(self, plot=None, label='LOCAL', tolerance_db=TOLERANCE_DB, **kwargs):
+        super().__init__(**kwargs)
+        self.plot = plot
+        self.label = label
+        self.tolerance_db = tolerance_db
+        self.trace = ScanTrace()
+        self.plot_s = 0.0
+        self.converged_at = None  # (readings, rig seconds)
+
+    def read(self):
+        power = super().read()
+        n = self.stats['reads']
+        if self.converged_at is None and self.error_db() <= self.tolerance_db:
+            self.converged_at = (n, self.clock)
+        self.trace.append(n, power, self.position(), phase=self.label)
+        if self.plot is not None:
+            start = time.perf_counter()
+            self.plot.add_point(n, power, self.label)
+            self.plot_s += time.perf_counter() - start
+        return power
+
+def make_plot():
+    """Headless LivePowerPlot, as the GUI uses, on an Agg canvas"""
+    fig = Figure(figsize=(8, 4), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    return LivePowerPlot(fig, ax, canvas, {axis: f"C{i}" for i, axis in enumerate(AXES)})
+
+def scan_grid(position):
+    """Brute force grid around a start: X ±300 in 150, Y and Z ±100 in 20"""
+    return {
+        'X': np.linspace(position['X'] - 300, position['X'] + 300, 5),
+        'Y': np.linspace(position['Y'] - 100, position['Y'] + 100, 11),
+        'Z': np.linspace(position['Z'] - 100, position['Z'] + 100, 11),
+    }
+
+def run_case(case, seed, plot=None, noise_db=0.02):
+    """One benchmark run of a path; returns the result dict"""
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)  # the random walks draw from the global generator
+    label = 'SCAN' if case == 'scan' else 'LOCAL'
+    if plot is not None:
+        plot.reset()
+    rig = BenchmarkRig(plot=plot, label=label, seed=seed, noise_db=noise_db, start=random_start(rng))
+    position = rig.position()
+    start_error = rig.error_db()
+
+    start = time.perf_counter()
+    with rig.installed(), contextlib.redirect_stdout(io.StringIO()):
+        if case == 'scan':
+            result = alignment.brute_force_3d_scan(rig.meter, rig.stage, scan_grid(position), position)
+            best = result.best_point()
+            for ax in AXES:
+                alignment.move_axis_to(rig.stage, ax, best['position'][ax])
+        elif case == 'walk':
+            alignment.random_walk_constrained(rig.meter, rig.stage, position, position.copy(), 50, 10)
+        elif case == 'hill':
+            alignment.hill_climb_all_axes_constrained(rig.meter, rig.stage, position, 10)
+        elif case == 'smart':
+            power = alignment.read_power(rig.meter)
+            alignment.smart_hill_climb(rig.meter, rig.stage, position, power)
+        else:
+            raise ValueError(f"unknown benchmark case '{case}'")
+        if plot is not None:
+            flush_start = time.perf_counter()
+            plot.flush()
+            rig.plot_s += time.perf_counter() - flush_start
+    optimizer_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        rig.trace.to_csv(os.path.join(tmp, "result.csv"), layout='scan' if case == 'scan' else 'climb')
+        rig.trace.to_npz(os.path.join(tmp, "result.npz"))
+    save_s = time.perf_counter() - start
+
+    timing = {
+        'move': rig.stats['move_s'],
+        'settle': rig.stats['settle_s'],
+        'read': rig.stats['read_s'],
+        'wait': rig.stats['wait_s'],
+        'compute': optimizer_s - rig.plot_s,
+        'plot': rig.plot_s,
+        'save': save_s,
+    }
+    timing['total'] = sum(timing[phase] for phase in RIG_PHASES + HOST_PHASES)
+    converged = rig.converged_at
+    return {
+        'seed': seed,
+        'readings': rig.stats['reads'],
+        'moves': rig.stats['moves'],
+        'points_per_s': rig.stats['reads'] / timing['total'] if timing['total'] else None,
+        'measurements_to_converge': converged[0] if converged else None,
+        'time_to_converge_s': converged[1] if converged else None,
+        'start_error_db': start_error,
+        'final_error_db': rig.error_db(),
+        'time_s': timing,
+    }
+
+def summarize(runs):
+    """Medians (and the converged fraction) over the runs of one case"""
+    def median(values):
+        values = [v for v in values if v is not None]
+        return float(np.median(values)) if values else None
+
+    summary = {key: median([r[key] for r in runs])
+               for key in ('readings', 'points_per_s', 'measurements_to_converge',
+                           'time_to_converge_s', 'final_error_db')}
+    summary['final_error_db_p90'] = float(np.percentile([r['final_error_db'] for r in runs], 90))
+    summary['converged_fraction'] = float(np.mean([r['measurements_to_converge'] is not None for r in runs]))
+    summary['time_s'] = {phase: median([r['time_s'][phase] for r in runs])
+                         for phase in RIG_PHASES + HOST_PHASES + ('total',)}
+    return summary
+
+def environment():
+    """Where the numbers come from"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'commit': commit or None}
+
+def run_benchmark(cases=CASES, runs=5, seed=0, plot=True, noise_db=0.02):
+    """Run every case for seeds seed..seed+runs-1; returns the results dict"""
+    results = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'config': {'cases': list(cases), 'runs': runs, 'seed': seed, 'plot': plot,
+                   'noise_db': noise_db, 'tolerance_db': TOLERANCE_DB},
+        'environment': environment(),
+        'cases': {},
+    }
+    for case in cases:
+        live_plot = make_plot() if plot else None
+        case_runs = [run_case(case, seed + i, live_plot, noise_db) for i in range(runs)]
+        results['cases'][case] = {'summary': summarize(case_runs), 'runs': case_runs}
+    return results
+
+def compare(results, baseline, threshold=0.1):
+    """Regressions of more than threshold (relative) against a baseline results dict"""
+    regressions = []
+    for case, entry in results['cases'].items():
+        old = baseline.get('cases', {}).get(case)
+        if not old:
+            continue
+        for key, higher_is_better in REGRESSION_METRICS:
+            now, before = entry['summary'].get(key), old['summary'].get(key)
+            if now is None or before is None or before == 0:
+                continue
+            change = (now - before) / abs(before)
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append({'case': case, 'metric': key, 'baseline': before,
+                                    'current': now, 'change': change})
+    return regressions
+
+def print_report(results):
+    print(f"{'case':<6} {'pts/s':>8} {'to 0.1dB':>9} {'rig s':>8} {'final dB':>9}  "
+          + " ".join(f"{phase:>8}" for phase in RIG_PHASES + HOST_PHASES))
+    for case, entry in results['cases'].items():
+        s = entry['summary']
+        to_converge = "-" if s['measurements_to_converge'] is None else f"{s['measurements_to_converge']:.0f}"
+        converge_s = "-" if s['time_to_converge_s'] is None else f"{s['time_to_converge_s']:.1f}"
+        print(f"{case:<6} {s['points_per_s']:>8.2f} {to_converge:>9} {converge_s:>8} {s['final_error_db']:>9.3f}  "
+              + " ".join(f"{s['time_s'][phase]:>8.3f}" for phase in RIG_PHASES + HOST_PHASES))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the alignment paths on the simulated rig')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES), help='Paths to run')
+    parser.add_argument('--runs', type=int, default=5, help='Seeds per path')
+    parser.add_argument('--seed', type=int, default=0, help='First seed')
+    parser.add_argument('--noise', type=float, default=0.02, help='Meter noise (dB rms)')
+    parser.add_argument('--no-plot', action='store_true', help='Skip the live plot')
+    parser.add_argument('--output', help='Results JSON (default: benchmark_<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.cases, args.runs, args.seed, not args.no_plot, args.noise)
+    print_report(results)
+
+    output = args.output or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        for r in regressions:
+            print(f"[WARNING] {r['case']} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} "
+                  f"({r['change'] * 100:+.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print("[INFO] No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+DS102 Stage Controller Emulator
+Serves the DS102 command subset used by alignment.py and main-imaging.py on
+a pseudo-terminal, so any code that opens a serial port can run against it
+unchanged:
+
+    AXIn:POS?          current position (in motion: where the axis is now)
+    AXIn:GOABS <pos>   absolute move
+    AXIn:MOTION?       1 while the axis is moving or settling, else 0
+    <axis><+/-pulses>  relative move, e.g. "Y+10"
+
+Moves follow a trapezoidal velocity profile in real time, and every byte in
+either direction costs its wire time at the configured baud rate (10 bits
+per byte), so serial throughput and scan timing measured against the
+emulator are close to those of the real controller. Linux/macOS only (pty).
+
+Usage:
+    python ds102_emulator.py                 # serve until Ctrl+C
+    python ds102_emulator.py --benchmark     # measure query and move timing
+"""
+
+import os
+import tty
+import time
+import select
+import argparse
+import threading
+
+AXES = ['X', 'Y', 'Z', 'U', 'V', 'W']
+
+class _AxisMotion:
+    """Trapezoidal move of one axis, evaluated against time.monotonic()"""
+
+    def __init__(self, position):
+        self.start = self.target = float(position)
+        self.t0 = 0.0
+        self.accel_s = self.cruise_s = 0.0
+        self.speed = 1.0
+        self.settle_s = 0.0
+
+    def plan(self, target, now, speed, accel, settle):
+        self.start = self.position(now)
+        self.target = float(target)
+        self.t0 = now
+        distance = abs(self.target - self.start)
+        if distance == 0:
+            self.accel_s = self.cruise_s = self.settle_s = 0.0
+            return
+        if distance >= speed ** 2 / accel:
+            self.speed = speed
+            self.accel_s = speed / accel
+            self.cruise_s = (distance - speed ** 2 / accel) / speed
+        else:
+            # Triangular profile: never reaches full speed
+            self.accel_s = (distance / accel) ** 0.5
+            self.speed = accel * self.accel_s
+            self.cruise_s = 0.0
+        self.settle_s = settle
+
+    def duration(self):
+        return 2 * self.accel_s + self.cruise_s
+
+    def position(self, now):
+        t = now - self.t0
+        if t >= self.duration():
+            return self.target
+        accel = self.speed / self.accel_s if self.accel_s else 0.0
+        if t < self.accel_s:
+            travelled = 0.5 * accel * t ** 2
+        elif t < self.accel_s + self.cruise_s:
+            travelled = 0.5 * self.speed * self.accel_s + self.speed * (t - self.accel_s)
+        else:
+            remaining = self.duration() - t
+            travelled = abs(self.target - self.start) - 0.5 * accel * remaining ** 2
+        return self.start + travelled * (1 if self.target >= self.start else -1)
+
+    def moving(self, now):
+        return now - self.t0 < self.duration() + self.settle_s
+
+class DS102Emulator:
+    """DS102 controller on a pty; open emulator.port with pyserial
+
+    baudrate: wire speed (10 bits per byte). speed: top speed in pulses/s;
+    accel: pulses/s^2; settle: time after arrival while MOTION? still
+    reports 1. start: initial {axis: position}. Use as a context manager or
+    call start()/stop().
+    """
+
+    def __init__(self, baudrate=38400, speed=2000.0, accel=20000.0, settle=0.02, start=None):
+        self.baudrate = baudrate
+        self.speed = float(speed)
+        self.accel = float(accel)
+        self.settle = float(settle)
+        self.axes = {ax: _AxisMotion((start or {}).get(ax, 0)) for ax in AXES}
+        self.stats = {'commands': 0, 'moves': 0, 'unknown': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # Controller behaviour
+    def handle(self, line):
+        """Apply one command line; returns the reply text or None"""
+        now = time.monotonic()
+        self.stats['commands'] += 1
+        if line.startswith("AXI") and len(line) > 5 and line[3] in self.axes and line[4] == ":":
+            motion = self.axes[line[3]]
+            command = line[5:]
+            if command == "POS?":
+                return str(int(round(motion.position(now))))
+            if command == "MOTION?":
+                return "1" if motion.moving(now) else "0"
+            if command.startswith("GOABS"):
+                try:
+                    target = float(command.split()[1])
+                except (IndexError, ValueError):
+                    self.stats['unknown'] += 1
+                    return None
+                motion.plan(target, now, self.speed, self.accel, self.settle)
+                self.stats['moves'] += 1
+                return None
+        elif line[:1] in self.axes:
+            try:
+                pulses = int(line[1:])
+            except ValueError:
+                pulses = None
+            if pulses is not None:
+                motion = self.axes[line[0]]
+                motion.plan(motion.target + pulses, now, self.speed, self.accel, self.settle)
+                self.stats['moves'] += 1
+                return None
+        if line:
+            # The controller ignores what it does not understand
+            self.stats['unknown'] += 1
+        return None
+
+    def position(self, axis):
+        return int(round(self.axes[axis].position(time.monotonic())))
+
+    def positions(self):
+        return {ax: self.position(ax) for ax in AXES}
+
+    def moving(self, axis):
+        return self.axes[axis].moving(time.monotonic())
+
+    # Serial side
+    def _wire(self, nbytes):
+        """Block for the time nbytes take on the line"""
+        if self.baudrate:
+            time.sleep(nbytes * 10.0 / self.baudrate)
+
+    def _serve(self):
+        buffer = b""
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(self._master, 1024)
+            except OSError:
+                break
+            if not chunk:
+                break
+            self.stats['bytes_in'] += len(chunk)
+            self._wire(len(chunk))
+            buffer += chunk
+            while b"\r" in buffer:
+                line, buffer = buffer.split(b"\r", 1)
+                buffer = buffer.lstrip(b"\n")
+                reply = self.handle(line.decode('ascii', 'replace').strip())
+                if reply is not None:
+                    data = (reply + "\r\n").encode('ascii')
+                    self._wire(len(data))
+                    os.write(self._master, data)
+                    self.stats['bytes_out'] += len(data)
+
+    def start(self):
+        """Open the pty and serve it from a background thread; returns the port path"""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # no echo or CR/LF translation before a client sets the port up
+        self.port = os.ttyname(self._slave)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name="ds102-emulator", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def benchmark(emulator, queries=200, moves=20, step=100):
+    """Time position queries and a scan line of moves against an emulator"""
+    import serial
+    import alignment
+
+    results = {}
+    with serial.Serial(emulator.port, baudrate=emulator.baudrate, timeout=0.5) as ser:
+        start = time.perf_counter()
+        for _ in range(queries):
+            ser.write(b'AXIX:POS?\r')
+            ser.readline()
+        elapsed = time.perf_counter() - start
+        results['pos_query_ms'] = elapsed / queries * 1000
+        results['queries_per_s'] = queries / elapsed
+
+        start = time.perf_counter()
+        for i in range(moves):
+            alignment.move_axis_to(ser, 'Y', (i + 1) * step)
+        elapsed = time.perf_counter() - start
+        results['move_ms'] = elapsed / moves * 1000
+
+        start = time.perf_counter()
+        for _ in range(moves):
+            alignment.get_all_positions(ser)
+        results['get_all_positions_ms'] = (time.perf_counter() - start) / moves * 1000
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='DS102 stage controller emulator on a pty')
+    parser.add_argument('--baudrate', type=int, default=38400, help='Wire speed (0: unlimited)')
+    parser.add_argument('--speed', type=float, default=2000.0, help='Top speed (pulses/s)')
+    parser.add_argument('--accel', type=float, default=20000.0, help='Acceleration (pulses/s^2)')
+    parser.add_argument('--settle', type=float, default=0.02, help='Settle time after each move (s)')
+    parser.add_argument('--benchmark', action='store_true', help='Measure query and move timing, then exit')
+    args = parser.parse_args()
+
+    emulator = DS102Emulator(args.baudrate, args.speed, args.accel, args.settle)
+    with emulator:
+        print(f"[INFO] DS102 emulator on {emulator.port} ({args.baudrate} baud, {args.speed:.0f} pulses/s)")
+        if args.benchmark:
+            results = benchmark(emulator)
+            print(f"[INFO] POS? round trip: {results['pos_query_ms']:.2f} ms ({results['queries_per_s']:.0f}/s)")
+            print(f"[INFO] move_axis_to (100 pulses): {results['move_ms']:.1f} ms")
+            print(f"[INFO] get_all_positions: {results['get_all_positions_ms']:.1f} ms")
+            return
+        print("[INFO] Press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(f"[INFO] Served {emulator.stats['commands']} commands ({emulator.stats['moves']} moves)")
+
+if __name__ == "__main__":
+    main()
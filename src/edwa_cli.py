@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Headless EDWA Alignment Runner
+Runs scans, hill climbs and an alignment hold from a recipe file without
+Tk, cameras or the meter web page, so unattended and overnight runs skip
+the GUI entirely. Log artefacts match main.py: scan plan, journal and
+scan_data CSV, heatmaps, peak fit, climb/combined CSV and plot, meter
+snapshot card, trace and I/O statistics.
+
+Recipe (JSON, or YAML when PyYAML is installed); every key is optional:
+
+    {
+      "lasers": {"pump1_ma": 50, "pump2_ma": 50, "signal_dbm": 0.0},
+      "scan": {"relative": false, "axes": {"X": [-100, 100, 5], "Y": [-100, 100, 5]}},
+      "optimizer": "smart",
+      "budget": {"max_minutes": 120, "max_tests": 400, "walk_iterations": 20},
+      "hold": {"interval_s": 30, "duration_min": 480, "drop_db": 0.5, "range": 10,
+               "fine_step": 2, "max_tests": 60},
+      "lasers_off": true
+    }
+
+scan.axes maps an axis to [start, stop, steps]: absolute DS102 positions,
+or offsets from the current position with "relative": true. optimizer is
+"smart" (smart_hill_climb, seeded by the scan's peak fit), "walk" (random
+walk then hill climb on all 6 axes, as the CLIMB HILL button) or "none".
+max_minutes stops the run like the STOP button; Ctrl+C does the same.
+
+Usage:
+    python edwa_cli.py scan recipe.json      # scan only
+    python edwa_cli.py align recipe.json     # scan (if any) then climb
+    python edwa_cli.py hold recipe.json      # re-optimize whenever power drops
+    EDWA_BACKEND=emulated python edwa_cli.py align recipe.json
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+from datetime import datetime
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+import tracing
+import io_stats
+from alignment import (AXES, setup_pump, setup_signal, read_power, move_axis_to, get_all_positions,
+                       brute_force_3d_scan, smart_hill_climb, random_walk_constrained,
+                       hill_climb_all_axes_constrained)
+from scan_trace import ScanTrace
+from run_journal import JournalWriter, convert_journal
+from scan_checkpoint import write_scan_plan, end_scan_session, mark_scan_finished
+from peak_fit import fit_scan_peak, climb_seed, save_peak_fit
+from heatmaps import generate_heatmaps
+from live_plot import LivePowerPlot
+from meter_snapshot import read_meter_state, write_meter_snapshot
+from meter_breaker import GuardedMeter
+from instrument_emulators import resource_manager, open_stage
+
+# Hardware setup (as in main.py)
+PUMP1_ADDRESS = "USB0::0x1313::0x804F::M01093719::0::INSTR"
+PUMP2_ADDRESS = "USB0::0x1313::0x804F::M00859480::0::INSTR"
+SIGNAL_ADDRESS = "GPIB0::20::INSTR"
+POWER_METER_ADDRESS = "TCPIP0::100.65.16.193::inst0::INSTR"
+STAGE_PORT = "COM3"
+BAUDRATE = 38400
+io_stats.DEVICE_NAMES.update({PUMP1_ADDRESS: 'pump1', PUMP2_ADDRESS: 'pump2',
+                              SIGNAL_ADDRESS: 'signal', POWER_METER_ADDRESS: 'meter'})
+AXIS_COLORS = {'X': 'red', 'Y': 'green', 'Z': 'blue', 'U': 'cyan', 'V': 'magenta', 'W': 'black'}
+LOG_ROOT = os.path.join("..", "log")
+
+DEFAULT_RECIPE = {
+    'lasers': {'pump1_ma': 50.0, 'pump2_ma': 50.0, 'signal_dbm': 0.0},
+    'scan': None,
+    'optimizer': 'smart',
+    'budget': {'max_minutes': None, 'max_tests': 400, 'walk_iterations': 20},
+    'hold': {'interval_s': 30.0, 'duration_min': 60.0, 'drop_db': 0.5, 'range': 10,
+             'fine_step': 2, 'max_tests': 60},
+    'lasers_off': True,
+}
+OPTIMIZERS = ('smart', 'walk', 'none')
+
+def load_recipe(path):
+    """Read a JSON/YAML recipe and fill in the defaults; raises ValueError if invalid"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith(('.yaml', '.yml')):
+        if not YAML_AVAILABLE:
+            raise ValueError("YAML recipes need PyYAML (pip install pyyaml); use JSON instead")
+        loaded = yaml.safe_load(text) or {}
+    else:
+        loaded = json.loads(text)
+    return merge_recipe(loaded)
+
+def merge_recipe(loaded):
+    """DEFAULT_RECIPE updated with a loaded recipe dict, validated"""
+    recipe = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_RECIPE.items()}
+    for key, value in loaded.items():
+        if key not in recipe:
+            raise ValueError(f"Unknown recipe key '{key}'")
+        if isinstance(recipe[key], dict) and isinstance(value, dict):
+            recipe[key].update(value)
+        else:
+            recipe[key] = value
+    if recipe['optimizer'] not in OPTIMIZERS:
+        raise ValueError(f"optimizer must be one of {', '.join(OPTIMIZERS)}")
+    if recipe['scan'] is not None:
+        axes = recipe['scan'].get('axes') or {}
+        if not axes:
+            raise ValueError("scan needs at least one axis")
+        for axis, spec in axes.items():
+            if axis not in AXES:
+                raise ValueError(f"Unknown axis '{axis}'")
+            if len(spec) != 3 or int(spec[2]) < 2:
+                raise ValueError(f"scan axis {axis} needs [start, stop, steps] with steps >= 2")
+    return recipe
+
+def scan_parameters(recipe, origin):
+    """{axis: np.linspace grid} from the recipe's scan section"""
+    scan = recipe['scan']
+    params = {}
+    for axis in AXES:
+        if axis in scan['axes']:
+            start, stop, steps = scan['axes'][axis]
+            offset = origin[axis] if scan.get('relative') else 0.0
+            params[axis] = np.linspace(offset + float(start), offset + float(stop), int(steps))
+    return params
+
+def position_text(position):
+    return ', '.join(f"{a}:{position[a]:.0f}" for a in AXES)
+
+class HeadlessRun:
+    """Instruments, stop handling and artefacts for one command-line run"""
+
+    def __init__(self, recipe, log_root=LOG_ROOT):
+        self.recipe = recipe
+        self.log_root = log_root
+        self.stop_event = threading.Event()
+        max_minutes = recipe['budget'].get('max_minutes')
+        self.deadline = time.monotonic() + 60 * max_minutes if max_minutes else None
+        self.trace = ScanTrace()
+        self.journal = None
+        self.bench = None
+
+    def stop_requested(self):
+        if self.deadline is not None and time.monotonic() > self.deadline and not self.stop_event.is_set():
+            print("[INFO] Time budget used up - stopping")
+            self.stop_event.set()
+        return self.stop_event.is_set()
+
+    def open_instruments(self):
+        rm = resource_manager()
+        p1 = rm.open_resource(PUMP1_ADDRESS)
+        p2 = rm.open_resource(PUMP2_ADDRESS)
+        sgl = rm.open_resource(SIGNAL_ADDRESS)
+        pwr = GuardedMeter(lambda: rm.open_resource(POWER_METER_ADDRESS), stop_check=self.stop_requested)
+        ser = open_stage(STAGE_PORT, baudrate=BAUDRATE, timeout=1)
+        ser.reset_input_buffer()
+        self.bench = (p1, p2, sgl, pwr, ser)
+
+        lasers = self.recipe['lasers']
+        setup_pump(p1, lasers['pump1_ma'] / 1000)
+        setup_pump(p2, lasers['pump2_ma'] / 1000)
+        setup_signal(sgl, lasers['signal_dbm'])
+        return pwr, ser
+
+    def close_instruments(self):
+        if self.bench is None:
+            return
+        p1, p2, sgl, pwr, ser = self.bench
+        self.bench = None
+        try:
+            if self.recipe['lasers_off']:
+                p1.write("OUTP:STAT OFF")
+                p2.write("OUTP:STAT OFF")
+                sgl.write(":SOUR1:POW:STAT OFF")
+        finally:
+            p1.close(); p2.close(); sgl.close(); pwr.close(); ser.close()
+
+    def new_log_dir(self, prefix):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_dir = os.path.join(self.log_root, f"{prefix}_{timestamp}")
+        os.makedirs(log_dir, exist_ok=True)
+        return log_dir, timestamp
+
+    # Climb/hold points: self.trace, journaled as they are measured
+    def start_trace(self, journal_path):
+        self.trace = ScanTrace()
+        self.journal = JournalWriter(journal_path)
+        self.trace.attach_journal(self.journal)
+
+    def add_point(self, index, power, label, position):
+        self.trace.append(index, power, position, phase=label)
+
+    def finish_trace(self, csv_path):
+        journal, self.journal = self.journal, None
+        self.trace.detach_journal()
+        journal.close()
+        if journal.error is None:
+            convert_journal(journal.path, csv_path, 'climb')
+        else:
+            self.trace.to_csv(csv_path, layout='climb')
+
+    def write_run_files(self, pwr, log_dir, timestamp, plot_name=None, points=None):
+        """Plot, meter snapshot card, trace and I/O statistics"""
+        if plot_name is not None:
+            save_plot(points if points is not None else self.trace_points(),
+                      os.path.join(log_dir, f"{plot_name}_{timestamp}.png"))
+        write_meter_snapshot(read_meter_state(pwr, read_power(pwr)), log_dir, timestamp)
+        tracing.write_run(log_dir, timestamp)
+        io_stats.write_run(log_dir, timestamp)
+
+    def trace_points(self):
+        return [(point['index'], point['power'], point['phase']) for point in self.trace]
+
+    def move_to(self, ser, position):
+        for axis in AXES:
+            move_axis_to(ser, axis, position[axis])
+        return get_all_positions(ser)
+
+    # Commands
+    def scan(self, pwr, ser):
+        """Brute force scan; returns (scan_data, peak_fit, log_dir)"""
+        origin = get_all_positions(ser)
+        params = scan_parameters(self.recipe, origin)
+        axes = list(params)
+        log_dir, timestamp = self.new_log_dir("scan")
+        write_scan_plan(log_dir, timestamp, params, origin)
+        total = int(np.prod([len(v) for v in params.values()]))
+        print(f"[SCAN] {total} points on {', '.join(axes)} from {position_text(origin)}")
+
+        def progress(current, total):
+            if current % 50 == 0 or current == total:
+                print(f"[SCAN] {current}/{total} ({100 * current / total:.1f}%)")
+
+        journal = JournalWriter(os.path.join(log_dir, f"scan_data_{timestamp}.journal"))
+        try:
+            scan_data = brute_force_3d_scan(pwr, ser, params, origin, progress, self.stop_requested,
+                                            journal=journal)
+        finally:
+            journal.close()
+        scan_data.detach_journal()
+        end_scan_session(log_dir, timestamp, scan_data)
+        if not self.stop_requested():
+            mark_scan_finished(log_dir, timestamp, scan_data.missed)
+        csv_path = os.path.join(log_dir, f"scan_data_{timestamp}.csv")
+        if journal.error is None:
+            convert_journal(journal.path, csv_path, 'scan')
+        else:
+            scan_data.to_csv(csv_path, layout='scan')
+
+        generate_heatmaps(scan_data, axes, timestamp, log_dir)
+        points = [(point['index'] if point['is_starting_position'] else i, point['power'],
+                   'START' if point['is_starting_position'] else axes[0]) for i, point in enumerate(scan_data)]
+        self.write_run_files(pwr, log_dir, timestamp, "scan_plot", points)
+
+        peak_fit = fit_scan_peak(scan_data, axes) if scan_data else None
+        if peak_fit is not None:
+            save_peak_fit(peak_fit, os.path.join(log_dir, f"peak_fit_{timestamp}.json"))
+        if scan_data:
+            best = scan_data.best_point()
+            print(f"[SCAN COMPLETE] Best: {best['power']:.2f} dBm @ {position_text(best['position'])}")
+        print(f"[INFO] Scan results saved to {log_dir}")
+        return scan_data, peak_fit, log_dir
+
+    def climb_after_scan(self, pwr, ser, scan_data, peak_fit, log_dir):
+        """Climb from the scan optimum into combined_optimization_* in the scan directory"""
+        best = scan_data.best_point()
+        fitted = peak_fit is not None and peak_fit['valid']
+        start = peak_fit['position'] if fitted else best['position']
+        scan_ranges, fine_step = climb_seed(peak_fit if fitted else None)
+        position = self.move_to(ser, start)
+        power = read_power(pwr)
+        if fitted and (power is None or power < best['power'] - 0.5):
+            # As in main.py: a fitted optimum reading worse than the grid best is not trusted
+            print("[CLIMB] Fitted optimum reads below the best scan point - using the scan point")
+            position = self.move_to(ser, best['position'])
+            power = read_power(pwr)
+            scan_ranges, fine_step = climb_seed(None)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.start_trace(os.path.join(log_dir, f"combined_optimization_{timestamp}.journal"))
+        best_power, best_position = best['power'], best['position']
+        if power is not None:
+            self.add_point(-1, power, 'START', position)
+            if power > best_power:
+                best_power, best_position = power, position
+        best_position, best_power = self.climb(pwr, ser, position, best_power, best_position,
+                                               scan_ranges, fine_step)
+        self.finish_trace(os.path.join(log_dir, f"combined_optimization_{timestamp}.csv"))
+        self.write_run_files(pwr, log_dir, timestamp, "combined_optimization_plot")
+        return best_position, best_power
+
+    def climb_from_here(self, pwr, ser):
+        """Climb from the current position into a new hillclimb_* directory"""
+        log_dir, timestamp = self.new_log_dir("hillclimb")
+        self.start_trace(os.path.join(log_dir, f"climb_hill_{timestamp}.journal"))
+        position = get_all_positions(ser)
+        power = read_power(pwr)
+        if power is not None:
+            self.add_point(-1, power, 'START', position)
+        best_position, best_power = self.climb(pwr, ser, position, power if power is not None else -np.inf,
+                                               position, None, 10)
+        self.finish_trace(os.path.join(log_dir, f"climb_hill_{timestamp}.csv"))
+        self.write_run_files(pwr, log_dir, timestamp, "climb_hill_plot")
+        return best_position, best_power
+
+    def climb(self, pwr, ser, position, best_power, best_position, scan_ranges, fine_step):
+        """Run the recipe's optimizer, end at the best position; returns (position, power)"""
+        optimizer = self.recipe['optimizer']
+        budget = self.recipe['budget']
+        if optimizer == 'smart':
+            best_position, best_power, tests = smart_hill_climb(
+                pwr, ser, position, best_power, best_position=best_position, max_tests=budget['max_tests'],
+                scan_ranges=scan_ranges, fine_step=fine_step, stop_check=self.stop_requested,
+                point_callback=self.add_point, status_callback=lambda text: print(f"[CLIMB] {text}"))
+            print(f"[CLIMB] {tests} tests")
+        elif optimizer == 'walk':
+            i = len(self.trace)
+            centre = position.copy()
+            for axis, pos, power in random_walk_constrained(pwr, ser, position, centre, budget['walk_iterations'],
+                                                            10, self.stop_requested):
+                self.add_point(i, power, axis, pos)
+                i += 1
+            if not self.stop_requested():
+                for axis, pos, power in hill_climb_all_axes_constrained(pwr, ser, position, 10, self.stop_requested):
+                    self.add_point(i, power, axis, pos)
+                    i += 1
+            if len(self.trace):
+                row = self.trace.best_index()
+                if self.trace.column('power')[row] > best_power:
+                    best_power, best_position = float(self.trace.column('power')[row]), self.trace.position(row)
+        final = self.move_to(ser, best_position)
+        print(f"[CLIMB] Best: {best_power:.2f} dBm @ {position_text(final)}")
+        return final, best_power
+
+    def hold(self, pwr, ser):
+        """Watch the coupling and re-optimize locally whenever it drops"""
+        settings = self.recipe['hold']
+        log_dir, timestamp = self.new_log_dir("hold")
+        self.start_trace(os.path.join(log_dir, f"hold_{timestamp}.journal"))
+        end = time.monotonic() + 60 * settings['duration_min']
+        position = get_all_positions(ser)
+        reference = read_power(pwr)
+        print(f"[HOLD] Reference {reference} dBm @ {position_text(position)}, "
+              f"re-optimizing below -{settings['drop_db']} dB")
+        i = 0
+        climbs = 0
+        while time.monotonic() < end and not self.stop_requested():
+            power = read_power(pwr)
+            if power is not None:
+                self.add_point(i, power, 'HOLD', position)
+                i += 1
+                if reference is None:
+                    reference = power
+                elif power < reference - settings['drop_db']:
+                    climbs += 1
+                    print(f"[HOLD] {power:.2f} dBm is {reference - power:.2f} dB down - re-optimizing")
+                    ranges = {axis: settings['range'] for axis in AXES}
+                    best_position, best_power, _ = smart_hill_climb(
+                        pwr, ser, position, power, max_tests=settings['max_tests'], scan_ranges=ranges,
+                        fine_step=settings['fine_step'], stop_check=self.stop_requested,
+                        point_callback=lambda j, p, label, pos: self.add_point(i + j, p, label, pos))
+                    i = max(i, int(self.trace.column('index').max()) + 1)
+                    position = self.move_to(ser, best_position)
+                    # A source that has really faded resets the reference instead of climbing forever
+                    reference = best_power
+                    print(f"[HOLD] Back at {best_power:.2f} dBm @ {position_text(position)}")
+            self.stop_event.wait(max(0.0, min(settings['interval_s'], end - time.monotonic())))
+        self.finish_trace(os.path.join(log_dir, f"hold_{timestamp}.csv"))
+        self.write_run_files(pwr, log_dir, timestamp, "hold_plot")
+        print(f"[HOLD] {i} readings, {climbs} re-optimizations; results saved to {log_dir}")
+        return climbs
+
+def save_plot(points, path):
+    """Power-vs-iteration plot as in the GUI, rendered once on an Agg canvas"""
+    fig = Figure(figsize=(10, 6), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    plot = LivePowerPlot(fig, ax, canvas, AXIS_COLORS)
+    for iteration, power, label in points:
+        plot.add_point(iteration, power, label)
+    plot.flush()
+    fig.savefig(path)
+
+def run_command(command, recipe, log_root=LOG_ROOT):
+    """Run scan/align/hold with a recipe dict; returns the best (position, power) or hold climbs"""
+    if command == 'scan' and recipe['scan'] is None:
+        raise ValueError("The recipe has no scan section")
+    tracing.start_run()
+    run = HeadlessRun(recipe, log_root)
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        def on_interrupt(signum, frame):
+            if run.stop_event.is_set():
+                raise KeyboardInterrupt
+            print("\n[INFO] Stop requested - finishing the current point and saving (Ctrl+C again to abort)")
+            run.stop_event.set()
+        previous_handler = signal.signal(signal.SIGINT, on_interrupt)
+    try:
+        pwr, ser = run.open_instruments()
+        if command == 'hold':
+            return run.hold(pwr, ser)
+        if recipe['scan'] is not None:
+            scan_data, peak_fit, log_dir = run.scan(pwr, ser)
+            if command == 'scan' or recipe['optimizer'] == 'none' or not scan_data or run.stop_requested():
+                if scan_data:
+                    best = scan_data.best_point()
+                    return best['position'], best['power']
+                return None
+            return run.climb_after_scan(pwr, ser, scan_data, peak_fit, log_dir)
+        if recipe['optimizer'] == 'none':
+            raise ValueError("Nothing to do: no scan section and optimizer 'none'")
+        return run.climb_from_here(pwr, ser)
+    finally:
+        run.close_instruments()
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless EDWA alignment runner')
+    parser.add_argument('command', choices=['scan', 'align', 'hold'], help='What to run')
+    parser.add_argument('recipe', help='Recipe file (.json, or .yaml/.yml with PyYAML)')
+    parser.add_argument('--log-root', default=LOG_ROOT, help='Directory for the run folders')
+    args = parser.parse_args()
+
+    try:
+        recipe = load_recipe(args.recipe)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Recipe {args.recipe}: {e}")
+        sys.exit(2)
+    try:
+        result = run_command(args.command, recipe, args.log_root)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+    except KeyboardInterrupt:
+        print("[ERROR] Aborted")
+        sys.exit(130)
+    if args.command != 'hold' and result is None:
+        print("[ERROR] No power readings collected")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
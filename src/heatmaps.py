@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Heatmap rendering for EDWA scan results
+Scan points that already lie on the np.linspace scan grid go straight into
+an image array, so interpolation is only needed for irregular data.
+Rendering uses matplotlib Figure objects without pyplot so it is safe to run
+in post-run worker processes. scipy.interpolate and mplot3d are imported
+only when irregular or 3-D data needs them; both are slow to import and
+live_plot pulls this module into the GUI at startup.
+"""
+
+import os
+import numpy as np
+from matplotlib.figure import Figure
+from scan_trace import ScanTrace
+
+def regular_grid_image(xy, powers, spacing_rtol=1e-3, min_fill=0.5):
+    """Reshape 2-D scan points on a rectilinear grid into an image
+
+    Returns (x_values, y_values, image) with image[iy, ix] holding the power
+    at (x_values[ix], y_values[iy]) and NaN for cells that were never
+    measured (e.g. a stopped scan). Returns None if the points are not on an
+    evenly spaced rectilinear grid.
+    """
+    xy = np.asarray(xy, dtype=float)
+    powers = np.asarray(powers, dtype=float)
+    if len(xy) == 0:
+        return None
+
+    x_values, ix = np.unique(xy[:, 0], return_inverse=True)
+    y_values, iy = np.unique(xy[:, 1], return_inverse=True)
+
+    # A scan grid is evenly spaced along each axis
+    for values in (x_values, y_values):
+        if len(values) > 2:
+            steps = np.diff(values)
+            if not np.allclose(steps, steps[0], rtol=spacing_rtol, atol=0):
+                return None
+
+    # Too many empty cells means scattered points, not a grid
+    if len(np.unique(ix * len(y_values) + iy)) < min_fill * len(x_values) * len(y_values):
+        return None
+
+    image = np.full((len(y_values), len(x_values)), np.nan)
+    image[iy.ravel(), ix.ravel()] = powers
+    return x_values, y_values, image
+
+def cell_extent(x_values, y_values):
+    """imshow extent that centres each cell on its grid position"""
+    dx = np.diff(x_values).mean() if len(x_values) > 1 else 1.0
+    dy = np.diff(y_values).mean() if len(y_values) > 1 else 1.0
+    return [x_values[0] - dx / 2, x_values[-1] + dx / 2,
+            y_values[0] - dy / 2, y_values[-1] + dy / 2]
+
+def generate_heatmaps(scan_data, axes, timestamp, log_dir):
+    """Generate 1D/2D/3D heatmaps from scan data
+
+    scan_data is a ScanTrace (lists of point dicts are converted). Uses
+    Figure objects directly (Agg rendering, no pyplot state) so it can run in
+    a worker process or thread. Returns the list of saved files.
+    """
+    saved = []
+    if not scan_data or not axes:
+        return saved
+    if not isinstance(scan_data, ScanTrace):
+        scan_data = ScanTrace.from_points(scan_data)
+    
+    # Extract data and identify starting position
+    positions = scan_data.positions(axes)
+    powers = scan_data.column('power')
+    
+    # Find starting position if it exists
+    starting_idx = None
+    starting_position = None
+    start_rows = np.flatnonzero(scan_data.mask('START'))
+    if len(start_rows):
+        starting_idx = int(start_rows[0])
+        starting_position = positions[starting_idx]
+    
+    # Find peak power and position for title
+    max_idx = np.argmax(powers)
+    peak_power = powers[max_idx]
+    
+    # Get the full DS102 position (all 6 axes) from the scan data
+    full_peak_position = scan_data.position(max_idx)
+    
+    # Format all XYZUVW positions for title
+    all_axes = ['X', 'Y', 'Z', 'U', 'V', 'W']
+    position_str = ', '.join([f"{ax}:{full_peak_position[ax]:.0f}" for ax in all_axes])
+    
+    if len(axes) == 1:
+        # 1D plot
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        ax.plot(positions[:, 0], powers, 'b-o', markersize=4)
+        
+        # Mark starting position with large star if it exists
+        if starting_idx is not None and starting_position is not None:
+            ax.plot(starting_position[0], powers[starting_idx], 'r*', markersize=15, 
+                   label=f'Starting Position: {powers[starting_idx]:.1f} dBm')
+            ax.legend()
+        
+        ax.set_xlabel(f'{axes[0]} Position')
+        ax.set_ylabel('Power (dBm)')
+        ax.set_title(f'1D Scan - {axes[0]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
+        ax.grid(True)
+        fig.tight_layout()
+        path = os.path.join(log_dir, f'heatmap_1D_{timestamp}.png')
+        fig.savefig(path, dpi=300, bbox_inches='tight')
+        saved.append(path)
+        
+    elif len(axes) == 2:
+        # 2D heatmap
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
+        
+        # Scan points normally sit on the linspace grid already: place them
+        # straight into the image (NaN where a stopped scan left gaps)
+        grid_mask = np.ones(len(powers), dtype=bool)
+        if starting_idx is not None:
+            grid_mask[starting_idx] = False
+        grid = regular_grid_image(positions[grid_mask, :2], powers[grid_mask])
+        
+        if grid is not None:
+            x_unique, y_unique, Z = grid
+            im = ax.imshow(Z, extent=cell_extent(x_unique, y_unique),
+                          origin='lower', cmap='viridis', aspect='auto', interpolation='nearest')
+        else:
+            # Irregular data: interpolate onto a regular grid
+            from scipy.interpolate import griddata
+            x_unique = np.unique(positions[:, 0])
+            y_unique = np.unique(positions[:, 1])
+            X, Y = np.meshgrid(x_unique, y_unique)
+            Z = griddata(positions[:, :2], powers, (X, Y), method='cubic', fill_value=np.nan)
+            im = ax.imshow(Z, extent=[x_unique.min(), x_unique.max(), y_unique.min(), y_unique.max()],
+                          origin='lower', cmap='viridis', aspect='auto')
+        
+        # Add colorbar
+        cbar = fig.colorbar(im, ax=ax)
+        cbar.set_label('Power (dBm)')
+        
+        # Labels and title
+        ax.set_xlabel(f'{axes[0]} Position')
+        ax.set_ylabel(f'{axes[1]} Position')
+        ax.set_title(f'2D Heatmap - {axes[0]} vs {axes[1]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
+        
+        # Show measured points on top of interpolated data only
+        if grid is None:
+            ax.scatter(positions[:, 0], positions[:, 1], c=powers, s=20, cmap='viridis', alpha=0.7, edgecolors='white', linewidth=0.5)
+        
+        # Mark starting position with large red star if it exists
+        if starting_idx is not None and starting_position is not None:
+            ax.plot(starting_position[0], starting_position[1], 'r*', markersize=20, 
+                   label=f'Starting Position: {powers[starting_idx]:.1f} dBm', 
+                   markeredgecolor='white', markeredgewidth=1)
+            ax.legend(loc='upper left', bbox_to_anchor=(0.02, 0.98))
+        
+        fig.tight_layout()
+        path = os.path.join(log_dir, f'heatmap_2D_{timestamp}.png')
+        fig.savefig(path, dpi=300, bbox_inches='tight')
+        saved.append(path)
+        
+    elif len(axes) >= 3:
+        # 3D volumetric visualization
+        from mpl_toolkits.mplot3d import Axes3D  # registers the '3d' projection
+        fig = Figure(figsize=(12, 10))
+        ax = fig.add_subplot(111, projection='3d')
+        
+        # 3D scatter plot with color mapping
+        scatter = ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2], 
+                           c=powers, cmap='viridis', s=50, alpha=0.8)
+        
+        # Mark starting position with large red star if it exists
+        if starting_idx is not None and starting_position is not None and len(starting_position) >= 3:
+            ax.scatter(starting_position[0], starting_position[1], starting_position[2], 
+                      c='red', marker='*', s=300, alpha=1.0, edgecolors='white', linewidth=2,
+                      label=f'Starting Position: {powers[starting_idx]:.1f} dBm')
+            ax.legend(loc='upper left')
+        
+        # Colorbar
+        cbar = fig.colorbar(scatter, ax=ax, shrink=0.8)
+        cbar.set_label('Power (dBm)')
+        
+        # Labels and title
+        ax.set_xlabel(f'{axes[0]} Position')
+        ax.set_ylabel(f'{axes[1]} Position')
+        ax.set_zlabel(f'{axes[2]} Position')
+        ax.set_title(f'3D Volumetric Scan - {axes[0]} vs {axes[1]} vs {axes[2]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
+        
+        fig.tight_layout()
+        path = os.path.join(log_dir, f'heatmap_3D_{timestamp}.png')
+        fig.savefig(path, dpi=300, bbox_inches='tight')
+        saved.append(path)
+        
+        # Also create 2D projections
+        for i in range(3):
+            for j in range(i+1, 3):
+                fig = Figure(figsize=(8, 6))
+                ax = fig.subplots()
+                scatter = ax.scatter(positions[:, i], positions[:, j], c=powers, cmap='viridis', s=30, alpha=0.8)
+                
+                # Mark starting position with large red star if it exists
+                if starting_idx is not None and starting_position is not None and len(starting_position) >= max(i+1, j+1):
+                    ax.plot(starting_position[i], starting_position[j], 'r*', markersize=15, 
+                           label=f'Starting Position: {powers[starting_idx]:.1f} dBm', 
+                           markeredgecolor='white', markeredgewidth=1)
+                    ax.legend(loc='upper left', bbox_to_anchor=(0.02, 0.98))
+                
+                cbar = fig.colorbar(scatter, ax=ax)
+                cbar.set_label('Power (dBm)')
+                ax.set_xlabel(f'{axes[i]} Position')
+                ax.set_ylabel(f'{axes[j]} Position')
+                ax.set_title(f'2D Projection: {axes[i]} vs {axes[j]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
+                ax.grid(True, alpha=0.3)
+                fig.tight_layout()
+                path = os.path.join(log_dir, f'projection_{axes[i]}_{axes[j]}_{timestamp}.png')
+                fig.savefig(path, dpi=300, bbox_inches='tight')
+                saved.append(path)
+    
+    print(f"Heatmaps saved to {log_dir}")
+    return saved
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Instrument Emulators and Backend Switch for EDWA
+VISA-level stand-ins for the Keysight power meter, the Thorlabs CLD1015
+pump drivers and the HP8164A signal laser. Each speaks the SCPI subset
+that alignment.py, meter_snapshot.py and keysight_manager.py send, keeps
+its settings across open/close like the real instrument, and takes a
+configurable time to answer. A query the instrument does not answer, or an
+answer slower than the session timeout, fails with the same VisaIOError
+(VI_ERROR_TMO) pyvisa raises, after the timeout has elapsed. A late answer
+stays in the output buffer, as it does on the real bus.
+
+The backend is chosen with the EDWA_BACKEND environment variable:
+
+    EDWA_BACKEND=hardware   (default) pyvisa and the DS102 COM port
+    EDWA_BACKEND=emulated   these emulators and the DS102 emulator on a pty,
+                            with the meter reading a coupling model of the
+                            emulated stage position
+
+main.py opens instruments through resource_manager() and open_stage(), so
+the whole GUI runs unchanged against the emulated bench. Either way the
+handles are wrapped by io_stats for per-command statistics.
+"""
+
+import os
+import time
+import threading
+import numpy as np
+import serial
+
+import io_stats
+from alignment import AXES
+
+try:
+    import pyvisa
+    from pyvisa.errors import VisaIOError
+    from pyvisa.constants import StatusCode
+    PYVISA_AVAILABLE = True
+except ImportError:
+    PYVISA_AVAILABLE = False
+
+BACKEND_ENV = "EDWA_BACKEND"
+BACKENDS = ('hardware', 'emulated')
+
+def _timeout_error(resource):
+    if PYVISA_AVAILABLE:
+        return VisaIOError(StatusCode.error_timeout)
+    return TimeoutError(f"{resource}: timeout expired before operation completed")
+
+def _not_found_error(resource):
+    if PYVISA_AVAILABLE:
+        return VisaIOError(StatusCode.error_resource_not_found)
+    return OSError(f"{resource}: resource not present")
+
+class EmulatedInstrument:
+    """Message-based VISA session: write/read/query/clear/close
+
+    latency: seconds before an answer is ready, either one number or a dict
+    of {command header: seconds} with a 'default' entry (headers are
+    matched case-insensitively by prefix, e.g. 'READ' covers READ1:POW?).
+    hung: when True nothing is answered (a locked-up instrument).
+    Subclasses implement respond(header, argument) and return the reply
+    text for queries, None for settings, or raise KeyError for commands the
+    instrument does not know.
+    """
+
+    IDN = "EMULATED,INSTRUMENT,0,1.0"
+
+    def __init__(self, resource_name, latency=0.0, timeout=2000):
+        self.resource_name = resource_name
+        self.latency = latency if isinstance(latency, dict) else {'default': latency}
+        self.timeout = timeout  # ms, as pyvisa
+        self.write_termination = '\n'
+        self.read_termination = '\n'
+        self.hung = False
+        self.errors = []
+        self.stats = {'writes': 0, 'reads': 0, 'timeouts': 0, 'unknown': 0}
+        self._output = []  # (ready_at, text)
+        self._lock = threading.Lock()
+
+    def _latency_for(self, header):
+        best, best_len = self.latency.get('default', 0.0), 0
+        for prefix, seconds in self.latency.items():
+            if prefix != 'default' and header.startswith(prefix.upper()) and len(prefix) > best_len:
+                best, best_len = seconds, len(prefix)
+        return best
+
+    def write(self, command):
+        with self._lock:
+            self.stats['writes'] += 1
+            if self.hung:
+                return len(command)
+            text = command.strip()
+            header, _, argument = text.partition(' ')
+            header = header.upper()
+            try:
+                reply = self.respond(header, argument.strip())
+            except KeyError:
+                # Unknown command: error queue entry and no answer
+                self.stats['unknown'] += 1
+                self.errors.append(f'-113,"Undefined header;{text}"')
+                return len(command)
+            if reply is not None:
+                self._output.append((time.monotonic() + self._latency_for(header), str(reply)))
+            return len(command)
+
+    def read(self):
+        with self._lock:
+            self.stats['reads'] += 1
+            deadline = time.monotonic() + self.timeout / 1000.0
+            if self._output and self._output[0][0] <= deadline:
+                ready_at, text = self._output.pop(0)
+            else:
+                ready_at = text = None
+        if text is None:
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            self.stats['timeouts'] += 1
+            raise _timeout_error(self.resource_name)
+        time.sleep(max(0.0, ready_at - time.monotonic()))
+        return text + self.read_termination
+
+    def query(self, command):
+        self.write(command)
+        return self.read()
+
+    def clear(self):
+        """Device clear: drop pending answers"""
+        with self._lock:
+            self._output.clear()
+
+    def close(self):
+        pass
+
+    def respond(self, header, argument):
+        if header == '*IDN?':
+            return self.IDN
+        if header in ('*RST', '*CLS'):
+            if header == '*CLS':
+                self.errors.clear()
+            else:
+                self.reset()
+            return None
+        if header == 'SYST:ERR?':
+            return self.errors.pop(0) if self.errors else '+0,"No error"'
+        raise KeyError(header)
+
+    def reset(self):
+        pass
+
+def _on_off(argument):
+    return argument.strip().upper() in ('ON', '1')
+
+class KeysightMeterEmulator(EmulatedInstrument):
+    """Keysight N774x power meter, channel 1
+
+    power_source: callable returning the optical power in dBm (default a
+    constant -20 dBm). read_commands: the read forms the meter answers;
+    others time out, which exercises read_power's fallback list. Reads take
+    the averaging time unless latency says otherwise.
+    """
+
+    IDN = "Keysight Technologies,N7744C,EMULATED,1.0"
+    READ_COMMANDS = ("READ1:POW?", "READ:CH1:POW?", "MEAS1:POW?", "FETCH1:POW?", ":READ1:POW?", "READ:POW?")
+
+    def __init__(self, resource_name, power_source=None, noise_db=0.0, seed=0,
+                 read_commands=None, latency=None, timeout=2000):
+        self.averaging_time = 0.02
+        if latency is None:
+            latency = {'default': 0.001, 'READ': self.averaging_time, ':READ': self.averaging_time,
+                       'MEAS': self.averaging_time, 'FETCH': 0.001}
+        super().__init__(resource_name, latency, timeout)
+        self.power_source = power_source or (lambda: -20.0)
+        self.noise_db = noise_db
+        self.rng = np.random.default_rng(seed)
+        self.read_commands = tuple(c.upper() for c in (read_commands or self.READ_COMMANDS))
+        self.reset()
+
+    def reset(self):
+        self.wavelength = 1.55e-6
+        self.unit = 0
+        self.auto_range = 1
+        self.range_dbm = 0.0
+        self.offset_db = 0.0
+
+    def respond(self, header, argument):
+        if header in self.read_commands:
+            reading = self.power_source() + self.noise_db * self.rng.standard_normal() - self.offset_db
+            return f"{reading:+.6E}"
+        queries = {
+            'SENS1:POW:WAV?': lambda: f"{self.wavelength:+.6E}",
+            'SENS1:POW:UNIT?': lambda: str(self.unit),
+            'SENS1:POW:ATIM?': lambda: f"{self.averaging_time:+.6E}",
+            'SENS1:POW:RANG:AUTO?': lambda: str(self.auto_range),
+            'SENS1:POW:RANG?': lambda: f"{self.range_dbm:+.6E}",
+            'SENS1:CORR?': lambda: f"{self.offset_db:+.6E}",
+        }
+        if header in queries:
+            return queries[header]()
+        return super().respond(header, argument)
+
+class CLD1015Emulator(EmulatedInstrument):
+    """Thorlabs CLD1015 laser diode driver in constant current mode"""
+
+    IDN = "Thorlabs,CLD1015,EMULATED,1.0"
+
+    def __init__(self, resource_name, latency=0.002, timeout=2000):
+        super().__init__(resource_name, latency, timeout)
+        self.reset()
+
+    def reset(self):
+        self.output = False
+        self.mode = 'CURR'
+        self.limit_a = 0.08
+        self.setpoint_a = 0.0
+
+    def current(self):
+        """Actual laser diode current in A (0 with the output off)"""
+        return min(self.setpoint_a, self.limit_a) if self.output else 0.0
+
+    def respond(self, header, argument):
+        if header == 'OUTP:STAT':
+            self.output = _on_off(argument)
+        elif header == 'OUTP:STAT?':
+            return "1" if self.output else "0"
+        elif header == 'SOUR:FUNC:MODE':
+            self.mode = argument.upper()
+        elif header == 'SOUR:CURR:LIM:AMPL':
+            self.limit_a = float(argument)
+        elif header == 'SOUR:CURR:LEV:IMM:AMPL':
+            self.setpoint_a = float(argument)
+        elif header == 'SOUR:CURR:LEV:IMM:AMPL?':
+            return f"{self.setpoint_a:.6E}"
+        elif header == 'SENS3:CURR:DC:DATA?':
+            return f"{self.current():.6E}"
+        else:
+            return super().respond(header, argument)
+        return None
+
+class HP8164AEmulator(EmulatedInstrument):
+    """HP/Agilent 8164A lightwave mainframe, laser source in slot 1"""
+
+    IDN = "HEWLETT-PACKARD,HP8164A,EMULATED,1.0"
+
+    def __init__(self, resource_name, latency=0.005, timeout=2000):
+        super().__init__(resource_name, latency, timeout)
+        self.reset()
+
+    def reset(self):
+        self.output = False
+        self.power_dbm = 0.0
+
+    def respond(self, header, argument):
+        if header == ':SOUR1:POW:STAT':
+            self.output = _on_off(argument)
+        elif header == ':SOUR1:POW:STAT?':
+            return "1" if self.output else "0"
+        elif header == ':SOUR1:POW':
+            self.power_dbm = float(argument)
+        elif header == ':SOUR1:POW?':
+            return f"{self.power_dbm:+.6E}"
+        else:
+            return super().respond(header, argument)
+        return None
+
+# Resource classes by address prefix
+EMULATED_RESOURCES = [
+    ('USB0::0x1313::0x804F', CLD1015Emulator),
+    ('GPIB', HP8164AEmulator),
+    ('TCPIP', KeysightMeterEmulator),
+]
+
+class EmulatedBench:
+    """Emulated instruments and DS102 stage sharing one coupling model
+
+    The meter reads the coupling model at the emulated stage position,
+    shifted by the signal laser setting (no light with its output off).
+    Instruments are created on first open and keep their state after.
+    """
+
+    def __init__(self, seed=0, model=None, noise_db=0.01, start=None, stage_options=None):
+        # Imported here so the hardware backend does not load the simulator
+        from rig_simulator import CouplingModel, random_start
+        from ds102_emulator import DS102Emulator
+
+        self.model = model or CouplingModel()
+        self.noise_db = noise_db
+        self.seed = seed
+        if start is None:
+            start = random_start(np.random.default_rng(seed))
+        self.stage = DS102Emulator(start=start, **(stage_options or {}))
+        self.instruments = {}
+        self._lock = threading.Lock()
+
+    def stage_port(self):
+        with self._lock:
+            if self.stage.port is None:
+                self.stage.start()
+            return self.stage.port
+
+    def signal(self):
+        for inst in self.instruments.values():
+            if isinstance(inst, HP8164AEmulator):
+                return inst
+        return None
+
+    def optical_power(self):
+        signal = self.signal()
+        if signal is not None and not signal.output:
+            return self.model.floor_dbm
+        shift = signal.power_dbm if signal is not None else 0.0
+        positions = self.stage.positions()
+        return float(self.model.power_dbm(np.array([positions[ax] for ax in AXES], dtype=float))) + shift
+
+    def open_resource(self, resource_name):
+        with self._lock:
+            if resource_name not in self.instruments:
+                for prefix, cls in EMULATED_RESOURCES:
+                    if resource_name.upper().startswith(prefix.upper()):
+                        break
+                else:
+                    raise _not_found_error(resource_name)
+                if cls is KeysightMeterEmulator:
+                    inst = cls(resource_name, power_source=self.optical_power,
+                               noise_db=self.noise_db, seed=self.seed)
+                else:
+                    inst = cls(resource_name)
+                self.instruments[resource_name] = inst
+            return self.instruments[resource_name]
+
+    def close(self):
+        self.stage.stop()
+
+class EmulatedResourceManager:
+    """pyvisa.ResourceManager stand-in over an EmulatedBench"""
+
+    def __init__(self, bench):
+        self.bench = bench
+
+    def open_resource(self, resource_name, **kwargs):
+        inst = self.bench.open_resource(resource_name)
+        for key, value in kwargs.items():
+            setattr(inst, key, value)
+        return inst
+
+    def list_resources(self):
+        return tuple(self.bench.instruments)
+
+    def close(self):
+        pass
+
+_bench = None
+_bench_lock = threading.Lock()
+
+def backend():
+    """Selected backend: 'hardware' or 'emulated' (EDWA_BACKEND)"""
+    name = os.environ.get(BACKEND_ENV, 'hardware').strip().lower()
+    if name not in BACKENDS:
+        print(f"[WARNING] Unknown {BACKEND_ENV} '{name}', using hardware")
+        return 'hardware'
+    return name
+
+def get_bench():
+    """The process-wide emulated bench (created on first use)"""
+    global _bench
+    with _bench_lock:
+        if _bench is None:
+            _bench = EmulatedBench()
+            print(f"[INFO] Emulated instrument backend (DS102 on {_bench.stage_port()})")
+        return _bench
+
+def resource_manager():
+    """pyvisa.ResourceManager() or the emulated one, per the backend
+
+    Resources it opens are timed per command by io_stats.
+    """
+    if backend() == 'emulated':
+        return io_stats.InstrumentedResourceManager(EmulatedResourceManager(get_bench()))
+    if not PYVISA_AVAILABLE:
+        raise RuntimeError(f"pyvisa is not installed: install it for the hardware backend, "
+                           f"or set {BACKEND_ENV}=emulated to run against the instrument emulators")
+    return io_stats.InstrumentedResourceManager(pyvisa.ResourceManager())
+
+def open_stage(port, baudrate=38400, timeout=1):
+    """Open the DS102 serial port (the emulator's pty on the emulated backend), timed by io_stats"""
+    if backend() == 'emulated':
+        port = get_bench().stage_port()
+    return io_stats.instrument_serial(serial.Serial(port, baudrate=baudrate, timeout=timeout), 'stage')
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Per-Command I/O Statistics for EDWA
+Wraps VISA resources and DS102 serial ports so every write, read, query and
+readline is timed and classified (ok / timeout / error) per device, command
+and operation. Numeric arguments are folded into '#', so
+"SOUR:CURR:LEV:IMM:AMPL 0.0500" and "AXIY:GOABS 1200" each form one row.
+A command issued right after a failure on the same handle (read_power's
+fallback list, a re-query) counts as a retry.
+
+Percentiles come from a rolling window of the latest samples; the first
+samples of a session form a baseline, and slow_ratio (recent p50 / baseline
+p50) makes a meter that is slowly degrading stand out before it locks up.
+Statistics accumulate for the whole session.
+
+    rm = io_stats.InstrumentedResourceManager(pyvisa.ResourceManager())
+    ser = io_stats.instrument_serial(serial.Serial(...), 'stage')
+    print(io_stats.format_summary())
+
+Usage:
+    python io_stats.py ../log/scan_20250101_120000/io_stats_20250101_120000.json
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from collections import deque
+import numpy as np
+
+try:
+    from pyvisa.constants import StatusCode
+    VISA_TIMEOUT_CODE = int(StatusCode.error_timeout)
+except ImportError:
+    VISA_TIMEOUT_CODE = -1073807339
+
+WINDOW = 500          # recent samples per command for percentiles
+BASELINE = 100        # first samples per command that form the baseline
+SLOW_FACTOR = 2.0     # recent p50 this many times the baseline p50 is degraded
+
+# Friendly device names by VISA resource name (main.py registers its addresses)
+DEVICE_NAMES = {}
+
+_ARGUMENT_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_RELATIVE_MOVE = re.compile(r'^([A-Z])[-+]\d+$')
+
+_lock = threading.Lock()
+_stats = {}  # (device, command, op) -> CommandStats
+
+def command_key(command):
+    """Command text with numeric arguments folded into '#'"""
+    if isinstance(command, bytes):
+        command = command.decode('ascii', 'replace')
+    text = command.strip()
+    if _RELATIVE_MOVE.match(text):
+        return f"{text[0]}±#"
+    header, _, argument = text.partition(' ')
+    if argument:
+        return f"{header} {_ARGUMENT_NUMBER.sub('#', argument.strip())}"
+    return header
+
+def is_timeout(error):
+    return isinstance(error, TimeoutError) or getattr(error, 'error_code', None) == VISA_TIMEOUT_CODE
+
+class CommandStats:
+    """Counts and latencies of one (device, command, operation)"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=WINDOW)
+        self.recent_timeouts = deque(maxlen=WINDOW)
+        self.baseline = []
+        self.last_error = None
+        self.last_time = None
+
+    def add(self, seconds, outcome, retry=False, error=None):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        self.recent_timeouts.append(outcome == 'timeout')
+        if len(self.baseline) < BASELINE:
+            self.baseline.append(seconds)
+        if outcome == 'timeout':
+            self.timeouts += 1
+        elif outcome == 'error':
+            self.errors += 1
+        if error is not None:
+            self.last_error = error
+        if retry:
+            self.retries += 1
+        self.last_time = time.time()
+
+    def snapshot(self):
+        recent = np.array(self.recent)
+        p50, p90, p99 = np.percentile(recent, [50, 90, 99]) * 1000 if len(recent) else (None, None, None)
+        baseline_p50 = float(np.median(self.baseline)) * 1000 if self.baseline else None
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'retries': self.retries,
+            'recent_timeout_rate': float(np.mean(self.recent_timeouts)) if self.recent_timeouts else 0.0,
+            'mean_ms': self.total / self.count * 1000 if self.count else None,
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': self.max * 1000,
+            'baseline_p50_ms': baseline_p50,
+            'slow_ratio': p50 / baseline_p50 if p50 is not None and baseline_p50 else None,
+            'last_error': self.last_error,
+            'last_time': self.last_time,
+        }
+
+def record(device, command, op, seconds, outcome='ok', retry=False, error=None):
+    """Add one timed operation"""
+    with _lock:
+        stats = _stats.get((device, command, op))
+        if stats is None:
+            stats = _stats[(device, command, op)] = CommandStats()
+        stats.add(seconds, outcome, retry, error)
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+def summary():
+    """One dict per (device, command, op), busiest first"""
+    with _lock:
+        rows = [dict(device=device, command=command, op=op, **stats.snapshot())
+                for (device, command, op), stats in _stats.items()]
+    return sorted(rows, key=lambda row: (row['device'], -row['count']))
+
+def degraded(rows=None, factor=SLOW_FACTOR, min_samples=20):
+    """Rows whose recent latency or timeout rate has risen against the baseline"""
+    flagged = []
+    for row in summary() if rows is None else rows:
+        if row['count'] < min_samples:
+            continue
+        slow = row['slow_ratio'] is not None and row['slow_ratio'] >= factor
+        if slow or row['recent_timeout_rate'] > 0.05:
+            flagged.append(row)
+    return flagged
+
+def format_summary(rows=None):
+    """Text table of the per-command statistics ('!' marks degraded rows)"""
+    rows = summary() if rows is None else rows
+    flagged = {(r['device'], r['command'], r['op']) for r in degraded(rows)}
+
+    def ms(value):
+        return f"{value:8.2f}" if value is not None else "       -"
+
+    lines = [f"  {'device':<10} {'command':<26} {'op':<8} {'count':>6} {'tmo':>4} {'err':>4} {'retry':>5} "
+             f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'slow':>5}"]
+    for r in rows:
+        mark = "!" if (r['device'], r['command'], r['op']) in flagged else " "
+        slow = f"{r['slow_ratio']:5.1f}" if r['slow_ratio'] is not None else "    -"
+        lines.append(f"{mark} {r['device'][:10]:<10} {r['command'][:26]:<26} {r['op']:<8} {r['count']:>6} "
+                     f"{r['timeouts']:>4} {r['errors']:>4} {r['retries']:>5} {ms(r['p50_ms'])} {ms(r['p90_ms'])} "
+                     f"{ms(r['p99_ms'])} {ms(r['max_ms'])} {slow}")
+    return "\n".join(lines)
+
+def write_summary(path):
+    with open(path, "w") as f:
+        json.dump({'time': time.time(), 'commands': summary()}, f, indent=2)
+    return path
+
+def write_run(log_dir, timestamp):
+    """Write the session statistics next to a run's CSV"""
+    try:
+        path = write_summary(os.path.join(log_dir, f"io_stats_{timestamp}.json"))
+    except OSError as e:
+        print(f"[WARNING] Could not write I/O statistics: {e}")
+        return None
+    for row in degraded():
+        print(f"[WARNING] {row['device']} {row['command']} ({row['op']}) is degrading: "
+              f"p50 {row['p50_ms']:.1f} ms vs baseline {row['baseline_p50_ms']:.1f} ms, "
+              f"{row['recent_timeout_rate'] * 100:.0f}% recent timeouts")
+    return path
+
+class _Instrumented:
+    """Shared wrapper plumbing: attribute delegation and timed calls"""
+
+    _own = ('_target', '_device', '_last_command', '_failed')
+
+    def __init__(self, target, device):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_device', device)
+        object.__setattr__(self, '_last_command', '?')
+        object.__setattr__(self, '_failed', False)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        if name in self._own:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._target, name, value)
+
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._target.__exit__(*exc)
+
+    def _timed(self, command, op, function, *args, empty_is_timeout=False):
+        retry = self._failed
+        start = time.perf_counter()
+        try:
+            result = function(*args)
+        except Exception as e:
+            outcome = 'timeout' if is_timeout(e) else 'error'
+            record(self._device, command, op, time.perf_counter() - start, outcome, retry, str(e))
+            self._failed = True
+            raise
+        elapsed = time.perf_counter() - start
+        if empty_is_timeout and not result:
+            # pyserial returns what arrived (nothing) when the read times out
+            record(self._device, command, op, elapsed, 'timeout', retry, "no reply")
+            self._failed = True
+        else:
+            record(self._device, command, op, elapsed, 'ok', retry)
+            self._failed = False
+        return result
+
+class InstrumentedResource(_Instrumented):
+    """pyvisa message-based resource with timed write/read/query"""
+
+    def write(self, command, *args, **kwargs):
+        self._last_command = command_key(command)
+        return self._timed(self._last_command, 'write', lambda: self._target.write(command, *args, **kwargs))
+
+    def read(self, *args, **kwargs):
+        return self._timed(self._last_command, 'read', lambda: self._target.read(*args, **kwargs))
+
+    def query(self, command, *args, **kwargs):
+        self._last_command = command_key(command)
+        return self._timed(self._last_command, 'query', lambda: self._target.query(command, *args, **kwargs))
+
+class InstrumentedSerial(_Instrumented):
+    """pyserial port with timed write/readline (an empty readline is a timeout)"""
+
+    def write(self, data):
+        self._last_command = command_key(data)
+        return self._timed(self._last_command, 'write', self._target.write, data)
+
+    def readline(self, *args):
+        return self._timed(self._last_command, 'readline', self._target.readline, *args, empty_is_timeout=True)
+
+    def read(self, size=1):
+        return self._timed(self._last_command, 'read', self._target.read, size, empty_is_timeout=size > 0)
+
+class InstrumentedResourceManager:
+    """ResourceManager whose open_resource returns InstrumentedResource handles"""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def open_resource(self, resource_name, *args, **kwargs):
+        resource = self.manager.open_resource(resource_name, *args, **kwargs)
+        return InstrumentedResource(resource, DEVICE_NAMES.get(resource_name, resource_name))
+
+    def __getattr__(self, name):
+        return getattr(self.manager, name)
+
+def instrument_serial(port, device='stage'):
+    return InstrumentedSerial(port, device)
+
+class IOStatsWindow:
+    """Tk window with the live per-command table, refreshed every interval_ms"""
+
+    def __init__(self, root, interval_ms=1000):
+        import tkinter as tk
+        self.root = root
+        self.interval_ms = interval_ms
+        self.window = tk.Toplevel(root)
+        self.window.title("I/O Statistics")
+        self.text = tk.Text(self.window, width=118, height=24, font=("Courier", 9))
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.refresh()
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        self.text.delete("1.0", "end")
+        self.text.insert("end", format_summary())
+        self.window.after(self.interval_ms, self.refresh)
+
+def main():
+    parser = argparse.ArgumentParser(description='Show saved EDWA I/O statistics')
+    parser.add_argument('summary', help='io_stats_<timestamp>.json')
+    args = parser.parse_args()
+    with open(args.summary) as f:
+        rows = json.load(f)['commands']
+    print(format_summary(rows))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Live Power Plot for EDWA Optimizer
+Persistent power-vs-iteration view that appends points in place instead of
+clearing and re-scattering the whole history on every measurement.
+"""
+
+import time
+import numpy as np
+from matplotlib.lines import Line2D
+import tracing
+from plot_decimation import ColumnDecimator, lttb_indices, canvas_pixel_width
+from heatmaps import cell_extent
+
+# Plot categories that are not a single DS102 axis
+SPECIAL_CATEGORIES = {
+    'START': {'color': 'red', 'label': 'Starting Position', 'marker': '*', 'size': 150},
+    'LOCAL': {'color': 'orange', 'label': 'Local Scan', 'marker': 'o', 'size': 50},
+    '2D': {'color': 'purple', 'label': '2D Cross-Scan', 'marker': 'o', 'size': 50},
+    'UNKNOWN': {'color': 'gray', 'label': 'Unknown', 'marker': 'o', 'size': 50},
+}
+
+class LivePowerPlot:
+    """Incremental power-vs-iteration scatter with a blitted current-point marker
+
+    One scatter collection is kept per category (axis, start, local, 2D) and new
+    points are appended to its offsets. Full canvas redraws are rate limited;
+    between them only the current-point highlight is blitted. Long histories
+    are decimated to about the canvas pixel width per category: min/max per
+    pixel column of the x range (ColumnDecimator), thinned further with LTTB
+    unless decimation='minmax'.
+    """
+
+    def __init__(self, fig, ax, canvas, axis_colors, max_fps=5.0, decimation='lttb'):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.axis_colors = axis_colors
+        self.min_redraw_interval = 1.0 / max_fps if max_fps else 0.0
+        self.decimation = decimation
+
+        self._categories = {}  # category -> {'collection', 'offsets', 'count', 'dirty'}
+        self._highlight = None
+        self._background = None
+        self._last_draw = 0.0
+        self._last_draw_cost = 0.0
+        self._pending = False
+        self._title = ""
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.reset()
+
+    def category_for(self, axis):
+        """Map an update_plot axis label to a plot category"""
+        if axis == 'START':
+            return 'START'
+        if axis == 'LOCAL':
+            return 'LOCAL'
+        if isinstance(axis, str) and len(axis) == 2 and axis[0] in self.axis_colors and axis[1] in self.axis_colors:
+            # 2D cross-scan combinations (e.g. 'XY', 'ZU', 'VW')
+            return '2D'
+        if axis in self.axis_colors:
+            return axis
+        return 'UNKNOWN'
+
+    def style_for(self, category):
+        """Return color/label/marker/size for a category"""
+        if category in SPECIAL_CATEGORIES:
+            return SPECIAL_CATEGORIES[category]
+        return {'color': self.axis_colors[category], 'label': f'Axis {category}', 'marker': 'o', 'size': 50}
+
+    def color_for(self, axis):
+        """Color used for an update_plot axis label"""
+        return self.style_for(self.category_for(axis))['color']
+
+    def reset(self):
+        """Clear all points and restore an empty, labelled plot"""
+        self.ax.clear()
+        self._categories = {}
+        self._background = None
+        self._pending = False
+        self._xlim = (-2.0, 10.0)
+        self._ylim = None
+        self._title = ""
+
+        self.ax.set_xlabel("Iteration")
+        self.ax.set_ylabel("Power (dBm)")
+        self.ax.grid(True, alpha=0.3)
+        self.ax.set_xlim(*self._xlim)
+        self._set_title("Power vs Iteration")
+
+        # Current point marker is animated so it can be blitted on its own
+        self._highlight = Line2D([], [], marker='o', markersize=10, linestyle='None',
+                                 markeredgecolor='black', markeredgewidth=2, animated=True)
+        self.ax.add_line(self._highlight)
+
+        self.fig.tight_layout()
+        self._full_redraw()
+
+    def add_point(self, iteration, power, axis):
+        """Append a point and refresh the view (rate limited)"""
+        category = self.category_for(axis)
+        entry = self._categories.get(category)
+        if entry is None:
+            entry = self._add_category(category)
+
+        if entry['count'] == len(entry['offsets']):
+            grown = np.empty((max(64, 2 * len(entry['offsets'])), 2))
+            grown[:entry['count']] = entry['offsets'][:entry['count']]
+            entry['offsets'] = grown
+        entry['offsets'][entry['count']] = (iteration, power)
+        entry['count'] += 1
+        entry['dirty'] = True
+        self._pending = True
+
+        if iteration != -1:
+            self._highlight.set_data([iteration], [power])
+            self._highlight.set_markerfacecolor(self.style_for(category)['color'])
+        self._set_title(f"Power vs Iteration (Current Axis: {axis})")
+
+        limits_changed = self._extend_limits(iteration, power)
+        # Never spend more than ~20% of the time in full redraws
+        interval = max(self.min_redraw_interval, 4 * self._last_draw_cost)
+        if limits_changed or time.monotonic() - self._last_draw >= interval:
+            self._full_redraw()
+        else:
+            self._blit_highlight()
+
+    def flush(self):
+        """Draw any points still waiting for a rate-limited redraw"""
+        if self._pending:
+            self._full_redraw()
+
+    def _add_category(self, category):
+        style = self.style_for(category)
+        kwargs = {'edgecolor': 'white', 'linewidth': 1} if category == 'START' else {'alpha': 0.7}
+        collection = self.ax.scatter([], [], c=style['color'], s=style['size'], marker=style['marker'], **kwargs)
+        entry = {'collection': collection, 'offsets': np.empty((64, 2)), 'count': 0, 'dirty': False,
+                 'decimator': None}
+        self._categories[category] = entry
+        self._update_legend()
+        return entry
+
+    def _update_legend(self):
+        # Legend only changes when a new category first appears
+        handles = []
+        for category in self._categories:
+            style = self.style_for(category)
+            handles.append(Line2D([0], [0], marker=style['marker'], color='w',
+                                  markerfacecolor=style['color'], markersize=8, label=style['label']))
+        self.ax.legend(handles=handles, loc='upper left', bbox_to_anchor=(1.02, 1))
+        self.fig.tight_layout()
+
+    def _extend_limits(self, iteration, power):
+        """Grow the axis limits with headroom so most points need no relayout"""
+        changed = False
+        xmin, xmax = self._xlim
+        if iteration > xmax:
+            xmax = max(xmax * 1.5, iteration + 10)
+            changed = True
+        if iteration < xmin:
+            xmin = iteration - 2
+            changed = True
+        self._xlim = (xmin, xmax)
+
+        if self._ylim is None:
+            self._ylim = (power - 1.0, power + 1.0)
+            changed = True
+        else:
+            ymin, ymax = self._ylim
+            span = ymax - ymin
+            if power < ymin:
+                ymin = power - 0.25 * span
+                changed = True
+            if power > ymax:
+                ymax = power + 0.25 * span
+                changed = True
+            self._ylim = (ymin, ymax)
+
+        if changed:
+            self.ax.set_xlim(*self._xlim)
+            self.ax.set_ylim(*self._ylim)
+        return changed
+
+    def _set_title(self, title):
+        if title != self._title:
+            self._title = title
+            self.ax.set_title(title, fontsize=12)
+
+    def _visible_offsets(self, entry):
+        """Offsets to draw for a category, decimated once it outgrows the canvas"""
+        offsets = entry['offsets'][:entry['count']]
+        budget = canvas_pixel_width(self.canvas)
+        if entry['count'] <= budget:
+            return offsets
+
+        # Per-column reduction over the current x range; only new points are
+        # folded in, the whole history is re-binned only when the range changes
+        decimator = entry['decimator']
+        columns = budget if self.decimation == 'lttb' else budget // 2
+        if decimator is None or not decimator.matches(columns, self._xlim):
+            decimator = entry['decimator'] = ColumnDecimator(columns, self._xlim)
+        decimator.update(offsets[:, 0], offsets[:, 1])
+        idx = decimator.indices()
+        if self.decimation == 'lttb' and len(idx) > budget:
+            # The candidates are spread evenly in x, so LTTB's index buckets are fair here
+            idx = idx[lttb_indices(offsets[idx, 0], offsets[idx, 1], budget)]
+        return offsets[idx]
+
+    @tracing.traced("gui.plot_redraw")
+    def _full_redraw(self):
+        for entry in self._categories.values():
+            if entry['dirty']:
+                entry['collection'].set_offsets(self._visible_offsets(entry))
+                entry['dirty'] = False
+        self._pending = False
+        start = time.monotonic()
+        # draw_event handler captures the background and blits the highlight
+        self.canvas.draw()
+        self._last_draw = time.monotonic()
+        self._last_draw_cost = self._last_draw - start
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_highlight()
+
+    def _blit_highlight(self):
+        if self._background is None:
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_highlight()
+
+    def _draw_highlight(self):
+        if self._highlight is not None and len(self._highlight.get_xdata()):
+            self.ax.draw_artist(self._highlight)
+        self.canvas.blit(self.fig.bbox)
+
+class LiveHeatmap:
+    """Heatmap of a 2-D scan that fills in cell by cell while the scan runs
+
+    The image array is preallocated with NaN for the full grid; each measured
+    point only writes one cell. The canvas is refreshed at a capped rate.
+    """
+
+    def __init__(self, fig, ax, canvas, max_fps=4.0, cmap='viridis'):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.cmap = cmap
+        self.min_redraw_interval = 1.0 / max_fps if max_fps else 0.0
+
+        self.x_grid = None
+        self.y_grid = None
+        self.data = None
+        self._image = None
+        self._colorbar = None
+        self._last_draw = 0.0
+        self._pending = False
+
+    def start(self, x_grid, y_grid, x_label, y_label):
+        """Prepare an empty (all NaN) map for the given scan grids"""
+        self.x_grid = np.asarray(x_grid, dtype=float)
+        self.y_grid = np.asarray(y_grid, dtype=float)
+        self.data = np.full((len(self.y_grid), len(self.x_grid)), np.nan)
+
+        if self._colorbar is not None:
+            self._colorbar.remove()
+            self._colorbar = None
+        self.ax.clear()
+
+        # Cell-centred extent so each pixel sits on its scan position
+        self._image = self.ax.imshow(self.data, extent=cell_extent(self.x_grid, self.y_grid), origin='lower',
+                                     cmap=self.cmap, aspect='auto', interpolation='nearest')
+        self._colorbar = self.fig.colorbar(self._image, ax=self.ax)
+        self._colorbar.set_label('Power (dBm)')
+
+        self.ax.set_xlabel(f'{x_label} Position')
+        self.ax.set_ylabel(f'{y_label} Position')
+        self.ax.set_title(f'Live Scan - {x_label} vs {y_label}', fontsize=11)
+        self.fig.tight_layout()
+        self._redraw()
+
+    def add_point(self, x, y, power):
+        """Write one measured point into its grid cell"""
+        if self.data is None:
+            return
+        ix = int(np.argmin(np.abs(self.x_grid - x)))
+        iy = int(np.argmin(np.abs(self.y_grid - y)))
+        self.data[iy, ix] = power
+        self._pending = True
+
+        if time.monotonic() - self._last_draw >= self.min_redraw_interval:
+            self._redraw()
+
+    def flush(self):
+        """Draw any cells still waiting for a rate-limited refresh"""
+        if self._pending:
+            self._redraw()
+
+    @tracing.traced("gui.heatmap_redraw")
+    def _redraw(self):
+        self._image.set_data(self.data)
+        if np.any(np.isfinite(self.data)):
+            vmin, vmax = np.nanmin(self.data), np.nanmax(self.data)
+            if vmin == vmax:
+                vmin, vmax = vmin - 0.5, vmax + 0.5
+            self._image.set_clim(vmin, vmax)
+        self._pending = False
+        self._last_draw = time.monotonic()
+        self.canvas.draw()
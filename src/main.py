@@ -1,203 +1,93 @@
 # main.py
 
-import pyvisa
-import serial
 import time
 import os
-import csv
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.colors as mcolors
-from scipy.interpolate import griddata
-from PIL import Image
-import requests
+from matplotlib.figure import Figure
 import json
 import webbrowser
-import pyautogui
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from live_plot import LivePowerPlot, LiveHeatmap
+from heatmaps import generate_heatmaps
+from report_pipeline import PostRunPipeline
+from scan_trace import ScanTrace
+import tracing
+import io_stats
+import metrics_server
+from alignment import (AXES, setup_pump, setup_signal, read_pump_current, read_signal_power,
+                       move_axis_to, get_all_positions, read_power, random_walk_constrained,
+                       hill_climb_all_axes_constrained, brute_force_3d_scan, verify_scan_points,
+                       smart_hill_climb)
+from run_journal import JournalWriter, convert_journal
+from scan_checkpoint import (build_scan_positions, write_scan_plan, start_scan_session, end_scan_session,
+                             mark_scan_finished, find_resumable_scan,
+                             completed_indices, select_verification_points, check_drift)
+from scan_registration import suggest_origin
+from peak_fit import fit_scan_peak, climb_seed, save_peak_fit
+from instrument_emulators import resource_manager, open_stage, backend
+from meter_breaker import GuardedMeter
+from meter_snapshot import read_meter_state, write_meter_snapshot, get_keysight_browser, close_keysight_browser
 
 # Enhanced Camera integration
-try:
-    from camera_integration import (
-        initialize_camera_system, capture_scan_start_image, capture_scan_optimum_image,
-        capture_hillclimb_start_image, capture_hillclimb_optimum_image,
-        capture_scan_images_during_process, capture_optimization_sequence,
-        cleanup_camera_system, camera_streaming
-    )
-    from pixelink_camera_enhanced_basic import EnhancedPixelinkCamera, EnhancedCameraGUI
+# The camera stack (cv2, PixeLINK SDK) is slow to import and initialize, so
+# OptimizerApp loads it in a background thread with load_camera_stack() once
+# the window is up. Until then (or if it is missing) these stand-ins are used.
+CAMERA_AVAILABLE = False
+ENHANCED_CAMERA_AVAILABLE = False
+CAMERA_FUNCTIONS = ('initialize_camera_system', 'capture_scan_start_image', 'capture_scan_optimum_image',
+                    'capture_hillclimb_start_image', 'capture_hillclimb_optimum_image',
+                    'capture_scan_images_during_process', 'capture_optimization_sequence',
+                    'cleanup_camera_system', 'camera_streaming')
+def initialize_camera_system(*args, **kwargs): return True
+def capture_scan_start_image(*args, **kwargs): return None
+def capture_scan_optimum_image(*args, **kwargs): return None
+def capture_hillclimb_start_image(*args, **kwargs): return None
+def capture_hillclimb_optimum_image(*args, **kwargs): return None
+def capture_scan_images_during_process(*args, **kwargs): return []
+def capture_optimization_sequence(*args, **kwargs): return []
+def cleanup_camera_system(*args, **kwargs): pass
+def camera_streaming():
+    from contextlib import contextmanager
+    @contextmanager
+    def dummy_context(): yield
+    return dummy_context()
+
+def load_camera_stack():
+    """Import the camera modules in place of the stand-ins; True if available"""
+    global CAMERA_AVAILABLE, ENHANCED_CAMERA_AVAILABLE, EnhancedPixelinkCamera, EnhancedCameraGUI
+    try:
+        import camera_integration
+        from pixelink_camera_enhanced_basic import EnhancedPixelinkCamera, EnhancedCameraGUI
+    except ImportError as e:
+        print(f"[WARNING] Enhanced camera integration not available: {e}")
+        return False
+    globals().update({name: getattr(camera_integration, name) for name in CAMERA_FUNCTIONS})
     CAMERA_AVAILABLE = True
     ENHANCED_CAMERA_AVAILABLE = True
     print("[INFO] Enhanced camera integration loaded successfully")
-except ImportError as e:
-    CAMERA_AVAILABLE = False
-    ENHANCED_CAMERA_AVAILABLE = False
-    print(f"[WARNING] Enhanced camera integration not available: {e}")
-    # Define dummy functions
-    def initialize_camera_system(*args, **kwargs): return True
-    def capture_scan_start_image(*args, **kwargs): return None
-    def capture_scan_optimum_image(*args, **kwargs): return None
-    def capture_hillclimb_start_image(*args, **kwargs): return None
-    def capture_hillclimb_optimum_image(*args, **kwargs): return None
-    def capture_scan_images_during_process(*args, **kwargs): return []
-    def capture_optimization_sequence(*args, **kwargs): return []
-    def cleanup_camera_system(*args, **kwargs): pass
-    def camera_streaming(): 
-        from contextlib import contextmanager
-        @contextmanager
-        def dummy_context(): yield
-        return dummy_context()
+    return True
 
 # Hardware setup
 PUMP1_ADDRESS = "USB0::0x1313::0x804F::M01093719::0::INSTR"
 PUMP2_ADDRESS = "USB0::0x1313::0x804F::M00859480::0::INSTR"  # Adjust as needed
 SIGNAL_ADDRESS = "GPIB0::20::INSTR"
 POWER_METER_ADDRESS = "TCPIP0::100.65.16.193::inst0::INSTR"
+POWER_METER_IP = "100.65.16.193"
 STAGE_PORT = "COM3"
+io_stats.DEVICE_NAMES.update({PUMP1_ADDRESS: 'pump1', PUMP2_ADDRESS: 'pump2',
+                              SIGNAL_ADDRESS: 'signal', POWER_METER_ADDRESS: 'meter'})
 BAUDRATE = 38400
-AXES = ['X', 'Y', 'Z', 'U', 'V', 'W']
 AXIS_COLORS = {'X': 'red', 'Y': 'green', 'Z': 'blue', 'U': 'cyan', 'V': 'magenta', 'W': 'black'}
-SLEEP_TIME = 0.2
-INITIAL_STEP = 100
-MIN_STEP = 10
-RANDOM_STEPS = 20  # Number of random walk steps before hill climbing
-INDEX_MATCHING = 0  # Set to 0 since power meter readings are already matched
-
-# Pump laser setup
-def setup_pump(inst, current_amps):
-    inst.write("*RST")
-    inst.write("OUTP:STAT ON")
-    inst.write("SOUR:FUNC:MODE CURR")
-    inst.write("SOUR:CURR:LIM:AMPL 0.08")
-    inst.write(f"SOUR:CURR:LEV:IMM:AMPL {current_amps:.4f}")
-
-# Signal laser setup
-def setup_signal(instr, power_dbm):
-    instr.write(":SOUR1:POW:STAT ON")
-    instr.write(f":SOUR1:POW {power_dbm:.2f}")
-
-def read_pump_current(inst):
-    """Read current pump laser current setting"""
-    try:
-        current = float(inst.query("SENS3:CURR:DC:DATA?"))
-        return current * 1000  # Convert to mA
-    except Exception as e:
-        print(f"[ERROR] Failed to read pump current: {e}")
-        return 0.0
-
-def read_signal_power(instr):
-    """Read current signal laser power setting"""
-    try:
-        power = float(instr.query(":SOUR1:POW?"))
-        return power
-    except Exception as e:
-        print(f"[ERROR] Failed to read signal power: {e}")
-        return 0.0
-
-# Stage control
-def move_stage(ser, axis, pulses):
-    cmd = f"{axis}{pulses:+d}\r\n".encode()
-    ser.write(cmd)
-    time.sleep(SLEEP_TIME)
-
-def get_axis_position(ser, axis):
-    """Read current position of an axis"""
-    try:
-        ser.reset_input_buffer()
-        ser.reset_output_buffer()
-        cmd = f'AXI{axis}:POS?\r'
-        ser.write(cmd.encode('ascii'))
-        time.sleep(0.1)
-        resp = ser.readline().decode('ascii').strip()
-        if resp:
-            return int(float(resp))
-        return 0
-    except Exception as e:
-        print(f"Error reading position for axis {axis}: {e}")
-        return 0
-
-def move_axis_to(ser, axis, pos):
-    """Move axis to absolute position"""
-    try:
-        cmd = f'AXI{axis}:GOABS {int(round(float(pos)))}\r'
-        ser.write(cmd.encode('ascii'))
-        # Wait for motion to complete
-        while True:
-            ser.write(f'AXI{axis}:MOTION?\r'.encode('ascii'))
-            resp = ser.readline().decode('ascii').strip()
-            if resp == '0':
-                break
-            time.sleep(0.05)
-    except Exception as e:
-        print(f"Error moving axis {axis}: {e}")
-
-def get_all_positions(ser):
-    """Get positions of all axes"""
-    positions = {}
-    for axis in AXES:
-        positions[axis] = get_axis_position(ser, axis)
-    return positions
-
-# Power meter - updated to use channel 1 with debugging
-def read_power(inst, debug=False):
-    try:
-        # Try multiple SCPI commands to find the correct one
-        commands_to_try = [
-            "READ1:pow?",  # Current command
-            "READ:ch1:pow?",  # Alternative format
-            "meas1:pow?",  # Measurement command
-            "fetch1:pow?",  # Fetch command
-            ":read1:pow?",  # With leading colon
-            "read:pow? (@1)",  # Channel syntax
-        ]
-        
-        raw_reading = None
-        successful_command = None
-        
-        for cmd in commands_to_try:
-            try:
-                if debug:
-                    print(f"[DEBUG] Trying command: {cmd}")
-                inst.write(cmd)
-                raw_reading = float(inst.read())
-                successful_command = cmd
-                break
-            except Exception as cmd_error:
-                if debug:
-                    print(f"[DEBUG] Command {cmd} failed: {cmd_error}")
-                continue
-        
-        if raw_reading is None:
-            print(f"[ERROR] All power reading commands failed")
-            return None
-            
-        # Apply INDEX_MATCHING offset (investigate if this is correct)
-        adjusted_reading = INDEX_MATCHING + raw_reading
-        
-        if debug:
-            print(f"[DEBUG] Successful command: {successful_command}")
-            print(f"[DEBUG] Raw reading: {raw_reading:.6f} dBm")
-            print(f"[DEBUG] INDEX_MATCHING offset: {INDEX_MATCHING}")
-            print(f"[DEBUG] Final reading: {adjusted_reading:.6f} dBm")
-            
-        return adjusted_reading
-        
-    except Exception as e:
-        print(f"[ERROR] Power read failed: {e}")
-        return None
 
 def read_power_web_interface():
     """Read power from Keysight web interface for comparison"""
     try:
         # Try to get data from the web interface
+        import requests  # only this debug path needs it; kept out of startup
         url = "http://100.65.16.193/pm/index.html?page=ch1"
         response = requests.get(url, timeout=5)
         
@@ -214,36 +104,12 @@ def read_power_web_interface():
         print(f"[DEBUG] Cannot access web interface: {e}")
         return None
 
+@tracing.traced("post.keysight_screenshot")
 def capture_keysight_screenshot(log_dir, timestamp):
-    """Capture screenshot of Keysight web interface"""
+    """Capture screenshot of Keysight web interface (shared long-lived browser)"""
     try:
-        # Setup Chrome options for headless mode
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        # Initialize webdriver
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # Navigate to Keysight web interface
-        url = "http://100.65.16.193/pm/index.html?page=ch1"
-        driver.get(url)
-        
-        # Wait for page to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Give extra time for dynamic content
-        time.sleep(3)
-        
-        # Take screenshot
         screenshot_path = os.path.join(log_dir, f"keysight_web_{timestamp}.png")
-        driver.save_screenshot(screenshot_path)
-        
-        driver.quit()
+        get_keysight_browser().capture(screenshot_path)
         
         print(f"[INFO] Keysight web interface screenshot saved: {screenshot_path}")
         return screenshot_path
@@ -252,6 +118,7 @@ def capture_keysight_screenshot(log_dir, timestamp):
         print(f"[ERROR] Failed to capture Keysight screenshot: {e}")
         try:
             # Fallback: try to capture with pyautogui if browser is open
+            import pyautogui
             screenshot = pyautogui.screenshot()
             fallback_path = os.path.join(log_dir, f"keysight_fallback_{timestamp}.png")
             screenshot.save(fallback_path)
@@ -261,6 +128,7 @@ def capture_keysight_screenshot(log_dir, timestamp):
             print(f"[ERROR] Fallback screenshot also failed: {fallback_error}")
             return None
 
+@tracing.traced("post.gui_screenshot")
 def capture_gui_screenshot(root_window, log_dir, timestamp):
     """Capture screenshot of the main GUI"""
     try:
@@ -274,7 +142,8 @@ def capture_gui_screenshot(root_window, log_dir, timestamp):
         width = root_window.winfo_width()
         height = root_window.winfo_height()
         
-        # Capture the GUI window area
+        # Capture the GUI window area (pyautogui is slow to import, so on first use)
+        import pyautogui
         screenshot = pyautogui.screenshot(region=(x, y, width, height))
         
         # Save screenshot
@@ -318,603 +187,21 @@ def compare_power_readings(inst, debug=True):
     print("="*60)
     return scpi_reading
 
-# Optimization
-def random_walk(inst, ser, position, iterations, step_size, stop_check=None):
-    history = []
-    
-    # Record the starting position and power as baseline
-    starting_position = position.copy()
-    starting_power = read_power(inst)
-    best_power = starting_power
-    best_position = starting_position.copy()
-    
-    print(f"[RANDOMWALK] Starting from power: {starting_power:.1f} dBm - this is the minimum baseline")
-    
-    for i in range(iterations):
-        # Check for stop request
-        if stop_check and stop_check():
-            print(f"[INFO] Random walk stopped at iteration {i+1}/{iterations}")
-            break
-            
-        axis = np.random.choice(AXES)
-        direction = np.random.choice([-1, 1])
-        move_stage(ser, axis, direction * step_size)
-        power = read_power(inst)
-        if power is not None:
-            position[axis] += direction * step_size
-            history.append((axis, position.copy(), power))
-            
-            # Track the best position found during random walk
-            if power > best_power:
-                best_power = power
-                best_position = position.copy()
-                print(f"[RANDOMWALK] New best: {power:.1f} dBm (improvement: {power - starting_power:+.1f})")
-        else:
-            move_stage(ser, axis, -direction * step_size)
-    
-    # Ensure we end at the best position found (never worse than starting)
-    if best_position != position:
-        print(f"[RANDOMWALK] Moving to best random walk position: {best_power:.1f} dBm")
-        for axis in AXES:
-            if abs(best_position[axis] - position[axis]) > 0.1:
-                move_axis_to(ser, axis, best_position[axis])
-        position.update(best_position)
-        time.sleep(0.2)
-    
-    return history
-
-def hill_climb(inst, ser, position, step_size, stop_check=None):
-    improved = True
-    history = []
-    base_power = read_power(inst)
-    starting_power = base_power  # Store original power for final comparison
-    
-    # Track the globally best position found - starting position is the minimum baseline
-    global_best_power = base_power
-    global_best_position = position.copy()
-    
-    print(f"[HILLCLIMB] Starting from power: {base_power:.1f} dBm - this is the minimum baseline")
-    
-    while improved and step_size >= MIN_STEP:
-        # Check for stop request
-        if stop_check and stop_check():
-            print(f"[INFO] Hill climb stopped")
-            break
-            
-        improved = False
-        for axis in AXES:
-            # Check for stop request before each axis
-            if stop_check and stop_check():
-                print(f"[INFO] Hill climb stopped during axis {axis} optimization")
-                break
-                
-            for direction in [1, -1]:
-                move_stage(ser, axis, direction * step_size)
-                power = read_power(inst)
-                if power is not None and power > base_power:
-                    position[axis] += direction * step_size
-                    history.append((axis, position.copy(), power))
-                    improved = True
-                    base_power = power
-                    
-                    # Update global best if this is better
-                    if power > global_best_power:
-                        improvement = power - global_best_power
-                        global_best_power = power
-                        global_best_position = position.copy()
-                        print(f"[HILLCLIMB] NEW GLOBAL BEST: {power:.1f} dBm (improvement: +{improvement:.1f} dBm)")
-                else:
-                    move_stage(ser, axis, -direction * step_size)
-        if not improved:
-            step_size = step_size // 2
-    
-    # Move to the globally best position found
-    if global_best_position != position:
-        print(f"[INFO] Moving to globally best position with power {global_best_power:.1f} dBm")
-        for axis in AXES:
-            if abs(global_best_position[axis] - position[axis]) > 0.1:  # Only move if significant difference
-                move_axis_to(ser, axis, global_best_position[axis])
-        position.update(global_best_position)
-        time.sleep(0.2)  # Allow movement to complete
-    
-    # Show final improvement summary
-    total_improvement = global_best_power - starting_power
-    if total_improvement > 0.1:
-        print(f"[HILLCLIMB COMPLETE] Total improvement: +{total_improvement:.1f} dBm ({starting_power:.1f} → {global_best_power:.1f} dBm)")
-    elif total_improvement < -0.1:
-        print(f"[HILLCLIMB COMPLETE] Power decreased: {total_improvement:.1f} dBm - this should not happen!")
-    else:
-        print(f"[HILLCLIMB COMPLETE] No significant change in power: {global_best_power:.1f} dBm")
-    
-    return history
-
-def hill_climb_all_axes(inst, ser, position, step_size, stop_check=None):
-    """Hill climb optimization using ALL 6 axes (XYZUVW) with improved algorithm"""
-    improved = True
-    history = []
-    base_power = read_power(inst)
-    starting_power = base_power  # Store original power for final comparison
-    iteration_count = 0
-    max_iterations = 200  # Prevent infinite loops
-    
-    # Track the globally best position found - starting position is the minimum baseline
-    global_best_power = base_power
-    global_best_position = position.copy()
-    
-    print(f"[INFO] Starting hill climb on all 6 axes from power: {base_power:.1f} dBm - this is the minimum baseline")
-    
-    while improved and step_size >= MIN_STEP and iteration_count < max_iterations:
-        # Check for stop request
-        if stop_check and stop_check():
-            print(f"[INFO] Hill climb stopped at iteration {iteration_count}")
-            break
-            
-        improved = False
-        iteration_count += 1
-        
-        # Try optimization on ALL 6 axes in each iteration
-        for axis in AXES:
-            # Check for stop request before each axis
-            if stop_check and stop_check():
-                print(f"[INFO] Hill climb stopped during axis {axis} optimization")
-                break
-                
-            best_direction = None
-            best_power = base_power
-            
-            # Try both directions for current axis
-            for direction in [1, -1]:
-                move_stage(ser, axis, direction * step_size)
-                time.sleep(0.05)  # Small delay for stage settling
-                power = read_power(inst)
-                
-                if power is not None and power > best_power:
-                    best_power = power
-                    best_direction = direction
-                
-                # Move back to test the other direction
-                move_stage(ser, axis, -direction * step_size)
-                time.sleep(0.05)
-            
-            # If we found improvement, make the move permanent
-            if best_direction is not None:
-                move_stage(ser, axis, best_direction * step_size)
-                position[axis] += best_direction * step_size
-                history.append((axis, position.copy(), best_power))
-                improved = True
-                base_power = best_power
-                
-                # Update global best if this is better
-                if best_power > global_best_power:
-                    global_best_power = best_power
-                    global_best_position = position.copy()
-                
-                print(f"[HILLCLIMB] Axis {axis}: {best_direction*step_size:+.0f} → {best_power:.1f} dBm")
-        
-        # If no improvement found, reduce step size
-        if not improved:
-            step_size = step_size // 2
-            print(f"[HILLCLIMB] Reducing step size to {step_size}")
-    
-    # Move to the globally best position found
-    if global_best_position != position:
-        print(f"[INFO] Moving to globally best position with power {global_best_power:.1f} dBm")
-        for axis in AXES:
-            if abs(global_best_position[axis] - position[axis]) > 0.1:  # Only move if significant difference
-                move_axis_to(ser, axis, global_best_position[axis])
-        position.update(global_best_position)
-        time.sleep(0.2)  # Allow movement to complete
-    
-    # Show final improvement summary
-    total_improvement = global_best_power - starting_power
-    if total_improvement > 0.1:
-        print(f"[HILLCLIMB ALL AXES COMPLETE] Total improvement: +{total_improvement:.1f} dBm ({starting_power:.1f} → {global_best_power:.1f} dBm) after {iteration_count} iterations")
-    elif total_improvement < -0.1:
-        print(f"[HILLCLIMB ALL AXES COMPLETE] Power decreased: {total_improvement:.1f} dBm - this should not happen!")
-    else:
-        print(f"[HILLCLIMB ALL AXES COMPLETE] No significant change in power: {global_best_power:.1f} dBm after {iteration_count} iterations")
-    
-    return history
-
-def random_walk_constrained(inst, ser, position, center_positions, iterations, step_size, stop_check=None):
-    """Random walk with ±100 constraint from center positions for all 6 axes"""
-    history = []
-    
-    # Record the starting position and power as baseline  
-    starting_position = position.copy()
-    starting_power = read_power(inst)
-    best_power = starting_power
-    best_position = starting_position.copy()
-    
-    print(f"[RANDOMWALK] Starting constrained walk from power: {starting_power:.1f} dBm - this is the minimum baseline")
-    
-    for i in range(iterations):
-        # Check for stop request
-        if stop_check and stop_check():
-            print(f"[INFO] Constrained random walk stopped at iteration {i+1}/{iterations}")
-            break
-            
-        axis = np.random.choice(AXES)
-        direction = np.random.choice([-1, 1])
-        move_amount = direction * step_size
-        
-        # Calculate new position
-        new_position = position[axis] + move_amount
-        
-        # Check if new position is within ±100 of center position
-        center_pos = center_positions[axis]
-        if abs(new_position - center_pos) <= 100:
-            # Move is allowed
-            move_stage(ser, axis, move_amount)
-            power = read_power(inst)
-            if power is not None:
-                position[axis] = new_position
-                history.append((axis, position.copy(), power))
-                
-                # Track the best position found during random walk
-                if power > best_power:
-                    best_power = power
-                    best_position = position.copy()
-                    print(f"[RANDOMWALK] Axis {axis}: {move_amount:+.0f} → {power:.1f} dBm (NEW BEST, improvement: {power - starting_power:+.1f})")
-                else:
-                    print(f"[RANDOMWALK] Axis {axis}: {move_amount:+.0f} → {power:.1f} dBm (within ±100 range)")
-            else:
-                # Move back if power reading failed
-                move_stage(ser, axis, -move_amount)
-        else:
-            # Move would exceed ±100 range, skip this iteration
-            print(f"[RANDOMWALK] Axis {axis}: {move_amount:+.0f} SKIPPED (would exceed ±100 range)")
-    
-    # Ensure we end at the best position found (never worse than starting)
-    if best_position != position:
-        print(f"[RANDOMWALK] Moving to best constrained walk position: {best_power:.1f} dBm")
-        for axis in AXES:
-            if abs(best_position[axis] - position[axis]) > 0.1:
-                move_axis_to(ser, axis, best_position[axis])
-        position.update(best_position)
-        time.sleep(0.2)
-    
-    return history
-
-def hill_climb_all_axes_constrained(inst, ser, position, step_size, stop_check=None):
-    """Hill climb optimization using ALL 6 axes with step sizes from 10 down to 1"""
-    improved = True
-    history = []
-    base_power = read_power(inst)
-    starting_power = base_power  # Store original power for final comparison
-    iteration_count = 0
-    max_iterations = 200  # Prevent infinite loops
-    min_step = 1  # Minimum step size is 1
-    
-    # Track the globally best position found - starting position is the minimum baseline
-    global_best_power = base_power
-    global_best_position = position.copy()
-    
-    print(f"[INFO] Starting constrained hill climb on all 6 axes from power: {base_power:.1f} dBm - this is the minimum baseline")
-    
-    while improved and step_size >= min_step and iteration_count < max_iterations:
-        # Check for stop request
-        if stop_check and stop_check():
-            print(f"[INFO] Constrained hill climb stopped at iteration {iteration_count}")
-            break
-            
-        improved = False
-        iteration_count += 1
-        
-        # Try optimization on ALL 6 axes in each iteration
-        for axis in AXES:
-            # Check for stop request before each axis
-            if stop_check and stop_check():
-                print(f"[INFO] Constrained hill climb stopped during axis {axis} optimization")
-                break
-                
-            best_direction = None
-            best_power = base_power
-            
-            # Try both directions for current axis
-            for direction in [1, -1]:
-                move_stage(ser, axis, direction * step_size)
-                time.sleep(0.05)  # Small delay for stage settling
-                power = read_power(inst)
-                
-                if power is not None and power > best_power:
-                    best_power = power
-                    best_direction = direction
-                
-                # Move back to test the other direction
-                move_stage(ser, axis, -direction * step_size)
-                time.sleep(0.05)
-            
-            # If we found improvement, make the move permanent
-            if best_direction is not None:
-                move_stage(ser, axis, best_direction * step_size)
-                position[axis] += best_direction * step_size
-                history.append((axis, position.copy(), best_power))
-                improved = True
-                base_power = best_power
-                
-                # Update global best if this is better
-                if best_power > global_best_power:
-                    global_best_power = best_power
-                    global_best_position = position.copy()
-                
-                print(f"[HILLCLIMB] Axis {axis}: {best_direction*step_size:+.0f} → {best_power:.1f} dBm")
-        
-        # If no improvement found, reduce step size
-        if not improved:
-            step_size = step_size // 2
-            if step_size < min_step:
-                step_size = min_step
-            print(f"[HILLCLIMB] Reducing step size to {step_size}")
-            
-            # If we're at minimum step size and no improvement, we're done
-            if step_size == min_step and not improved:
-                print(f"[HILLCLIMB] Reached minimum step size ({min_step}) with no improvement")
-                break
-    
-    # Move to the globally best position found
-    if global_best_position != position:
-        print(f"[INFO] Moving to globally best position with power {global_best_power:.1f} dBm")
-        for axis in AXES:
-            if abs(global_best_position[axis] - position[axis]) > 0.1:  # Only move if significant difference
-                move_axis_to(ser, axis, global_best_position[axis])
-        position.update(global_best_position)
-        time.sleep(0.2)  # Allow movement to complete
-    
-    # Show final improvement summary
-    total_improvement = global_best_power - starting_power
-    if total_improvement > 0.1:
-        print(f"[CONSTRAINED HILLCLIMB COMPLETE] Total improvement: +{total_improvement:.1f} dBm ({starting_power:.1f} → {global_best_power:.1f} dBm) after {iteration_count} iterations")
-    elif total_improvement < -0.1:
-        print(f"[CONSTRAINED HILLCLIMB COMPLETE] Power decreased: {total_improvement:.1f} dBm - this should not happen!")
-    else:
-        print(f"[CONSTRAINED HILLCLIMB COMPLETE] No significant change in power: {global_best_power:.1f} dBm after {iteration_count} iterations")
-    
-    return history
-
-def systematic_scan(inst, ser, scan_params, origin_positions):
-    """Perform systematic scan based on selected axes and parameters"""
-    history = []
-    
-    # Create meshgrid for all enabled axes
-    axes = list(scan_params.keys())
-    grids = [scan_params[ax] for ax in axes]
-    positions = np.array(np.meshgrid(*grids, indexing='ij')).reshape(len(axes), -1).T
-    
-    total_positions = len(positions)
-    
-    for idx, pos in enumerate(positions):
-        # Move to scan position
-        current_pos = origin_positions.copy()
-        for ax, val in zip(axes, pos):
-            move_axis_to(ser, ax, val)
-            current_pos[ax] = val
-        
-        # Read power with debugging
-        power = read_power(inst, debug=True)
-        if power is not None:
-            history.append((axes[0], current_pos, power))
-        
-        # Update progress (this would be called from GUI)
-        print(f"Scan progress: {idx+1}/{total_positions}")
-    
-    # Return to origin
-    for ax in axes:
-        move_axis_to(ser, ax, origin_positions[ax])
-    
-    return history
-
-def brute_force_3d_scan(inst, ser, scan_params, origin_positions, progress_callback=None, stop_check=None):
-    """Perform brute force 3D scanning for DS102"""
-    scan_data = []
-    axes = list(scan_params.keys())
-    
-    if not axes:
-        return scan_data
-    
-    # Always include the starting position as the first data point
-    starting_power = read_power(inst, debug=True)
-    if starting_power is not None:
-        starting_point = {
-            'position': origin_positions.copy(),
-            'power': starting_power,
-            'index': -1,  # Special index to identify starting position
-            'is_starting_position': True
-        }
-        scan_data.append(starting_point)
-        print(f"[SCAN] Starting position recorded: {starting_power:.1f} dBm at {', '.join([f'{a}:{origin_positions[a]:.0f}' for a in ['X','Y','Z','U','V','W']])}")
-    
-    # Create full 3D grid for enabled axes
-    grids = [scan_params[ax] for ax in axes]
-    
-    if len(axes) == 1:
-        # 1D scan
-        positions = [(pos,) for pos in grids[0]]
-    elif len(axes) == 2:
-        # 2D scan
-        X, Y = np.meshgrid(grids[0], grids[1], indexing='ij')
-        positions = [(x, y) for x, y in zip(X.ravel(), Y.ravel())]
-    elif len(axes) >= 3:
-        # 3D+ scan
-        meshgrids = np.meshgrid(*grids[:3], indexing='ij')
-        positions = list(zip(*[grid.ravel() for grid in meshgrids]))
-    
-    total_positions = len(positions)
-    
-    for idx, pos in enumerate(positions):
-        # Check for stop request
-        if stop_check and stop_check():
-            print(f"[INFO] Scan stopped at position {idx+1}/{total_positions}")
-            break
-            
-        # Move to scan position
-        current_pos = origin_positions.copy()
-        for i, ax in enumerate(axes[:len(pos)]):
-            move_axis_to(ser, ax, pos[i])
-            current_pos[ax] = pos[i]
-        
-        # Read power with debugging
-        power = read_power(inst, debug=True)
-        if power is not None:
-            # Store position and power data
-            scan_point = {
-                'position': current_pos.copy(),
-                'power': power,
-                'index': idx
-            }
-            scan_data.append(scan_point)
-        
-        # Progress callback
-        if progress_callback:
-            progress_callback(idx + 1, total_positions)
-    
-    # Return to origin
-    for ax in axes:
-        move_axis_to(ser, ax, origin_positions[ax])
-    
-    return scan_data
+def write_scan_csv(scan_data, timestamp, log_dir):
+    """Write brute force scan points (ScanTrace) to scan_data_<timestamp>.csv"""
+    return scan_data.to_csv(os.path.join(log_dir, f"scan_data_{timestamp}.csv"), layout='scan')
 
-def generate_heatmaps(scan_data, axes, timestamp, log_dir):
-    """Generate 1D/2D/3D heatmaps from scan data"""
-    if not scan_data or not axes:
-        return
-    
-    # Extract data and identify starting position
-    positions = np.array([[point['position'][ax] for ax in axes] for point in scan_data])
-    powers = np.array([point['power'] for point in scan_data])
-    
-    # Find starting position if it exists
-    starting_idx = None
-    starting_position = None
-    for i, point in enumerate(scan_data):
-        if point.get('is_starting_position', False):
-            starting_idx = i
-            starting_position = [point['position'][ax] for ax in axes]
-            break
+def capture_scan_camera_set(origin_positions, scan_data, log_dir):
+    """Camera captures for a finished scan (start, during, optimum)"""
+    # Capture scan starting position
+    capture_scan_start_image(origin_positions, log_dir)
     
-    # Find peak power and position for title
-    max_idx = np.argmax(powers)
-    peak_power = powers[max_idx]
-    
-    # Get the full DS102 position (all 6 axes) from the scan data
-    full_peak_position = scan_data[max_idx]['position']
-    
-    # Format all XYZUVW positions for title
-    all_axes = ['X', 'Y', 'Z', 'U', 'V', 'W']
-    position_str = ', '.join([f"{ax}:{full_peak_position[ax]:.0f}" for ax in all_axes])
-    
-    if len(axes) == 1:
-        # 1D plot
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(positions[:, 0], powers, 'b-o', markersize=4)
-        
-        # Mark starting position with large star if it exists
-        if starting_idx is not None and starting_position is not None:
-            ax.plot(starting_position[0], powers[starting_idx], 'r*', markersize=15, 
-                   label=f'Starting Position: {powers[starting_idx]:.1f} dBm')
-            ax.legend()
-        
-        ax.set_xlabel(f'{axes[0]} Position')
-        ax.set_ylabel('Power (dBm)')
-        ax.set_title(f'1D Scan - {axes[0]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
-        ax.grid(True)
-        plt.tight_layout()
-        plt.savefig(os.path.join(log_dir, f'heatmap_1D_{timestamp}.png'), dpi=300, bbox_inches='tight')
-        plt.close()
-        
-    elif len(axes) == 2:
-        # 2D heatmap
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Create regular grid for interpolation
-        x_unique = np.unique(positions[:, 0])
-        y_unique = np.unique(positions[:, 1])
-        X, Y = np.meshgrid(x_unique, y_unique)
-        
-        # Interpolate power values to grid
-        Z = griddata(positions[:, :2], powers, (X, Y), method='cubic', fill_value=np.nan)
-        
-        # Create heatmap
-        im = ax.imshow(Z, extent=[x_unique.min(), x_unique.max(), y_unique.min(), y_unique.max()],
-                      origin='lower', cmap='viridis', aspect='auto')
-        
-        # Add colorbar
-        cbar = plt.colorbar(im, ax=ax)
-        cbar.set_label('Power (dBm)')
-        
-        # Labels and title
-        ax.set_xlabel(f'{axes[0]} Position')
-        ax.set_ylabel(f'{axes[1]} Position')
-        ax.set_title(f'2D Heatmap - {axes[0]} vs {axes[1]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
-        
-        # Add scatter points
-        ax.scatter(positions[:, 0], positions[:, 1], c=powers, s=20, cmap='viridis', alpha=0.7, edgecolors='white', linewidth=0.5)
-        
-        # Mark starting position with large red star if it exists
-        if starting_idx is not None and starting_position is not None:
-            ax.plot(starting_position[0], starting_position[1], 'r*', markersize=20, 
-                   label=f'Starting Position: {powers[starting_idx]:.1f} dBm', 
-                   markeredgecolor='white', markeredgewidth=1)
-            ax.legend(loc='upper left', bbox_to_anchor=(0.02, 0.98))
-        
-        plt.tight_layout()
-        plt.savefig(os.path.join(log_dir, f'heatmap_2D_{timestamp}.png'), dpi=300, bbox_inches='tight')
-        plt.close()
-        
-    elif len(axes) >= 3:
-        # 3D volumetric visualization
-        fig = plt.figure(figsize=(12, 10))
-        ax = fig.add_subplot(111, projection='3d')
-        
-        # 3D scatter plot with color mapping
-        scatter = ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2], 
-                           c=powers, cmap='viridis', s=50, alpha=0.8)
-        
-        # Mark starting position with large red star if it exists
-        if starting_idx is not None and starting_position is not None and len(starting_position) >= 3:
-            ax.scatter(starting_position[0], starting_position[1], starting_position[2], 
-                      c='red', marker='*', s=300, alpha=1.0, edgecolors='white', linewidth=2,
-                      label=f'Starting Position: {powers[starting_idx]:.1f} dBm')
-            ax.legend(loc='upper left')
-        
-        # Colorbar
-        cbar = plt.colorbar(scatter, ax=ax, shrink=0.8)
-        cbar.set_label('Power (dBm)')
-        
-        # Labels and title
-        ax.set_xlabel(f'{axes[0]} Position')
-        ax.set_ylabel(f'{axes[1]} Position')
-        ax.set_zlabel(f'{axes[2]} Position')
-        ax.set_title(f'3D Volumetric Scan - {axes[0]} vs {axes[1]} vs {axes[2]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
-        
-        plt.tight_layout()
-        plt.savefig(os.path.join(log_dir, f'heatmap_3D_{timestamp}.png'), dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # Also create 2D projections
-        for i in range(3):
-            for j in range(i+1, 3):
-                fig, ax = plt.subplots(figsize=(8, 6))
-                scatter = ax.scatter(positions[:, i], positions[:, j], c=powers, cmap='viridis', s=30, alpha=0.8)
-                
-                # Mark starting position with large red star if it exists
-                if starting_idx is not None and starting_position is not None and len(starting_position) >= max(i+1, j+1):
-                    ax.plot(starting_position[i], starting_position[j], 'r*', markersize=15, 
-                           label=f'Starting Position: {powers[starting_idx]:.1f} dBm', 
-                           markeredgecolor='white', markeredgewidth=1)
-                    ax.legend(loc='upper left', bbox_to_anchor=(0.02, 0.98))
-                
-                cbar = plt.colorbar(scatter, ax=ax)
-                cbar.set_label('Power (dBm)')
-                ax.set_xlabel(f'{axes[i]} Position')
-                ax.set_ylabel(f'{axes[j]} Position')
-                ax.set_title(f'2D Projection: {axes[i]} vs {axes[j]} vs Power\nPeak: {peak_power:.1f} dBm at [{position_str}]')
-                ax.grid(True, alpha=0.3)
-                plt.tight_layout()
-                plt.savefig(os.path.join(log_dir, f'projection_{axes[i]}_{axes[j]}_{timestamp}.png'), dpi=300, bbox_inches='tight')
-                plt.close()
+    # Capture images during scan process
+    capture_scan_images_during_process(scan_data, log_dir)
     
-    print(f"Heatmaps saved to {log_dir}")
+    # Capture scan optimum position if we have results
+    if scan_data:
+        capture_scan_optimum_image(scan_data.best_point()['position'], log_dir)
 
 # GUI Application
 class OptimizerApp:
@@ -944,50 +231,102 @@ class OptimizerApp:
         # Stop flag for immediate termination
         self.stop_requested = False
         
+        # Crash-safe journal of the run in progress (run_journal.JournalWriter)
+        self.journal = None
+        
+        # Background jobs for heatmaps, screenshots, camera captures and CSV files
+        self.post_run = PostRunPipeline()
+        
         # Axis configuration
         self.axis_enabled = {}
         self.axis_entries = {}
         self.current_positions = {}
         
-        # Initialize camera system
-        self.camera_enabled = tk.BooleanVar(value=CAMERA_AVAILABLE)
+        # Camera system: imported and initialized in the background (start_camera_init)
+        self.camera_enabled = tk.BooleanVar(value=False)
         self.enhanced_camera = None
         self.enhanced_camera_gui = None
+        self.camera_init_thread = None
         
-        if CAMERA_AVAILABLE:
+        # Initialize axis variables
+        for axis in AXES:
+            self.axis_enabled[axis] = tk.BooleanVar(value=False)
+            self.axis_entries[axis] = {}
+            self.current_positions[axis] = 0
+        
+        self.setup_ui()
+        
+        # Data storage: every plotted point (power, position, axis/phase)
+        self.trace = ScanTrace()
+        
+        # Prometheus endpoint on localhost; the meter probe only makes sense on real hardware
+        metrics_server.start(probe_host=POWER_METER_IP if backend() == 'hardware' else None)
+        
+        # Cameras come up in the background; the DS102 is read once the window is shown
+        self.start_camera_init()
+        self.root.after(100, self.read_current_positions)
+    
+    def start_camera_init(self):
+        """Import and initialize both cameras in a background thread"""
+        self.camera_status.config(text="Camera: Initializing...")
+        self.live_camera_status.config(fg="orange")
+        result = {}
+        
+        def work():
+            if not load_camera_stack():
+                return
             try:
                 initialize_camera_system(enable_camera=True)
+                result['basic'] = True
                 print("[INFO] Camera system initialized for EDWA")
             except Exception as e:
                 print(f"[WARNING] Camera system initialization failed: {e}")
-                self.camera_enabled.set(False)
-        
-        # Initialize enhanced camera if available
-        if ENHANCED_CAMERA_AVAILABLE:
             try:
-                self.enhanced_camera = EnhancedPixelinkCamera()
-                if self.enhanced_camera.initialize():
+                camera = EnhancedPixelinkCamera()
+                if camera.initialize():
+                    result['enhanced'] = camera
                     print("[INFO] Enhanced camera system initialized for EDWA")
                 else:
                     print("[WARNING] Enhanced camera initialization failed")
-                    self.enhanced_camera = None
             except Exception as e:
                 print(f"[WARNING] Enhanced camera system initialization failed: {e}")
-                self.enhanced_camera = None
-        
-        # Initialize axis variables
-        for axis in AXES:
-            self.axis_enabled[axis] = tk.BooleanVar(value=False)
-            self.axis_entries[axis] = {}
-            self.current_positions[axis] = 0
         
-        self.setup_ui()
-        
-        # Data storage
-        self.iterations, self.powers, self.colors, self.positions = [], [], [], []
+        self.camera_init_thread = threading.Thread(target=work, name="camera-init", daemon=True)
+        self.camera_init_thread.start()
+        self.root.after(200, self.finish_camera_init, result)
+    
+    def finish_camera_init(self, result):
+        """Back on the GUI thread: show the camera state once initialization is done"""
+        if self.camera_init_thread.is_alive():
+            self.root.after(200, self.finish_camera_init, result)
+            return
+        self.camera_init_thread = None
+        self.enhanced_camera = result.get('enhanced')
+        self.camera_enabled.set(CAMERA_AVAILABLE and result.get('basic', False))
+        self.live_camera_status.config(fg="red")
         
-        # Read initial positions
-        self.read_current_positions()
+        if self.enhanced_camera:
+            status_text = "Enhanced Camera: Ready"
+            info = self.enhanced_camera.camera_info
+            if info:
+                status_text += f" ({info.get('model', 'Unknown')} - {info.get('serial', 'Unknown')})"
+            try:
+                self.enhanced_camera_gui = EnhancedCameraGUI(self.camera_controls_frame, self.enhanced_camera)
+                print("[INFO] Enhanced camera GUI integrated into main interface")
+            except Exception as e:
+                print(f"[WARNING] Failed to create enhanced camera GUI: {e}")
+        elif CAMERA_AVAILABLE:
+            status_text = "Basic Camera: Ready"
+        else:
+            status_text = "Camera: Not Available"
+        self.camera_status.config(text=status_text)
+    
+    def camera_initializing(self):
+        """True (and tells the user) while the background camera init is still running"""
+        if self.camera_init_thread is not None:
+            messagebox.showinfo("Camera", "Camera is still initializing, please try again in a moment")
+            return True
+        return False
     
     def setup_ui(self):
         # Main frame with three panels
@@ -1040,15 +379,31 @@ class OptimizerApp:
         utility_button_frame.pack(fill=tk.X, pady=10)
         
         tk.Button(utility_button_frame, text="Screenshots", command=self.capture_screenshots, bg="lightcyan", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(utility_button_frame, text="Resume Last Scan", command=self.resume_last_scan, bg="lightyellow", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(utility_button_frame, text="I/O Stats", command=lambda: io_stats.IOStatsWindow(self.root), bg="lavender", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
         
         # Status
         self.status = tk.Label(control_frame, text="Ready.", font=("Arial", 12), fg="blue")
         self.status.pack(pady=10)
         
+        # Post-run artefact progress (heatmaps, screenshots, camera, CSV)
+        self.postrun_status = tk.Label(control_frame, text="", font=("Arial", 10), fg="gray")
+        self.postrun_status.pack()
+        
         # Setup plot in the right panel
-        self.fig, self.ax = plt.subplots(figsize=(6, 5))  # Smaller to fit new layout
+        self.fig = Figure(figsize=(6, 5))  # Smaller to fit new layout
+        self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.live_plot = LivePowerPlot(self.fig, self.ax, self.canvas, AXIS_COLORS)
+        
+        # Live heatmap panel, only shown during 2-D scans
+        self.heatmap_frame = tk.Frame(plot_frame)
+        self.heatmap_fig = Figure(figsize=(6, 4))
+        self.heatmap_ax = self.heatmap_fig.add_subplot(111)
+        self.heatmap_canvas = FigureCanvasTkAgg(self.heatmap_fig, master=self.heatmap_frame)
+        self.heatmap_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.live_heatmap = LiveHeatmap(self.heatmap_fig, self.heatmap_ax, self.heatmap_canvas)
     
     def setup_live_camera_view(self, parent):
         """Setup built-in live camera view panel"""
@@ -1227,18 +582,8 @@ class OptimizerApp:
                       variable=self.camera_enabled, bg="#fff0e6", 
                       font=("Arial", 10, "bold")).pack(side=tk.LEFT)
         
-        # Enhanced status display
-        if ENHANCED_CAMERA_AVAILABLE and self.enhanced_camera:
-            status_text = "Enhanced Camera: Ready"
-            info = self.enhanced_camera.camera_info
-            if info:
-                status_text += f" ({info.get('model', 'Unknown')} - {info.get('serial', 'Unknown')})"
-        elif CAMERA_AVAILABLE:
-            status_text = "Basic Camera: Ready"
-        else:
-            status_text = "Camera: Not Available"
-            
-        self.camera_status = tk.Label(camera_frame, text=status_text, 
+        # Enhanced status display (filled in by finish_camera_init)
+        self.camera_status = tk.Label(camera_frame, text="Camera: Not Available", 
                                     bg="#fff0e6", font=("Arial", 9))
         self.camera_status.pack(fill=tk.X, padx=5, pady=2)
         
@@ -1253,13 +598,8 @@ class OptimizerApp:
         tk.Button(camera_button_frame, text="Export Data", command=self.export_camera_data, 
                  bg="lightgreen", font=("Arial", 9), width=12).pack(side=tk.LEFT, padx=2)
         
-        # Enhanced camera controls (if available)
-        if ENHANCED_CAMERA_AVAILABLE and self.enhanced_camera:
-            try:
-                self.enhanced_camera_gui = EnhancedCameraGUI(camera_frame, self.enhanced_camera)
-                print("[INFO] Enhanced camera GUI integrated into main interface")
-            except Exception as e:
-                print(f"[WARNING] Failed to create enhanced camera GUI: {e}")
+        # Enhanced camera controls are added here once the camera is initialized
+        self.camera_controls_frame = camera_frame
     
     def setup_axis_config(self, parent):
         """Setup DS102 axis configuration UI"""
@@ -1311,6 +651,8 @@ class OptimizerApp:
                  bg="lightcoral", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
         tk.Button(ds102_button_frame, text="Set Defaults", command=self.set_default_scan_range, 
                  bg="lightyellow", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
+        tk.Button(ds102_button_frame, text="Drift Correct", command=self.apply_drift_correction, 
+                 bg="lavender", font=("Arial", 10), width=12).pack(side=tk.LEFT, padx=5)
     
     def read_current_positions(self):
         """Read current positions from DS102"""
@@ -1318,7 +660,7 @@ class OptimizerApp:
             self.status.config(text="Reading DS102 positions...")
             self.root.update()
             
-            ser = serial.Serial(STAGE_PORT, baudrate=BAUDRATE, timeout=0.5)
+            ser = open_stage(STAGE_PORT, baudrate=BAUDRATE, timeout=0.5)
             positions = get_all_positions(ser)
             ser.close()
             
@@ -1349,7 +691,7 @@ class OptimizerApp:
             self.status.config(text="Reading laser values...")
             self.root.update()
             
-            rm = pyvisa.ResourceManager()
+            rm = resource_manager()
             
             # Read Pump 1
             try:
@@ -1499,6 +841,66 @@ class OptimizerApp:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to set default ranges: {e}")
     
+    def apply_drift_correction(self):
+        """Re-centre the 2-D scan window on the peak position predicted from scan-to-scan drift"""
+        enabled = [axis for axis in AXES if self.axis_enabled[axis].get()]
+        if len(enabled) != 2:
+            messagebox.showwarning("Drift Correct", "Enable exactly the two axes of a 2-D scan.")
+            return
+        
+        try:
+            # Prefer history taken at the current positions of the other axes
+            fixed = {axis: self.current_positions[axis] for axis in AXES if axis not in enabled}
+            window = {}
+            for axis in enabled:
+                try:
+                    window[axis] = (float(self.axis_entries[axis]['start'].get()),
+                                    float(self.axis_entries[axis]['stop'].get()))
+                except ValueError:
+                    window[axis] = (self.current_positions[axis] - 100, self.current_positions[axis] + 100)
+            log_root = os.path.join("..", "log")
+            suggestion = suggest_origin(log_root, enabled, fixed=fixed, window=window)
+            note = ""
+            if suggestion is None:
+                suggestion = suggest_origin(log_root, enabled, window=window)
+                note = "\n(No earlier scans at the current positions of the other axes; using the latest series.)"
+            if suggestion is None:
+                messagebox.showinfo("Drift Correct", f"No earlier {'/'.join(enabled)} scans found in the log.")
+                return
+            
+            centre_str = ', '.join([f"{a}:{suggestion['origin'][a]:.0f}" for a in enabled])
+            current_str = ', '.join([f"{a}:{(window[a][0] + window[a][1]) / 2:.0f}" for a in enabled])
+            if suggestion['stale']:
+                rate_str = f"not used (latest scan is {suggestion['hours']:.0f} h old)"
+            elif suggestion['rate']:
+                rate_str = ', '.join([f"{a}:{suggestion['rate'][a]:+.1f}/h (rms {suggestion['residual'][a]:.1f})" for a in enabled])
+                rate_str += f", applied for {suggestion['extrapolated_hours']:.1f} of {suggestion['hours']:.1f} h"
+            else:
+                rate_str = "n/a (single scan)"
+            if suggestion['clipped']:
+                note += f"\n(Shift limited to one window width on {', '.join(suggestion['clipped'])}.)"
+            print(f"[INFO] Drift-compensated centre {centre_str} from {suggestion['scans']} scans, rate {rate_str}")
+            if not messagebox.askyesno("Drift Correct",
+                                       f"Move the scan window centre from {current_str}\n"
+                                       f"to the predicted peak {centre_str}?\n\n"
+                                       f"Drift rate: {rate_str}\n"
+                                       f"Based on {suggestion['scans']} scans, latest {os.path.basename(suggestion['last'])}{note}"):
+                self.status.config(text="Drift correction not applied")
+                return
+            
+            for axis in enabled:
+                half = abs(window[axis][1] - window[axis][0]) / 2
+                centre = round(suggestion['origin'][axis])
+                self.axis_entries[axis]['start'].delete(0, tk.END)
+                self.axis_entries[axis]['start'].insert(0, str(centre - half))
+                self.axis_entries[axis]['stop'].delete(0, tk.END)
+                self.axis_entries[axis]['stop'].insert(0, str(centre + half))
+            
+            self.status.config(text=f"Scan window centred on predicted peak {centre_str}")
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to compute drift correction: {e}")
+    
     def test_camera_capture(self):
         """Test camera capture functionality"""
         try:
@@ -1536,7 +938,7 @@ class OptimizerApp:
                 
                 # Get current DS102 position for measurement-triggered capture
                 try:
-                    ser = serial.Serial(STAGE_PORT, BAUDRATE, timeout=1)
+                    ser = open_stage(STAGE_PORT, BAUDRATE, timeout=1)
                     current_position = get_all_positions(ser)
                     power_reading = 85.0  # Mock power reading for test
                     
@@ -1573,6 +975,8 @@ class OptimizerApp:
     
     def open_enhanced_camera_preview(self):
         """Open enhanced camera preview window"""
+        if self.camera_initializing():
+            return
         try:
             if not self.camera_enabled.get():
                 messagebox.showinfo("Camera", "Camera is disabled")
@@ -1632,6 +1036,8 @@ class OptimizerApp:
     
     def start_live_camera(self):
         """Start the built-in live camera view"""
+        if self.camera_initializing():
+            return
         try:
             if not self.camera_enabled.get():
                 messagebox.showinfo("Camera", "Camera is disabled")
@@ -1687,12 +1093,14 @@ class OptimizerApp:
                 settings = self.enhanced_camera.get_camera_settings()
                 status_text = f"● LIVE STREAMING ●\\n\\nPixeLINK D3010 - Serial: 318002000\\n\\nExp: {settings['exposure_time']:.1f}ms | Gain: {settings['gain']:.1f}dB\\n\\nStreaming: {self.enhanced_camera.is_streaming}"
                 self.camera_display_label.config(text=status_text)
+                metrics_server.record_frame()
                 
                 # Schedule next update
                 self.live_camera_update_id = self.root.after(100, self.update_live_camera_feed)
                 
             except Exception as e:
                 print(f"[WARNING] Live camera feed update error: {e}")
+                metrics_server.record_error('camera')
                 self.stop_live_camera()
     
     def quick_capture(self):
@@ -1704,7 +1112,7 @@ class OptimizerApp:
                 
             # Get current position for measurement capture
             try:
-                ser = serial.Serial(STAGE_PORT, BAUDRATE, timeout=1)
+                ser = open_stage(STAGE_PORT, BAUDRATE, timeout=1)
                 current_position = get_all_positions(ser)
                 power_reading = 88.0  # Mock reading for quick capture
                 
@@ -1825,6 +1233,16 @@ class OptimizerApp:
         self.stop_requested = False
         self.stop_button.config(state="normal", text="STOP")
     
+    def open_power_meter(self, rm):
+        """Power meter session behind a circuit breaker: a hung meter is reset
+        and reconnected mid-run while the GUI keeps updating"""
+        def status(text):
+            self.status.config(text=f"[METER] {text}")
+            self.root.update()
+        return GuardedMeter(lambda: rm.open_resource(POWER_METER_ADDRESS), status_callback=status,
+                            idle_callback=self.root.update, stop_check=lambda: self.stop_requested,
+                            open_callback=lambda: metrics_server.record_error('meter_breaker'))
+    
     def move_to_best_position(self, ser, best_position, best_power, operation_name="Optimization"):
         """Helper function to move DS102 to the best position found and verify"""
         try:
@@ -1859,7 +1277,7 @@ class OptimizerApp:
             self.root.update()
             
             # Initialize power meter
-            rm = pyvisa.ResourceManager()
+            rm = resource_manager()
             pwr = rm.open_resource(POWER_METER_ADDRESS)
             pwr.timeout = 5000
             
@@ -1900,110 +1318,25 @@ class OptimizerApp:
             messagebox.showerror("Debug Error", f"Power meter debug failed: {e}")
             print(f"[ERROR] Debug failed: {e}")
 
+    @tracing.traced("gui.update_plot")
     def update_plot(self, iteration, power, axis, position):
-        self.iterations.append(iteration)
-        self.powers.append(power)
-        
-        # Handle special markers and axis combinations
-        try:
-            if axis == 'START':
-                self.colors.append('red')  # Red for starting position
-            elif axis == 'LOCAL':
-                self.colors.append('orange')  # Orange for local scanning
-            elif len(axis) == 2 and axis[0] in AXES and axis[1] in AXES:
-                # 2D cross-scan combinations (e.g. 'XY', 'ZU', 'VW')
-                self.colors.append('purple')  # Purple for 2D cross-scans
-            elif axis in AXES:
-                self.colors.append(AXIS_COLORS[axis])  # Normal axis colors
-            else:
-                self.colors.append('gray')  # Default for unknown: {axis}
-        except Exception as e:
-            print(f"[ERROR] update_plot axis handling failed for axis '{axis}': {e}")
-            self.colors.append('gray')  # Fallback color
-            
-        self.positions.append(position.copy())
-        self.ax.clear()
-        
-        # Enhanced plot with axis information
-        self.ax.set_title(f"Power vs Iteration (Current Axis: {axis})", fontsize=12)
-        self.ax.set_xlabel("Iteration")
-        self.ax.set_ylabel("Power (dBm)")
-        
-        # Plot all points with color coding, special handling for starting position
-        for i, (iter_val, pwr, color) in enumerate(zip(self.iterations, self.powers, self.colors)):
-            if iter_val == -1:  # Starting position
-                self.ax.scatter([iter_val], [pwr], c='red', s=150, marker='*', 
-                              edgecolor='white', linewidth=1, label='Starting Position')
-            else:
-                self.ax.scatter([iter_val], [pwr], c=color, s=50, alpha=0.7)
-        
-        # Highlight the current point (if not starting position)
-        if len(self.iterations) > 0 and iteration != -1:
-            try:
-                # Determine highlight color based on axis type
-                if axis == 'START':
-                    highlight_color = 'red'
-                elif axis == 'LOCAL':
-                    highlight_color = 'orange'
-                elif len(axis) == 2 and axis[0] in AXES and axis[1] in AXES:
-                    # 2D cross-scan combinations (e.g. 'XY', 'ZU', 'VW')
-                    highlight_color = 'purple'
-                elif axis in AXES:
-                    highlight_color = AXIS_COLORS[axis]
-                else:
-                    highlight_color = 'gray'
-                    
-                self.ax.scatter([iteration], [power], c=[highlight_color], s=100, 
-                              marker='o', edgecolor='black', linewidth=2, label=f'Current: {axis}')
-            except Exception as e:
-                print(f"[ERROR] Failed to highlight current point for axis '{axis}': {e}")
-                # Fallback highlighting with gray color
-                self.ax.scatter([iteration], [power], c=['gray'], s=100, 
-                              marker='o', edgecolor='black', linewidth=2, label=f'Current: {axis}')
-        
-        # Add legend showing axis colors
-        legend_elements = []
-        used_axes = set()
-        for i, color in enumerate(self.colors):
-            # Find axis name from color, handle special colors gracefully
-            axis_candidates = [a for a, c in AXIS_COLORS.items() if c == color]
-            if axis_candidates:
-                axis_name = axis_candidates[0]
-                label_text = f'Axis {axis_name}'
-            elif color == 'red':
-                axis_name = 'START'
-                label_text = 'Starting Position'
-            elif color == 'orange':
-                axis_name = 'LOCAL'  
-                label_text = 'Local Scan'
-            elif color == 'purple':
-                axis_name = '2D'
-                label_text = '2D Cross-Scan'
-            elif color == 'gray':
-                axis_name = 'UNKNOWN'
-                label_text = 'Unknown'
-            else:
-                axis_name = f'COLOR_{color}'
-                label_text = f'Unknown ({color})'
-                
-            if axis_name not in used_axes:
-                legend_elements.append(plt.Line2D([0], [0], marker='o', color='w', 
-                                                markerfacecolor=color, markersize=8, label=label_text))
-                used_axes.add(axis_name)
-        
-        if legend_elements:
-            self.ax.legend(handles=legend_elements, loc='upper left', bbox_to_anchor=(1.02, 1))
+        # Axis label doubles as the phase of the point (axis, START, LOCAL, 2D pair)
+        self.trace.append(iteration, power, position, phase=axis)
+        metrics_server.record_point(power)
         
-        self.ax.grid(True, alpha=0.3)
+        # Append to the persistent plot (rate-limited redraw, blitted highlight)
+        self.live_plot.add_point(iteration, power, axis)
         
         # Show current position info in status
         pos_str = ', '.join([f"{a}:{position[a]:.0f}" for a in AXES])
         current_status = self.status.cget("text")
         if "Phase" not in current_status:  # Don't override phase information
             self.status.config(text=f"Optimizing {axis}: {power:.1f} dBm @ {pos_str}")
-        
-        self.fig.tight_layout()
-        self.canvas.draw()
+    
+    def clear_plot_data(self):
+        """Clear stored points and the live plot before a new run"""
+        self.trace.clear()
+        self.live_plot.reset()
 
     def get_scan_parameters(self):
         """Get scan parameters for enabled axes"""
@@ -2029,28 +1362,39 @@ class OptimizerApp:
         
         return scan_params, enabled_axes
     
-    def run_brute_force_scan(self):
-        """Run brute force 3D scanning"""
+    def run_brute_force_scan(self, resume=None):
+        """Run brute force 3D scanning
+
+        resume is (log_dir, plan, scan_params, trace) from find_resumable_scan
+        to continue an interrupted scan instead of starting a new one.
+        """
         try:
             # Reset stop flag at start
             self.reset_stop_flag()
+            tracing.start_run()
+            metrics_server.start_run('scan')
             
             self.status.config(text="Initializing brute force scan...")
             self.root.update()
             
-            # Get scan parameters
-            scan_params, enabled_axes = self.get_scan_parameters()
+            # Get scan parameters (a resumed scan uses its saved plan)
+            if resume is not None:
+                log_dir, plan, scan_params, resume_trace = resume
+                enabled_axes = list(plan['axes'])
+            else:
+                resume_trace = None
+                scan_params, enabled_axes = self.get_scan_parameters()
             if scan_params is None or not enabled_axes:
                 messagebox.showwarning("No Axes Selected", "Please enable at least one axis for scanning.")
                 return
             
             # Initialize instruments
-            rm = pyvisa.ResourceManager()
+            rm = resource_manager()
             p1 = rm.open_resource(PUMP1_ADDRESS)
             p2 = rm.open_resource(PUMP2_ADDRESS)
             sgl = rm.open_resource(SIGNAL_ADDRESS)
-            pwr = rm.open_resource(POWER_METER_ADDRESS)
-            ser = serial.Serial(STAGE_PORT, baudrate=BAUDRATE, timeout=1)
+            pwr = self.open_power_meter(rm)
+            ser = open_stage(STAGE_PORT, baudrate=BAUDRATE, timeout=1)
             ser.reset_input_buffer()
             
             # Setup lasers
@@ -2059,78 +1403,137 @@ class OptimizerApp:
             setup_signal(sgl, self.signal_power.get())
             
             # Get origin positions
-            origin_positions = get_all_positions(ser)
+            if resume is not None:
+                # Back to the saved origin, then check the stored points still match
+                origin_positions = dict(plan['origin'])
+                for axis in AXES:
+                    move_axis_to(ser, axis, origin_positions[axis])
+                
+                self.status.config(text="Verifying stored scan points before resuming...")
+                self.root.update()
+                rows = select_verification_points(resume_trace)
+                measured = verify_scan_points(pwr, ser, resume_trace, rows, build_scan_positions(scan_params)[0])
+                ok, max_diff = check_drift(resume_trace.column('power')[rows], measured)
+                if not ok and not messagebox.askyesno(
+                        "Drift Detected",
+                        f"Re-measured points differ from the stored scan by up to {max_diff:.2f} dBm.\n"
+                        f"Resume the scan anyway?"):
+                    self.status.config(text=f"Resume cancelled: drift {max_diff:.2f} dBm")
+                    p1.write("OUTP:STAT OFF")
+                    p2.write("OUTP:STAT OFF")
+                    sgl.write(":SOUR1:POW:STAT OFF")
+                    p1.close(); p2.close(); sgl.close(); pwr.close(); ser.close()
+                    return
+            else:
+                origin_positions = get_all_positions(ser)
             
             self.status.config(text=f"Scanning {len(enabled_axes)}D grid on axes: {', '.join(enabled_axes)}")
             self.root.update()
             
             # Clear previous data
-            self.iterations, self.powers, self.colors, self.positions = [], [], [], []
+            self.clear_plot_data()
+            
+            # Live heatmap for 2-D scans so bad scans can be aborted early
+            point_callback = None
+            if len(enabled_axes) == 2:
+                self.heatmap_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+                self.live_heatmap.start(scan_params[enabled_axes[0]], scan_params[enabled_axes[1]],
+                                        enabled_axes[0], enabled_axes[1])
+                
+                def heatmap_point(idx, position, power):
+                    self.live_heatmap.add_point(position[enabled_axes[0]], position[enabled_axes[1]], power)
+                point_callback = heatmap_point
+                
+                if resume_trace is not None:
+                    for point in resume_trace:
+                        if not point['is_starting_position']:
+                            point_callback(point['index'], point['position'], point['power'])
+            else:
+                self.heatmap_frame.pack_forget()
             
             # Progress callback
             def update_progress(current, total):
                 self.status.config(text=f"Scanning: {current}/{total} ({100*current/total:.1f}%)")
-                self.root.update()
+                with tracing.span("gui.root_update"):
+                    self.root.update()
             
             # Stop check callback
             def check_stop():
                 return self.stop_requested
             
+            # Log directory, scan plan and journal exist before the scan so an
+            # interrupted scan keeps every measured point and can be resumed
+            if resume is not None:
+                timestamp = plan['timestamp']
+                start_scan_session(log_dir, timestamp)
+            else:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                log_dir = os.path.join("..", "log", f"scan_{timestamp}")
+                os.makedirs(log_dir, exist_ok=True)
+                write_scan_plan(log_dir, timestamp, scan_params, origin_positions)
+            journal = JournalWriter(os.path.join(log_dir, f"scan_data_{timestamp}.journal"))
+            
             # Perform brute force scan
-            scan_data = brute_force_3d_scan(pwr, ser, scan_params, origin_positions, update_progress, check_stop)
+            try:
+                scan_data = brute_force_3d_scan(pwr, ser, scan_params, origin_positions, update_progress, check_stop,
+                                                point_callback, journal, resume_trace)
+            finally:
+                journal.close()
+            scan_data.detach_journal()
+            end_scan_session(log_dir, timestamp, scan_data)
+            if not self.stop_requested:
+                mark_scan_finished(log_dir, timestamp, scan_data.missed)
+            if scan_data.missed:
+                messagebox.showwarning("Missed Points",
+                                       f"{len(scan_data.missed)} scan point(s) have no reading because the power "
+                                       f"meter did not answer.\nUse Resume Last Scan to measure them.")
+            self.live_heatmap.flush()
             
             # Process data for plotting
             for i, point in enumerate(scan_data):
                 # Handle starting position with special marker
-                if point.get('is_starting_position', False):
+                if point['is_starting_position']:
                     self.update_plot(point['index'], point['power'], 'START', point['position'])
                 else:
                     self.update_plot(i, point['power'], enabled_axes[0], point['position'])
             
-            # Generate and save heatmaps
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_dir = os.path.join("..", "log", f"scan_{timestamp}")
-            os.makedirs(log_dir, exist_ok=True)
-            
-            generate_heatmaps(scan_data, enabled_axes, timestamp, log_dir)
-            
-            # Capture screenshots and camera images
-            self.status.config(text="Capturing screenshots...")
-            self.root.update()
-            
-            # Capture Keysight web interface
-            capture_keysight_screenshot(log_dir, timestamp)
-            
-            # Capture GUI screenshot
+            # GUI screenshot must be taken on the GUI thread, before anything changes
+            self.live_plot.flush()
             capture_gui_screenshot(self.root, log_dir, timestamp)
             
-            # Capture camera images if enabled
+            # Remaining artefacts run in the background; the hill climb prompt does not wait
+            # Meter state is read now, on the thread that owns the VISA session
+            meter_state = read_meter_state(pwr, read_power(pwr))
+            
+            self.post_run.start_run()
+            self.post_run.submit_render("heatmaps", generate_heatmaps, scan_data, enabled_axes, timestamp, log_dir)
+            self.post_run.submit_render("meter snapshot", write_meter_snapshot, meter_state, log_dir, timestamp)
             if self.camera_enabled.get():
-                try:
-                    # Capture scan starting position
-                    capture_scan_start_image(origin_positions, log_dir)
-                    
-                    # Capture images during scan process
-                    capture_scan_images_during_process(scan_data, log_dir)
-                    
-                    # Capture scan optimum position if we have results
-                    if scan_data:
-                        best_point = max(scan_data, key=lambda x: x['power'])
-                        capture_scan_optimum_image(best_point['position'], log_dir)
-                        
-                except Exception as e:
-                    print(f"[WARNING] Camera capture during scan failed: {e}")
-                    self.camera_status.config(text="Camera Status: Capture failed")
+                self.post_run.submit_io("camera", capture_scan_camera_set, origin_positions, scan_data, log_dir)
             
             # Save scan data
-            self.save_scan_results(scan_data, enabled_axes, timestamp, log_dir)
+            self.save_scan_results(scan_data, enabled_axes, timestamp, log_dir, journal)
+            self.post_run.watch(self.root, lambda text: self.postrun_status.config(text=text))
+            
+            # Sub-grid optimum from the neighbourhood of the best grid point
+            peak_fit = fit_scan_peak(scan_data, enabled_axes) if scan_data else None
+            if peak_fit is not None:
+                save_peak_fit(peak_fit, os.path.join(log_dir, f"peak_fit_{timestamp}.json"))
             
             # Display results and offer hill climbing
             if scan_data:
-                best_point = max(scan_data, key=lambda x: x['power'])
+                best_point = scan_data.best_point()
                 best_power = best_point['power']
                 best_pos = best_point['position']
                 pos_str = ', '.join([f"{a}:{best_pos[a]:.0f}" for a in AXES])
+                if peak_fit['valid']:
+                    fit_str = (', '.join([f"{a}:{peak_fit['center'][a]:.0f}" for a in peak_fit['axes']]) +
+                               f" (predicted {peak_fit['power']:.1f} dBm, width " +
+                               ', '.join([f"{a}:{peak_fit['sigma'][a]:.0f}" for a in peak_fit['axes']]) + ")")
+                    print(f"[SCAN COMPLETE] Fitted optimum: {fit_str}")
+                else:
+                    fit_str = f"not used ({peak_fit.get('reason')})"
+                    print(f"[SCAN COMPLETE] Peak fit {fit_str}")
                 
                 # Check if scan was stopped
                 if self.stop_requested:
@@ -2156,10 +1559,11 @@ class OptimizerApp:
                         "Scan Complete", 
                         f"Scan completed successfully!\n\n"
                         f"Maximum power found: {best_power:.1f} dBm\n"
-                        f"Best position: {pos_str}\n\n"
+                        f"Best position: {pos_str}\n"
+                        f"Fitted optimum: {fit_str}\n\n"
                         f"Would you like to continue with hill climbing optimization?\n\n"
                         f"This will:\n"
-                        f"1. Move DS102 to the optimal position found by scan\n"
+                        f"1. Move DS102 to the fitted optimum (or the best scan point)\n"
                         f"2. Perform smart hill climbing (≤400 tests) on all 6 axes\n"
                         f"3. Find even better positions around the scan optimum",
                         icon='question'
@@ -2175,7 +1579,7 @@ class OptimizerApp:
                     self.global_best_power = best_power
                     
                     # Don't cleanup instruments yet - pass them to hill climbing with scan log directory
-                    self.continue_with_hill_climbing(p1, p2, sgl, pwr, ser, best_pos, log_dir)
+                    self.continue_with_hill_climbing(p1, p2, sgl, pwr, ser, best_pos, log_dir, peak_fit)
                     return
                 else:
                     self.status.config(text="Scan completed - Hill climbing skipped")
@@ -2185,7 +1589,8 @@ class OptimizerApp:
                 pos_str = ', '.join([f"{a}:{current_pos[a]:.0f}" for a in AXES])
                 self.status.config(text=f"Scan completed - no data collected. At position: {pos_str}")
             
-            # Cleanup and reset stop button
+            # Cleanup and reset stop button (camera captures need the lasers on)
+            self.wait_for_camera()
             p1.write("OUTP:STAT OFF")
             p2.write("OUTP:STAT OFF")
             sgl.write(":SOUR1:POW:STAT OFF")
@@ -2193,12 +1598,27 @@ class OptimizerApp:
             
         except Exception as e:
             self.status.config(text=f"[ERROR] {e}")
+            metrics_server.record_error('scan')
             messagebox.showerror("Error", f"Brute force scan failed: {e}")
             print(e)
         finally:
             # Always reset stop flag when optimization ends
             self.reset_stop_flag()
     
+    def resume_last_scan(self):
+        """Continue the most recent scan that did not measure all of its points"""
+        found = find_resumable_scan(os.path.join("..", "log"))
+        if found is None:
+            messagebox.showinfo("Resume Scan", "No interrupted scan found.")
+            return
+        log_dir, plan, scan_params, trace = found
+        done = len(completed_indices(trace))
+        if not messagebox.askyesno("Resume Scan",
+                                   f"Resume scan {plan['timestamp']} on axes {', '.join(plan['axes'])}?\n"
+                                   f"{done}/{plan['total_points']} points already measured."):
+            return
+        self.run_brute_force_scan(resume=found)
+    
     def run_climb_hill_with_position_update(self):
         """Wrapper for hill climbing that updates DS102 positions first"""
         try:
@@ -2225,17 +1645,19 @@ class OptimizerApp:
         try:
             # Reset stop flag at start
             self.reset_stop_flag()
+            tracing.start_run()
+            metrics_server.start_run('climb')
             
             self.status.config(text="Initializing hill climb on all 6 axes...")
             self.root.update()
 
             # Initialize instruments
-            rm = pyvisa.ResourceManager()
+            rm = resource_manager()
             p1 = rm.open_resource(PUMP1_ADDRESS)
             p2 = rm.open_resource(PUMP2_ADDRESS)
             sgl = rm.open_resource(SIGNAL_ADDRESS)
-            pwr = rm.open_resource(POWER_METER_ADDRESS)
-            ser = serial.Serial(STAGE_PORT, baudrate=BAUDRATE, timeout=1)
+            pwr = self.open_power_meter(rm)
+            ser = open_stage(STAGE_PORT, baudrate=BAUDRATE, timeout=1)
             ser.reset_input_buffer()
 
             # Setup lasers (use current values or defaults)
@@ -2256,7 +1678,13 @@ class OptimizerApp:
             self.root.update()
             
             # Clear previous data
-            self.iterations, self.powers, self.colors, self.positions = [], [], [], []
+            self.clear_plot_data()
+            
+            # Journal every point from the start so a crash keeps the run
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            log_dir = os.path.join("..", "log", f"hillclimb_{timestamp}")
+            os.makedirs(log_dir, exist_ok=True)
+            self.start_journal(os.path.join(log_dir, f"climb_hill_{timestamp}.journal"))
             
             i = 0
             position = current_positions.copy()  # Start from current DS102 position
@@ -2273,7 +1701,8 @@ class OptimizerApp:
             for axis, pos, pwrval in random_walk_constrained(pwr, ser, position, current_positions, 20, 10, check_stop):
                 self.update_plot(i, pwrval, axis, pos)
                 i += 1
-                self.root.update()
+                with tracing.span("gui.root_update"):
+                    self.root.update()
                 
                 # Check if stopped during random walk
                 if self.stop_requested:
@@ -2288,17 +1717,18 @@ class OptimizerApp:
                 for axis, pos, pwrval in hill_climb_all_axes_constrained(pwr, ser, position, 10, check_stop):
                     self.update_plot(i, pwrval, axis, pos)
                     i += 1
-                    self.root.update()
+                    with tracing.span("gui.root_update"):
+                        self.root.update()
                     
                     # Check if stopped during hill climbing
                     if self.stop_requested:
                         break
 
             # Display results and handle positioning
-            if self.powers:
-                max_idx = np.argmax(self.powers)
-                best = self.powers[max_idx]
-                best_position = self.positions[max_idx]
+            if len(self.trace):
+                max_idx = self.trace.best_index()
+                best = self.trace.column('power')[max_idx]
+                best_position = self.trace.position(max_idx)
                 pos_str = ', '.join([f"{a}:{best_position[a]:.0f}" for a in AXES])
                 
                 if self.stop_requested:
@@ -2351,33 +1781,31 @@ class OptimizerApp:
                     self.status.config(text="Hill climb completed - no data collected")
 
             # Capture screenshots for hill climb
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_dir = os.path.join("..", "log", f"hillclimb_{timestamp}")
-            os.makedirs(log_dir, exist_ok=True)
-            
-            self.status.config(text="Capturing screenshots...")
-            self.root.update()
+            # GUI screenshot on the GUI thread; the rest runs in the background
+            self.live_plot.flush()
+            capture_gui_screenshot(self.root, log_dir, timestamp)
             
-            # Capture Keysight web interface
-            capture_keysight_screenshot(log_dir, timestamp)
+            meter_state = read_meter_state(pwr, read_power(pwr))
             
-            # Capture GUI screenshot
-            capture_gui_screenshot(self.root, log_dir, timestamp)
+            self.post_run.start_run()
+            self.post_run.submit_render("meter snapshot", write_meter_snapshot, meter_state, log_dir, timestamp)
             
             # Capture camera images if enabled
             if self.camera_enabled.get():
                 try:
                     # Capture hill climbing optimum position
                     final_pos = get_all_positions(ser)
-                    capture_hillclimb_optimum_image(final_pos, log_dir)
+                    self.post_run.submit_io("camera", capture_hillclimb_optimum_image, final_pos, log_dir)
                     
                 except Exception as e:
                     print(f"[WARNING] Camera capture during hill climbing failed: {e}")
                     self.camera_status.config(text="Camera Status: Capture failed")
             
             self.save_results(log_dir)
+            self.post_run.watch(self.root, lambda text: self.postrun_status.config(text=text))
 
-            # Cleanup
+            # Cleanup, once the optimum image has been taken with the lasers still on
+            self.wait_for_camera()
             p1.write("OUTP:STAT OFF")
             p2.write("OUTP:STAT OFF")
             sgl.write(":SOUR1:POW:STAT OFF")
@@ -2385,12 +1813,37 @@ class OptimizerApp:
 
         except Exception as e:
             self.status.config(text=f"[ERROR] {e}")
+            metrics_server.record_error('climb')
             messagebox.showerror("Error", f"Hill climb failed: {e}")
             print(e)
         finally:
+            self.close_journal()
             # Always reset stop flag when optimization ends
             self.reset_stop_flag()
 
+    def start_journal(self, path):
+        """Stream every point added to self.trace to a crash-safe journal file"""
+        self.close_journal()
+        self.journal = JournalWriter(path)
+        self.trace.attach_journal(self.journal)
+        return self.journal
+    
+    def close_journal(self):
+        """Flush and close the active journal; returns it (or None)"""
+        journal, self.journal = self.journal, None
+        if journal is not None:
+            self.trace.detach_journal()
+            journal.close()
+        return journal
+    
+    def write_trace_csv(self, csv_path, layout):
+        """Finish the run journal into csv_path (in the background if possible)"""
+        journal = self.close_journal()
+        if journal is not None and journal.error is None:
+            self.post_run.submit_io("results", convert_journal, journal.path, csv_path, layout)
+        else:
+            self.trace.to_csv(csv_path, layout=layout)
+
     def save_results(self, log_dir=None):
         """Save hill climb results to specified directory or default location"""
         if log_dir is None:
@@ -2401,19 +1854,37 @@ class OptimizerApp:
         csv_path = os.path.join(log_dir, f"climb_hill_{ts}.csv")
         plot_path = os.path.join(log_dir, f"climb_hill_plot_{ts}.png")
         
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Iteration", "Power (dBm)", "Axis"] + AXES)
-            for i, (pwr, color, pos) in enumerate(zip(self.powers, self.colors, self.positions)):
-                # Find axis from color
-                axis = [a for a, c in AXIS_COLORS.items() if c == color][0] if color in AXIS_COLORS.values() else 'Unknown'
-                writer.writerow([i, pwr, axis] + [pos[a] for a in AXES])
-        self.fig.savefig(plot_path)
+        self.write_trace_csv(csv_path, 'climb')
+        self.live_plot.flush()
+        with tracing.span("gui.savefig"):
+            self.fig.savefig(plot_path)
         print(f"[INFO] Hill climb results saved to {csv_path} and {plot_path}")
+        tracing.write_run(log_dir, ts)
+        io_stats.write_run(log_dir, ts)
+    
+    def wait_for_camera(self):
+        """Block until queued camera captures finish (before the stage moves or the lasers go off)"""
+        if any(name == "camera" and not future.done() for name, future in self.post_run.jobs):
+            self.status.config(text="Waiting for camera captures...")
+            self.root.update()
+        self.post_run.wait(["camera"])
     
-    def continue_with_hill_climbing(self, p1, p2, sgl, pwr, ser, best_position, scan_log_dir):
-        """Continue with hill climbing from the best scan position"""
+    def continue_with_hill_climbing(self, p1, p2, sgl, pwr, ser, best_position, scan_log_dir, peak_fit=None):
+        """Continue with hill climbing from the best scan position
+
+        With a valid peak_fit (fit_scan_peak) the climb starts at the fitted
+        sub-grid optimum and its 1-D ranges and fine step follow the fitted
+        peak width.
+        """
         try:
+            # Scan camera captures must finish before the stage leaves the scan position
+            self.wait_for_camera()
+            
+            fitted = peak_fit is not None and peak_fit['valid']
+            if fitted:
+                best_position = peak_fit['position']
+            scan_ranges, fine_step = climb_seed(peak_fit if fitted else None)
+            
             self.status.config(text="Moving to optimal position for hill climbing...")
             self.root.update()
             
@@ -2439,6 +1910,23 @@ class OptimizerApp:
             
             # Critical: Verify we're actually at the scan optimum
             actual_power = read_power(pwr)
+            
+            # A fitted optimum that reads worse than the best grid point is not trusted
+            if fitted and actual_power is not None and actual_power < self.best_scan_power - 0.5:
+                print(f"[HILLCLIMB SETUP] Fitted optimum reads {actual_power:.1f} dBm, below the best scan point - using the scan point")
+                best_position = peak_fit['grid_best']['position']
+                for axis in AXES:
+                    move_axis_to(ser, axis, best_position[axis])
+                time.sleep(1)
+                current_pos = get_all_positions(ser)
+                pos_str = ', '.join([f"{a}:{current_pos[a]:.0f}" for a in AXES])
+                actual_power = read_power(pwr)
+                scan_ranges, fine_step = climb_seed(None)
+            elif fitted and actual_power is not None and actual_power > self.global_best_power:
+                self.global_best_power = actual_power
+                self.global_best_position = current_pos.copy()
+                print(f"[HILLCLIMB SETUP] Fitted optimum improves on the scan: {actual_power:.1f} dBm")
+            
             power_diff = abs(actual_power - self.best_scan_power) if actual_power is not None else float('inf')
             
             print(f"[HILLCLIMB SETUP] Final position: {pos_str}")
@@ -2458,7 +1946,11 @@ class OptimizerApp:
             self.root.update()
             
             # Clear previous plotting data for hill climbing phase
-            self.iterations, self.powers, self.colors, self.positions = [], [], [], []
+            self.clear_plot_data()
+            
+            # Journal the climb into the scan directory as it runs
+            journal_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.start_journal(os.path.join(scan_log_dir, f"combined_optimization_{journal_ts}.journal"))
             
             # Add starting position to hill climbing plot data using verified power
             if actual_power is not None:
@@ -2472,184 +1964,23 @@ class OptimizerApp:
                     print(f"[HILLCLIMB] Starting position recorded: {starting_power:.1f} dBm (fallback)")
             
             # SMART HILL CLIMBING: Limited to ≤400 tests total
-            self.status.config(text="Phase 1: Smart 1D axis scans around maximum (±50 range)...")
-            self.root.update()
-            
-            i = 0
-            position = current_pos.copy()
-            test_count = 0
-            max_tests = 400
-            
-            # Stop check callback
             def check_stop():
-                return self.stop_requested or test_count >= max_tests
-            
-            # Phase 1: 1D scans along each axis (6 × 11 = 66 tests)
-            axis_improvements = {}  # Track which axes show improvement
-            scan_range = 50
-            scan_steps = 11
-            
-            for axis in AXES:
-                if check_stop():
-                    break
-                    
-                self.status.config(text=f"Scanning axis {axis} (±{scan_range})... Tests: {test_count}/{max_tests}")
-                self.root.update()
-                
-                center = position[axis]
-                best_axis_power = self.global_best_power
-                best_axis_pos = center
-                
-                # 1D scan along this axis
-                for step in np.linspace(center - scan_range, center + scan_range, scan_steps):
-                    if check_stop():
-                        break
-                        
-                    # Move only this axis
-                    move_axis_to(ser, axis, step)
-                    test_pos = position.copy()
-                    test_pos[axis] = step
-                    
-                    power = read_power(pwr)
-                    test_count += 1
-                    
-                    if power is not None:
-                        self.update_plot(i, power, axis, test_pos)
-                        i += 1
-                        
-                        # Track best for this axis
-                        if power > best_axis_power:
-                            best_axis_power = power
-                            best_axis_pos = step
-                            
-                        # Update global best
-                        if power > self.global_best_power:
-                            self.global_best_power = power
-                            self.global_best_position = test_pos.copy()
-                            print(f"[PHASE1] New best on {axis}: {power:.1f} dBm (improvement: +{power - self.best_scan_power:.1f} dBm)")
-                        
-                        self.root.update()
-                
-                # Record improvement for this axis
-                improvement = best_axis_power - self.best_scan_power
-                axis_improvements[axis] = {
-                    'improvement': improvement,
-                    'best_pos': best_axis_pos,
-                    'best_power': best_axis_power
-                }
-                
-                # Move back to center for next axis scan
-                move_axis_to(ser, axis, center)
-                print(f"[PHASE1] {axis} scan complete: {improvement:+.1f} dBm improvement")
+                return self.stop_requested
             
-            # Phase 2: 2D cross-scans on most promising axes (≤120 tests)  
-            if not check_stop() and len(axis_improvements) >= 2:
-                self.status.config(text=f"Phase 2: 2D cross-scans on promising axes... Tests: {test_count}/{max_tests}")
+            def set_status(text):
+                self.status.config(text=text)
                 self.root.update()
-                
-                # Find top 3 axes with most improvement
-                sorted_axes = sorted(axis_improvements.items(), key=lambda x: x[1]['improvement'], reverse=True)[:3]
-                
-                for i_axis, (axis1, data1) in enumerate(sorted_axes):
-                    for axis2, data2 in sorted_axes[i_axis+1:]:
-                        if check_stop() or test_count + 25 > max_tests:  # Leave room for phase 3
-                            break
-                            
-                        # 2D scan on these two axes (5×5 = 25 tests)
-                        steps1 = np.linspace(data1['best_pos'] - 25, data1['best_pos'] + 25, 5)
-                        steps2 = np.linspace(data2['best_pos'] - 25, data2['best_pos'] + 25, 5)
-                        
-                        for pos1 in steps1:
-                            for pos2 in steps2:
-                                if check_stop():
-                                    break
-                                    
-                                move_axis_to(ser, axis1, pos1)
-                                move_axis_to(ser, axis2, pos2)
-                                
-                                test_pos = position.copy()
-                                test_pos[axis1] = pos1
-                                test_pos[axis2] = pos2
-                                
-                                power = read_power(pwr)
-                                test_count += 1
-                                
-                                if power is not None:
-                                    self.update_plot(i, power, f'{axis1}{axis2}', test_pos)
-                                    i += 1
-                                    
-                                    if power > self.global_best_power:
-                                        self.global_best_power = power
-                                        self.global_best_position = test_pos.copy()
-                                        print(f"[PHASE2] New best on {axis1}+{axis2}: {power:.1f} dBm (improvement: +{power - self.best_scan_power:.1f} dBm)")
-                                    
-                                    self.root.update()
-                        
-                        print(f"[PHASE2] {axis1}+{axis2} cross-scan complete")
-                        if check_stop():
-                            break
             
-            # Phase 3: Fine hill climbing (≤200 tests)
-            if not check_stop():
-                self.status.config(text=f"Phase 3: Fine hill climbing... Tests: {test_count}/{max_tests}")
-                self.root.update()
-                
-                # Move to globally best position found so far
-                if self.global_best_position != position:
-                    for axis in AXES:
-                        if abs(self.global_best_position[axis] - position[axis]) > 0.1:
-                            move_axis_to(ser, axis, self.global_best_position[axis])
-                    position = self.global_best_position.copy()
-                    time.sleep(0.3)
-                
-                # Limited hill climbing with test count limit
-                remaining_tests = max_tests - test_count
-                hill_climb_count = 0
-                step_size = 10
-                
-                while not check_stop() and hill_climb_count < remaining_tests and step_size >= 1:
-                    improved = False
-                    
-                    for axis in AXES:
-                        if check_stop() or hill_climb_count >= remaining_tests:
-                            break
-                            
-                        # Try both directions
-                        for direction in [1, -1]:
-                            if check_stop() or hill_climb_count >= remaining_tests:
-                                break
-                                
-                            move_axis_to(ser, axis, position[axis] + direction * step_size)
-                            test_pos = position.copy()
-                            test_pos[axis] = position[axis] + direction * step_size
-                            
-                            power = read_power(pwr)
-                            test_count += 1
-                            hill_climb_count += 1
-                            
-                            if power is not None:
-                                self.update_plot(i, power, axis, test_pos)
-                                i += 1
-                                
-                                if power > self.global_best_power:
-                                    self.global_best_power = power
-                                    self.global_best_position = test_pos.copy()
-                                    position[axis] = test_pos[axis]
-                                    improved = True
-                                    print(f"[PHASE3] Fine climb {axis}: {power:.1f} dBm (improvement: +{power - self.best_scan_power:.1f} dBm)")
-                                else:
-                                    # Move back if no improvement
-                                    move_axis_to(ser, axis, position[axis])
-                                
-                                self.root.update()
-                    
-                    if not improved:
-                        step_size = step_size // 2
-                        print(f"[PHASE3] Reducing step size to {step_size}")
-                
-                print(f"[PHASE3] Fine hill climbing complete after {hill_climb_count} tests")
+            def plot_point(i, power, label, test_pos):
+                self.update_plot(i, power, label, test_pos)
+                with tracing.span("gui.root_update"):
+                    self.root.update()
             
-            print(f"[SMART CLIMB] Total tests used: {test_count}/{max_tests}")
+            self.global_best_position, self.global_best_power, test_count = smart_hill_climb(
+                pwr, ser, current_pos, self.global_best_power, best_position=self.global_best_position,
+                baseline_power=self.best_scan_power, max_tests=400, scan_ranges=scan_ranges,
+                fine_step=fine_step, stop_check=check_stop, point_callback=plot_point,
+                status_callback=set_status)
             
             # Display final results and handle positioning using GLOBAL best (scan + hill climbing)
             # Use the global best which considers both scan and hill climbing results
@@ -2707,17 +2038,15 @@ class OptimizerApp:
             log_dir = scan_log_dir
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            self.status.config(text="Capturing screenshots...")
-            self.root.update()
-            
-            # Capture Keysight web interface
-            capture_keysight_screenshot(log_dir, timestamp)
-            
-            # Capture GUI screenshot
+            # GUI screenshot on the GUI thread; meter snapshot card in the background
+            self.live_plot.flush()
             capture_gui_screenshot(self.root, log_dir, timestamp)
+            meter_state = read_meter_state(pwr, read_power(pwr))
+            self.post_run.submit_render("meter snapshot", write_meter_snapshot, meter_state, log_dir, timestamp)
             
             # Save combined results in the scan log directory
             self.save_combined_results(timestamp, log_dir)
+            self.post_run.watch(self.root, lambda text: self.postrun_status.config(text=text))
             
             # Cleanup
             p1.write("OUTP:STAT OFF")
@@ -2730,6 +2059,7 @@ class OptimizerApp:
             
         except Exception as e:
             self.status.config(text=f"[ERROR] Hill climbing failed: {e}")
+            metrics_server.record_error('climb')
             messagebox.showerror("Hill Climbing Error", f"Hill climbing optimization failed: {e}")
             print(f"[ERROR] Hill climbing failed: {e}")
             
@@ -2742,37 +2072,37 @@ class OptimizerApp:
             except:
                 pass
             finally:
+                self.close_journal()
                 # Always reset stop flag when optimization ends
                 self.reset_stop_flag()
     
     def save_combined_results(self, timestamp, log_dir):
         """Save combined scan + hill climb results"""
-        with open(os.path.join(log_dir, f"combined_optimization_{timestamp}.csv"), "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Iteration", "Power (dBm)", "Axis"] + AXES)
-            for i, (pwr, color, pos) in enumerate(zip(self.powers, self.colors, self.positions)):
-                # Find axis from color
-                axis = [a for a, c in AXIS_COLORS.items() if c == color][0] if color in AXIS_COLORS.values() else 'Unknown'
-                writer.writerow([i, pwr, axis] + [pos[a] for a in AXES])
-        
-        self.fig.savefig(os.path.join(log_dir, f"combined_optimization_plot_{timestamp}.png"))
+        self.write_trace_csv(os.path.join(log_dir, f"combined_optimization_{timestamp}.csv"), 'climb')
+        
+        self.live_plot.flush()
+        with tracing.span("gui.savefig"):
+            self.fig.savefig(os.path.join(log_dir, f"combined_optimization_plot_{timestamp}.png"))
         print(f"[INFO] Combined optimization results saved to {log_dir}/combined_optimization_{timestamp}.*")
-    
-    def save_scan_results(self, scan_data, enabled_axes, timestamp, log_dir):
-        """Save brute force scan results"""
-        with open(os.path.join(log_dir, f"scan_data_{timestamp}.csv"), "w", newline="") as f:
-            writer = csv.writer(f)
-            header = ["Index", "Power (dBm)"] + [f"{ax}_Position" for ax in AXES]
-            writer.writerow(header)
-            
-            for point in scan_data:
-                row = [point['index'], point['power']] + [point['position'][ax] for ax in AXES]
-                writer.writerow(row)
+        tracing.write_run(log_dir, timestamp)
+        io_stats.write_run(log_dir, timestamp)
+    
+    def save_scan_results(self, scan_data, enabled_axes, timestamp, log_dir, journal=None):
+        """Save brute force scan results (CSV written in the background)"""
+        if journal is not None and journal.error is None:
+            csv_path = os.path.join(log_dir, f"scan_data_{timestamp}.csv")
+            self.post_run.submit_io("scan data", convert_journal, journal.path, csv_path, 'scan')
+        else:
+            self.post_run.submit_io("scan data", write_scan_csv, scan_data, timestamp, log_dir)
         
-        # Save current plot
-        self.fig.savefig(os.path.join(log_dir, f"scan_plot_{timestamp}.png"))
+        # Save current plot (Tk figure, so on the GUI thread)
+        self.live_plot.flush()
+        with tracing.span("gui.savefig"):
+            self.fig.savefig(os.path.join(log_dir, f"scan_plot_{timestamp}.png"))
         
         print(f"[INFO] Scan results saved to {log_dir}")
+        tracing.write_run(log_dir, timestamp)
+        io_stats.write_run(log_dir, timestamp)
 
 # Launch GUI
 if __name__ == "__main__":
@@ -2781,6 +2111,10 @@ if __name__ == "__main__":
     
     # Add cleanup handler for camera system
     def on_closing():
+        # Let outstanding post-run artefacts finish writing
+        app.post_run.shutdown(wait=True)
+        close_keysight_browser()
+        metrics_server.stop()
         if CAMERA_AVAILABLE:
             cleanup_camera_system()
         root.destroy()
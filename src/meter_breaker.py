@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker for the Keysight Power Meter Read Path
+A hung meter makes read_power return None point after point, each only
+after a timeout. GuardedMeter wraps the meter session: after `threshold`
+consecutive failed reads the breaker opens, the run pauses, and the
+keysight_manager recovery steps run in a background thread (device clear,
+close and reopen the session, *CLS, verify with *IDN? and a reading) while
+the caller's idle callback keeps the GUI alive. On success the failed
+point is read again and the run carries on; brute_force_3d_scan then goes
+back for the points missed just before the breaker opened.
+
+If every attempt fails the breaker stays open: reads fail fast, without
+waiting for timeouts, and a new recovery is tried after retry_interval.
+A scan does not carry on through an open breaker: it waits in
+wait_and_read() for the next recovery (or STOP).
+
+    pwr = GuardedMeter(lambda: rm.open_resource(POWER_METER_ADDRESS))
+    power = read_power(pwr)     # alignment.read_power goes through the breaker
+
+*RST is not part of the default recovery: it resets wavelength, range and
+averaging time mid-run. Pass full_reset=True to include it.
+"""
+
+import time
+import threading
+
+import tracing
+import alignment
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+class GuardedMeter:
+    """Meter session with a circuit breaker on read_power
+
+    open_meter: callable returning a new VISA session. threshold: failed
+    reads in a row that open the breaker. attempts/backoff: recovery tries
+    and the wait (s) before each. retry_interval: how long an open breaker
+    fails fast before trying again. status_callback(text) reports progress
+    and idle_callback() is called about every 0.1 s while a recovery runs,
+    both from the caller's thread; stop_check() aborts the recovery.
+    open_callback() is called each time the breaker opens.
+    """
+
+    _own = ('inst', '_open_meter', 'threshold', 'attempts', 'backoff', 'retry_interval', 'full_reset',
+            'status_callback', 'idle_callback', 'stop_check', 'open_callback', 'state', 'failures', 'opens',
+            'recoveries', 'retry_at', 'events')
+
+    def __init__(self, open_meter, threshold=3, attempts=3, backoff=(2, 5, 10), retry_interval=60,
+                 full_reset=False, status_callback=None, idle_callback=None, stop_check=None,
+                 open_callback=None):
+        self._open_meter = open_meter
+        self.inst = open_meter()
+        self.threshold = threshold
+        self.attempts = attempts
+        self.backoff = backoff
+        self.retry_interval = retry_interval
+        self.full_reset = full_reset
+        self.status_callback = status_callback
+        self.idle_callback = idle_callback
+        self.stop_check = stop_check
+        self.open_callback = open_callback
+        self.state = CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.recoveries = 0
+        self.retry_at = 0.0
+        self.events = []  # (time, text)
+
+    # The session's own interface (write/read/query/timeout...) passes through
+    def __getattr__(self, name):
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        if name in self._own:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.inst, name, value)
+
+    @property
+    def breaker(self):
+        """Hook alignment.read_power looks for"""
+        return self
+
+    @property
+    def is_open(self):
+        return self.state == OPEN
+
+    def _event(self, text):
+        # May run in the recovery thread: status_callback is only called from
+        # the caller's thread, by _report
+        self.events.append((time.time(), text))
+        print(f"[BREAKER] {text}")
+
+    def _report(self, start):
+        if self.status_callback:
+            for _, text in self.events[start:]:
+                self.status_callback(text)
+        return len(self.events)
+
+    def read_power(self, debug=False):
+        """read_power through the breaker; None only if the meter stays down"""
+        if self.state == OPEN:
+            if time.monotonic() < self.retry_at:
+                return None  # fail fast instead of waiting for another timeout
+            return self._recover_and_read(debug)
+
+        power = alignment.read_power_once(self.inst, debug)
+        if power is not None:
+            self.failures = 0
+            return power
+        self.failures += 1
+        if self.failures < self.threshold:
+            return None
+        self.opens += 1
+        tracing.count("meter.breaker_opens")
+        if self.open_callback:
+            self.open_callback()
+        self._event(f"Meter failed {self.failures} reads in a row: pausing to recover")
+        return self._recover_and_read(debug)
+
+    def wait_and_read(self, stop_check=None, debug=False):
+        """Wait out an open breaker, idling, until a recovery brings the meter back
+
+        Returns the reading, or None if stop_check() (default: the breaker's
+        own) asks to stop first.
+        """
+        stop_check = stop_check or self.stop_check
+        while self.state == OPEN:
+            if stop_check and stop_check():
+                return None
+            if time.monotonic() < self.retry_at:
+                if self.idle_callback:
+                    self.idle_callback()
+                time.sleep(0.1)
+                continue
+            power = self._recover_and_read(debug)
+            if power is not None:
+                return power
+        return self.read_power(debug)
+
+    def _recover_and_read(self, debug):
+        reported = len(self.events) - 1 if self.state == CLOSED else len(self.events)
+        if self._run_recovery(reported):
+            self.state = CLOSED
+            self.failures = 0
+            self.recoveries += 1
+            self._event("Meter recovered: resuming from the failed point")
+            power = alignment.read_power_once(self.inst, debug)
+        else:
+            self.state = OPEN
+            self.retry_at = time.monotonic() + self.retry_interval
+            self._event(f"Meter recovery failed: reads skipped for {self.retry_interval:.0f} s")
+            power = None
+        self._report(len(self.events) - 1)
+        return power
+
+    def _run_recovery(self, reported):
+        """Recovery in a worker thread; the caller's thread keeps idling"""
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(ok=self.recover()), name="meter-recovery",
+                                  daemon=True)
+        worker.start()
+        while worker.is_alive():
+            reported = self._report(reported)
+            if self.idle_callback:
+                self.idle_callback()
+            worker.join(0.1)
+        self._report(reported)
+        return result.get('ok', False)
+
+    def recover(self):
+        """Clear, reconnect and verify the meter (blocking); True when it reads again"""
+        for attempt in range(self.attempts):
+            wait = self.backoff[min(attempt, len(self.backoff) - 1)]
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                if self.stop_check and self.stop_check():
+                    return False
+                time.sleep(0.1)
+            self._event(f"Recovery attempt {attempt + 1}/{self.attempts}")
+            try:
+                try:
+                    self.inst.clear()
+                except Exception:
+                    pass
+                try:
+                    self.inst.close()
+                except Exception:
+                    pass
+                self.inst = self._open_meter()
+                if self.full_reset:
+                    self.inst.write("*RST")
+                    time.sleep(2)
+                self.inst.write("*CLS")
+                idn = self.inst.query("*IDN?").strip()
+                if alignment.read_power_once(self.inst) is not None:
+                    tracing.count("meter.breaker_recoveries")
+                    self._event(f"Meter answering again: {idn}")
+                    return True
+            except Exception as e:
+                self._event(f"Recovery attempt {attempt + 1} failed: {e}")
+        return False
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Keysight Power Meter Snapshot for EDWA
+Records the meter settings and reading over the open VISA session and
+renders them as a small JSON + PNG card, instead of loading the meter's web
+page in a fresh headless browser after every run. A single long-lived
+browser is kept for the occasions when the web page itself is wanted.
+"""
+
+import os
+import re
+import json
+import threading
+import importlib.util
+from datetime import datetime
+from matplotlib.figure import Figure
+
+# selenium is slow to import, so it is only imported when a capture starts a browser
+SELENIUM_AVAILABLE = importlib.util.find_spec("selenium") is not None
+
+KEYSIGHT_WEB_URL = "http://100.65.16.193/pm/index.html?page=ch1"
+
+# The page fills the channel panel in from JavaScript after it has loaded;
+# a capture waits until a power reading like "-12.345 dBm" is on the page
+READING_PATTERN = re.compile(r"-?\d+(?:\.\d+)?\s*(?:dBm|[munp]?W)\b")
+
+# Settings read from channel 1: (key, label, SCPI query)
+METER_QUERIES = [
+    ('idn', 'Instrument', '*IDN?'),
+    ('wavelength_m', 'Wavelength', 'SENS1:POW:WAV?'),
+    ('unit', 'Unit', 'SENS1:POW:UNIT?'),
+    ('averaging_time_s', 'Averaging time', 'SENS1:POW:ATIM?'),
+    ('auto_range', 'Auto range', 'SENS1:POW:RANG:AUTO?'),
+    ('range_dbm', 'Range', 'SENS1:POW:RANG?'),
+    ('offset_db', 'Offset', 'SENS1:CORR?'),
+]
+
+def read_meter_state(inst, power_dbm=None):
+    """Query the meter settings over VISA and return them as a dict
+
+    Must run on the thread that owns the VISA session. Queries that the
+    meter does not answer are stored as None.
+    """
+    state = {'time': datetime.now().isoformat(timespec='seconds'), 'power_dbm': power_dbm}
+    for key, _, query in METER_QUERIES:
+        try:
+            state[key] = inst.query(query).strip()
+        except Exception as e:
+            print(f"[WARNING] Meter query {query} failed: {e}")
+            state[key] = None
+    return state
+
+def _format_value(key, value):
+    """Human readable value for the card"""
+    if value is None:
+        return "n/a"
+    try:
+        if key == 'wavelength_m':
+            return f"{float(value) * 1e9:.2f} nm"
+        if key == 'averaging_time_s':
+            return f"{float(value) * 1e3:.1f} ms"
+        if key == 'range_dbm':
+            return f"{float(value):.0f} dBm"
+        if key == 'offset_db':
+            return f"{float(value):.2f} dB"
+        if key == 'power_dbm':
+            return f"{float(value):.3f} dBm"
+        if key == 'auto_range':
+            return "ON" if value in ('1', 'ON') else "OFF"
+        if key == 'unit':
+            return {'0': 'dBm', '1': 'W'}.get(value, value)
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+def write_meter_snapshot(state, log_dir, timestamp):
+    """Save meter state as keysight_state_<timestamp>.json and .png
+
+    Rendering uses a Figure object (no pyplot), so this can run in a
+    post-run background job. Returns the PNG path.
+    """
+    json_path = os.path.join(log_dir, f"keysight_state_{timestamp}.json")
+    with open(json_path, "w") as f:
+        json.dump(state, f, indent=2)
+
+    rows = [('Power', _format_value('power_dbm', state.get('power_dbm')))]
+    rows += [(label, _format_value(key, state.get(key))) for key, label, _ in METER_QUERIES if key != 'idn']
+
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    ax.axis('off')
+    idn = state.get('idn') or 'Keysight power meter'
+    ax.set_title(f"{idn.split(',')[1] if idn.count(',') >= 1 else idn} - Channel 1\n{state['time']}", fontsize=9)
+    table = ax.table(cellText=rows, colLabels=['Setting', 'Value'], loc='center', cellLoc='left')
+    table.scale(1, 1.3)
+    png_path = os.path.join(log_dir, f"keysight_state_{timestamp}.png")
+    fig.savefig(png_path, dpi=100, bbox_inches='tight')
+
+    print(f"[INFO] Keysight meter snapshot saved: {png_path}")
+    return png_path
+
+class KeysightBrowser:
+    """One headless Chrome kept open for Keysight web page captures
+
+    Starting Chrome dominates the cost of a capture, so the driver is created
+    on first use and reused until close(). Captures are serialised.
+    Each capture waits up to timeout seconds for the reading to appear, in
+    reading_selector (CSS) if given, otherwise anywhere in the page text.
+    """
+
+    def __init__(self, url=KEYSIGHT_WEB_URL, timeout=10, reading_selector=None):
+        self.url = url
+        self.timeout = timeout
+        self.reading_selector = reading_selector
+        self.driver = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--window-size=1920,1080")
+        self.driver = webdriver.Chrome(options=chrome_options)
+
+    def capture(self, screenshot_path):
+        """Load (or refresh) the meter page and save a screenshot"""
+        if not SELENIUM_AVAILABLE:
+            raise RuntimeError("selenium not available")
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self.driver is None:
+                        self._start()
+                    self.driver.get(self.url)
+                    # Wait for the page scripts to fill in the reading instead of a fixed sleep
+                    try:
+                        WebDriverWait(self.driver, self.timeout).until(self._reading_shown)
+                    except TimeoutException:
+                        print(f"[WARNING] No power reading on the Keysight page after {self.timeout} s, "
+                              f"saving the screenshot anyway")
+                    self.driver.save_screenshot(screenshot_path)
+                    return screenshot_path
+                except Exception:
+                    # Browser may have died between captures: restart once
+                    self._quit()
+                    if attempt:
+                        raise
+
+    def _reading_shown(self, driver):
+        from selenium.webdriver.common.by import By
+        if driver.execute_script("return document.readyState") != "complete":
+            return False
+        if self.reading_selector:
+            elements = driver.find_elements(By.CSS_SELECTOR, self.reading_selector)
+            return any(element.text.strip() for element in elements)
+        return READING_PATTERN.search(driver.find_element(By.TAG_NAME, "body").text) is not None
+
+    def _quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def close(self):
+        """Shut the browser down"""
+        with self._lock:
+            self._quit()
+
+# Global browser instance
+_keysight_browser = None
+
+def get_keysight_browser():
+    """Get or create the shared Keysight browser"""
+    global _keysight_browser
+    if _keysight_browser is None:
+        _keysight_browser = KeysightBrowser()
+    return _keysight_browser
+
+def close_keysight_browser():
+    """Close the shared browser if one was started"""
+    global _keysight_browser
+    if _keysight_browser is not None:
+        _keysight_browser.close()
+        _keysight_browser = None
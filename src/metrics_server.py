@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local Metrics Endpoint for EDWA
+Serves the optimizer's live state in Prometheus text format on
+http://127.0.0.1:9108/metrics from a background thread, so dashboards can
+watch several rigs without screenshots:
+
+    edwa_points_total, edwa_points_per_second, edwa_run_points,
+    edwa_best_power_dbm, edwa_stage_moves_total, edwa_meter_read_seconds
+    (p50/p90/p99), edwa_io_timeouts_total / edwa_io_errors_total per device,
+    edwa_camera_fps, edwa_errors_total by kind, and the meter probe
+    (edwa_meter_probe_up, edwa_meter_probe_seconds per port)
+
+The GUI feeds points, frames and errors through record_point(),
+record_frame() and record_error(); I/O figures come from io_stats. The
+meter probe only opens TCP connections to the meter's web and VXI-11 ports
+(no VISA session), so it never competes with a running scan.
+
+EDWA_METRICS_PORT sets the port (0 disables the endpoint).
+
+Usage:
+    python metrics_server.py --probe-host 100.65.16.193   # standalone probe
+"""
+
+import os
+import time
+import socket
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import io_stats
+
+METRICS_PORT_ENV = "EDWA_METRICS_PORT"
+DEFAULT_PORT = 9108
+RATE_WINDOW = 10.0        # seconds for points/s and camera fps
+PROBE_INTERVAL = 30.0     # seconds between meter probes
+PROBE_PORTS = (80, 111)   # web interface, VXI-11 portmapper
+
+_lock = threading.Lock()
+_state = {
+    'points_total': 0,
+    'run_points': 0,
+    'best_dbm': None,
+    'last_dbm': None,
+    'run': '',
+    'errors': {},
+    'probe': {},
+}
+_point_times = deque()
+_frame_times = deque()
+_server = None
+_probe_thread = None
+_probe_stop = threading.Event()
+
+def _trim(times, now):
+    while times and now - times[0] > RATE_WINDOW:
+        times.popleft()
+
+def _rate(times, now):
+    _trim(times, now)
+    if len(times) < 2:
+        return 0.0
+    return (len(times) - 1) / max(now - times[0], 1e-9)
+
+def start_run(name=''):
+    """New run: resets the run point count and best power"""
+    with _lock:
+        _state['run_points'] = 0
+        _state['best_dbm'] = None
+        _state['run'] = name
+
+def record_point(power):
+    """One power reading (dBm) recorded by the GUI"""
+    now = time.monotonic()
+    with _lock:
+        _state['points_total'] += 1
+        _state['run_points'] += 1
+        _state['last_dbm'] = power
+        if power is not None and (_state['best_dbm'] is None or power > _state['best_dbm']):
+            _state['best_dbm'] = power
+        _point_times.append(now)
+        _trim(_point_times, now)
+
+def record_frame():
+    """One camera frame shown or captured"""
+    now = time.monotonic()
+    with _lock:
+        _frame_times.append(now)
+        _trim(_frame_times, now)
+
+def record_error(kind):
+    with _lock:
+        _state['errors'][kind] = _state['errors'].get(kind, 0) + 1
+
+def probe_meter(host, ports=PROBE_PORTS, timeout=2.0):
+    """TCP connect times to the meter's ports: {port: seconds or None}"""
+    results = {}
+    for port in ports:
+        start = time.perf_counter()
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                results[port] = time.perf_counter() - start
+        except OSError:
+            results[port] = None
+    return results
+
+def _probe_loop(host, interval):
+    while not _probe_stop.is_set():
+        results = probe_meter(host)
+        with _lock:
+            _state['probe'] = {'time': time.time(), 'ports': results}
+        _probe_stop.wait(interval)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _sample(name, value, labels=None):
+    if labels:
+        label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f"{name}{{{label_text}}} {value}"
+    return f"{name} {value}"
+
+def render():
+    """Current metrics in Prometheus text exposition format"""
+    now = time.monotonic()
+    with _lock:
+        state = dict(_state, errors=dict(_state['errors']), probe=dict(_state['probe']))
+        points_rate = _rate(_point_times, now)
+        camera_fps = _rate(_frame_times, now)
+    io_rows = io_stats.summary()
+
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for value, labels in samples:
+            if value is not None:
+                lines.append(_sample(name, value, labels))
+
+    metric('edwa_info', 'gauge', 'Rig identity', [(1, {'rig': socket.gethostname(), 'run': state['run']})])
+    metric('edwa_points_total', 'counter', 'Power readings recorded', [(state['points_total'], None)])
+    metric('edwa_run_points', 'gauge', 'Power readings in the current run', [(state['run_points'], None)])
+    metric('edwa_points_per_second', 'gauge', f'Readings per second over the last {RATE_WINDOW:.0f} s',
+           [(round(points_rate, 4), None)])
+    metric('edwa_best_power_dbm', 'gauge', 'Best power of the current run (dBm)', [(state['best_dbm'], None)])
+    metric('edwa_last_power_dbm', 'gauge', 'Latest power reading (dBm)', [(state['last_dbm'], None)])
+    metric('edwa_camera_fps', 'gauge', f'Camera frames per second over the last {RATE_WINDOW:.0f} s',
+           [(round(camera_fps, 3), None)])
+
+    moves = sum(r['count'] for r in io_rows
+                if r['device'] == 'stage' and r['op'] == 'write' and ('GOABS' in r['command'] or '±' in r['command']))
+    metric('edwa_stage_moves_total', 'counter', 'DS102 move commands sent', [(moves, None)])
+
+    # Meter read latency: the busiest read/query row of the meter
+    reads = [r for r in io_rows if r['device'] == 'meter' and r['op'] in ('read', 'query') and r['p50_ms'] is not None]
+    if reads:
+        busiest = max(reads, key=lambda r: r['count'])
+        metric('edwa_meter_read_seconds', 'gauge', 'Meter read latency quantiles (recent window)',
+               [(busiest[f'p{q}_ms'] / 1000, {'quantile': f'0.{q}', 'command': busiest['command']})
+                for q in (50, 90, 99)])
+
+    devices = sorted({r['device'] for r in io_rows})
+    metric('edwa_io_timeouts_total', 'counter', 'Instrument I/O timeouts',
+           [(sum(r['timeouts'] for r in io_rows if r['device'] == d), {'device': d}) for d in devices])
+    metric('edwa_io_errors_total', 'counter', 'Instrument I/O errors',
+           [(sum(r['errors'] for r in io_rows if r['device'] == d), {'device': d}) for d in devices])
+    metric('edwa_errors_total', 'counter', 'Application errors by kind',
+           [(count, {'kind': kind}) for kind, count in sorted(state['errors'].items())])
+
+    probe = state['probe']
+    if probe:
+        metric('edwa_meter_probe_up', 'gauge', 'Meter port reachable (1) or not (0)',
+               [(int(seconds is not None), {'port': port}) for port, seconds in probe['ports'].items()])
+        metric('edwa_meter_probe_seconds', 'gauge', 'Meter TCP connect time',
+               [(seconds, {'port': port}) for port, seconds in probe['ports'].items()])
+        metric('edwa_meter_probe_timestamp_seconds', 'gauge', 'Time of the last meter probe',
+               [(probe['time'], None)])
+    return "\n".join(lines) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+def start(port=None, host='127.0.0.1', probe_host=None, probe_interval=PROBE_INTERVAL):
+    """Serve /metrics from a background thread; returns the bound port or None
+
+    port defaults to EDWA_METRICS_PORT (or 9108); 0 from the environment
+    disables the endpoint, while port=0 passed here binds a free port.
+    probe_host starts the background meter probe.
+    """
+    global _server, _probe_thread
+    if port is None:
+        port = int(os.environ.get(METRICS_PORT_ENV, DEFAULT_PORT))
+        if port == 0:
+            return None
+    if _server is None:
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            print(f"[WARNING] Metrics endpoint not started on {host}:{port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"[INFO] Metrics at http://{host}:{_server.server_address[1]}/metrics")
+    if probe_host and _probe_thread is None:
+        _probe_stop.clear()
+        _probe_thread = threading.Thread(target=_probe_loop, args=(probe_host, probe_interval),
+                                         name="meter-probe", daemon=True)
+        _probe_thread.start()
+    return _server.server_address[1]
+
+def stop():
+    global _server, _probe_thread
+    _probe_stop.set()
+    if _probe_thread is not None:
+        _probe_thread.join(timeout=5)
+        _probe_thread = None
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+def main():
+    parser = argparse.ArgumentParser(description='EDWA metrics endpoint (standalone meter probe)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to serve on')
+    parser.add_argument('--probe-host', help='Meter IP to probe')
+    parser.add_argument('--interval', type=float, default=PROBE_INTERVAL, help='Seconds between probes')
+    args = parser.parse_args()
+    if start(args.port, probe_host=args.probe_host, probe_interval=args.interval) is None:
+        return
+    print("[INFO] Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Sub-Grid Peak Estimation for EDWA Scans
+The best scan point is only as accurate as the grid pitch. This fits a
+Gaussian (a quadratic in ln of linear power) or a quadratic (in linear
+power) to the grid neighbourhood of the maximum and returns the fitted
+optimum, the spot width and a confidence ellipsoid for the optimum, so the
+follow-on hill climb can start at the fitted position with step sizes that
+match the width of the coupling peak.
+"""
+
+import json
+import numpy as np
+
+from scan_trace import ScanTrace, AXES, START_PHASE
+
+DB_PER_NEPER = 10 / np.log(10)
+
+def _design(u):
+    """Columns 1, u_i, u_i*u_j (i <= j) of a full quadratic in n dimensions"""
+    n = u.shape[1]
+    columns = [np.ones(len(u))] + [u[:, i] for i in range(n)]
+    pairs = [(i, j) for i in range(n) for j in range(i, n)]
+    columns += [u[:, i] * u[:, j] for i, j in pairs]
+    return np.column_stack(columns), pairs
+
+def _unpack(theta, n, pairs):
+    """Constant, gradient and Hessian of the fitted quadratic"""
+    b = theta[1:n + 1]
+    hessian = np.zeros((n, n))
+    for k, (i, j) in enumerate(pairs):
+        value = theta[n + 1 + k]
+        if i == j:
+            hessian[i, i] = 2 * value
+        else:
+            hessian[i, j] = hessian[j, i] = value
+    return theta[0], b, hessian
+
+def _vertex(theta, n, pairs):
+    c, b, hessian = _unpack(theta, n, pairs)
+    centre = -np.linalg.solve(hessian, b)
+    return centre, c + 0.5 * b @ centre
+
+def fit_peak(positions, powers_dbm, pitch=None, model='gaussian', level=0.95):
+    """Fit a peak to points around a maximum
+
+    positions is (N, n) in stage units and powers_dbm the N readings. pitch
+    (one per dimension) scales coordinates to grid cells for a well
+    conditioned fit. model 'gaussian' fits ln(P) (P in mW) weighted by P,
+    'quadratic' fits P itself. Returns a dict with 'valid', 'center',
+    'power' (dBm at the centre), 'sigma' (Gaussian 1/e^0.5 half width per
+    dimension), 'center_cov', 'ellipsoid' (semi-axes and directions at the
+    given confidence level) and 'rms_residual_db'; 'reason' explains an
+    invalid fit.
+    """
+    x = np.asarray(positions, dtype=float)
+    dbm = np.asarray(powers_dbm, dtype=float)
+    n = x.shape[1]
+    best = int(np.argmax(dbm))
+    pitch = np.ones(n) if pitch is None else np.asarray(pitch, dtype=float)
+    u = (x - x[best]) / pitch
+
+    design, pairs = _design(u)
+    n_params = design.shape[1]
+    result = {'valid': False, 'model': model, 'points': len(dbm)}
+    if len(dbm) < n_params:
+        result['reason'] = f"{len(dbm)} points for {n_params} parameters"
+        return result
+
+    linear = 10 ** ((dbm - dbm[best]) / 10)  # relative to the best point, for conditioning
+    if model == 'gaussian':
+        target = np.log(linear)
+        weights = linear
+    elif model == 'quadratic':
+        target = linear
+        weights = np.ones_like(linear)
+    else:
+        raise ValueError(f"unknown peak model '{model}'")
+
+    sw = np.sqrt(weights)
+    theta, _, rank, _ = np.linalg.lstsq(design * sw[:, None], target * sw, rcond=None)
+    if rank < n_params:
+        result['reason'] = "points do not span the fit (degenerate neighbourhood)"
+        return result
+
+    c, b, hessian = _unpack(theta, n, pairs)
+    if np.any(np.linalg.eigvalsh(hessian) >= 0):
+        result['reason'] = "no maximum: fitted surface is not concave"
+        return result
+
+    centre_u, peak = _vertex(theta, n, pairs)
+    if model == 'gaussian':
+        peak_linear = np.exp(peak)
+        width_cov = -np.linalg.inv(hessian)
+        fitted_db = DB_PER_NEPER * (design @ theta)
+    else:
+        peak_linear = peak
+        width_cov = peak * -np.linalg.inv(hessian)
+        fitted_db = 10 * np.log10(np.clip(design @ theta, 1e-12, None))
+    if not peak_linear > 0:
+        result['reason'] = "fitted peak power is not positive"
+        return result
+
+    # Centre covariance from the parameter covariance (delta method)
+    dof = len(dbm) - n_params
+    centre_cov = None
+    if dof > 0:
+        residual = (design @ theta - target) * sw
+        normal = (design * weights[:, None]).T @ design
+        theta_cov = (residual @ residual / dof) * np.linalg.pinv(normal)
+        jacobian = np.zeros((n, n_params))
+        for k in range(n_params):
+            h = 1e-6 * max(1.0, abs(theta[k]))
+            up, down = theta.copy(), theta.copy()
+            up[k] += h
+            down[k] -= h
+            jacobian[:, k] = (_vertex(up, n, pairs)[0] - _vertex(down, n, pairs)[0]) / (2 * h)
+        centre_cov = np.diag(pitch) @ (jacobian @ theta_cov @ jacobian.T) @ np.diag(pitch)
+
+    centre = x[best] + centre_u * pitch
+    result.update({
+        'center': centre,
+        'power': float(dbm[best] + 10 * np.log10(peak_linear)),
+        'sigma': np.sqrt(np.diag(width_cov)) * pitch,
+        'center_cov': centre_cov,
+        'rms_residual_db': float(np.sqrt(np.mean((fitted_db - (dbm - dbm[best])) ** 2))),
+    })
+    if centre_cov is not None:
+        from scipy.stats import chi2  # scipy.stats takes ~0.5 s to import; only needed here
+        eigenvalues, directions = np.linalg.eigh(centre_cov)
+        result['ellipsoid'] = {
+            'level': level,
+            'semi_axes': np.sqrt(np.clip(eigenvalues, 0, None) * chi2.ppf(level, n)),
+            'directions': directions.T,
+        }
+
+    # A vertex far outside the fitted neighbourhood is an extrapolation
+    if np.any(np.abs(centre_u) > np.abs(u).max(axis=0) + 1):
+        result['reason'] = "fitted optimum lies outside the fitted neighbourhood"
+        return result
+    result['valid'] = True
+    return result
+
+def _grid_pitch(values):
+    unique = np.unique(values)
+    return float(np.min(np.diff(unique))) if len(unique) > 1 else 1.0
+
+def fit_scan_peak(scan_data, axes, radius=1, model='gaussian', level=0.95):
+    """Sub-grid optimum of a brute force scan
+
+    Fits the grid points within radius cells of the best point on the
+    scanned axes (the first three, as scanned). Returns the fit_peak dict
+    with 'axes', 'center'/'sigma' as {axis: value}, 'position' (all six
+    axes: the best point with the fitted axes replaced) and 'grid_best';
+    on an invalid fit 'position' is the best grid point.
+    """
+    if not isinstance(scan_data, ScanTrace):
+        scan_data = ScanTrace.from_points(scan_data)
+    axes = list(axes)[:3]
+    grid_rows = np.flatnonzero(~scan_data.mask(START_PHASE))
+    if not axes or len(grid_rows) == 0:
+        return {'valid': False, 'axes': axes, 'reason': "no scan points"}
+    grid_best = scan_data.point(int(grid_rows[np.argmax(scan_data.column('power')[grid_rows])]))
+    result = {'valid': False, 'axes': axes, 'grid_best': grid_best, 'position': dict(grid_best['position'])}
+
+    positions = scan_data.positions(axes)[grid_rows]
+    powers = scan_data.column('power')[grid_rows]
+    pitch = np.array([_grid_pitch(positions[:, k]) for k in range(len(axes))])
+    centre = np.array([grid_best['position'][ax] for ax in axes])
+
+    # A maximum on the edge of the grid has a one-sided neighbourhood: widen it once
+    for r in (radius, radius + 1):
+        near = np.all(np.abs(positions - centre) <= (r + 0.01) * pitch, axis=1)
+        fit = fit_peak(positions[near], powers[near], pitch, model, level)
+        if fit['valid']:
+            break
+    result.update(fit)
+
+    if fit.get('center') is not None:
+        result['center'] = {ax: float(v) for ax, v in zip(axes, fit['center'])}
+        result['sigma'] = {ax: float(v) for ax, v in zip(axes, fit['sigma'])}
+    if fit['valid']:
+        result['position'].update(result['center'])
+    return result
+
+def climb_seed(fit, default_range=50, default_step=10, min_range=5):
+    """Per-axis 1-D scan ranges and the starting fine step for the smart climb
+
+    Fitted axes scan +/-1 sigma (clamped to [min_range, default_range]) and
+    the fine climb starts at a quarter of the narrowest sigma (a power of
+    two so the halving schedule ends at 1). Unfitted axes keep the defaults.
+    """
+    scan_range = {ax: default_range for ax in AXES}
+    step = default_step
+    if fit and fit.get('valid'):
+        for ax, sigma in fit['sigma'].items():
+            scan_range[ax] = float(np.clip(sigma, min_range, default_range))
+        quarter = min(fit['sigma'].values()) / 4
+        step = int(np.clip(2 ** np.floor(np.log2(max(quarter, 1))), 1, default_step))
+    return scan_range, step
+
+def save_peak_fit(fit, path):
+    """Write a fit result as JSON"""
+    def plain(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, dict):
+            return {k: plain(v) for k, v in value.items()}
+        if isinstance(value, (np.floating, np.integer, np.bool_)):
+            return value.item()
+        return value
+    with open(path, "w") as f:
+        json.dump(plain(fit), f, indent=2)
+    return path
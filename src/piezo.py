@@ -11,6 +11,7 @@ from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import Matern, WhiteKernel, ConstantKernel
 import tkinter as tk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from plot_decimation import decimate_indices, canvas_pixel_width
 
 
 # Constants
@@ -97,7 +98,9 @@ class PiezoOptimizerApp:
         for ax in AXES:
             self.ax.plot([], [], color=AXIS_COLORS[ax], label=ax)
         self.ax.legend()
-        self.ax.scatter(self.iterations, self.powers, c=self.colors)
+        # Draw at most ~one point per pixel column; full history is still saved
+        idx = decimate_indices(self.iterations, self.powers, canvas_pixel_width(self.canvas))
+        self.ax.scatter(np.asarray(self.iterations)[idx], np.asarray(self.powers)[idx], c=np.asarray(self.colors)[idx])
         self.canvas.draw()
 
         # Intermediate PNG
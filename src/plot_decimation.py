@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Plot Decimation for Long EDWA Runs
+Downsamples power-vs-iteration history to roughly the pixel width of the
+canvas so redraw cost does not grow with run length. Full-resolution data
+is untouched and still saved to disk by the callers.
+"""
+
+import numpy as np
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape
+
+    The first and last points are always kept. Returns all indices when the
+    input is already small enough.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets spread over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        # Triangle area between the previously selected point, each candidate and the next average
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) -
+                      (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+def minmax_indices(y, n_buckets):
+    """Min/max bucketing: indices of the minimum and maximum of each bucket, in order"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * n_buckets or n_buckets < 1:
+        return np.arange(n)
+
+    bucket = np.arange(n) * n_buckets // n
+    # Sort by bucket, then by value: first/last of each group are the min/max
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket) != 0])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[order[starts], order[ends]])
+
+class ColumnDecimator:
+    """Incremental min/max per pixel column over a fixed x range
+
+    The x range is split into n_columns equal columns and only the indices
+    of the lowest and highest point of each column are kept, so every part
+    of a run gets its share of the budget however long the run grows.
+    update() folds in just the points added since the last call; when the
+    axis range or the canvas width changes a new decimator is built.
+    """
+
+    def __init__(self, n_columns, x_range):
+        self.n_columns = max(1, int(n_columns))
+        self.x_range = (float(x_range[0]), float(x_range[1]))
+        self.count = 0
+        self._min_idx = np.full(self.n_columns, -1, dtype=np.intp)
+        self._max_idx = np.full(self.n_columns, -1, dtype=np.intp)
+        self._min_val = np.full(self.n_columns, np.inf)
+        self._max_val = np.full(self.n_columns, -np.inf)
+
+    def matches(self, n_columns, x_range):
+        return self.n_columns == max(1, int(n_columns)) and self.x_range == (float(x_range[0]), float(x_range[1]))
+
+    def update(self, x, y):
+        """Fold in the points from index count on (x, y: the full history)"""
+        n = len(x)
+        if n <= self.count:
+            return
+        xs = np.asarray(x[self.count:n], dtype=float)
+        ys = np.asarray(y[self.count:n], dtype=float)
+        lo, hi = self.x_range
+        scale = self.n_columns / (hi - lo) if hi > lo else 0.0
+        columns = np.clip(((xs - lo) * scale).astype(np.intp), 0, self.n_columns - 1)
+
+        # Sort by column, then by value: first/last of each group are its min/max
+        order = np.lexsort((ys, columns))
+        sorted_columns = columns[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(sorted_columns) != 0])
+        ends = np.r_[starts[1:], len(order)] - 1
+        column = sorted_columns[starts]
+        lows, highs = order[starts], order[ends]
+
+        better = ys[lows] < self._min_val[column]
+        self._min_val[column[better]] = ys[lows[better]]
+        self._min_idx[column[better]] = lows[better] + self.count
+        better = ys[highs] > self._max_val[column]
+        self._max_val[column[better]] = ys[highs[better]]
+        self._max_idx[column[better]] = highs[better] + self.count
+        self.count = n
+
+    def indices(self):
+        """Sorted indices of the kept points (at most 2 per column)"""
+        return np.unique(np.r_[self._min_idx[self._min_idx >= 0], self._max_idx[self._max_idx >= 0]])
+
+def decimate_indices(x, y, max_points, method='lttb'):
+    """Indices to plot so that at most ~max_points are drawn"""
+    max_points = int(max_points)
+    if method == 'minmax':
+        return minmax_indices(y, max(1, max_points // 2))
+    return lttb_indices(x, y, max_points)
+
+def canvas_pixel_width(canvas, default=800):
+    """Width of a matplotlib canvas in display pixels"""
+    try:
+        width = canvas.get_width_height()[0]
+        return width if width > 0 else default
+    except Exception:
+        return default
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Post-Run Report Pipeline for EDWA
+Runs the artefacts produced after a scan or hill climb (heatmaps, screenshots,
+camera captures, CSV files) as independent background jobs so the operator
+does not wait for them before the next prompt appears.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class PostRunPipeline:
+    """Background job runner for post-run artefacts
+
+    Figure rendering goes to a worker process pool (Figure objects render with
+    Agg there); I/O bound jobs such as screenshots, camera captures and CSV
+    writing run in a thread pool. Results are exposed as futures.
+    """
+
+    def __init__(self, render_workers=2, io_workers=4):
+        self.render_workers = render_workers
+        self._process_pool = None
+        self._process_lock = threading.Lock()
+        self._thread_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="postrun")
+        self.jobs = []  # (name, future) for the current run
+        self._watch_id = None
+
+    def start_run(self):
+        """Forget the jobs of the previous run"""
+        self.jobs = []
+
+    def submit_render(self, name, fn, *args):
+        """Run a figure-rendering job in a worker process"""
+        future = self._thread_pool.submit(self._render, fn, args)
+        self.jobs.append((name, future))
+        return future
+
+    def submit_io(self, name, fn, *args):
+        """Run an I/O bound job (screenshot, camera, file write) in a thread"""
+        future = self._thread_pool.submit(fn, *args)
+        self.jobs.append((name, future))
+        return future
+
+    def _get_process_pool(self):
+        with self._process_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.render_workers)
+            return self._process_pool
+
+    def _render(self, fn, args):
+        try:
+            return self._get_process_pool().submit(fn, *args).result()
+        except (BrokenProcessPool, OSError) as e:
+            # Worker processes unavailable: render in this thread instead
+            print(f"[WARNING] Render worker unavailable ({e}), rendering in background thread")
+            with self._process_lock:
+                self._process_pool = None
+            return fn(*args)
+
+    def progress(self):
+        """Return (done, total, failed job names) for the current run"""
+        done = [(name, f) for name, f in self.jobs if f.done()]
+        failed = [name for name, f in done if f.exception() is not None]
+        return len(done), len(self.jobs), failed
+
+    def wait(self, names=None, timeout=None):
+        """Block until the named jobs (or all jobs) have finished"""
+        for name, future in list(self.jobs):
+            if names is None or name in names:
+                try:
+                    future.result(timeout=timeout)
+                except Exception as e:
+                    print(f"[WARNING] Post-run job '{name}' failed: {e}")
+
+    def watch(self, root, status_callback, interval_ms=250):
+        """Report progress to the GUI from the Tk event loop until all jobs finish"""
+        if self._watch_id is not None:
+            root.after_cancel(self._watch_id)
+            self._watch_id = None
+
+        def poll():
+            done, total, failed = self.progress()
+            if done < total:
+                status_callback(f"Saving run artefacts: {done}/{total} done")
+                self._watch_id = root.after(interval_ms, poll)
+                return
+            self._watch_id = None
+            if failed:
+                status_callback(f"Run artefacts saved ({len(failed)} failed: {', '.join(failed)})")
+            elif total:
+                status_callback(f"Run artefacts saved ({total} jobs)")
+
+        poll()
+
+    def shutdown(self, wait=True):
+        """Finish outstanding jobs and stop the worker pools"""
+        self._thread_pool.shutdown(wait=wait)
+        with self._process_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=wait)
+                self._process_pool = None
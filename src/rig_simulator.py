@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Simulated EDWA Alignment Rig
+A digital twin of the fibre-to-waveguide coupling for developing the
+alignment algorithms offline. A vectorised 6-DOF mode-overlap model gives
+the coupled power for any stage position; the rig adds meter noise, slow
+drift of the optimum, stage backlash, move and settle time and meter
+latency on a virtual clock, so nothing actually waits.
+
+The rig exposes handles that speak the same command subset as the real
+instruments, so the unchanged functions in alignment.py run against it:
+
+    rig = SimulatedRig(seed=1)
+    with rig.installed():
+        move_axis_to(rig.stage, 'Y', 120)
+        power = read_power(rig.meter)
+
+Usage:
+    python rig_simulator.py --runs 500 --algorithm hill
+"""
+
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+
+import alignment
+from alignment import AXES
+
+class CouplingModel:
+    """Gaussian mode-overlap coupling as a function of the six DS102 axes
+
+    X is the gap along the fibre, Y and Z are lateral, U and V tilt the
+    fibre (about a pivot behind the tip, so tilting also moves the tip
+    sideways by lever units per tilt unit) and W rolls it. All widths are in
+    stage units. A larger gap lowers the coupling and widens the lateral
+    tolerance, as for two Gaussian beams of equal waist.
+    """
+
+    def __init__(self, optimum=None, peak_dbm=-20.0, waist=64.0, rayleigh=1500.0,
+                 tilt_width=400.0, roll_width=2000.0, lever=0.3, floor_dbm=-70.0):
+        self.optimum = np.array([(optimum or {}).get(ax, 0.0) for ax in AXES], dtype=float)
+        self.peak_dbm = peak_dbm
+        self.waist = waist
+        self.rayleigh = rayleigh
+        self.tilt_width = tilt_width
+        self.roll_width = roll_width
+        self.lever = lever
+        self.floor_dbm = floor_dbm
+
+    def efficiency(self, positions, optimum=None):
+        """Coupling efficiency (0-1) for an (N, 6) or (6,) array of positions"""
+        d = np.asarray(positions, dtype=float) - (self.optimum if optimum is None else optimum)
+        gap, dy, dz, du, dv, dw = np.moveaxis(d, -1, 0)
+        spread = 1 + (gap / (2 * self.rayleigh)) ** 2
+        lateral_y = dy + self.lever * du
+        lateral_z = dz + self.lever * dv
+        return (np.exp(-(lateral_y ** 2 + lateral_z ** 2) / (self.waist ** 2 * spread)) / spread *
+                np.exp(-(du ** 2 + dv ** 2) / self.tilt_width ** 2) *
+                np.exp(-dw ** 2 / self.roll_width ** 2))
+
+    def power_dbm(self, positions, optimum=None):
+        """Coupled power in dBm (noise-free), down to the detector floor"""
+        linear = 10 ** (self.peak_dbm / 10) * self.efficiency(positions, optimum) + 10 ** (self.floor_dbm / 10)
+        return 10 * np.log10(linear)
+
+class SimulatedRig:
+    """Stage, power meter and virtual clock around a CouplingModel
+
+    noise_db: Gaussian reading noise. drift: optimum drift per axis in units
+    per hour. backlash: per-axis dead band (units). speed: stage speed in
+    units/s; settle: settle time per move (s); meter_latency: time per
+    reading (s). start: initial stage position (default: the origin).
+    """
+
+    def __init__(self, model=None, seed=0, noise_db=0.02, drift=None, backlash=None,
+                 speed=2000.0, settle=0.05, meter_latency=0.02, start=None):
+        self.model = model or CouplingModel()
+        self.rng = np.random.default_rng(seed)
+        self.noise_db = noise_db
+        self.drift = np.array([(drift or {}).get(ax, 0.0) for ax in AXES], dtype=float) / 3600.0
+        self.backlash = np.array([(backlash or {}).get(ax, 0.0) for ax in AXES], dtype=float)
+        self.speed = speed
+        self.settle = settle
+        self.meter_latency = meter_latency
+        self.commanded = np.array([(start or {}).get(ax, 0.0) for ax in AXES], dtype=float)
+        self.actual = self.commanded.copy()
+        self.clock = 0.0
+        self.stats = {'moves': 0, 'reads': 0, 'move_s': 0.0, 'settle_s': 0.0, 'read_s': 0.0, 'wait_s': 0.0}
+        self.meter = SimulatedPowerMeter(self)
+        self.stage = SimulatedStageSerial(self)
+
+    # Physics
+    def optimum_now(self):
+        """Optimum position at the current virtual time (after drift)"""
+        return self.model.optimum + self.drift * self.clock
+
+    def true_power(self, position=None):
+        """Noise-free power at a position dict (default: where the stage actually is)"""
+        if position is None:
+            actual = self.actual
+        else:
+            actual = np.array([position[ax] for ax in AXES], dtype=float)
+        return float(self.model.power_dbm(actual, self.optimum_now()))
+
+    def peak_power(self):
+        return float(self.model.power_dbm(self.optimum_now(), self.optimum_now()))
+
+    def error_db(self, position=None):
+        """How far below the (drifted) optimum a position is, in dB"""
+        return self.peak_power() - self.true_power(position)
+
+    # Instrument behaviour
+    def move_to(self, axis, target):
+        i = AXES.index(axis)
+        distance = target - self.commanded[i]
+        if distance == 0:
+            return
+        # Dead band: the carriage only follows once the slack is taken up
+        half = self.backlash[i] / 2
+        if distance > 0:
+            self.actual[i] = max(self.actual[i], target - half)
+        else:
+            self.actual[i] = min(self.actual[i], target + half)
+        self.commanded[i] = target
+        move_time = abs(distance) / self.speed
+        self.clock += move_time + self.settle
+        self.stats['moves'] += 1
+        self.stats['move_s'] += move_time
+        self.stats['settle_s'] += self.settle
+
+    def read(self):
+        self.clock += self.meter_latency
+        self.stats['reads'] += 1
+        self.stats['read_s'] += self.meter_latency
+        return self.true_power() + self.noise_db * self.rng.standard_normal()
+
+    def sleep(self, seconds):
+        """Virtual-clock replacement for alignment.sleep"""
+        self.clock += seconds
+        self.stats['wait_s'] += seconds
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Route alignment.sleep to this rig's virtual clock"""
+        previous = alignment.set_sleep(self.sleep)
+        try:
+            yield self
+        finally:
+            alignment.set_sleep(previous)
+
+    def position(self):
+        """Commanded position as a dict (what the controller reports)"""
+        return {ax: float(v) for ax, v in zip(AXES, self.commanded)}
+
+class SimulatedPowerMeter:
+    """Keysight power meter handle: write/read/query of the power read commands"""
+
+    READ_COMMANDS = ("READ1:pow?", "READ:ch1:pow?", "meas1:pow?", "fetch1:pow?", ":read1:pow?", "read:pow? (@1)")
+
+    def __init__(self, rig):
+        self.rig = rig
+        self._pending = None
+        self.timeout = 5000
+
+    def write(self, command):
+        self._pending = command.strip()
+
+    def read(self):
+        command, self._pending = self._pending, None
+        if command in self.READ_COMMANDS:
+            return f"{self.rig.read():.6f}"
+        if command == "*IDN?":
+            return "Keysight Technologies,N7744C,SIMULATED,1.0"
+        # A query the meter does not answer times out, as over VISA
+        raise TimeoutError(f"simulated meter: no response to {command!r}")
+
+    def query(self, command):
+        self.write(command)
+        return self.read()
+
+    def close(self):
+        pass
+
+class SimulatedStageSerial:
+    """DS102 serial handle: AXIn:GOABS/MOTION?/POS? and relative moves ("Y+10")"""
+
+    def __init__(self, rig):
+        self.rig = rig
+        self._replies = []
+        self._buffer = ""
+        self.timeout = 1
+        self.is_open = True
+
+    def write(self, data):
+        self._buffer += data.decode('ascii') if isinstance(data, bytes) else data
+        while "\r" in self._buffer:
+            line, self._buffer = self._buffer.split("\r", 1)
+            self._buffer = self._buffer.lstrip("\n")
+            self._handle(line.strip())
+        return len(data)
+
+    def _handle(self, line):
+        if line.startswith("AXI") and ":" in line:
+            axis = line[3]
+            command = line[5:]
+            if command.startswith("GOABS"):
+                self.rig.move_to(axis, float(command.split()[1]))
+            elif command == "MOTION?":
+                # Moves complete on the virtual clock as soon as they are issued
+                self._replies.append("0")
+            elif command == "POS?":
+                self._replies.append(str(int(round(self.rig.commanded[AXES.index(axis)]))))
+        elif line and line[0] in AXES:
+            axis = line[0]
+            self.rig.move_to(axis, self.rig.commanded[AXES.index(axis)] + float(line[1:]))
+
+    def readline(self):
+        if not self._replies:
+            return b""  # read timeout
+        return (self._replies.pop(0) + "\r\n").encode('ascii')
+
+    @property
+    def in_waiting(self):
+        return sum(len(reply) + 2 for reply in self._replies)
+
+    def reset_input_buffer(self):
+        self._replies.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+def random_start(rng, spread=None):
+    """Start position scattered around the optimum (default ±60 lateral, ±300 gap, ±100 tilt)"""
+    spread = spread or {'X': 300, 'Y': 60, 'Z': 60, 'U': 100, 'V': 100, 'W': 200}
+    return {ax: float(np.round(rng.uniform(-spread[ax], spread[ax]))) for ax in AXES}
+
+def run_alignment(algorithm, seed, rig_options=None):
+    """One simulated alignment from a random start; returns a result dict"""
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)  # the random walks draw from the global generator
+    rig = SimulatedRig(seed=seed, start=random_start(rng), **(rig_options or {}))
+    position = rig.position()
+    start_error = rig.error_db()
+    with rig.installed(), contextlib.redirect_stdout(io.StringIO()):
+        if algorithm == 'hill':
+            alignment.hill_climb_all_axes_constrained(rig.meter, rig.stage, position, 10)
+        elif algorithm == 'walk':
+            alignment.random_walk_constrained(rig.meter, rig.stage, position, position.copy(), 50, 10)
+        elif algorithm == 'smart':
+            power = alignment.read_power(rig.meter)
+            alignment.smart_hill_climb(rig.meter, rig.stage, position, power)
+        else:
+            raise ValueError(f"unknown algorithm '{algorithm}'")
+    return {'seed': seed, 'start_error_db': start_error, 'final_error_db': rig.error_db(),
+            'virtual_s': rig.clock, **rig.stats}
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated EDWA alignment runs')
+    parser.add_argument('--runs', type=int, default=200, help='Number of alignments')
+    parser.add_argument('--algorithm', choices=['hill', 'walk', 'smart'], default='hill', help='Optimizer to run')
+    parser.add_argument('--seed', type=int, default=0, help='First seed')
+    parser.add_argument('--noise', type=float, default=0.02, help='Meter noise (dB rms)')
+    parser.add_argument('--backlash', type=float, default=0.0, help='Backlash on every axis (units)')
+    args = parser.parse_args()
+
+    options = {'noise_db': args.noise, 'backlash': {ax: args.backlash for ax in AXES}}
+    start = time.perf_counter()
+    results = [run_alignment(args.algorithm, args.seed + i, options) for i in range(args.runs)]
+    elapsed = time.perf_counter() - start
+
+    final = np.array([r['final_error_db'] for r in results])
+    reads = np.array([r['reads'] for r in results])
+    print(f"[INFO] {args.runs} '{args.algorithm}' alignments in {elapsed:.2f} s "
+          f"({args.runs / elapsed * 60:.0f} per minute)")
+    print(f"[INFO] Final error: median {np.median(final):.3f} dB, 90th percentile {np.percentile(final, 90):.3f} dB, "
+          f"within 0.1 dB: {np.mean(final <= 0.1) * 100:.0f}%")
+    print(f"[INFO] Readings per alignment: median {np.median(reads):.0f}; "
+          f"simulated rig time: median {np.median([r['virtual_s'] for r in results]):.1f} s")
+
+if __name__ == "__main__":
+    main()
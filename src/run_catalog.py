@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Run Catalogue for EDWA Logs
+Incrementally indexes the run directories under log/ (scan_*, hillclimb_*,
+scan_hillclimb_*) into a local SQLite database so questions like "best
+coupling ever" or "all scans with Z enabled" are answered without opening
+files by hand. Only new or changed directories are re-read on update.
+
+Run duration and points/s need the measuring sessions recorded in a
+scan_plan_*.json; older runs show them as n/a.
+
+Usage:
+    python run_catalog.py update
+    python run_catalog.py best --limit 5
+    python run_catalog.py list --axis Z --kind scan --since 2025-08-05
+    python run_catalog.py show scan_20250807_104114
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+import numpy as np
+
+from scan_trace import AXES
+from scan_loader import load_table
+from run_journal import read_journal
+from scan_checkpoint import scan_duration
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "log")
+DEFAULT_DB_NAME = "run_catalog.sqlite"
+
+RUN_DIR_PATTERN = re.compile(r"^(scan_hillclimb|scan|hillclimb)_(\d{8}_\d{6})$")
+
+# Result files in priority order: the first one found describes the run
+RESULT_FILES = [
+    ('combined', re.compile(r"^combined_optimization_\d{8}_\d{6}\.csv$")),
+    ('scan', re.compile(r"^scan_data_\d{8}_\d{6}\.csv$")),
+    ('climb', re.compile(r"^climb_hill_\d{8}_\d{6}\.csv$")),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    started TEXT,
+    dir_mtime REAL NOT NULL,
+    result_file TEXT,
+    result_type TEXT,
+    points INTEGER,
+    enabled_axes TEXT,
+    peak_power REAL,
+    peak_X REAL, peak_Y REAL, peak_Z REAL, peak_U REAL, peak_V REAL, peak_W REAL,
+    start_power REAL,
+    duration_s REAL,
+    points_per_s REAL,
+    file_count INTEGER,
+    image_count INTEGER,
+    has_heatmap INTEGER,
+    wavelength_nm REAL,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_peak ON runs(peak_power);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+"""
+
+def summarize_result(path, result_type):
+    """Per-run numbers from a result CSV"""
+    table = load_table(path)
+    power = np.asarray(table['power'])
+    positions = {ax: np.asarray(table[ax]) for ax in AXES}
+    if result_type == 'scan':
+        measured = table['index'] >= 0
+        start_power = float(power[~measured][0]) if np.any(~measured) else None
+        # Enabled axes are the ones that actually moved during the scan
+        enabled = [ax for ax in AXES if len(np.unique(positions[ax][measured])) > 1]
+    else:
+        start_power = float(power[0]) if len(power) else None
+        labels = set(np.unique(table['phase']).tolist())
+        enabled = [ax for ax in AXES if ax in labels]
+
+    summary = {'points': int(len(power)), 'enabled_axes': ",".join(enabled), 'start_power': start_power}
+    if len(power):
+        best = int(np.argmax(power))
+        summary['peak_power'] = float(power[best])
+        for ax in AXES:
+            summary[f'peak_{ax}'] = float(positions[ax][best])
+    return summary
+
+def index_run_dir(path):
+    """Collect catalogue fields for one run directory (None if not a run)"""
+    name = os.path.basename(os.path.normpath(path))
+    match = RUN_DIR_PATTERN.match(name)
+    if not match:
+        return None
+    kind, stamp = match.groups()
+    files = os.listdir(path)
+
+    record = {
+        'name': name,
+        'path': os.path.abspath(path),
+        'kind': kind,
+        'started': datetime.strptime(stamp, "%Y%m%d_%H%M%S").isoformat(),
+        'file_count': len(files),
+        'image_count': sum(1 for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg'))),
+        'has_heatmap': int(any(f.startswith('heatmap_') for f in files)),
+        'indexed_at': time.time(),
+    }
+
+    for result_type, pattern in RESULT_FILES:
+        matches = sorted(f for f in files if pattern.match(f))
+        if matches:
+            record['result_file'] = matches[-1]
+            record['result_type'] = result_type
+            try:
+                record.update(summarize_result(os.path.join(path, matches[-1]), result_type))
+            except (ValueError, KeyError, StopIteration) as e:
+                print(f"[WARNING] Could not read {matches[-1]} in {name}: {e}")
+            break
+
+    # Duration is only known when the measuring sessions were recorded (scan
+    # plan); it leaves out the time a resumed scan sat interrupted. A session
+    # cut short by a crash ends at its last point in the journal
+    plans = [f for f in files if f.startswith('scan_plan_') and f.endswith('.json')]
+    if plans and record.get('result_file'):
+        try:
+            with open(os.path.join(path, plans[0])) as f:
+                plan = json.load(f)
+            times = None
+            journal_path = os.path.join(path, plan.get('journal', ""))
+            if any(s.get('end') is None for s in plan.get('sessions', [])) and os.path.isfile(journal_path):
+                times = read_journal(journal_path).column('t')
+            record['duration_s'] = scan_duration(plan, times)
+            if record['duration_s'] and record.get('points'):
+                record['points_per_s'] = record['points'] / record['duration_s']
+            if not record.get('enabled_axes'):
+                record['enabled_axes'] = ",".join(plan['axes'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARNING] Could not read scan plan in {name}: {e}")
+
+    states = sorted(f for f in files if f.startswith('keysight_state_') and f.endswith('.json'))
+    if states:
+        try:
+            with open(os.path.join(path, states[-1])) as f:
+                record['wavelength_nm'] = float(json.load(f)['wavelength_m']) * 1e9
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    # Taken last: reading the results may add a loader cache to the directory
+    record['dir_mtime'] = os.stat(path).st_mtime
+    return record
+
+class RunCatalog:
+    """SQLite catalogue of run directories"""
+
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, db_path=None):
+        self.log_dir = log_dir
+        self.db_path = db_path or os.path.join(log_dir, DEFAULT_DB_NAME)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.columns = [row[1] for row in self.conn.execute("PRAGMA table_info(runs)")]
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, force=False):
+        """Index new or changed run directories and drop deleted ones
+
+        Returns (added_or_updated, removed) counts.
+        """
+        known = {row['name']: row['dir_mtime'] for row in self.conn.execute("SELECT name, dir_mtime FROM runs")}
+        seen = set()
+        changed = 0
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir() or not RUN_DIR_PATTERN.match(entry.name):
+                    continue
+                seen.add(entry.name)
+                if not force and known.get(entry.name) == entry.stat().st_mtime:
+                    continue
+                record = index_run_dir(entry.path)
+                if record is None:
+                    continue
+                fields = [c for c in self.columns if c in record]
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO runs ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                    [record[c] for c in fields])
+                changed += 1
+
+        removed = [name for name in known if name not in seen]
+        self.conn.executemany("DELETE FROM runs WHERE name = ?", [(name,) for name in removed])
+        self.conn.commit()
+        return changed, len(removed)
+
+    def runs(self, axes=None, kind=None, since=None, until=None, min_power=None, order_by='started', limit=None):
+        """Runs matching all given filters, as dicts
+
+        axes: runs in which every listed axis was enabled. since/until:
+        ISO dates or datetimes compared with the run start.
+        """
+        where, params = [], []
+        for axis in axes or []:
+            where.append("(',' || enabled_axes || ',') LIKE ?")
+            params.append(f"%,{axis.upper()},%")
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if since:
+            where.append("started >= ?")
+            params.append(since)
+        if until:
+            where.append("started <= ?")
+            params.append(until)
+        if min_power is not None:
+            where.append("peak_power >= ?")
+            params.append(min_power)
+
+        if order_by not in ('started', 'peak_power', 'points'):
+            raise ValueError(f"cannot order by '{order_by}'")
+        direction = "DESC" if order_by in ('peak_power', 'points') else "ASC"
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by} IS NULL, {order_by} {direction}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def best(self, limit=10, **filters):
+        """Runs with the highest peak power"""
+        return self.runs(order_by='peak_power', limit=limit, **filters)
+
+    def get(self, name):
+        """One run by directory name, or None"""
+        row = self.conn.execute("SELECT * FROM runs WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+def format_run(run):
+    """One-line summary of a run"""
+    peak = "n/a" if run['peak_power'] is None else f"{run['peak_power']:.2f} dBm"
+    position = ", ".join(f"{ax}:{run[f'peak_{ax}']:.0f}" for ax in AXES if run[f'peak_{ax}'] is not None)
+    duration = "n/a" if run['duration_s'] is None else f"{run['duration_s']:.0f} s"
+    return (f"{run['name']:<32} {run['kind']:<15} axes={run['enabled_axes'] or '-':<12} "
+            f"points={run['points'] or 0:<6} peak={peak:<12} time={duration:<8} [{position}]")
+
+def main():
+    parser = argparse.ArgumentParser(description='EDWA run catalogue')
+    parser.add_argument('action', choices=['update', 'list', 'best', 'show'], help='Action to perform')
+    parser.add_argument('name', nargs='?', help='Run directory name (for show)')
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR, help='Directory holding the run directories')
+    parser.add_argument('--db', help='Catalogue file (default: <log-dir>/run_catalog.sqlite)')
+    parser.add_argument('--axis', action='append', help='Only runs with this axis enabled (repeatable)')
+    parser.add_argument('--kind', choices=['scan', 'hillclimb', 'scan_hillclimb'], help='Only runs of this kind')
+    parser.add_argument('--since', help='Only runs started on/after this date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Only runs started on/before this date (YYYY-MM-DD)')
+    parser.add_argument('--min-power', type=float, help='Only runs with peak power >= this (dBm)')
+    parser.add_argument('--limit', type=int, default=None, help='Maximum number of runs to print')
+    parser.add_argument('--force', action='store_true', help='Re-read every directory on update')
+    args = parser.parse_args()
+
+    catalog = RunCatalog(args.log_dir, args.db)
+    start = time.perf_counter()
+
+    # Queries always see an up-to-date catalogue; unchanged directories cost one stat each
+    changed, removed = catalog.update(force=args.force and args.action == 'update')
+    if args.action == 'update':
+        print(f"[INFO] {changed} runs indexed, {removed} removed ({time.perf_counter() - start:.3f} s)")
+    elif args.action == 'show':
+        run = catalog.get(args.name or "")
+        if run is None:
+            print(f"[ERROR] No run named '{args.name}'")
+            sys.exit(1)
+        for key, value in run.items():
+            if value is None and key in ('duration_s', 'points_per_s'):
+                value = "n/a (no measuring sessions in a scan plan)"
+            print(f"{key:>14}: {value}")
+    else:
+        filters = dict(axes=args.axis, kind=args.kind, since=args.since,
+                       until=args.until + "T23:59:59" if args.until else None, min_power=args.min_power)
+        if args.action == 'best':
+            runs = catalog.best(limit=args.limit or 10, **filters)
+        else:
+            runs = catalog.runs(limit=args.limit, **filters)
+        for run in runs:
+            print(format_run(run))
+        if any(run['duration_s'] is None for run in runs):
+            print("[INFO] time=n/a: run has no scan plan with its measuring sessions, so its duration is unknown")
+        print(f"[INFO] {len(runs)} runs ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    catalog.close()
+
+if __name__ == "__main__":
+    main()
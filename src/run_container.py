@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Single-File Run Container for EDWA
+Bundles one run into a .npz (zip) file: the measurement table, camera frames
+as one image stack, per-frame analysis, instrument settings and optionally
+the remaining run files. Tables are deflate-compressed. By default frames are
+written as one deflated chunk per frame (compact, read frame by frame); with
+compress_frames=False the stack is stored uncompressed so it can be
+memory-mapped straight out of the file, at the cost of a container larger
+than the source JPEGs. Frames are decoded and written one at a time.
+np.load() can also open the file.
+
+Usage:
+    python run_container.py pack ../log/scan_20250807_104114
+    python run_container.py pack ../log/scan_20250807_104114 --stored-frames
+    python run_container.py info ../log/scan_20250807_104114.npz
+"""
+
+import os
+import io
+import re
+import csv
+import sys
+import json
+import struct
+import zipfile
+import argparse
+from datetime import datetime
+import numpy as np
+
+from scan_trace import ScanTrace, AXES
+from scan_checkpoint import read_scan_csv
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+CONTAINER_VERSION = 1
+FRAME_EXTENSIONS = ('.jpg', '.jpeg', '.bmp', '.png')
+ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")  # fixed part of a zip local file header
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, np.asarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+def read_climb_csv(path):
+    """Load a climb_hill_*/combined_optimization_*.csv into a ScanTrace"""
+    trace = ScanTrace()
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            position = {ax: float(row[ax]) for ax in AXES}
+            trace.append(int(row["Iteration"]), float(row["Power (dBm)"]), position, phase=row["Axis"])
+    return trace
+
+def write_run_container(path, trace=None, frames=None, frame_info=None, metadata=None, files=None,
+                        compress_frames=True):
+    """Write a run container
+
+    trace: ScanTrace. frames: (N, H, W[, C]) uint8 array or any sequence of
+    equally shaped arrays supporting len() and indexing (written one by one,
+    so the whole stack never has to be in memory). frame_info: list of per-frame dicts (name, analysis, ...).
+    metadata: JSON-serialisable dict (scan plan, meter state, ...). files:
+    {name: bytes} stored as-is under files/.
+    """
+    with zipfile.ZipFile(path, "w", allowZip64=True) as zf:
+        manifest = {'version': CONTAINER_VERSION, 'created': datetime.now().isoformat(timespec='seconds')}
+
+        if trace is not None:
+            zf.writestr("trace.npy", _npy_bytes(trace.data), compress_type=zipfile.ZIP_DEFLATED)
+            zf.writestr("trace_phases.npy", _npy_bytes(np.asarray(trace.phases, dtype=str)),
+                        compress_type=zipfile.ZIP_DEFLATED)
+            manifest['points'] = len(trace)
+
+        if frames is not None and len(frames):
+            first = np.asarray(frames[0], dtype=np.uint8)
+            shape = (len(frames),) + first.shape
+            if compress_frames:
+                # One deflated chunk per frame: smaller, frames still load individually
+                for i, frame in enumerate(frames):
+                    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+                    if frame.shape != first.shape:
+                        raise ValueError(f"frame shape {frame.shape} differs from {first.shape}")
+                    zf.writestr(f"frames/{i:05d}.npy", _npy_bytes(frame), compress_type=zipfile.ZIP_DEFLATED)
+            else:
+                # Stored (not deflated) so the stack can be memory-mapped in place
+                with zf.open(zipfile.ZipInfo("frames.npy"), "w", force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(member, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.uint8)),
+                                                                  'fortran_order': False, 'shape': shape})
+                    for frame in frames:
+                        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+                        if frame.shape != first.shape:
+                            raise ValueError(f"frame shape {frame.shape} differs from {first.shape}")
+                        member.write(frame.tobytes())
+            manifest['frames'] = list(shape)
+            manifest['frame_storage'] = 'chunked' if compress_frames else 'stored'
+
+        zf.writestr("frames.json", json.dumps(frame_info or [], indent=1), compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("metadata.json", json.dumps(metadata or {}, indent=1), compress_type=zipfile.ZIP_DEFLATED)
+
+        for name, data in (files or {}).items():
+            zf.writestr(f"files/{name}", data, compress_type=zipfile.ZIP_STORED)
+        manifest['files'] = sorted(files or {})
+
+        zf.writestr("manifest.json", json.dumps(manifest, indent=1), compress_type=zipfile.ZIP_DEFLATED)
+    return path
+
+class FrameFiles:
+    """Image files as a frame sequence, decoded only when a frame is read"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        with Image.open(self.paths[i]) as image:
+            return np.asarray(image if image.mode in ("L", "RGB") else image.convert("L"))
+
+    def __iter__(self):
+        for i in range(len(self.paths)):
+            yield self[i]
+
+def _frame_shape(image):
+    width, height = image.size
+    return (height, width, 3) if image.mode == "RGB" else (height, width)
+
+def _load_frames(frame_paths):
+    """Frames of the most common shape; returns (FrameFiles, used_paths)
+
+    Only the image headers are read here; pixels are decoded while the
+    container is written.
+    """
+    if not PIL_AVAILABLE:
+        print("[WARNING] PIL not available - camera frames not packed")
+        return FrameFiles([]), []
+    shapes = {}
+    for frame_path in frame_paths:
+        try:
+            with Image.open(frame_path) as image:
+                shapes[frame_path] = _frame_shape(image)
+        except Exception as e:
+            print(f"[WARNING] Could not decode {frame_path}: {e}")
+    if not shapes:
+        return FrameFiles([]), []
+    counts = list(shapes.values())
+    common = max(set(counts), key=counts.count)
+    used = [p for p in frame_paths if shapes.get(p) == common]
+    return FrameFiles(used), used
+
+def pack_run_dir(run_dir, out_path=None, include_files=True, compress_frames=True):
+    """Pack a log/<run> directory into <run>.npz next to it"""
+    run_dir = os.path.normpath(run_dir)
+    name = os.path.basename(run_dir)
+    out_path = out_path or run_dir + ".npz"
+    files = sorted(os.listdir(run_dir))
+
+    trace = None
+    for pattern, reader in ((r"^combined_optimization_.*\.csv$", read_climb_csv),
+                            (r"^scan_data_.*\.csv$", read_scan_csv),
+                            (r"^climb_hill_.*\.csv$", read_climb_csv)):
+        matches = [f for f in files if re.match(pattern, f)]
+        if matches:
+            trace = reader(os.path.join(run_dir, matches[-1]))
+            break
+
+    metadata = {'run': name}
+    for prefix, key in (("scan_plan_", 'scan_plan'), ("keysight_state_", 'meter_state')):
+        for f in files:
+            if f.startswith(prefix) and f.endswith(".json"):
+                with open(os.path.join(run_dir, f)) as fh:
+                    metadata[key] = json.load(fh)
+
+    # Camera frames and their analysis/metadata JSON files
+    camera_dir = os.path.join(run_dir, "camera_captures")
+    frame_paths = []
+    if os.path.isdir(camera_dir):
+        frame_paths = sorted(os.path.join(camera_dir, f) for f in os.listdir(camera_dir)
+                             if f.lower().endswith(FRAME_EXTENSIONS))
+    frames, used = _load_frames(frame_paths)
+    frame_info = []
+    for frame_path in used:
+        info = {'name': os.path.basename(frame_path)}
+        stem = os.path.splitext(frame_path)[0]
+        for suffix, key in (("_analysis.json", 'analysis'), ("_metadata.json", 'metadata')):
+            if os.path.exists(stem + suffix):
+                with open(stem + suffix) as fh:
+                    info[key] = json.load(fh)
+        frame_info.append(info)
+
+    extra = {}
+    if include_files:
+        for f in files:
+            full = os.path.join(run_dir, f)
+            if os.path.isfile(full):
+                with open(full, "rb") as fh:
+                    extra[f] = fh.read()
+        for frame_path in frame_paths:
+            if frame_path not in used:
+                with open(frame_path, "rb") as fh:
+                    extra[f"camera_captures/{os.path.basename(frame_path)}"] = fh.read()
+
+    write_run_container(out_path, trace, frames, frame_info, metadata, extra, compress_frames)
+    print(f"[INFO] Run container written: {out_path} ({len(trace) if trace is not None else 0} points, "
+          f"{len(frames)} frames, {len(extra)} files)")
+    return out_path
+
+class RunContainer:
+    """Lazy reader for a run container
+
+    Nothing is decompressed until asked for; frames() memory-maps the stack
+    directly from the container file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "r")
+        self.names = self._zip.namelist()
+        self.manifest = self._json("manifest.json")
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _json(self, name):
+        if name not in self.names:
+            return {}
+        return json.loads(self._zip.read(name))
+
+    @property
+    def metadata(self):
+        return self._json("metadata.json")
+
+    @property
+    def frame_info(self):
+        return self._json("frames.json") or []
+
+    def trace(self):
+        """Measurement table as a ScanTrace (None if the run has none)"""
+        if "trace.npy" not in self.names:
+            return None
+        data = np.load(io.BytesIO(self._zip.read("trace.npy")), allow_pickle=False)
+        phases = np.load(io.BytesIO(self._zip.read("trace_phases.npy")), allow_pickle=False)
+        return ScanTrace.from_array(data, [str(label) for label in phases])
+
+    def _member_data_offset(self, name):
+        """Byte offset of a stored member's data inside the container file"""
+        info = self._zip.getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{name} is compressed and cannot be memory-mapped")
+        with open(self.path, "rb") as f:
+            f.seek(info.header_offset)
+            fields = ZIP_LOCAL_HEADER.unpack(f.read(ZIP_LOCAL_HEADER.size))
+            name_len, extra_len = fields[-2], fields[-1]
+            return info.header_offset + ZIP_LOCAL_HEADER.size + name_len + extra_len
+
+    @property
+    def frame_count(self):
+        return self.manifest.get('frames', [0])[0]
+
+    def frames(self, mmap=True):
+        """Camera frame stack (N, H, W[, C])
+
+        Memory-mapped for the stored layout unless mmap=False; a chunked
+        (compressed, default) stack is always read into memory.
+        """
+        if self.manifest.get('frame_storage') == 'chunked':
+            return np.stack([self.frame(i) for i in range(self.frame_count)])
+        if "frames.npy" not in self.names:
+            return None
+        if not mmap:
+            return np.load(io.BytesIO(self._zip.read("frames.npy")), allow_pickle=False)
+        offset = self._member_data_offset("frames.npy")
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            data_offset = f.tell()
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=data_offset, shape=shape,
+                         order="F" if fortran_order else "C")
+
+    def frame(self, i):
+        """One frame, read from disk on its own"""
+        if self.manifest.get('frame_storage') == 'chunked':
+            return np.load(io.BytesIO(self._zip.read(f"frames/{i:05d}.npy")), allow_pickle=False)
+        return np.array(self.frames(mmap=True)[i])
+
+    def file(self, name):
+        """Raw bytes of a bundled run file (e.g. a heatmap PNG)"""
+        return self._zip.read(f"files/{name}")
+
+def main():
+    parser = argparse.ArgumentParser(description='EDWA single-file run container')
+    parser.add_argument('action', choices=['pack', 'info'], help='Pack a run directory or describe a container')
+    parser.add_argument('path', help='Run directory (pack) or container file (info)')
+    parser.add_argument('--output', '-o', help='Container path (default: <run dir>.npz)')
+    parser.add_argument('--no-files', action='store_true', help='Do not bundle PNG/screenshot files')
+    parser.add_argument('--stored-frames', action='store_true',
+                        help='Store camera frames uncompressed (memory-mappable, larger than the JPEGs)')
+    args = parser.parse_args()
+
+    if args.action == 'pack':
+        if not os.path.isdir(args.path):
+            print(f"[ERROR] Not a directory: {args.path}")
+            sys.exit(1)
+        pack_run_dir(args.path, args.output, include_files=not args.no_files, compress_frames=not args.stored_frames)
+    else:
+        with RunContainer(args.path) as container:
+            print(json.dumps(container.manifest, indent=2))
+            meta = container.metadata
+            print(f"Metadata keys: {', '.join(meta) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Crash-Safe Run Journal for EDWA
+Every measurement is appended to a journal file as it is taken, so a crash
+or a dropped VISA link mid-run loses at most the last fsync interval. The
+measuring loop only puts rows on a queue; a background thread writes them in
+batches. After a normal finish the journal is converted to the usual CSV
+layout and removed.
+"""
+
+import os
+import csv
+import time
+import queue
+import threading
+
+from scan_trace import ScanTrace, AXES
+
+JOURNAL_HEADER = ["Index", "t", "Power (dBm)", "Phase"] + AXES
+
+def trim_torn_tail(path):
+    """Truncate a journal back to its last complete line, if it has one missing"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return 0
+        # Walk back in blocks to the last newline (the torn line is short)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            cut = f.read(end - start).rfind(b"\n")
+            if cut >= 0:
+                end = start + cut + 1
+                break
+            end = start
+        f.truncate(end)
+    print(f"[WARNING] Dropped a torn last line ({size - end} bytes) from {path}")
+    return size - end
+
+class JournalWriter:
+    """Append-only journal written from a background thread
+
+    write() never blocks on disk. Rows are written in batches of up to
+    batch_size, flushed after every batch and fsync'd at most every
+    fsync_interval seconds (0 = after every batch).
+    """
+
+    def __init__(self, path, fsync_interval=1.0, batch_size=256):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.error = None
+
+        self._queue = queue.SimpleQueue()
+        self._stop = object()
+        # An existing journal is continued (resumed scan); drop a line torn by a crash first
+        trim_torn_tail(path)
+        self._file = open(path, "a", newline="")
+        self.appending = self._file.tell() > 0
+        if not self.appending:
+            self._file.write(",".join(JOURNAL_HEADER) + "\n")
+            self._file.flush()
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="run-journal", daemon=True)
+        self._thread.start()
+
+    def write(self, index, t, power, phase, position):
+        """Queue one measurement (position: dict with the X..W axes)"""
+        if self._file.closed:
+            return
+        self._queue.put((index, t, power, phase, tuple(position.get(ax, 0.0) for ax in AXES)))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = batch[-1] is self._stop
+            rows = [row for row in batch if row is not self._stop]
+            if rows:
+                self._write_rows(rows)
+            if done:
+                return
+
+    def _write_rows(self, rows):
+        if self.error is not None:
+            return
+        try:
+            self._file.write("".join(
+                f"{index},{t!r},{power!r},{phase}," + ",".join(repr(float(p)) for p in pos) + "\n"
+                for index, t, power, phase, pos in rows))
+            self._file.flush()
+            self.rows_written += len(rows)
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+        except Exception as e:
+            # Keep the run going; the in-memory data is still saved at the end
+            self.error = e
+            print(f"[ERROR] Run journal write failed ({self.path}): {e}")
+
+    def close(self):
+        """Write everything still queued, fsync and close the file"""
+        if self._file.closed:
+            return
+        self._queue.put(self._stop)
+        self._thread.join()
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception as e:
+            print(f"[WARNING] Final journal fsync failed: {e}")
+        self._file.close()
+
+def read_journal(path):
+    """Load a journal into a ScanTrace, ignoring a torn last line"""
+    trace = ScanTrace()
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != JOURNAL_HEADER:
+            raise ValueError(f"{path} is not a run journal")
+        for row in reader:
+            if len(row) != len(JOURNAL_HEADER):
+                continue
+            try:
+                index, t, power = int(row[0]), float(row[1]), float(row[2])
+                position = {ax: float(v) for ax, v in zip(AXES, row[4:])}
+            except ValueError:
+                continue
+            trace.append(index, power, position, phase=row[3], t=t)
+    return trace
+
+def convert_journal(journal_path, csv_path, layout='scan', remove=True):
+    """Write a journal out in an existing CSV layout (see ScanTrace.to_csv)"""
+    read_journal(journal_path).to_csv(csv_path, layout=layout)
+    if remove:
+        os.remove(journal_path)
+    print(f"[INFO] Journal converted: {csv_path}")
+    return csv_path
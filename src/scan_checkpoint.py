@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Scan Checkpoint / Resume for EDWA
+A scan plan (axes, grids, visiting order, origin) is saved next to the scan
+journal when a brute force scan starts. Together with the points already in
+the journal (or in the scan CSV of a stopped scan) this is enough to pick an
+interrupted scan up where it left off instead of starting again at index 0.
+"""
+
+import os
+import csv
+import json
+import glob
+import time
+import numpy as np
+
+from scan_trace import ScanTrace, AXES
+from run_journal import read_journal
+
+PLAN_VERSION = 1
+
+def build_scan_positions(scan_params):
+    """Grid positions in visiting order for brute_force_3d_scan
+
+    Returns (axes, positions): positions[i] holds the target for axes[j] at
+    scan index i. Grids are combined with meshgrid(indexing='ij'), so the
+    first axis changes slowest. Only the first three axes are scanned.
+    """
+    axes = list(scan_params.keys())
+    grids = [np.asarray(scan_params[ax], dtype=float) for ax in axes]
+    if not axes:
+        return [], np.empty((0, 0))
+    if len(axes) == 1:
+        return axes, grids[0].reshape(-1, 1)
+    meshgrids = np.meshgrid(*grids[:3], indexing='ij')
+    return axes[:3], np.column_stack([grid.ravel() for grid in meshgrids])
+
+def plan_path(log_dir, timestamp):
+    return os.path.join(log_dir, f"scan_plan_{timestamp}.json")
+
+def write_scan_plan(log_dir, timestamp, scan_params, origin_positions):
+    """Save the scan plan at the start of a scan"""
+    axes, positions = build_scan_positions(scan_params)
+    plan = {
+        'version': PLAN_VERSION,
+        'timestamp': timestamp,
+        'axes': list(scan_params.keys()),
+        'grids': {ax: [float(v) for v in scan_params[ax]] for ax in scan_params},
+        'order': 'ij',
+        'origin': {ax: float(origin_positions[ax]) for ax in AXES},
+        'total_points': len(positions),
+        'journal': f"scan_data_{timestamp}.journal",
+        'csv': f"scan_data_{timestamp}.csv",
+        # One entry per measuring session (the first run and every resume)
+        'sessions': [{'start': time.time(), 'end': None}],
+    }
+    path = plan_path(log_dir, timestamp)
+    with open(path, "w") as f:
+        json.dump(plan, f, indent=2)
+    return path
+
+def _update_plan(log_dir, timestamp, update):
+    path = plan_path(log_dir, timestamp)
+    with open(path) as f:
+        plan = json.load(f)
+    update(plan)
+    with open(path, "w") as f:
+        json.dump(plan, f, indent=2)
+    return path
+
+def start_scan_session(log_dir, timestamp):
+    """Record in the plan that a resumed scan starts measuring again"""
+    def update(plan):
+        plan.setdefault('sessions', []).append({'start': time.time(), 'end': None})
+    return _update_plan(log_dir, timestamp, update)
+
+def end_scan_session(log_dir, timestamp, trace):
+    """Record when the current session took its last point (stopped or finished)
+
+    Only points taken after the session started count, so the time a
+    resumed scan sat interrupted is not part of its duration.
+    """
+    times = trace.column('t')
+
+    def update(plan):
+        sessions = plan.get('sessions')
+        if not sessions:
+            return
+        start = sessions[-1]['start']
+        own = times[times >= start]
+        sessions[-1]['end'] = float(own.max()) if len(own) else start
+    return _update_plan(log_dir, timestamp, update)
+
+def scan_duration(plan, times=None):
+    """Seconds spent measuring a planned scan, summed over its sessions
+
+    A session without an end (the program died mid-scan) ends at its last
+    point in times, the journal's point times. Returns None when a session's
+    end is unknown or the plan predates session records.
+    """
+    sessions = plan.get('sessions')
+    if not sessions:
+        return None
+    times = np.asarray(times if times is not None else [], dtype=float)
+    total = 0.0
+    for i, session in enumerate(sessions):
+        end = session.get('end')
+        if end is None:
+            later = sessions[i + 1]['start'] if i + 1 < len(sessions) else np.inf
+            own = times[(times >= session['start']) & (times < later)]
+            if not len(own):
+                return None
+            end = float(own.max())
+        total += end - session['start']
+    return total
+
+def mark_scan_finished(log_dir, timestamp, missed=()):
+    """Record in the plan that the scan ran to the end
+
+    missed holds the scan indices that still have no reading (meter
+    failures); a finished plan with none left is no longer resumable.
+    """
+    def update(plan):
+        plan['finished'] = True
+        plan['missed'] = sorted(int(i) for i in missed)
+    return _update_plan(log_dir, timestamp, update)
+
+def load_scan_plan(path):
+    """Read a scan plan; returns (plan, scan_params) with numpy grids"""
+    with open(path) as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION or plan.get('order') != 'ij':
+        raise ValueError(f"Unsupported scan plan: {path}")
+    scan_params = {ax: np.asarray(plan['grids'][ax], dtype=float) for ax in plan['axes']}
+    return plan, scan_params
+
+def read_scan_csv(path):
+    """Load a scan_data_*.csv written by a (stopped) scan into a ScanTrace"""
+    trace = ScanTrace()
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            index = int(float(row["Index"]))
+            position = {ax: float(row[f"{ax}_Position"]) for ax in AXES}
+            trace.append(index, float(row["Power (dBm)"]), position, phase='START' if index == -1 else 'SCAN')
+    return trace
+
+def load_completed_points(log_dir, plan):
+    """Points already measured for a plan, from its journal or its CSV
+
+    Returns (trace, source) where source is 'journal', 'csv' or None.
+    """
+    journal_path = os.path.join(log_dir, plan['journal'])
+    csv_path = os.path.join(log_dir, plan['csv'])
+    if os.path.exists(journal_path):
+        return read_journal(journal_path), 'journal'
+    if os.path.exists(csv_path):
+        return read_scan_csv(csv_path), 'csv'
+    return ScanTrace(), None
+
+def completed_indices(trace):
+    """Set of scan indices present in a trace (the start point is excluded)"""
+    index = trace.column('index')
+    return set(index[index >= 0].tolist())
+
+def find_resumable_scan(log_root):
+    """Most recent scan directory whose plan still has unmeasured points
+
+    Scans that ran to the end with every point read (mark_scan_finished)
+    are skipped. Returns (log_dir, plan, scan_params, trace) or None.
+    """
+    plans = sorted(glob.glob(os.path.join(log_root, "scan_*", "scan_plan_*.json")), reverse=True)
+    for path in plans:
+        try:
+            plan, scan_params = load_scan_plan(path)
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            print(f"[WARNING] Skipping scan plan {path}: {e}")
+            continue
+        if plan.get('finished') and not plan.get('missed'):
+            continue
+        log_dir = os.path.dirname(path)
+        trace, source = load_completed_points(log_dir, plan)
+        if source is not None and len(completed_indices(trace)) < plan['total_points']:
+            return log_dir, plan, scan_params, trace
+    return None
+
+def select_verification_points(trace, count=3):
+    """Rows of stored scan points to re-measure before resuming
+
+    Takes the strongest point (most sensitive to alignment drift) and, for
+    the rest, the most recent points (closest in time to the interruption).
+    """
+    rows = np.flatnonzero(trace.column('index') >= 0)
+    if len(rows) == 0:
+        return []
+    power = trace.column('power')
+    selected = [int(rows[np.argmax(power[rows])])]
+    for row in rows[::-1]:
+        if len(selected) >= count:
+            break
+        if int(row) not in selected:
+            selected.append(int(row))
+    return selected
+
+def check_drift(stored_powers, measured_powers, tolerance_db=1.0):
+    """Compare re-measured powers with stored ones
+
+    Returns (ok, max_abs_difference_db). Points that could not be
+    re-measured (None) count as failed.
+    """
+    if any(m is None for m in measured_powers):
+        return False, float('inf')
+    if not len(stored_powers):
+        return True, 0.0
+    diff = np.abs(np.asarray(measured_powers, dtype=float) - np.asarray(stored_powers, dtype=float))
+    max_diff = float(diff.max())
+    return max_diff <= tolerance_db, max_diff
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Fast Loader for EDWA Result CSVs
+Parses scan_data_*.csv (Index,Power (dBm),X_Position..W_Position) and
+climb_hill_*/combined_optimization_*.csv (Iteration,Power (dBm),Axis,X..W)
+into one typed structured array with a vectorised parser, and caches the
+result as a hidden .npy sidecar keyed by the CSV's mtime and size. Cached
+tables are memory-mapped, so reloading hundreds of runs takes milliseconds.
+"""
+
+import os
+import io
+import glob
+import numpy as np
+
+from scan_trace import ScanTrace, AXES, START_PHASE
+
+TABLE_DTYPE = np.dtype([('index', 'i8'), ('power', 'f8')] +
+                       [(ax, 'f8') for ax in AXES] +
+                       [('phase', 'U16')])
+
+SCAN_HEADER = ["Index", "Power (dBm)"] + [f"{ax}_Position" for ax in AXES]
+CLIMB_HEADER = ["Iteration", "Power (dBm)", "Axis"] + AXES
+
+def _sidecar_prefix(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.")
+
+def sidecar_path(path):
+    """Cache file for a CSV, named after its current mtime and size"""
+    stat = os.stat(path)
+    return f"{_sidecar_prefix(path)}{stat.st_mtime_ns}-{stat.st_size}.npy"
+
+def parse_result_csv(path):
+    """Parse a result CSV into a TABLE_DTYPE array (no cache)"""
+    with open(path, newline="") as f:
+        header = f.readline().strip().split(",")
+        body = f.read()
+
+    if header == SCAN_HEADER:
+        file_dtype = [('index', 'i8'), ('power', 'f8')] + [(ax, 'f8') for ax in AXES]
+    elif header == CLIMB_HEADER:
+        file_dtype = [('index', 'i8'), ('power', 'f8'), ('phase', 'U16')] + [(ax, 'f8') for ax in AXES]
+    else:
+        raise ValueError(f"{path}: unknown CSV header {header}")
+
+    # One C-level pass over the whole file into a structured array
+    try:
+        raw = np.loadtxt(io.StringIO(body), delimiter=",", dtype=file_dtype, ndmin=1)
+    except ValueError:
+        # Torn or malformed rows (e.g. a crash mid-write): keep complete rows only
+        lines = [line for line in body.splitlines() if line.count(",") == len(header) - 1]
+        raw = np.loadtxt(lines, delimiter=",", dtype=file_dtype, ndmin=1)
+
+    table = np.zeros(len(raw), dtype=TABLE_DTYPE)
+    for name in raw.dtype.names:
+        table[name] = raw[name]
+    if 'phase' not in raw.dtype.names:
+        table['phase'] = np.where(table['index'] < 0, START_PHASE, 'SCAN')
+    return table
+
+def load_table(path, use_cache=True, mmap=True):
+    """Typed table for a result CSV, from the .npy sidecar when it is current
+
+    Returns a TABLE_DTYPE array (memory-mapped from the cache when mmap).
+    A stale or unreadable cache is rebuilt; if the directory is read-only
+    the parsed table is returned without caching.
+    """
+    if not use_cache:
+        return parse_result_csv(path)
+
+    cache = sidecar_path(path)
+    if os.path.exists(cache):
+        try:
+            table = np.load(cache, mmap_mode="r" if mmap else None, allow_pickle=False)
+            if table.dtype == TABLE_DTYPE:
+                return table
+        except (OSError, ValueError):
+            pass
+
+    table = parse_result_csv(path)
+    try:
+        # Remove sidecars of older versions of the file, then write atomically
+        for stale in glob.glob(glob.escape(_sidecar_prefix(path)) + "*.npy"):
+            os.remove(stale)
+        tmp = cache + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, table, allow_pickle=False)
+        os.replace(tmp, cache)
+    except OSError as e:
+        print(f"[WARNING] Could not write loader cache for {path}: {e}")
+    return table
+
+def load_trace(path, use_cache=True):
+    """Result CSV as a ScanTrace (phases: START/SCAN or the climb Axis labels)"""
+    table = load_table(path, use_cache)
+    trace = ScanTrace(capacity=len(table))
+    labels, codes = np.unique(np.asarray(table['phase']), return_inverse=True)
+    for label in labels:
+        trace.phase_code(str(label))
+    data = trace._data[:len(table)]
+    for name in ('index', 'power') + tuple(AXES):
+        data[name] = table[name]
+    data['t'] = np.nan
+    data['phase'] = codes
+    trace._n = len(table)
+    return trace
+
+def find_result_csvs(log_dir):
+    """All scan/climb/combined result CSVs under a log directory"""
+    patterns = ("scan_data_*.csv", "climb_hill_*.csv", "combined_optimization_*.csv")
+    paths = []
+    for pattern in patterns:
+        paths.extend(glob.glob(os.path.join(log_dir, "*", pattern)))
+    return sorted(paths)
+
+def load_all(log_dir, use_cache=True):
+    """{csv path: table} for every result CSV under log_dir"""
+    tables = {}
+    for path in find_result_csvs(log_dir):
+        try:
+            tables[path] = load_table(path, use_cache)
+        except ValueError as e:
+            print(f"[WARNING] {e}")
+    return tables
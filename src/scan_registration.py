@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Scan-to-Scan Registration for EDWA
+Aligns successive 2-D scan maps by FFT phase correlation (with subpixel
+peak refinement) to measure how far the coupling peak has moved between
+runs. Consecutive scans of the same two axes at the same fixed positions
+form a series; the per-scan shifts give a drift vector and a drift rate,
+which predict where the peak will be for the next brute force scan so the
+scan window can be re-centred (and kept small).
+
+Usage:
+    python scan_registration.py
+    python scan_registration.py --since 2025-08-07 --json drift.json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+import numpy as np
+
+from scan_trace import AXES
+from scan_loader import load_table, find_result_csvs
+from heatmaps import regular_grid_image
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "log")
+
+STAMP_PATTERN = re.compile(r"(\d{8}_\d{6})")
+
+def load_scan_map(path, fixed_tolerance=0.5):
+    """2-D scan CSV as a map in linear power (mW)
+
+    Returns a dict with the scanned axes, grid values, image[iy, ix] (NaN
+    for unmeasured cells), the positions of the other axes, the best
+    measured point and the scan time. Returns None for scans that are not
+    a 2-D grid.
+    """
+    table = load_table(path)
+    measured = np.asarray(table['index']) >= 0
+    if not np.any(measured):
+        return None
+    rows = table[measured]
+    moving = [ax for ax in AXES if np.ptp(rows[ax]) > fixed_tolerance]
+    if len(moving) != 2:
+        return None
+
+    xy = np.column_stack([rows[moving[0]], rows[moving[1]]])
+    grid = regular_grid_image(xy, 10 ** (np.asarray(rows['power']) / 10))
+    if grid is None:
+        return None
+    x_values, y_values, image = grid
+
+    best = int(np.argmax(rows['power']))
+    match = STAMP_PATTERN.search(os.path.basename(path))
+    return {
+        'path': path,
+        'time': datetime.strptime(match.group(1), "%Y%m%d_%H%M%S") if match else None,
+        'axes': tuple(moving),
+        'x': x_values,
+        'y': y_values,
+        'image': image,
+        'fixed': {ax: float(np.median(rows[ax])) for ax in AXES if ax not in moving},
+        'peak': {ax: float(rows[ax][best]) for ax in AXES},
+        'peak_power': float(rows['power'][best]),
+    }
+
+def _refine(values, i):
+    """Subpixel offset of a peak at index i from a 3-point parabola (log values when positive)"""
+    left, centre, right = values[i - 1], values[i], values[(i + 1) % len(values)]
+    if min(left, centre, right) > 0:
+        left, centre, right = np.log(left), np.log(centre), np.log(right)
+    denom = left - 2 * centre + right
+    if denom >= 0:
+        return 0.0
+    return float(np.clip(0.5 * (left - right) / denom, -0.5, 0.5))
+
+def phase_correlation(reference, moved, eps=0.1):
+    """Shift (dy, dx) in pixels that maps reference onto moved, and the peak height
+
+    Both images must have the same shape and be zero where nothing was
+    measured. Images are zero-padded to twice their size so shifts do not
+    wrap around, and the correlation peak is refined to subpixel accuracy.
+    """
+    a = np.asarray(reference, dtype=float)
+    b = np.asarray(moved, dtype=float)
+    shape = [2 * n for n in a.shape]
+    fa = np.fft.rfft2(a, shape)
+    fb = np.fft.rfft2(b, shape)
+    cross = fb * np.conj(fa)
+    magnitude = np.abs(cross)
+    # eps keeps weak frequencies (noise, interpolation kinks) from dominating;
+    # pure whitening locks small upsampled maps onto their original grid
+    cross /= magnitude + eps * magnitude.max() + 1e-300
+    corr = np.fft.irfft2(cross, shape)
+
+    iy, ix = np.unravel_index(np.argmax(corr), corr.shape)
+    dy = iy + _refine(corr[:, ix], iy)
+    dx = ix + _refine(corr[iy, :], ix)
+    # Indices past the middle are negative shifts
+    if dy > shape[0] / 2:
+        dy -= shape[0]
+    if dx > shape[1] / 2:
+        dx -= shape[1]
+    return float(dy), float(dx), float(corr[iy, ix])
+
+def _overlap_grid(values_a, values_b, upsample, max_cells):
+    """Grid over the overlap of two scan windows at a fraction of the finer pitch"""
+    pitch = min(np.diff(values_a).mean() if len(values_a) > 1 else np.inf,
+                np.diff(values_b).mean() if len(values_b) > 1 else np.inf) / upsample
+    low = max(values_a[0], values_b[0])
+    high = min(values_a[-1], values_b[-1])
+    if not np.isfinite(pitch) or high <= low:
+        return None
+    count = int(min(max_cells, np.floor((high - low) / pitch) + 1))
+    return np.linspace(low, high, count)
+
+def _resample(scan_map, gx, gy, offset=(0.0, 0.0)):
+    """Background-subtracted map sampled at (gx + offset[0], gy + offset[1])"""
+    from scipy.interpolate import RegularGridInterpolator  # slow import, kept out of GUI startup
+    image = scan_map['image']
+    image = np.nan_to_num(image - np.nanmin(image), nan=0.0)
+    interp = RegularGridInterpolator((scan_map['y'], scan_map['x']), image, method='linear',
+                                     bounds_error=False, fill_value=0.0)
+    yy, xx = np.meshgrid(gy + offset[1], gx + offset[0], indexing='ij')
+    return interp(np.column_stack([yy.ravel(), xx.ravel()])).reshape(yy.shape)
+
+def _taper(shape):
+    return np.outer(np.hanning(shape[0] + 2)[1:-1], np.hanning(shape[1] + 2)[1:-1])
+
+def register_maps(reference, moved, upsample=4, max_cells=256, min_cells=3, iterations=5):
+    """Stage-coordinate shift of the coupling peak from reference to moved
+
+    Maps may have different windows and pitches: both are resampled onto a
+    grid over the overlap of their windows at a fraction of the finer pitch
+    and edge-tapered. The taper pulls a single estimate towards zero, so the
+    moved map is re-sampled at the current estimate and the residual shift
+    registered again until it is below 1/20 of a grid cell.
+
+    Returns {axis: shift, ..., 'quality'}, where quality is the correlation
+    coefficient of the two maps after alignment, or None if the windows
+    overlap by less than min_cells grid cells.
+    """
+    if reference['axes'] != moved['axes']:
+        raise ValueError(f"cannot register {reference['axes']} scan onto {moved['axes']} scan")
+    shift = np.zeros(2)
+    for _ in range(iterations):
+        gx = _overlap_grid(reference['x'], moved['x'] - shift[0], upsample, max_cells)
+        gy = _overlap_grid(reference['y'], moved['y'] - shift[1], upsample, max_cells)
+        if gx is None or gy is None or min(len(gx), len(gy)) < (min_cells - 1) * upsample + 1:
+            return None
+        a = _resample(reference, gx, gy)
+        b = _resample(moved, gx, gy, shift)
+        window = _taper(a.shape)
+        dy, dx, _ = phase_correlation(a * window, b * window)
+        step = np.array([dx * (gx[1] - gx[0]), dy * (gy[1] - gy[0])])
+        shift += step
+        if np.all(np.abs(step) < [(gx[1] - gx[0]) / 20, (gy[1] - gy[0]) / 20]):
+            break
+
+    b = _resample(moved, gx, gy, shift)
+    quality = np.corrcoef(a.ravel(), b.ravel())[0, 1] if a.std() > 0 and b.std() > 0 else 0.0
+    ax0, ax1 = reference['axes']
+    return {ax0: float(shift[0]), ax1: float(shift[1]), 'quality': float(quality)}
+
+def _same_setup(a, b, fixed_tolerance):
+    if a['axes'] != b['axes']:
+        return False
+    if any(abs(a['fixed'][ax] - b['fixed'][ax]) > fixed_tolerance for ax in a['fixed']):
+        return False
+    # Windows must overlap on both axes
+    return (a['x'][0] <= b['x'][-1] and b['x'][0] <= a['x'][-1] and
+            a['y'][0] <= b['y'][-1] and b['y'][0] <= a['y'][-1])
+
+def drift_series(log_dir=DEFAULT_LOG_DIR, since=None, fixed_tolerance=5.0, min_quality=0.5):
+    """Register consecutive 2-D scans of the same setup
+
+    Returns a list of series; each series is a list of records (oldest
+    first) with the scan map, the shift from the previous scan and the
+    cumulative drift from the first scan. Registrations with too little
+    window overlap or a correlation peak below min_quality fall back to the
+    change in best point.
+    """
+    maps = []
+    for path in find_result_csvs(log_dir):
+        if not os.path.basename(path).startswith("scan_data_"):
+            continue
+        try:
+            scan_map = load_scan_map(path)
+        except ValueError as e:
+            print(f"[WARNING] {e}")
+            continue
+        if scan_map is None or scan_map['time'] is None:
+            continue
+        if since and scan_map['time'] < datetime.fromisoformat(since):
+            continue
+        maps.append(scan_map)
+    maps.sort(key=lambda m: m['time'])
+
+    series = []
+    for scan_map in maps:
+        axes = scan_map['axes']
+        previous = series[-1][-1] if series else None
+        if previous is None or not _same_setup(previous['map'], scan_map, fixed_tolerance):
+            series.append([{'map': scan_map, 'shift': {ax: 0.0 for ax in axes},
+                            'drift': {ax: 0.0 for ax in axes}, 'quality': None, 'method': None}])
+            continue
+
+        shift = register_maps(previous['map'], scan_map)
+        quality = shift.pop('quality') if shift else None
+        method = 'phase'
+        if quality is None or quality < min_quality:
+            shift = {ax: scan_map['peak'][ax] - previous['map']['peak'][ax] for ax in axes}
+            method = 'peak'
+        series[-1].append({
+            'map': scan_map,
+            'shift': shift,
+            'drift': {ax: previous['drift'][ax] + shift[ax] for ax in axes},
+            'quality': quality,
+            'method': method,
+        })
+    return series
+
+def drift_rate(records):
+    """Least-squares drift rate per axis (units/hour) and RMS residual over a series"""
+    if len(records) < 2:
+        return None
+    axes = records[0]['map']['axes']
+    t0 = records[0]['map']['time']
+    hours = np.array([(r['map']['time'] - t0).total_seconds() / 3600 for r in records])
+    if np.ptp(hours) == 0:
+        return None
+    rate, residual = {}, {}
+    for ax in axes:
+        drift = np.array([r['drift'][ax] for r in records])
+        slope, intercept = np.polyfit(hours, drift, 1)
+        rate[ax] = float(slope)
+        residual[ax] = float(np.sqrt(np.mean((drift - (slope * hours + intercept)) ** 2)))
+    return {'rate': rate, 'residual': residual, 'hours': float(np.ptp(hours))}
+
+def suggest_origin(log_dir=DEFAULT_LOG_DIR, axes=None, at=None, fixed=None, fixed_tolerance=5.0,
+                   window=None, max_age_hours=8.0, extrapolation_fraction=1.0, max_window_shift=1.0):
+    """Drift-compensated scan centre for the next scan
+
+    Uses the most recent series scanning the given pair of axes (and, when
+    fixed positions are given, taken at those positions). The prediction is
+    the last scan's best point moved on by the fitted drift rate for the
+    time since that scan. The extrapolation is limited to
+    extrapolation_fraction of the time the fit spans; a fit whose last scan
+    is more than max_age_hours old is not used at all (the last best point
+    is returned, 'stale' is set). With window = {axis: (start, stop)} the
+    suggestion is kept within max_window_shift window widths of the current
+    window centre ('clipped' lists the axes that were limited).
+
+    Returns {'origin': {axis: value}, 'rate', 'residual', 'scans', 'last',
+    'hours', 'extrapolated_hours', 'stale', 'clipped'} or None if there is
+    no history.
+    """
+    at = at or datetime.now()
+    candidates = []
+    for records in drift_series(log_dir, fixed_tolerance=fixed_tolerance):
+        scan_map = records[-1]['map']
+        if axes and set(scan_map['axes']) != set(axes):
+            continue
+        if fixed and any(abs(scan_map['fixed'][ax] - fixed[ax]) > fixed_tolerance
+                         for ax in scan_map['fixed'] if ax in fixed):
+            continue
+        candidates.append(records)
+    if not candidates:
+        return None
+
+    records = candidates[-1]
+    last = records[-1]['map']
+    hours = (at - last['time']).total_seconds() / 3600
+    stale = hours > max_age_hours
+    fit = None if stale else drift_rate(records)
+    extrapolated = min(max(hours, 0.0), extrapolation_fraction * fit['hours']) if fit else 0.0
+    origin = {}
+    for ax in last['axes']:
+        origin[ax] = last['peak'][ax] + (fit['rate'][ax] * extrapolated if fit else 0.0)
+
+    clipped = []
+    for ax, (start, stop) in (window or {}).items():
+        if ax not in origin:
+            continue
+        centre, limit = (start + stop) / 2, max_window_shift * abs(stop - start)
+        bounded = min(max(origin[ax], centre - limit), centre + limit)
+        if bounded != origin[ax]:
+            origin[ax] = bounded
+            clipped.append(ax)
+    return {
+        'origin': origin,
+        'rate': fit['rate'] if fit else None,
+        'residual': fit['residual'] if fit else None,
+        'scans': len(records),
+        'last': last['path'],
+        'hours': hours,
+        'extrapolated_hours': extrapolated,
+        'stale': stale,
+        'clipped': clipped,
+    }
+
+def series_report(series):
+    """JSON-friendly summary of drift series"""
+    report = []
+    for records in series:
+        report.append({
+            'axes': list(records[0]['map']['axes']),
+            'fixed': records[0]['map']['fixed'],
+            'fit': drift_rate(records),
+            'scans': [{
+                'file': os.path.basename(r['map']['path']),
+                'time': r['map']['time'].isoformat(),
+                'peak_power': r['map']['peak_power'],
+                'shift': r['shift'],
+                'drift': r['drift'],
+                'quality': r['quality'],
+                'method': r['method'],
+            } for r in records],
+        })
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='EDWA scan-to-scan drift registration')
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR, help='Directory holding the run directories')
+    parser.add_argument('--since', help='Only scans started on/after this date (YYYY-MM-DD)')
+    parser.add_argument('--json', help='Also write the drift report to this file')
+    args = parser.parse_args()
+
+    series = drift_series(args.log_dir, since=args.since)
+    if not series:
+        print("[INFO] No 2-D scans found")
+        sys.exit(0)
+
+    for records in series:
+        ax0, ax1 = records[0]['map']['axes']
+        print(f"\n=== {ax0}/{ax1} series, {len(records)} scans ===")
+        for r in records:
+            quality = "-" if r['method'] is None else "n/a (peak)" if r['quality'] is None else f"{r['quality']:.2f} ({r['method']})"
+            print(f"{os.path.basename(r['map']['path']):<32} "
+                  f"shift {ax0}:{r['shift'][ax0]:+8.1f} {ax1}:{r['shift'][ax1]:+8.1f}   "
+                  f"drift {ax0}:{r['drift'][ax0]:+8.1f} {ax1}:{r['drift'][ax1]:+8.1f}   q={quality}")
+        fit = drift_rate(records)
+        if fit:
+            print(f"[INFO] Drift rate {ax0}:{fit['rate'][ax0]:+.1f}/h {ax1}:{fit['rate'][ax1]:+.1f}/h "
+                  f"over {fit['hours']:.1f} h (rms residual {ax0}:{fit['residual'][ax0]:.1f} "
+                  f"{ax1}:{fit['residual'][ax1]:.1f})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(series_report(series), f, indent=2)
+        print(f"\n[INFO] Drift report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
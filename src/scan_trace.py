@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Columnar Scan/Trace Store for EDWA
+Measured points (index, time, power, DS102 X..W, phase) are kept in one
+growable NumPy structured array instead of a list of dicts, so plotting,
+heatmaps and file export work on column views without per-point rebuilding.
+"""
+
+import time
+import numpy as np
+from numpy.lib import recfunctions
+
+AXES = ['X', 'Y', 'Z', 'U', 'V', 'W']
+
+TRACE_DTYPE = np.dtype([('index', 'i8'), ('t', 'f8'), ('power', 'f8')] +
+                       [(ax, 'f8') for ax in AXES] +
+                       [('phase', 'u1')])
+
+START_PHASE = 'START'
+
+def _position_text(values):
+    """CSV text for a position column: integers without '.0', anything else exact"""
+    whole = np.isfinite(values) & (values == np.round(values))
+    return [str(int(v)) if w else repr(v) for v, w in zip(values.tolist(), whole.tolist())]
+
+class ScanTrace:
+    """Growable structured array of measured points
+
+    append() is amortised O(1): capacity doubles when full. data, column()
+    and positions() return views of the filled part; phases are interned
+    labels ('START', 'SCAN', an axis name, 'LOCAL', 'XY', ...) stored as a
+    small integer code per point.
+    """
+
+    def __init__(self, capacity=256):
+        self._data = np.zeros(max(1, int(capacity)), dtype=TRACE_DTYPE)
+        self._n = 0
+        self.phases = []  # code -> label
+        self._phase_codes = {}  # label -> code
+        self._journal = None
+        self.missed = []  # scan indices left without a reading (brute_force_3d_scan)
+
+    @classmethod
+    def from_points(cls, points):
+        """Build a trace from legacy point dicts ('index', 'power', 'position')"""
+        trace = cls(capacity=len(points))
+        for point in points:
+            phase = START_PHASE if point.get('is_starting_position', False) else point.get('phase', 'SCAN')
+            trace.append(point['index'], point['power'], point['position'], phase, point.get('t'))
+        return trace
+
+    @classmethod
+    def load_npz(cls, path):
+        """Read a trace written by to_npz()"""
+        with np.load(path, allow_pickle=False) as npz:
+            return cls.from_array(npz['trace'], [str(p) for p in npz['phases']])
+
+    @classmethod
+    def from_array(cls, data, phases):
+        """Build a trace from a TRACE_DTYPE array and its phase labels"""
+        trace = cls(capacity=len(data))
+        trace._data[:len(data)] = data
+        trace._n = len(data)
+        for label in phases:
+            trace.phase_code(label)
+        return trace
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self.point(i)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("trace index out of range")
+        return self.point(i)
+
+    def __getstate__(self):
+        # Only the filled part is pickled (e.g. when sent to a worker process)
+        state = self.__dict__.copy()
+        state['_data'] = self.data.copy()
+        state['_journal'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('missed', [])
+        if len(self._data) == 0:
+            self._data = np.zeros(1, dtype=TRACE_DTYPE)
+
+    def phase_code(self, label):
+        """Integer code for a phase label, interning new labels"""
+        code = self._phase_codes.get(label)
+        if code is None:
+            if len(self.phases) > np.iinfo(TRACE_DTYPE['phase']).max:
+                raise ValueError("too many distinct phase labels")
+            code = len(self.phases)
+            self.phases.append(label)
+            self._phase_codes[label] = code
+        return code
+
+    def append(self, index, power, position, phase='SCAN', t=None):
+        """Add one point; position is a dict with (some of) the X..W axes"""
+        if self._n == len(self._data):
+            grown = np.zeros(2 * len(self._data), dtype=TRACE_DTYPE)
+            grown[:self._n] = self._data[:self._n]
+            self._data = grown
+        row = self._data[self._n]
+        row['index'] = index
+        row['t'] = time.time() if t is None else t
+        row['power'] = power
+        for ax in AXES:
+            row[ax] = position.get(ax, 0.0)
+        row['phase'] = self.phase_code(phase)
+        self._n += 1
+        if self._journal is not None:
+            self._journal.write(index, float(row['t']), power, phase, position)
+
+    def attach_journal(self, journal, write_existing=True):
+        """Mirror every appended point to a run_journal.JournalWriter
+
+        Points already in the trace are written first unless write_existing
+        is False (the journal already holds them).
+        """
+        if write_existing:
+            for i in range(self._n):
+                point = self.point(i)
+                journal.write(point['index'], point['t'], point['power'], point['phase'], point['position'])
+        self._journal = journal
+
+    def detach_journal(self):
+        """Stop mirroring points; returns the journal that was attached"""
+        journal, self._journal = self._journal, None
+        return journal
+
+    def clear(self):
+        """Drop all points (capacity and phase labels are kept)"""
+        self._n = 0
+
+    @property
+    def data(self):
+        """Structured view of the filled rows (no copy)"""
+        return self._data[:self._n]
+
+    def column(self, name):
+        """View of a single field, e.g. 'power' or 'Y'"""
+        return self.data[name]
+
+    def positions(self, axes=AXES):
+        """(n, len(axes)) float array of the requested axis positions"""
+        return recfunctions.structured_to_unstructured(self.data[list(axes)], dtype=float)
+
+    def phase_labels(self):
+        """Phase label of every point"""
+        if not self.phases:
+            return np.array([], dtype=str)
+        return np.asarray(self.phases)[self.data['phase']]
+
+    def mask(self, phase):
+        """Boolean mask of points with the given phase label"""
+        code = self._phase_codes.get(phase)
+        if code is None:
+            return np.zeros(self._n, dtype=bool)
+        return self.data['phase'] == code
+
+    def position(self, i):
+        """Position dict of point i"""
+        row = self.data[i]
+        return {ax: float(row[ax]) for ax in AXES}
+
+    def point(self, i):
+        """Point i as a dict in the layout the rest of the code used to pass around"""
+        row = self.data[i]
+        phase = self.phases[row['phase']]
+        return {
+            'index': int(row['index']),
+            'power': float(row['power']),
+            'position': self.position(i),
+            'phase': phase,
+            't': float(row['t']),
+            'is_starting_position': phase == START_PHASE,
+        }
+
+    def best_index(self):
+        """Row of the highest power, or None if empty"""
+        if self._n == 0:
+            return None
+        return int(np.argmax(self.column('power')))
+
+    def best_point(self):
+        """Point dict with the highest power, or None if empty"""
+        i = self.best_index()
+        return None if i is None else self.point(i)
+
+    def to_csv(self, path, layout='scan'):
+        """Write the trace in one of the existing CSV layouts
+
+        'scan':  Index,Power (dBm),X_Position..W_Position  (scan_data_*.csv)
+        'climb': Iteration,Power (dBm),Axis,X..W            (climb_hill_*.csv, combined_*.csv)
+        """
+        data = self.data
+        # DS102 positions are whole steps and are written as ints; other values
+        # use repr, the shortest string that reads back to the same float64
+        position_cols = [_position_text(data[ax]) for ax in AXES]
+        power_col = list(map(repr, data['power'].tolist()))
+        if layout == 'scan':
+            header = ["Index", "Power (dBm)"] + [f"{ax}_Position" for ax in AXES]
+            cols = [np.char.mod('%d', data['index']), power_col] + position_cols
+        elif layout == 'climb':
+            header = ["Iteration", "Power (dBm)", "Axis"] + AXES
+            cols = [np.char.mod('%d', np.arange(self._n)), power_col, self.phase_labels()] + position_cols
+        else:
+            raise ValueError(f"unknown CSV layout '{layout}'")
+
+        with open(path, "w", newline="") as f:
+            f.write(",".join(header) + "\n")
+            if self._n:
+                f.write("\n".join(",".join(row) for row in zip(*cols)) + "\n")
+        return path
+
+    def to_npz(self, path):
+        """Write the raw structured array and phase labels to a compressed .npz"""
+        np.savez_compressed(path, trace=self.data, phases=np.asarray(self.phases, dtype=str))
+        return path
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test script for the alignment benchmark
+Checks that runs are reproducible per seed and that regressions are flagged
+"""
+
+import sys
+import copy
+
+from benchmark_alignment import run_case, run_benchmark, compare, make_plot, RIG_PHASES, HOST_PHASES
+
+def test_reproducible_runs():
+    """Same seed, same readings and errors; the time split adds up"""
+    print("=== Testing Reproducible Runs ===")
+    first = run_case('hill', seed=3)
+    second = run_case('hill', seed=3, plot=make_plot())
+    for key in ('readings', 'moves', 'measurements_to_converge', 'final_error_db'):
+        assert first[key] == second[key], key
+    assert second['time_s']['plot'] > 0 and first['time_s']['plot'] == 0
+    timing = first['time_s']
+    assert abs(sum(timing[p] for p in RIG_PHASES + HOST_PHASES) - timing['total']) < 1e-9
+    assert first['points_per_s'] == first['readings'] / timing['total']
+    print(f"[OK] hill: {first['readings']} readings, final {first['final_error_db']:.3f} dB")
+
+def test_regression_check():
+    """A slower or less accurate run is reported against the baseline"""
+    print("\n=== Testing Regression Check ===")
+    baseline = run_benchmark(cases=['scan', 'smart'], runs=1, plot=False)
+    assert baseline['cases']['scan']['summary']['readings'] == 5 * 11 * 11 + 1
+    assert compare(baseline, baseline) == []
+
+    worse = copy.deepcopy(baseline)
+    worse['cases']['smart']['summary']['points_per_s'] *= 0.5
+    worse['cases']['scan']['summary']['final_error_db'] *= 2
+    flagged = {(r['case'], r['metric']) for r in compare(worse, baseline)}
+    assert flagged == {('smart', 'points_per_s'), ('scan', 'final_error_db')}
+    print("[OK] Regressions flagged")
+
+if __name__ == "__main__":
+    test_reproducible_runs()
+    test_regression_check()
+    print("\nAll alignment benchmark tests passed")
+    sys.exit(0)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the DS102 emulator
+Drives the pty with pyserial through the unchanged alignment.py stage
+functions and checks motion timing and the baud-rate limit
+"""
+
+import sys
+import time
+import serial
+
+import alignment
+from ds102_emulator import DS102Emulator
+
+def test_stage_functions():
+    """alignment.py stage commands work against the emulator"""
+    print("=== Testing Stage Commands ===")
+    with DS102Emulator(speed=20000, accel=400000, settle=0.0, start={'Z': 250}) as emu:
+        with serial.Serial(emu.port, baudrate=emu.baudrate, timeout=0.5) as ser:
+            assert alignment.get_axis_position(ser, 'Z') == 250
+            alignment.move_axis_to(ser, 'Y', 1200)
+            assert emu.position('Y') == 1200
+            assert alignment.get_axis_position(ser, 'Y') == 1200
+
+            alignment.move_stage(ser, 'Y', -200)
+            assert alignment.get_axis_position(ser, 'Y') == 1000
+            alignment.move_stage(ser, 'W', +15)
+            positions = alignment.get_all_positions(ser)
+            assert positions == {'X': 0, 'Y': 1000, 'Z': 250, 'U': 0, 'V': 0, 'W': 15}
+
+            # Unknown commands get no reply
+            ser.write(b'AXIY:FOO?\r')
+            assert ser.readline() == b""
+            assert emu.stats['unknown'] == 1
+    print("[OK] Stage commands")
+
+def test_motion_timing():
+    """MOTION? reports 1 for the duration of a trapezoidal move"""
+    print("\n=== Testing Motion Timing ===")
+    # 1000 pulses at 5000/s with 50000/s^2: 0.1 s ramps + 0.1 s cruise = 0.3 s, + 0.05 s settle
+    with DS102Emulator(baudrate=0, speed=5000, accel=50000, settle=0.05) as emu:
+        with serial.Serial(emu.port, timeout=0.5) as ser:
+            start = time.monotonic()
+            ser.write(b'AXIX:GOABS 1000\r')
+            time.sleep(0.15)
+            ser.write(b'AXIX:POS?\r')
+            midway = int(ser.readline())
+            assert 0 < midway < 1000
+            alignment.move_axis_to(ser, 'X', 1000)
+            elapsed = time.monotonic() - start
+            assert 0.35 <= elapsed < 0.6, elapsed
+            ser.write(b'AXIX:MOTION?\r')
+            assert ser.readline().strip() == b'0'
+    print(f"[OK] Move took {elapsed:.2f} s (planned 0.35 s)")
+
+def test_baud_rate_limit():
+    """Round trips cost the wire time of command and reply"""
+    print("\n=== Testing Baud Rate Limit ===")
+    queries = 20
+    with DS102Emulator(baudrate=9600) as emu:
+        with serial.Serial(emu.port, baudrate=9600, timeout=0.5) as ser:
+            start = time.perf_counter()
+            for _ in range(queries):
+                ser.write(b'AXIX:POS?\r')
+                assert ser.readline() == b'0\r\n'
+            elapsed = time.perf_counter() - start
+    # 10 bytes out + 3 bytes back at 960 bytes/s
+    minimum = queries * 13 / 960
+    assert elapsed >= minimum, elapsed
+    print(f"[OK] {queries} queries in {elapsed:.3f} s (wire time {minimum:.3f} s)")
+
+if __name__ == "__main__":
+    test_stage_functions()
+    test_motion_timing()
+    test_baud_rate_limit()
+    print("\nAll DS102 emulator tests passed")
+    sys.exit(0)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless alignment runner
+Runs align and hold recipes on the emulated backend and checks the log
+artefacts written without Tk
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+import alignment
+import instrument_emulators
+import edwa_cli
+from instrument_emulators import EmulatedBench
+
+def with_emulated_bench(function):
+    """Run function(bench, log_root) on a fast emulated bench with no waits"""
+    bench = EmulatedBench(start={'X': 30, 'Y': -20, 'Z': 0, 'U': 0, 'V': 0, 'W': 0}, noise_db=0.0,
+                          stage_options={'speed': 50000, 'accel': 1e6, 'settle': 0.0})
+    log_root = tempfile.mkdtemp(prefix="edwa_cli_")
+    previous = os.environ.get(instrument_emulators.BACKEND_ENV)
+    os.environ[instrument_emulators.BACKEND_ENV] = 'emulated'
+    instrument_emulators._bench = bench
+    previous_sleep = alignment.set_sleep(lambda seconds: None)
+    try:
+        return function(bench, log_root)
+    finally:
+        alignment.set_sleep(previous_sleep)
+        instrument_emulators._bench = None
+        if previous is None:
+            del os.environ[instrument_emulators.BACKEND_ENV]
+        else:
+            os.environ[instrument_emulators.BACKEND_ENV] = previous
+        bench.close()
+        shutil.rmtree(log_root, ignore_errors=True)
+
+def test_recipe_validation():
+    """Defaults are filled in and bad recipes are rejected"""
+    print("=== Testing Recipe Loading ===")
+    path = os.path.join(tempfile.mkdtemp(prefix="edwa_recipe_"), "recipe.json")
+    with open(path, 'w') as f:
+        json.dump({'scan': {'relative': True, 'axes': {'X': [-10, 10, 3]}}, 'budget': {'max_tests': 50}}, f)
+    recipe = edwa_cli.load_recipe(path)
+    assert recipe['budget'] == {'max_minutes': None, 'max_tests': 50, 'walk_iterations': 20}
+    assert recipe['lasers']['pump1_ma'] == 50.0 and recipe['optimizer'] == 'smart'
+    params = edwa_cli.scan_parameters(recipe, {ax: 100.0 for ax in alignment.AXES})
+    assert list(params['X']) == [90.0, 100.0, 110.0]
+    for bad in ({'optimizer': 'anneal'}, {'scan': {'axes': {'Q': [0, 1, 3]}}},
+                {'scan': {'axes': {'X': [0, 1, 1]}}}, {'speed': 1}):
+        try:
+            edwa_cli.merge_recipe(bad)
+            assert False, f"accepted {bad}"
+        except ValueError:
+            pass
+    shutil.rmtree(os.path.dirname(path))
+    print("[OK] Recipe loading")
+
+def test_align_writes_artefacts():
+    """Scan plus smart climb leaves the same files main.py writes"""
+    print("\n=== Testing Headless Align ===")
+    recipe = edwa_cli.merge_recipe({
+        'scan': {'relative': True, 'axes': {'X': [-40, 40, 5], 'Y': [-40, 40, 5]}},
+        'budget': {'max_tests': 60},
+    })
+
+    def run(bench, log_root):
+        position, power = edwa_cli.run_command('align', recipe, log_root)
+        (run_dir,) = os.listdir(log_root)
+        return position, power, run_dir, sorted(os.listdir(os.path.join(log_root, run_dir))), bench
+
+    position, power, run_dir, files, bench = with_emulated_bench(run)
+    assert run_dir.startswith("scan_")
+    for prefix in ("scan_plan_", "scan_data_", "scan_plot_", "peak_fit_", "combined_optimization_",
+                   "combined_optimization_plot_", "keysight_state_", "io_stats_"):
+        assert any(name.startswith(prefix) for name in files), (prefix, files)
+    assert not any(name.endswith(".journal") for name in files)
+    assert power > bench.model.peak_dbm - 3.0
+    print(f"[OK] {len(files)} files, best {power:.2f} dBm")
+
+def test_hold_reoptimizes():
+    """A drop larger than drop_db triggers a local climb"""
+    print("\n=== Testing Headless Hold ===")
+    recipe = edwa_cli.merge_recipe({'hold': {'interval_s': 0.0, 'duration_min': 0.02, 'drop_db': 0.5,
+                                             'max_tests': 20}})
+
+    def run(bench, log_root):
+        readings = []
+        original = bench.optical_power
+
+        def drifting_power():
+            # The coupling falls away after a few readings, as if the fibre drifted
+            readings.append(1)
+            return original() - (3.0 if len(readings) > 5 else 0.0)
+
+        bench.open_resource(edwa_cli.POWER_METER_ADDRESS).power_source = drifting_power
+        climbs = edwa_cli.run_command('hold', recipe, log_root)
+        (run_dir,) = os.listdir(log_root)
+        return climbs, run_dir, os.listdir(os.path.join(log_root, run_dir))
+
+    climbs, run_dir, files = with_emulated_bench(run)
+    assert climbs >= 1 and run_dir.startswith("hold_")
+    assert any(name.startswith("hold_") and name.endswith(".csv") for name in files)
+    print(f"[OK] {climbs} re-optimization(s)")
+
+if __name__ == "__main__":
+    test_recipe_validation()
+    test_align_writes_artefacts()
+    test_hold_reoptimizes()
+    print("\nAll headless runner tests passed")
+    sys.exit(0)
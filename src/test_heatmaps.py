@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for the scan heatmaps
+Checks the rectilinear-grid fast path (grid detection, NaN gaps, cell
+extent) and the griddata fallback for scattered points
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+from scan_trace import ScanTrace
+from heatmaps import regular_grid_image, cell_extent, generate_heatmaps
+
+def grid_points(xs, ys):
+    xx, yy = np.meshgrid(xs, ys, indexing='ij')
+    xy = np.column_stack([xx.ravel(), yy.ravel()])
+    return xy, -40.0 + 0.01 * xy[:, 0] - 0.02 * xy[:, 1]
+
+def test_regular_grid():
+    """Evenly spaced scan points land in their own cells"""
+    print("=== Testing Regular Grid Detection ===")
+    xs, ys = np.linspace(-100, 100, 5), np.linspace(0, 30, 4)
+    xy, powers = grid_points(xs, ys)
+    order = np.random.default_rng(0).permutation(len(xy))  # visiting order does not matter
+    x_values, y_values, image = regular_grid_image(xy[order], powers[order])
+    assert np.array_equal(x_values, xs) and np.array_equal(y_values, ys)
+    assert image.shape == (4, 5)
+    assert image[2, 3] == -40.0 + 0.01 * xs[3] - 0.02 * ys[2]
+    print("[OK] Regular grid")
+
+def test_missing_cells_are_nan():
+    """A stopped scan leaves NaN cells instead of interpolated values"""
+    print("\n=== Testing Missing Cells ===")
+    xy, powers = grid_points(np.linspace(0, 40, 5), np.linspace(0, 40, 5))
+    _, _, image = regular_grid_image(xy[:22], powers[:22])  # stopped 2 points into the last column
+    assert image.shape == (5, 5) and np.isnan(image).sum() == 3
+    assert not np.isnan(image[:, :4]).any() and np.isnan(image[2:, 4]).all()
+    print("[OK] Missing cells are NaN")
+
+def test_fallback_cases():
+    """Uneven spacing or too few filled cells are not treated as a grid"""
+    print("\n=== Testing Grid Fallback ===")
+    xy, powers = grid_points([0, 10, 25, 30], [0, 10, 20])
+    assert regular_grid_image(xy, powers) is None
+
+    xy, powers = grid_points(np.linspace(0, 90, 10), np.linspace(0, 90, 10))
+    diagonal = np.arange(0, 100, 11)  # 10 of 100 cells
+    assert regular_grid_image(xy[diagonal], powers[diagonal]) is None
+    assert regular_grid_image(xy[diagonal], powers[diagonal], min_fill=0.1) is not None
+
+    scattered = np.random.default_rng(1).uniform(0, 100, size=(40, 2))
+    assert regular_grid_image(scattered, np.zeros(40)) is None
+    assert regular_grid_image(np.empty((0, 2)), np.empty(0)) is None
+    print("[OK] Fallback cases")
+
+def test_cell_extent():
+    """The image extends half a cell past the outer samples"""
+    print("\n=== Testing Cell Extent ===")
+    assert cell_extent(np.array([0.0, 10.0, 20.0]), np.array([5.0, 7.0])) == [-5.0, 25.0, 4.0, 8.0]
+    assert cell_extent(np.array([3.0]), np.array([1.0, 2.0])) == [2.5, 3.5, 0.5, 2.5]
+    print("[OK] Cell extent")
+
+def test_generate_2d_heatmaps():
+    """Both the grid path and the griddata path write the heatmap"""
+    print("\n=== Testing 2D Heatmap Files ===")
+    grid_xy, grid_powers = grid_points(np.linspace(0, 40, 5), np.linspace(0, 40, 5))
+    scattered_xy = np.random.default_rng(2).uniform(0, 40, size=(30, 2))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, xy, powers in (("grid", grid_xy, grid_powers),
+                                 ("scattered", scattered_xy, -40.0 + 0.01 * scattered_xy[:, 0])):
+            trace = ScanTrace()
+            trace.append(-1, -45.0, {'Y': 20.0, 'Z': 20.0}, phase='START')
+            for i, ((y, z), power) in enumerate(zip(xy, powers)):
+                trace.append(i, power, {'Y': y, 'Z': z})
+            log_dir = os.path.join(tmp, name)
+            os.makedirs(log_dir)
+            saved = generate_heatmaps(trace, ['Y', 'Z'], "20260101_120000", log_dir)
+            assert saved and all(os.path.getsize(path) > 0 for path in saved), (name, saved)
+    print("[OK] 2D heatmaps written")
+
+if __name__ == "__main__":
+    test_regular_grid()
+    test_missing_cells_are_nan()
+    test_fallback_cases()
+    test_cell_extent()
+    test_generate_2d_heatmaps()
+    print("\nAll heatmap tests passed")
+    sys.exit(0)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the instrument emulators
+Runs the unchanged alignment.py instrument functions against the emulated
+meter, pump drivers and signal laser, and the emulated backend end to end
+"""
+
+import os
+import sys
+import time
+from pyvisa.errors import VisaIOError
+
+import alignment
+import instrument_emulators
+from instrument_emulators import (KeysightMeterEmulator, CLD1015Emulator, HP8164AEmulator,
+                                  EmulatedBench, EmulatedResourceManager)
+
+def test_laser_setup():
+    """setup_pump/setup_signal and their read-backs"""
+    print("=== Testing Laser Setup ===")
+    pump = CLD1015Emulator("USB0::0x1313::0x804F::M0::0::INSTR", latency=0.0)
+    alignment.setup_pump(pump, 0.0512)
+    assert pump.output and pump.mode == 'CURR'
+    assert abs(alignment.read_pump_current(pump) - 51.2) < 1e-6
+    pump.write("SOUR:CURR:LEV:IMM:AMPL 0.2")  # above the 80 mA limit
+    assert abs(alignment.read_pump_current(pump) - 80.0) < 1e-6
+    pump.write("OUTP:STAT OFF")
+    assert alignment.read_pump_current(pump) == 0.0
+
+    laser = HP8164AEmulator("GPIB0::20::INSTR", latency=0.0)
+    alignment.setup_signal(laser, -3.5)
+    assert laser.output
+    assert alignment.read_signal_power(laser) == -3.5
+    print("[OK] Laser setup")
+
+def test_meter_fallback_and_timeouts():
+    """read_power falls back past commands the meter does not answer"""
+    print("\n=== Testing Meter Fallback and Timeouts ===")
+    meter = KeysightMeterEmulator("TCPIP0::1::inst0::INSTR", power_source=lambda: -12.5,
+                                  read_commands=["fetch1:pow?"], latency=0.0, timeout=50)
+    start = time.perf_counter()
+    assert alignment.read_power(meter) == -12.5
+    elapsed = time.perf_counter() - start
+    # READ1:pow?, READ:ch1:pow? and meas1:pow? each time out first
+    assert meter.stats['timeouts'] == 3 and elapsed >= 0.15, elapsed
+    assert meter.query("SYST:ERR?").startswith('-113')
+
+    meter.hung = True
+    assert alignment.read_power(meter) is None
+    meter.hung = False
+
+    # An answer slower than the timeout stays in the buffer
+    slow = KeysightMeterEmulator("TCPIP0::2::inst0::INSTR", power_source=lambda: -1.0,
+                                 latency={'default': 0.0, 'READ': 0.1}, timeout=20)
+    try:
+        slow.query("READ1:pow?")
+        assert False, "expected a timeout"
+    except VisaIOError:
+        pass
+    time.sleep(0.1)
+    assert float(slow.query("*IDN?")) == -1.0  # the stale reading arrives first
+    print(f"[OK] Fallback after {elapsed * 1000:.0f} ms of timeouts")
+
+def test_emulated_backend():
+    """EDWA_BACKEND=emulated: meter power follows the emulated stage"""
+    print("\n=== Testing Emulated Backend ===")
+    bench = EmulatedBench(start={ax: 0 for ax in alignment.AXES}, noise_db=0.0,
+                          stage_options={'speed': 50000, 'accel': 1e6, 'settle': 0.0})
+    rm = EmulatedResourceManager(bench)
+    meter = rm.open_resource("TCPIP0::100.65.16.193::inst0::INSTR")
+    signal = rm.open_resource("GPIB0::20::INSTR")
+    assert rm.open_resource("TCPIP0::100.65.16.193::inst0::INSTR") is meter
+    try:
+        rm.open_resource("ASRL9::INSTR")
+        assert False, "expected resource not found"
+    except VisaIOError:
+        pass
+
+    # No light until the signal laser is on
+    assert alignment.read_power(meter) == bench.model.floor_dbm
+    alignment.setup_signal(signal, 0.0)
+    on_peak = alignment.read_power(meter)
+    assert abs(on_peak - bench.model.peak_dbm) < 0.01
+
+    previous = os.environ.get(instrument_emulators.BACKEND_ENV)
+    os.environ[instrument_emulators.BACKEND_ENV] = 'emulated'
+    instrument_emulators._bench = bench
+    try:
+        with instrument_emulators.open_stage("COM3", 38400, timeout=0.5) as ser:
+            alignment.move_axis_to(ser, 'Y', 64)
+        assert alignment.read_power(meter) < on_peak - 3
+        assert isinstance(instrument_emulators.resource_manager().manager, EmulatedResourceManager)
+
+        # Hardware backend without pyvisa: a clear error, not a NameError
+        os.environ[instrument_emulators.BACKEND_ENV] = 'hardware'
+        instrument_emulators.PYVISA_AVAILABLE = False
+        try:
+            instrument_emulators.resource_manager()
+            assert False, "expected RuntimeError"
+        except RuntimeError as e:
+            assert "emulated" in str(e)
+    finally:
+        instrument_emulators.PYVISA_AVAILABLE = True
+        instrument_emulators._bench = None
+        if previous is None:
+            del os.environ[instrument_emulators.BACKEND_ENV]
+        else:
+            os.environ[instrument_emulators.BACKEND_ENV] = previous
+        bench.close()
+    print("[OK] Emulated backend")
+
+if __name__ == "__main__":
+    test_laser_setup()
+    test_meter_fallback_and_timeouts()
+    test_emulated_backend()
+    print("\nAll instrument emulator tests passed")
+    sys.exit(0)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for per-command I/O statistics
+Wraps emulated VISA instruments and the DS102 emulator and checks command
+keys, timeouts, retries and degradation flags
+"""
+
+import sys
+import serial
+
+import io_stats
+import alignment
+from ds102_emulator import DS102Emulator
+from instrument_emulators import KeysightMeterEmulator, CLD1015Emulator
+
+def rows_by_key():
+    return {(r['device'], r['command'], r['op']): r for r in io_stats.summary()}
+
+def test_command_keys():
+    """Numeric arguments fold into one row per command"""
+    print("=== Testing Command Keys ===")
+    assert io_stats.command_key("SOUR:CURR:LEV:IMM:AMPL 0.0500") == "SOUR:CURR:LEV:IMM:AMPL #"
+    assert io_stats.command_key(b"AXIY:GOABS -1200\r") == "AXIY:GOABS #"
+    assert io_stats.command_key(b"Y+10\r\n") == "Y±#"
+    assert io_stats.command_key("READ1:pow?") == "READ1:pow?"
+    assert io_stats.command_key("read:pow? (@1)") == "read:pow? (@#)"
+    print("[OK] Command keys")
+
+def test_visa_fallback_and_degradation():
+    """Timeouts and fallback retries per command; a slowing meter is flagged"""
+    print("\n=== Testing VISA Statistics ===")
+    io_stats.reset()
+    meter = KeysightMeterEmulator("TCPIP0::1::inst0::INSTR", read_commands=["meas1:pow?"],
+                                  latency={'default': 0.0, 'MEAS': 0.001}, timeout=10)
+    wrapped = io_stats.InstrumentedResource(meter, 'meter')
+    wrapped.timeout = 10  # attributes reach the resource
+    assert meter.timeout == 10
+    for _ in range(25):
+        assert alignment.read_power(wrapped) == -20.0
+    rows = rows_by_key()
+    assert rows[('meter', 'READ1:pow?', 'read')]['timeouts'] == 25
+    assert rows[('meter', 'READ:ch1:pow?', 'write')]['retries'] == 25
+    assert rows[('meter', 'meas1:pow?', 'write')]['retries'] == 25
+    assert rows[('meter', 'meas1:pow?', 'read')]['timeouts'] == 0
+    assert io_stats.degraded() == [row for row in io_stats.summary() if row['recent_timeout_rate'] > 0.05]
+
+    pump = io_stats.InstrumentedResource(CLD1015Emulator("USB0::0x1313::0x804F::M0::0::INSTR", latency=0.001), 'pump1')
+    for _ in range(io_stats.BASELINE):
+        alignment.read_pump_current(pump)
+    pump._target.latency = {'default': 0.005}
+    for _ in range(io_stats.WINDOW):
+        alignment.read_pump_current(pump)
+    row = rows_by_key()[('pump1', 'SENS3:CURR:DC:DATA?', 'query')]
+    assert row['slow_ratio'] > 2 and row in io_stats.degraded()
+    assert "! pump1" in io_stats.format_summary()
+    print(f"[OK] Pump query slowed {row['slow_ratio']:.1f}x and flagged")
+
+def test_serial_statistics():
+    """DS102 traffic: readline timeouts and per-command latency"""
+    print("\n=== Testing Serial Statistics ===")
+    io_stats.reset()
+    with DS102Emulator(speed=50000, accel=1e6, settle=0.0) as emu:
+        with io_stats.instrument_serial(serial.Serial(emu.port, baudrate=emu.baudrate, timeout=0.2)) as ser:
+            alignment.move_axis_to(ser, 'Z', 300)
+            assert alignment.get_axis_position(ser, 'Z') == 300
+            ser.write(b'AXIZ:FOO?\r')
+            assert ser.readline() == b""
+    rows = rows_by_key()
+    assert rows[('stage', 'AXIZ:POS?', 'readline')]['count'] == 1
+    assert rows[('stage', 'AXIZ:MOTION?', 'readline')]['p50_ms'] > 0
+    assert rows[('stage', 'AXIZ:FOO?', 'readline')]['timeouts'] == 1
+    print("[OK] Serial statistics")
+    io_stats.reset()
+
+if __name__ == "__main__":
+    test_command_keys()
+    test_visa_fallback_and_degradation()
+    test_serial_statistics()
+    print("\nAll I/O statistics tests passed")
+    sys.exit(0)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the keysight_manager health checks
+Runs the parallel health check and the watch mode against local services
+(no meter needed) and checks the shared deadline and the ping flags
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+import keysight_manager
+from keysight_manager import KeysightManager, ping_command
+
+class _Page(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+def test_ping_command():
+    """Windows takes -n/-w in ms, Linux -c/-W in seconds"""
+    print("=== Testing Ping Command ===")
+    system = keysight_manager.platform.system
+    try:
+        keysight_manager.platform.system = lambda: 'Windows'
+        assert ping_command('10.0.0.1', 2) == ['ping', '-n', '1', '-w', '2000', '10.0.0.1']
+        keysight_manager.platform.system = lambda: 'Linux'
+        assert ping_command('10.0.0.1', 2) == ['ping', '-c', '1', '-W', '2', '10.0.0.1']
+    finally:
+        keysight_manager.platform.system = system
+    print("[OK] Ping command")
+
+def test_health_deadline():
+    """A hung probe cannot hold the check past its deadline"""
+    print("\n=== Testing Parallel Health Check ===")
+    server = HTTPServer(('127.0.0.1', 0), _Page)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    manager = KeysightManager()
+    manager.ip = '127.0.0.1'
+    manager.web_url = f"http://127.0.0.1:{server.server_address[1]}/pm/index.html"
+    manager.check_visa_connection = lambda timeout: time.sleep(5)  # a hung VISA session
+    try:
+        start = time.perf_counter()
+        health = manager.check_device_health(deadline=1.5)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert elapsed < 2.0, elapsed
+    assert health['web_interface'] and not health['visa_connection']
+    assert health['latency']['visa_connection'] is None and health['latency']['web_interface'] < 1.5
+    assert health['overall_status'] == 'DEGRADED'
+    print(f"[OK] Health check returned in {elapsed:.2f} s")
+
+    # The hung probe must not keep the process alive either
+    script = (
+        "import time, keysight_manager\n"
+        "manager = keysight_manager.KeysightManager()\n"
+        "manager.ip = '127.0.0.1'\n"
+        "manager.web_url = 'http://127.0.0.1:9/'\n"
+        "manager.check_visa_connection = lambda timeout: time.sleep(10)\n"
+        "manager.check_device_health(deadline=1)\n"
+        "print('RETURNED', time.time(), flush=True)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True,
+                            timeout=20)
+    exited = time.time()
+    returned = [line for line in result.stdout.splitlines() if line.startswith('RETURNED')]
+    assert result.returncode == 0 and returned, result.stdout + result.stderr
+    exit_delay = exited - float(returned[0].split()[1])
+    assert exit_delay < 1.0, exit_delay
+    print(f"[OK] Process exited {exit_delay:.2f} s after the check returned")
+
+def test_watch_history():
+    """Each watch round adds one entry per probe"""
+    print("\n=== Testing Watch Mode ===")
+    manager = KeysightManager()
+    manager.ip = '127.0.0.1'
+    history = manager.watch(interval=0, count=3, history=2, timeout=0.5)
+    assert set(history) == {'ping', 'web', 'vxi11'}
+    assert all(len(values) == 2 for values in history.values())
+    print("[OK] Watch history")
+
+if __name__ == "__main__":
+    test_ping_command()
+    test_health_deadline()
+    test_watch_history()
+    print("\nAll keysight manager tests passed")
+    sys.exit(0)
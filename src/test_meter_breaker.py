@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for the power-meter circuit breaker
+Hangs the emulated Keysight meter and checks that the breaker opens,
+recovers by reconnecting, and that a scan goes back for the missed points
+"""
+
+import sys
+import time
+import serial
+
+import alignment
+from meter_breaker import GuardedMeter, CLOSED, OPEN
+from instrument_emulators import KeysightMeterEmulator, EmulatedBench
+
+def hung_meter():
+    meter = KeysightMeterEmulator("TCPIP0::1::inst0::INSTR", power_source=lambda: -12.0, latency=0.0, timeout=5)
+    meter.hung = True
+    return meter
+
+def test_breaker_recovers():
+    """Opens after threshold failures and recovers on the second reconnect"""
+    print("=== Testing Breaker Recovery ===")
+    meter = hung_meter()
+    opens = []
+
+    def open_meter():
+        opens.append(time.monotonic())
+        meter.hung = len(opens) < 3  # the second reconnect brings it back
+        return meter
+
+    messages, idles = [], []
+    guarded = GuardedMeter(open_meter, threshold=3, attempts=3, backoff=(0.0,),
+                           status_callback=messages.append, idle_callback=lambda: idles.append(1))
+    assert alignment.read_power(guarded) is None
+    assert alignment.read_power(guarded) is None
+    assert guarded.opens == 0 and not messages
+    power = alignment.read_power(guarded)  # third failure: recover, then read the point again
+    assert power == alignment.INDEX_MATCHING - 12.0
+    assert guarded.state == CLOSED and guarded.opens == 1 and guarded.recoveries == 1
+    assert len(opens) == 3 and guarded.failures == 0
+    assert messages[0].startswith("Meter failed 3 reads") and "resuming" in messages[-1]
+    assert idles
+    guarded.timeout = 7  # session attributes reach the meter
+    assert meter.timeout == 7 and guarded.query("*IDN?").strip() == meter.IDN
+    print(f"[OK] Recovered after {len(opens) - 1} reconnects, {len(messages)} status messages")
+
+def test_breaker_stays_open():
+    """A meter that never comes back fails fast until retry_interval"""
+    print("\n=== Testing Open Breaker ===")
+    meter = hung_meter()
+    guarded = GuardedMeter(lambda: meter, threshold=2, attempts=2, backoff=(0.0,), retry_interval=60)
+    for _ in range(2):
+        assert alignment.read_power(guarded) is None
+    assert guarded.state == OPEN
+    writes = meter.stats['writes']
+    start = time.perf_counter()
+    assert alignment.read_power(guarded) is None
+    assert meter.stats['writes'] == writes and time.perf_counter() - start < 0.01
+    guarded.retry_at = 0.0  # retry_interval elapsed
+    meter.hung = False
+    assert alignment.read_power(guarded) is not None and guarded.state == CLOSED
+    print("[OK] Fails fast while open, closes once the meter answers")
+
+def test_scan_resumes_missed_points():
+    """The meter hangs mid-scan; every grid point still ends up measured"""
+    print("\n=== Testing Scan Through a Meter Hang ===")
+    bench = EmulatedBench(start={ax: 0 for ax in alignment.AXES}, noise_db=0.0,
+                          stage_options={'speed': 50000, 'accel': 1e6, 'settle': 0.0})
+    meter = bench.open_resource("TCPIP0::100.65.16.193::inst0::INSTR")
+    meter.timeout = 5
+
+    def open_meter():
+        meter.hung = False  # a reconnect clears the lock-up
+        return meter
+
+    def point_callback(index, position, power):
+        if index == 4 and not guarded.opens:
+            meter.hung = True
+
+    guarded = GuardedMeter(open_meter, threshold=3, backoff=(0.0,))
+    try:
+        with serial.Serial(bench.stage_port(), baudrate=bench.stage.baudrate, timeout=1) as ser:
+            origin = {ax: 0 for ax in alignment.AXES}
+            scan_params = {'X': [-20, -10, 0, 10, 20], 'Y': [-10, 0, 10]}
+            trace = alignment.brute_force_3d_scan(guarded, ser, scan_params, origin,
+                                                  point_callback=point_callback)
+    finally:
+        bench.close()
+    indices = [int(i) for i in trace.column('index') if i >= 0]
+    assert sorted(indices) == list(range(15)), indices
+    assert guarded.opens == 1 and guarded.recoveries == 1
+    print(f"[OK] {len(indices)}/15 points measured across one meter recovery")
+
+def scan_grid(guarded, bench, stop_check=None, point_callback=None):
+    with serial.Serial(bench.stage_port(), baudrate=bench.stage.baudrate, timeout=1) as ser:
+        origin = {ax: 0 for ax in alignment.AXES}
+        scan_params = {'X': [-20, 0, 20], 'Y': [-10, 0, 10], 'Z': [-5, 0, 5]}
+        return alignment.brute_force_3d_scan(guarded, ser, scan_params, origin, stop_check=stop_check,
+                                             point_callback=point_callback)
+
+def test_scan_waits_for_open_breaker():
+    """A failed recovery does not let the scan run on without readings"""
+    print("\n=== Testing Scan Through a Failed Recovery ===")
+    bench = EmulatedBench(start={ax: 0 for ax in alignment.AXES}, noise_db=0.0,
+                          stage_options={'speed': 50000, 'accel': 1e6, 'settle': 0.0})
+    meter = bench.open_resource("TCPIP0::100.65.16.193::inst0::INSTR")
+    meter.timeout = 5
+    opens, opened = [], []
+
+    def open_meter():
+        opens.append(1)
+        meter.hung = len(opens) < 3  # first recovery fails, the one after retry_interval works
+        return meter
+
+    def point_callback(index, position, power):
+        if index == 4 and not guarded.opens:
+            meter.hung = True
+
+    guarded = GuardedMeter(open_meter, threshold=3, attempts=1, backoff=(0.0,), retry_interval=0.2,
+                           open_callback=lambda: opened.append(1))
+    try:
+        trace = scan_grid(guarded, bench, point_callback=point_callback)
+    finally:
+        bench.close()
+    indices = sorted(int(i) for i in trace.column('index') if i >= 0)
+    assert indices == list(range(27)), indices
+    assert trace.missed == [] and guarded.opens == 1 and opened == [1] and guarded.recoveries == 1
+    print(f"[OK] {len(indices)}/27 points measured after waiting out the open breaker")
+
+def test_scan_reports_gaps():
+    """Points still unread when STOP ends the wait are reported in missed"""
+    print("\n=== Testing Scan Gaps on STOP ===")
+    bench = EmulatedBench(start={ax: 0 for ax in alignment.AXES}, noise_db=0.0,
+                          stage_options={'speed': 50000, 'accel': 1e6, 'settle': 0.0})
+    meter = bench.open_resource("TCPIP0::100.65.16.193::inst0::INSTR")
+    meter.timeout = 5
+    measured = []
+    deadline = []
+
+    def point_callback(index, position, power):
+        measured.append(index)
+        if len(measured) == 5:
+            meter.hung = True  # never comes back
+            deadline.append(time.monotonic() + 0.5)
+
+    guarded = GuardedMeter(lambda: meter, threshold=2, attempts=1, backoff=(0.0,), retry_interval=0.1)
+    try:
+        trace = scan_grid(guarded, bench, stop_check=lambda: bool(deadline) and time.monotonic() > deadline[0],
+                          point_callback=point_callback)
+    finally:
+        bench.close()
+    assert guarded.is_open and len(trace) < 28
+    scanned = set(int(i) for i in trace.column('index') if i >= 0)
+    assert trace.missed and not set(trace.missed) & scanned
+    print(f"[OK] Missed points reported: {trace.missed}")
+
+if __name__ == "__main__":
+    test_breaker_recovers()
+    test_breaker_stays_open()
+    test_scan_resumes_missed_points()
+    test_scan_waits_for_open_breaker()
+    test_scan_reports_gaps()
+    print("\nAll meter breaker tests passed")
+    sys.exit(0)
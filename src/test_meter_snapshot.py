@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the Keysight meter snapshot
+Reads the meter state from the emulated N7744C and checks the JSON/PNG card
+written in place of the web page screenshot
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+from instrument_emulators import KeysightMeterEmulator
+from meter_snapshot import read_meter_state, write_meter_snapshot, _format_value, METER_QUERIES
+
+def test_snapshot_roundtrip():
+    """Every setting reaches the JSON file and the card is rendered"""
+    print("=== Testing Meter Snapshot ===")
+    meter = KeysightMeterEmulator("TCPIP0::1::inst0::INSTR", latency=0.0)
+    meter.wavelength = 1.5305e-6
+    meter.range_dbm = -10.0
+    state = read_meter_state(meter, power_dbm=-12.3456)
+    assert state['idn'] == meter.IDN and float(state['wavelength_m']) == 1.5305e-6
+    assert state['unit'] == '0' and state['auto_range'] == '1'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        png_path = write_meter_snapshot(state, tmp, "20260101_120000")
+        assert png_path == os.path.join(tmp, "keysight_state_20260101_120000.png")
+        with open(png_path, "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+        with open(os.path.join(tmp, "keysight_state_20260101_120000.json")) as f:
+            assert json.load(f) == state
+    assert set(key for key, _, _ in METER_QUERIES) < set(state)
+    print("[OK] Snapshot written")
+
+def test_timed_out_query():
+    """A query the meter does not answer in time is stored as None, shown as n/a"""
+    print("\n=== Testing Timed Out Query ===")
+    meter = KeysightMeterEmulator("TCPIP0::1::inst0::INSTR", latency={'default': 0.0, 'SENS1:CORR': 1.0},
+                                  timeout=100)
+    state = read_meter_state(meter)
+    assert state['offset_db'] is None and state['range_dbm'] is not None
+    assert state['power_dbm'] is None
+    assert _format_value('offset_db', state['offset_db']) == "n/a"
+    assert _format_value('power_dbm', None) == "n/a"
+    with tempfile.TemporaryDirectory() as tmp:
+        assert os.path.getsize(write_meter_snapshot(state, tmp, "20260101_120001")) > 0
+    print("[OK] Timed out query shown as n/a")
+
+def test_format_values():
+    """SCPI answers are shown in readable units"""
+    print("\n=== Testing Value Formatting ===")
+    assert _format_value('wavelength_m', "+1.550000E-06") == "1550.00 nm"
+    assert _format_value('averaging_time_s', "+2.000000E-02") == "20.0 ms"
+    assert _format_value('auto_range', "0") == "OFF" and _format_value('unit', "1") == "W"
+    assert _format_value('range_dbm', "garbled") == "garbled"
+    print("[OK] Value formatting")
+
+if __name__ == "__main__":
+    test_snapshot_roundtrip()
+    test_timed_out_query()
+    test_format_values()
+    print("\nAll meter snapshot tests passed")
+    sys.exit(0)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the local metrics endpoint
+Scrapes the Prometheus text output over HTTP and checks the meter probe
+against a local listener
+"""
+
+import sys
+import time
+import socket
+import urllib.request
+
+import io_stats
+import metrics_server
+
+def parse(text):
+    """{metric line without value: value} for the sample lines"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+def test_scrape():
+    """Points, best power, rate, moves and I/O errors appear in the scrape"""
+    print("=== Testing Metrics Scrape ===")
+    io_stats.reset()
+    port = metrics_server.start(port=0)
+    try:
+        metrics_server.start_run('scan')
+        for power in (-30.0, -25.5, -27.0):
+            metrics_server.record_point(power)
+            time.sleep(0.01)
+        metrics_server.record_error('scan')
+        io_stats.record('stage', 'AXIY:GOABS #', 'write', 0.001)
+        io_stats.record('stage', 'Y±#', 'write', 0.001)
+        io_stats.record('meter', 'READ1:pow?', 'read', 0.020)
+        io_stats.record('meter', 'READ1:pow?', 'read', 2.0, outcome='timeout')
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            text = response.read().decode()
+        samples = parse(text)
+        assert samples['edwa_run_points'] == 3
+        assert samples['edwa_best_power_dbm'] == -25.5
+        assert samples['edwa_points_per_second'] > 0
+        assert samples['edwa_stage_moves_total'] == 2
+        assert samples['edwa_io_timeouts_total{device="meter"}'] == 1
+        assert samples['edwa_errors_total{kind="scan"}'] == 1
+        assert 'edwa_meter_read_seconds{quantile="0.50",command="READ1:pow?"}' in samples
+        assert "# TYPE edwa_points_total counter" in text
+    finally:
+        metrics_server.stop()
+        io_stats.reset()
+    print(f"[OK] {len(samples)} samples scraped")
+
+def test_probe():
+    """The probe reports reachable and closed ports"""
+    print("\n=== Testing Meter Probe ===")
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    open_port = listener.getsockname()[1]
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+    try:
+        results = metrics_server.probe_meter('127.0.0.1', (open_port, closed_port), timeout=1)
+    finally:
+        listener.close()
+    assert results[open_port] is not None and results[closed_port] is None
+    print("[OK] Probe")
+
+if __name__ == "__main__":
+    test_scrape()
+    test_probe()
+    print("\nAll metrics server tests passed")
+    sys.exit(0)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for sub-grid peak estimation
+Fits synthetic Gaussian coupling peaks sampled on coarse scan grids
+"""
+
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+from scan_trace import ScanTrace
+from peak_fit import fit_scan_peak, climb_seed, save_peak_fit
+
+def gaussian_scan(axes, grids, centre, sigma, noise_db=0.0, seed=0):
+    """ScanTrace of a Gaussian peak (-20 dBm) on a brute force grid"""
+    rng = np.random.default_rng(seed)
+    trace = ScanTrace()
+    trace.append(-1, -45.0, {ax: 0.0 for ax in axes}, phase='START')
+    mesh = np.meshgrid(*grids, indexing='ij')
+    points = np.column_stack([m.ravel() for m in mesh])
+    for i, p in enumerate(points):
+        exponent = sum((p[k] - centre[k]) ** 2 / (2 * sigma[k] ** 2) for k in range(len(axes)))
+        power = 10 * np.log10(1e-2 * np.exp(-exponent) + 1e-7) + noise_db * rng.standard_normal()
+        trace.append(i, power, {ax: p[k] for k, ax in enumerate(axes)})
+    return trace
+
+def test_2d_fit():
+    """A 2-D fit beats the grid pitch and reports the spot width"""
+    print("=== Testing 2-D Gaussian Fit ===")
+    trace = gaussian_scan(['Y', 'Z'], [np.linspace(600, 900, 10), np.linspace(2300, 2600, 10)],
+                          (737.0, 2418.0), (60.0, 45.0), noise_db=0.05)
+    fit = fit_scan_peak(trace, ['Y', 'Z'])
+    assert fit['valid']
+    print(f"Fitted centre {fit['center']}, grid best {fit['grid_best']['position']['Y']:.0f}/"
+          f"{fit['grid_best']['position']['Z']:.0f}")
+    assert abs(fit['center']['Y'] - 737.0) < 3 and abs(fit['center']['Z'] - 2418.0) < 3
+    assert abs(fit['sigma']['Y'] - 60.0) < 6 and abs(fit['sigma']['Z'] - 45.0) < 5
+    assert abs(fit['power'] + 20.0) < 0.2
+    assert fit['position']['Y'] == fit['center']['Y'] and fit['position']['X'] == 0.0
+    assert len(fit['ellipsoid']['semi_axes']) == 2 and max(fit['ellipsoid']['semi_axes']) < 10
+
+    scan_ranges, step = climb_seed(fit)
+    assert scan_ranges['X'] == 50 and abs(scan_ranges['Z'] - fit['sigma']['Z']) < 1e-9
+    assert step == 8
+    print("[OK] 2-D fit")
+
+def test_3d_fit_and_save():
+    """3-D fits work with the quadratic model too, and results serialise"""
+    print("\n=== Testing 3-D Fit ===")
+    trace = gaussian_scan(['X', 'Y', 'Z'], [np.linspace(-100, 100, 7)] * 3, (12.0, -23.0, 31.0), (50.0, 70.0, 60.0))
+    for model in ('gaussian', 'quadratic'):
+        fit = fit_scan_peak(trace, ['X', 'Y', 'Z'], model=model)
+        assert fit['valid']
+        assert all(abs(fit['center'][ax] - c) < 5 for ax, c in zip('XYZ', (12.0, -23.0, 31.0)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_peak_fit(fit, os.path.join(tmp, "peak_fit.json"))
+        with open(path) as f:
+            assert json.load(f)['axes'] == ['X', 'Y', 'Z']
+    print("[OK] 3-D fit")
+
+def test_no_peak():
+    """A monotonic scan has no interior maximum and keeps the grid best"""
+    print("\n=== Testing Fit Rejection ===")
+    trace = ScanTrace()
+    for i, y in enumerate(np.linspace(0, 100, 5)):
+        for j, z in enumerate(np.linspace(0, 100, 5)):
+            trace.append(i * 5 + j, -40 + 0.1 * y + 0.05 * z, {'Y': y, 'Z': z})
+    fit = fit_scan_peak(trace, ['Y', 'Z'])
+    assert not fit['valid'] and fit['reason']
+    assert fit['position'] == fit['grid_best']['position']
+    assert climb_seed(fit) == ({ax: 50 for ax in 'XYZUVW'}, 10)
+    print(f"[OK] Rejected: {fit['reason']}")
+
+if __name__ == "__main__":
+    test_2d_fit()
+    test_3d_fit_and_save()
+    test_no_peak()
+    print("\nAll peak fit tests passed")
+    sys.exit(0)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for plot decimation used by the live power plots
+Checks that LTTB and min/max bucketing keep the shape of long runs
+"""
+
+import sys
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from plot_decimation import lttb_indices, minmax_indices, decimate_indices, ColumnDecimator
+from live_plot import LivePowerPlot
+
+def test_lttb_keeps_endpoints_and_peak():
+    """LTTB output is sorted, bounded and keeps endpoints and the global peak"""
+    print("=== Testing LTTB Decimation ===")
+    x = np.arange(50000)
+    y = -40 + 0.01 * np.random.default_rng(0).standard_normal(len(x))
+    y[31234] = -10.0  # single spike must survive
+
+    idx = lttb_indices(x, y, 800)
+    assert len(idx) == 800
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 31234 in idx
+    print("[OK] LTTB keeps endpoints and peak")
+
+def test_small_input_untouched():
+    """Short histories are returned unchanged"""
+    print("\n=== Testing Small Input ===")
+    idx = decimate_indices([0, 1, 2], [1.0, 2.0, 3.0], 800)
+    assert list(idx) == [0, 1, 2]
+    print("[OK] Small input untouched")
+
+def test_minmax_keeps_extremes():
+    """Min/max bucketing keeps the extreme of every bucket"""
+    print("\n=== Testing Min/Max Decimation ===")
+    y = np.sin(np.linspace(0, 20 * np.pi, 10000))
+    idx = minmax_indices(y, 100)
+    assert len(idx) <= 200
+    assert np.all(np.diff(idx) > 0)
+    assert np.isclose(y[idx].max(), y.max()) and np.isclose(y[idx].min(), y.min())
+    print("[OK] Min/max keeps extremes")
+
+def test_column_decimator_incremental():
+    """Folding points in batches keeps the same per-column extremes as one pass"""
+    print("\n=== Testing Column Decimator ===")
+    rng = np.random.default_rng(2)
+    x = np.arange(5000.0)
+    y = rng.standard_normal(len(x))
+    whole = ColumnDecimator(100, (0, 5000))
+    whole.update(x, y)
+    batched = ColumnDecimator(100, (0, 5000))
+    for stop in (7, 1000, 1001, 3500, 5000):
+        batched.update(x[:stop], y[:stop])
+    assert np.array_equal(whole.indices(), batched.indices())
+    assert len(whole.indices()) == 200
+    assert np.isclose(y[whole.indices()].max(), y.max())
+    print("[OK] Incremental column decimation")
+
+def test_live_plot_keeps_history():
+    """Every tenth of a long live run keeps a fair share of the drawn points"""
+    print("\n=== Testing Live Plot History ===")
+    fig = Figure(figsize=(6, 4), dpi=100)  # 600 pixel budget
+    canvas = FigureCanvasAgg(fig)
+    plot = LivePowerPlot(fig, fig.add_subplot(111), canvas, {'Y': 'green'})
+    plot._blit_highlight = lambda: None  # only the full redraws matter here
+    y = -40 + np.random.default_rng(3).standard_normal(20000)
+    for i, power in enumerate(y):
+        plot.add_point(i, power, 'Y')
+        if i % 1000 == 999:
+            plot.flush()
+    plot.flush()
+    drawn = plot._categories['Y']['collection'].get_offsets()
+    assert len(drawn) <= 600
+    per_decile = np.histogram(drawn[:, 0], bins=10, range=(0, 20000))[0]
+    print(f"Points drawn per tenth of the run: {per_decile.tolist()}")
+    assert per_decile.min() >= 0.5 * len(drawn) / 10, per_decile
+    print("[OK] History kept across the run")
+
+if __name__ == "__main__":
+    test_lttb_keeps_endpoints_and_peak()
+    test_small_input_untouched()
+    test_minmax_keeps_extremes()
+    test_column_decimator_incremental()
+    test_live_plot_keeps_history()
+    print("\nAll decimation tests passed")
+    sys.exit(0)
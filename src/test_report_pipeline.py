@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the post-run report pipeline
+Runs render and I/O jobs through the worker pools and checks that a broken
+process pool falls back to rendering in a background thread
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+
+from report_pipeline import PostRunPipeline
+
+def write_artefact(path, text):
+    """Stand-in for a render job (module level so it pickles)"""
+    with open(path, "w") as f:
+        f.write(text)
+    return os.getpid()
+
+def failing_job():
+    raise RuntimeError("camera not connected")
+
+def test_jobs_run_in_pools():
+    """Render jobs run in a worker process, I/O jobs in a thread"""
+    print("=== Testing Post-Run Pools ===")
+    pipeline = PostRunPipeline(render_workers=1, io_workers=2)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline.start_run()
+            render = pipeline.submit_render("heatmaps", write_artefact, os.path.join(tmp, "heatmap.txt"), "map")
+            io = pipeline.submit_io("scan data", write_artefact, os.path.join(tmp, "scan.csv"), "csv")
+            pipeline.submit_io("camera", failing_job)
+            pipeline.wait()
+            assert render.result() != os.getpid() and io.result() == os.getpid()
+            assert sorted(os.listdir(tmp)) == ["heatmap.txt", "scan.csv"]
+            assert pipeline.progress() == (3, 3, ["camera"])
+
+            pipeline.start_run()
+            assert pipeline.progress() == (0, 0, [])
+    finally:
+        pipeline.shutdown()
+    print("[OK] Jobs ran, failure reported by name")
+
+def test_broken_process_pool_fallback():
+    """A worker process that dies does not lose the artefact"""
+    print("\n=== Testing Broken Process Pool ===")
+    pipeline = PostRunPipeline(render_workers=1)
+    try:
+        pool = pipeline._get_process_pool()
+        try:
+            pool.submit(os._exit, 1).result()
+            assert False, "expected a broken pool"
+        except BrokenProcessPool:
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline.start_run()
+            path = os.path.join(tmp, "heatmap.txt")
+            future = pipeline.submit_render("heatmaps", write_artefact, path, "map")
+            pipeline.wait()
+            assert future.result() == os.getpid()  # rendered in this process
+            assert open(path).read() == "map"
+            assert pipeline.progress() == (1, 1, [])
+        assert pipeline._process_pool is None  # a fresh pool is made next time
+    finally:
+        pipeline.shutdown()
+    print("[OK] Rendered in a thread after the pool broke")
+
+if __name__ == "__main__":
+    test_jobs_run_in_pools()
+    test_broken_process_pool_fallback()
+    print("\nAll report pipeline tests passed")
+    sys.exit(0)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the run catalogue
+Builds a small fake log/ tree and checks indexing, incremental updates and queries
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+from scan_trace import AXES
+from run_journal import JournalWriter
+from run_catalog import RunCatalog, index_run_dir
+
+def write_scan(log_dir, stamp, peak):
+    run_dir = os.path.join(log_dir, f"scan_{stamp}")
+    os.makedirs(run_dir)
+    with open(os.path.join(run_dir, f"scan_data_{stamp}.csv"), "w") as f:
+        f.write("Index,Power (dBm),X_Position,Y_Position,Z_Position,U_Position,V_Position,W_Position\n")
+        f.write("-1,-35.0,10,20,30,0,0,0\n")
+        f.write("0,-40.0,10,0,30,0,0,0\n")
+        f.write(f"1,{peak},10,50,30,0,0,0\n")
+        f.write("2,-41.0,10,100,30,0,0,0\n")
+    return run_dir
+
+def write_combined(log_dir, stamp):
+    run_dir = os.path.join(log_dir, f"scan_hillclimb_{stamp}")
+    os.makedirs(run_dir)
+    with open(os.path.join(run_dir, f"combined_optimization_{stamp}.csv"), "w") as f:
+        f.write("Iteration,Power (dBm),Axis,X,Y,Z,U,V,W\n")
+        f.write("0,-30.0,Z,1,2,3,4,5,6\n")
+        f.write("1,-29.0,U,1,2,3,5,5,6\n")
+    return run_dir
+
+def test_index_and_query():
+    """Runs are indexed once and answer peak/axis queries"""
+    print("=== Testing Run Catalogue ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        write_scan(log_dir, "20250801_100000", -31.0)
+        write_combined(log_dir, "20250802_100000")
+        os.makedirs(os.path.join(log_dir, "not_a_run"))
+
+        catalog = RunCatalog(log_dir)
+        assert catalog.update() == (2, 0)
+        assert catalog.update() == (0, 0)  # nothing changed
+
+        best = catalog.best(limit=1)[0]
+        assert best['name'] == "scan_hillclimb_20250802_100000" and best['peak_power'] == -29.0
+
+        scan = catalog.get("scan_20250801_100000")
+        assert scan['enabled_axes'] == "Y" and scan['points'] == 4 and scan['peak_Y'] == 50.0
+        assert scan['start_power'] == -35.0
+
+        assert [r['name'] for r in catalog.runs(axes=['Z'])] == ["scan_hillclimb_20250802_100000"]
+        assert len(catalog.runs(since="2025-08-02")) == 1
+
+        write_scan(log_dir, "20250803_100000", -20.0)
+        assert catalog.update() == (1, 0)
+        assert catalog.best(limit=1)[0]['name'] == "scan_20250803_100000"
+        catalog.close()
+    print("[OK] Catalogue indexing and queries")
+
+def test_resumed_run_duration():
+    """Duration comes from the plan's measuring sessions, not the result file time"""
+    print("\n=== Testing Run Duration ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        stamp = "20250801_100000"
+        run_dir = write_scan(log_dir, stamp, -31.0)
+        plan = {'timestamp': stamp, 'axes': ['Y'], 'journal': f"scan_data_{stamp}.journal",
+                'sessions': [{'start': 1000.0, 'end': 1060.0}, {'start': 90000.0, 'end': 90020.0}]}
+        with open(os.path.join(run_dir, f"scan_plan_{stamp}.json"), "w") as f:
+            json.dump(plan, f)
+        record = index_run_dir(run_dir)
+        assert record['duration_s'] == 80.0 and record['points_per_s'] == 4 / 80.0
+
+        # Crashed in the second session: it ends at the last point in the journal
+        plan['sessions'][1]['end'] = None
+        with open(os.path.join(run_dir, f"scan_plan_{stamp}.json"), "w") as f:
+            json.dump(plan, f)
+        journal = JournalWriter(os.path.join(run_dir, plan['journal']))
+        for idx, t in enumerate([1030.0, 1060.0, 90010.0, 90040.0]):
+            journal.write(idx, t, -40.0, 'SCAN', {ax: 0.0 for ax in AXES})
+        journal.close()
+        assert index_run_dir(run_dir)['duration_s'] == 60.0 + 40.0
+
+        del plan['sessions']  # written before sessions were recorded
+        with open(os.path.join(run_dir, f"scan_plan_{stamp}.json"), "w") as f:
+            json.dump(plan, f)
+        record = index_run_dir(run_dir)
+        assert record['duration_s'] is None and 'points_per_s' not in record
+    print("[OK] Resumed run duration")
+
+if __name__ == "__main__":
+    test_index_and_query()
+    test_resumed_run_duration()
+    print("\nAll run catalogue tests passed")
+    sys.exit(0)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-file run container
+Checks table/frame round trips and memory-mapped frame access
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+from PIL import Image
+
+from scan_trace import ScanTrace, AXES
+from run_container import write_run_container, pack_run_dir, RunContainer
+
+def make_inputs():
+    trace = ScanTrace()
+    trace.append(-1, -30.0, {ax: 1.0 for ax in AXES}, phase='START')
+    for i in range(20):
+        trace.append(i, -40.0 + i / 10.0, {'Y': float(i)}, phase='SCAN')
+    rng = np.random.default_rng(1)
+    frames = rng.integers(0, 255, size=(4, 48, 64), dtype=np.uint8)
+    info = [{'name': f"frame_{i}.jpg", 'analysis': {'peak_intensity': int(frames[i].max())}} for i in range(4)]
+    return trace, frames, info
+
+def test_stored_frames_memmap():
+    """Stored layout memory-maps the frame stack from the container"""
+    print("=== Testing Stored Frame Layout ===")
+    trace, frames, info = make_inputs()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_run_container(os.path.join(tmp, "run.npz"), trace, frames, info,
+                                   {'meter_state': {'unit': '0'}}, {'note.txt': b'hello'},
+                                   compress_frames=False)
+        with RunContainer(path) as container:
+            mapped = container.frames()
+            assert isinstance(mapped, np.memmap)
+            assert np.array_equal(mapped, frames)
+            assert np.array_equal(container.frame(3), frames[3])
+            assert np.array_equal(container.trace().data, trace.data)
+            assert container.frame_info[2]['analysis']['peak_intensity'] == int(frames[2].max())
+            assert container.metadata['meter_state']['unit'] == '0'
+            assert container.file('note.txt') == b'hello'
+            del mapped
+
+        # Plain numpy can read the same file
+        with np.load(path) as npz:
+            assert np.array_equal(npz['frames'], frames)
+    print("[OK] Stored layout")
+
+def test_chunked_frames():
+    """Default compressed layout reads single frames without the rest"""
+    print("\n=== Testing Chunked Frame Layout ===")
+    trace, frames, info = make_inputs()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_run_container(os.path.join(tmp, "run.npz"), trace, frames, info)
+        with RunContainer(path) as container:
+            assert container.frame_count == 4
+            assert np.array_equal(container.frame(1), frames[1])
+            assert np.array_equal(container.frames(), frames)
+    print("[OK] Chunked layout")
+
+def test_pack_run_dir():
+    """Packing a run directory keeps frames compact and skips odd-sized ones"""
+    print("\n=== Testing Run Directory Packing ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        run_dir = os.path.join(tmp, "scan_20260101_120000")
+        camera_dir = os.path.join(run_dir, "camera_captures")
+        os.makedirs(camera_dir)
+        gradient = np.add.outer(np.arange(120), np.arange(160)).astype(np.uint8)
+        for i in range(5):
+            Image.fromarray(gradient + i).save(os.path.join(camera_dir, f"frame_{i}.jpg"))
+        Image.fromarray(gradient[:60]).save(os.path.join(camera_dir, "thumb.jpg"))
+
+        path = pack_run_dir(run_dir)
+        with RunContainer(path) as container:
+            assert container.manifest['frame_storage'] == 'chunked'
+            assert container.manifest['frames'] == [5, 120, 160]
+            assert container.frame(2).shape == (120, 160)
+            assert container.file("camera_captures/thumb.jpg")[:2] == b"\xff\xd8"
+        assert os.path.getsize(path) < 5 * 120 * 160 / 4  # well under the raw pixels
+    print(f"[OK] Packed {os.path.basename(path)}")
+
+if __name__ == "__main__":
+    test_stored_frames_memmap()
+    test_chunked_frames()
+    test_pack_run_dir()
+    print("\nAll run container tests passed")
+    sys.exit(0)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the crash-safe run journal
+Checks that streamed points survive a torn write and convert to the CSV layout
+"""
+
+import os
+import csv
+import sys
+import tempfile
+
+from scan_trace import ScanTrace, AXES
+from run_journal import JournalWriter, read_journal, convert_journal
+
+def test_journal_roundtrip():
+    """Points appended to a trace reach the journal and convert to CSV"""
+    print("=== Testing Journal Round Trip ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalWriter(os.path.join(tmp, "scan.journal"), fsync_interval=0)
+        trace = ScanTrace()
+        trace.append(-1, -30.0, {ax: 1.0 for ax in AXES}, phase='START')
+        trace.attach_journal(journal)  # existing point is written first
+        for i in range(500):
+            trace.append(i, -40.0 - i / 100.0, {'X': 5.0, 'Y': float(i)}, phase='SCAN')
+        journal.close()
+        assert journal.rows_written == 501
+
+        loaded = read_journal(journal.path)
+        assert len(loaded) == 501
+        assert loaded[0]['is_starting_position']
+        assert loaded[100]['position']['Y'] == 99.0
+
+        csv_path = convert_journal(journal.path, os.path.join(tmp, "scan.csv"), 'scan')
+        rows = list(csv.reader(open(csv_path)))
+        assert rows[0][:2] == ["Index", "Power (dBm)"] and len(rows) == 502
+        assert not os.path.exists(journal.path)
+    print("[OK] Journal round trip")
+
+def test_torn_last_line():
+    """A partially written last line (crash mid-write) is skipped"""
+    print("\n=== Testing Torn Journal ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalWriter(os.path.join(tmp, "climb.journal"))
+        for i in range(10):
+            journal.write(i, 0.0, -35.0, 'X', {'X': float(i)})
+        journal.close()
+        with open(journal.path, "a") as f:
+            f.write("10,0.0,-35.0,X,10.0,0")
+        assert len(read_journal(journal.path)) == 10
+    print("[OK] Torn line skipped")
+
+def test_continue_after_torn_line():
+    """Continuing a crashed journal does not glue the next row onto the torn one"""
+    print("\n=== Testing Continued Torn Journal ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalWriter(os.path.join(tmp, "scan.journal"))
+        for i in range(5):
+            journal.write(i, 0.0, -35.0, 'SCAN', {'X': float(i)})
+        journal.close()
+        with open(journal.path, "a") as f:
+            f.write("5,0.0,-35.0,SC")
+
+        resumed = JournalWriter(journal.path)
+        assert resumed.appending
+        for i in range(5, 8):
+            resumed.write(i, 0.0, -36.0, 'SCAN', {'X': float(i)})
+        resumed.close()
+        loaded = read_journal(journal.path)
+        assert [int(i) for i in loaded.column('index')] == list(range(8))
+
+        # Torn inside the header: the journal starts again
+        with open(journal.path, "w") as f:
+            f.write("Index,t,Pow")
+        restarted = JournalWriter(journal.path)
+        assert not restarted.appending
+        restarted.write(0, 0.0, -35.0, 'SCAN', {'X': 0.0})
+        restarted.close()
+        assert len(read_journal(journal.path)) == 1
+    print("[OK] Torn line trimmed before continuing")
+
+if __name__ == "__main__":
+    test_journal_roundtrip()
+    test_torn_last_line()
+    test_continue_after_torn_line()
+    print("\nAll run journal tests passed")
+    sys.exit(0)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for scan checkpoint/resume
+Checks the saved plan, detection of interrupted scans and the drift check
+"""
+
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+from scan_trace import ScanTrace, AXES
+from run_journal import JournalWriter
+from scan_checkpoint import (build_scan_positions, write_scan_plan, find_resumable_scan, plan_path,
+                             start_scan_session, end_scan_session, scan_duration,
+                             mark_scan_finished, completed_indices, select_verification_points, check_drift)
+
+def test_plan_order():
+    """Positions follow meshgrid 'ij' order (first axis slowest)"""
+    print("=== Testing Scan Plan Order ===")
+    axes, positions = build_scan_positions({'Y': np.linspace(0, 10, 3), 'Z': np.linspace(0, 1, 2)})
+    assert axes == ['Y', 'Z'] and positions.shape == (6, 2)
+    assert positions[:2].tolist() == [[0.0, 0.0], [0.0, 1.0]]
+    print("[OK] Plan order")
+
+def test_find_interrupted_scan():
+    """A scan whose journal holds only part of the plan is resumable"""
+    print("\n=== Testing Interrupted Scan Detection ===")
+    with tempfile.TemporaryDirectory() as root:
+        timestamp = "20260101_120000"
+        log_dir = os.path.join(root, f"scan_{timestamp}")
+        os.makedirs(log_dir)
+        params = {'Y': np.linspace(0, 100, 5), 'Z': np.linspace(0, 50, 4)}
+        origin = {ax: 0.0 for ax in AXES}
+        write_scan_plan(log_dir, timestamp, params, origin)
+
+        journal = JournalWriter(os.path.join(log_dir, f"scan_data_{timestamp}.journal"))
+        journal.write(-1, 0.0, -30.0, 'START', origin)
+        _, positions = build_scan_positions(params)
+        for idx in range(7):
+            journal.write(idx, 0.0, -40.0 + idx, 'SCAN', {'Y': positions[idx][0], 'Z': positions[idx][1]})
+        journal.close()
+
+        found = find_resumable_scan(root)
+        assert found is not None
+        found_dir, plan, scan_params, trace = found
+        assert found_dir == log_dir and plan['total_points'] == 20
+        assert completed_indices(trace) == set(range(7))
+        assert np.allclose(scan_params['Z'], params['Z'])
+
+        rows = select_verification_points(trace, count=3)
+        assert len(rows) == 3 and trace.column('index')[rows[0]] == 6  # strongest point first
+
+        # Ran to the end: still offered while points lack a reading, not once all were read
+        mark_scan_finished(log_dir, timestamp, missed=[3, 12])
+        assert find_resumable_scan(root)[1]['missed'] == [3, 12]
+        mark_scan_finished(log_dir, timestamp)
+        assert find_resumable_scan(root) is None
+    print("[OK] Interrupted scan found")
+
+def test_resumed_scan_duration():
+    """Duration counts the measuring sessions, not the time between them"""
+    print("\n=== Testing Resumed Scan Duration ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        timestamp = "20260101_120000"
+        write_scan_plan(log_dir, timestamp, {'Y': np.linspace(0, 100, 5)}, {ax: 0.0 for ax in AXES})
+        with open(plan_path(log_dir, timestamp)) as f:
+            plan = json.load(f)
+        first_start = plan['sessions'][0]['start'] = plan['sessions'][0]['start'] - 1000.0
+        with open(plan_path(log_dir, timestamp), "w") as f:
+            json.dump(plan, f)
+        trace = ScanTrace()
+        for idx in range(2):
+            trace.append(idx, -40.0, {'Y': 25.0 * idx}, t=first_start + 10.0 * (idx + 1))
+        end_scan_session(log_dir, timestamp, trace)  # stopped after 20 s
+
+        start_scan_session(log_dir, timestamp)  # resumed later
+        with open(plan_path(log_dir, timestamp)) as f:
+            second_start = json.load(f)['sessions'][1]['start']
+        for idx in range(2, 5):
+            trace.append(idx, -40.0, {'Y': 25.0 * idx}, t=second_start + 5.0 * (idx - 1))
+        end_scan_session(log_dir, timestamp, trace)
+        mark_scan_finished(log_dir, timestamp)
+        with open(plan_path(log_dir, timestamp)) as f:
+            plan = json.load(f)
+        assert np.isclose(scan_duration(plan), 20.0 + 15.0)
+
+        # A session cut short by a crash ends at its last journal point
+        plan['sessions'][1]['end'] = None
+        assert scan_duration(plan) is None
+        assert np.isclose(scan_duration(plan, trace.column('t')), 20.0 + 15.0)
+        assert scan_duration({'timestamp': timestamp}) is None  # plan without sessions
+    print("[OK] Resumed scan duration")
+
+def test_drift_check():
+    """Drift beyond tolerance or a failed reading blocks a silent resume"""
+    print("\n=== Testing Drift Check ===")
+    assert check_drift([-40.0, -42.0], [-40.3, -41.8], tolerance_db=1.0)[0]
+    ok, diff = check_drift([-40.0], [-43.0], tolerance_db=1.0)
+    assert not ok and np.isclose(diff, 3.0)
+    assert not check_drift([-40.0], [None])[0]
+    print("[OK] Drift check")
+
+if __name__ == "__main__":
+    test_plan_order()
+    test_find_interrupted_scan()
+    test_resumed_scan_duration()
+    test_drift_check()
+    print("\nAll scan checkpoint tests passed")
+    sys.exit(0)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the fast result CSV loader
+Checks both CSV layouts, torn rows and the .npy sidecar cache
+"""
+
+import os
+import sys
+import glob
+import tempfile
+import numpy as np
+
+from scan_loader import load_table, load_trace, sidecar_path
+
+def write_file(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+def test_scan_layout_and_cache():
+    """Scan CSVs load with START/SCAN phases and are served from the cache"""
+    print("=== Testing Scan CSV Loading ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan_data_20250801_100000.csv")
+        write_file(path, "Index,Power (dBm),X_Position,Y_Position,Z_Position,U_Position,V_Position,W_Position\n"
+                         "-1,-35.0,10,20,30,0,0,0\n"
+                         "0,-40.0,10,0,30,0,0,0\n"
+                         "1,-31.5,10,50,30,0,0,0\n"
+                         "2,-41")  # torn final row
+        table = load_table(path)
+        assert len(table) == 3
+        assert list(table['phase']) == ['START', 'SCAN', 'SCAN']
+        assert table['Y'][2] == 50.0 and table['power'][2] == -31.5
+        assert os.path.exists(sidecar_path(path))
+
+        cached = load_table(path)
+        assert isinstance(cached, np.memmap)
+        assert np.array_equal(cached, table)
+
+        # Rewriting the CSV invalidates and replaces the old sidecar
+        write_file(path, "Index,Power (dBm),X_Position,Y_Position,Z_Position,U_Position,V_Position,W_Position\n"
+                         "0,-20.0,1,2,3,4,5,6\n")
+        del cached
+        assert len(load_table(path)) == 1
+        assert len(glob.glob(os.path.join(tmp, ".*.npy"))) == 1
+    print("[OK] Scan layout and cache")
+
+def test_climb_layout_trace():
+    """Climb CSVs keep their Axis labels as trace phases"""
+    print("\n=== Testing Climb CSV Loading ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "climb_hill_20250801_100000.csv")
+        write_file(path, "Iteration,Power (dBm),Axis,X,Y,Z,U,V,W\n"
+                         "0,-30.0,Z,1,2,3,4,5,6\n"
+                         "1,-29.0,U,1,2,3,5,5,6\n")
+        trace = load_trace(path)
+        assert len(trace) == 2
+        assert list(trace.phase_labels()) == ['Z', 'U']
+        assert trace.best_point()['position']['U'] == 5.0
+    print("[OK] Climb layout")
+
+if __name__ == "__main__":
+    test_scan_layout_and_cache()
+    test_climb_layout_trace()
+    print("\nAll scan loader tests passed")
+    sys.exit(0)
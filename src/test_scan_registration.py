@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for scan-to-scan registration
+Checks subpixel shift recovery and drift prediction on synthetic 2-D scans
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+import numpy as np
+
+from scan_registration import register_maps, drift_series, drift_rate, suggest_origin
+
+def gaussian_power(y, z, centre):
+    """Coupling in dBm for a Gaussian spot of 60 units (1/e^2 radius ~120)"""
+    return 10 * np.log10(1e-2 * np.exp(-((y - centre[0]) ** 2 + (z - centre[1]) ** 2) / (2 * 60 ** 2)) + 1e-6)
+
+def write_scan(log_dir, stamp, window_centre, peak, steps=10, span=300):
+    run_dir = os.path.join(log_dir, f"scan_{stamp}")
+    os.makedirs(run_dir)
+    ys = np.linspace(window_centre[0] - span / 2, window_centre[0] + span / 2, steps)
+    zs = np.linspace(window_centre[1] - span / 2, window_centre[1] + span / 2, steps)
+    with open(os.path.join(run_dir, f"scan_data_{stamp}.csv"), "w") as f:
+        f.write("Index,Power (dBm),X_Position,Y_Position,Z_Position,U_Position,V_Position,W_Position\n")
+        f.write(f"-1,{gaussian_power(window_centre[0], window_centre[1], peak)},100,{window_centre[0]},{window_centre[1]},0,0,0\n")
+        i = 0
+        for y in ys:
+            for z in zs:
+                f.write(f"{i},{gaussian_power(y, z, peak)},100,{y},{z},0,0,0\n")
+                i += 1
+
+def scan_map(window_centre, peak, steps=10, span=300):
+    x = np.linspace(window_centre[0] - span / 2, window_centre[0] + span / 2, steps)
+    y = np.linspace(window_centre[1] - span / 2, window_centre[1] + span / 2, steps)
+    yy, xx = np.meshgrid(y, x, indexing='ij')
+    return {'axes': ('Y', 'Z'), 'x': x, 'y': y, 'image': 10 ** (gaussian_power(xx, yy, peak) / 10)}
+
+def test_register_shift():
+    """Shifts smaller than the grid pitch are recovered, also with moved windows"""
+    print("=== Testing Map Registration ===")
+    reference = scan_map((700, 2400), (700, 2400))
+    moved = scan_map((733, 2380), (737.5, 2378))
+    shift = register_maps(reference, moved)
+    print(f"Recovered shift Y:{shift['Y']:.1f} Z:{shift['Z']:.1f} (true 37.5, -22.0), quality {shift['quality']:.3f}")
+    assert abs(shift['Y'] - 37.5) < 5 and abs(shift['Z'] + 22.0) < 5
+    assert shift['quality'] > 0.9
+
+    # Windows that do not overlap cannot be registered
+    assert register_maps(reference, scan_map((2000, 2400), (2000, 2400))) is None
+    print("[OK] Registration")
+
+def test_drift_prediction():
+    """A steady drift gives the right rate and a predicted scan centre"""
+    print("\n=== Testing Drift Prediction ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        # Peak moves +20 Y and -10 Z per hour; windows are re-centred each time
+        for hour in range(4):
+            peak = (700 + 20 * hour, 2400 - 10 * hour)
+            write_scan(log_dir, f"20250807_{8 + hour:02d}0000", (700 + 15 * hour, 2400), peak)
+
+        series = drift_series(log_dir)
+        assert len(series) == 1 and len(series[0]) == 4
+        fit = drift_rate(series[0])
+        print(f"Fitted rate Y:{fit['rate']['Y']:+.1f}/h Z:{fit['rate']['Z']:+.1f}/h")
+        assert abs(fit['rate']['Y'] - 20) < 3 and abs(fit['rate']['Z'] + 10) < 3
+
+        suggestion = suggest_origin(log_dir, ['Y', 'Z'], at=datetime(2025, 8, 7, 13, 0, 0))
+        assert suggestion['scans'] == 4
+        assert abs(suggestion['origin']['Y'] - 800) < 40 and abs(suggestion['origin']['Z'] - 2350) < 40
+
+        # Extrapolation stops at the span of the fit (3 h), old fits are not used
+        capped = suggest_origin(log_dir, ['Y', 'Z'], at=datetime(2025, 8, 7, 17, 0, 0), max_age_hours=24)
+        assert capped['extrapolated_hours'] == 3.0 and abs(capped['origin']['Y'] - 820) < 40
+        stale = suggest_origin(log_dir, ['Y', 'Z'], at=datetime(2026, 8, 7, 13, 0, 0))
+        assert stale['stale'] and stale['rate'] is None
+        assert stale['origin'] == {ax: series[0][-1]['map']['peak'][ax] for ax in ('Y', 'Z')}
+
+        # The suggestion stays within one window width of the current window
+        window = {'Y': (-100.0, 100.0), 'Z': (2300.0, 2500.0)}
+        bounded = suggest_origin(log_dir, ['Y', 'Z'], at=datetime(2025, 8, 7, 13, 0, 0), window=window)
+        assert bounded['clipped'] == ['Y'] and bounded['origin']['Y'] == 200.0
+
+        # History taken with the other axes elsewhere is not used
+        assert suggest_origin(log_dir, ['Y', 'Z'], fixed={'X': 5000}) is None
+    print("[OK] Drift prediction")
+
+if __name__ == "__main__":
+    test_register_shift()
+    test_drift_prediction()
+    print("\nAll scan registration tests passed")
+    sys.exit(0)
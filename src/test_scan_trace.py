@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar ScanTrace store
+Checks growth, column views, phase labels and the CSV/NPZ exports
+"""
+
+import os
+import csv
+import sys
+import pickle
+import tempfile
+import numpy as np
+
+from scan_trace import ScanTrace, AXES
+
+def make_trace(n=1000):
+    trace = ScanTrace(capacity=4)
+    origin = {ax: 100.0 * i for i, ax in enumerate(AXES)}
+    trace.append(-1, -30.0, origin, phase='START')
+    pos = origin.copy()
+    for i in range(n):
+        pos['Y'] = 10.0 * (i % 25)
+        pos['Z'] = 10.0 * (i // 25)
+        trace.append(i, -40.0 + np.sin(i / 50.0), pos, phase='SCAN')
+    return trace
+
+def test_append_and_views():
+    """Appends grow the store; columns are views of the filled part"""
+    print("=== Testing Append and Views ===")
+    trace = make_trace()
+    assert len(trace) == 1001
+    power = trace.column('power')
+    assert power.base is not None  # view, not a copy
+    assert trace.positions(['Y', 'Z']).shape == (1001, 2)
+    assert trace[0]['is_starting_position'] and not trace[1]['is_starting_position']
+    assert trace.mask('START').sum() == 1
+    best = trace.best_point()
+    assert best['power'] == power.max()
+    print("[OK] Append and views")
+
+def test_csv_layouts():
+    """CSV exports keep the existing column layouts"""
+    print("\n=== Testing CSV Export ===")
+    trace = make_trace(50)
+    with tempfile.TemporaryDirectory() as tmp:
+        scan_path = trace.to_csv(os.path.join(tmp, "scan.csv"), layout='scan')
+        rows = list(csv.reader(open(scan_path)))
+        assert rows[0] == ["Index", "Power (dBm)"] + [f"{ax}_Position" for ax in AXES]
+        assert rows[1][0] == "-1" and float(rows[1][1]) == -30.0
+        assert len(rows) == 52
+        # float64 values read back exactly; whole-step positions are written as ints
+        powers = trace.column('power')
+        assert [float(row[1]) for row in rows[1:]] == powers.tolist()
+        assert rows[1][2:] == [str(100 * i) for i in range(len(AXES))]
+        assert all(value.lstrip("-").isdigit() for row in rows[1:] for value in row[2:])
+
+        climb_path = trace.to_csv(os.path.join(tmp, "climb.csv"), layout='climb')
+        rows = list(csv.reader(open(climb_path)))
+        assert rows[0] == ["Iteration", "Power (dBm)", "Axis"] + AXES
+        assert rows[1][2] == "START" and rows[2][2] == "SCAN"
+    print("[OK] CSV layouts")
+
+def test_npz_and_pickle_roundtrip():
+    """NPZ export and pickling keep data and phase labels"""
+    print("\n=== Testing NPZ/Pickle Round Trip ===")
+    trace = make_trace(100)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = trace.to_npz(os.path.join(tmp, "trace.npz"))
+        loaded = ScanTrace.load_npz(path)
+    assert np.array_equal(loaded.data, trace.data)
+    assert list(loaded.phase_labels()) == list(trace.phase_labels())
+
+    clone = pickle.loads(pickle.dumps(trace))
+    assert np.array_equal(clone.data, trace.data)
+    clone.append(999, -20.0, {'X': 1.0})
+    assert len(clone) == len(trace) + 1
+    print("[OK] Round trips")
+
+if __name__ == "__main__":
+    test_append_and_views()
+    test_csv_layouts()
+    test_npz_and_pickle_roundtrip()
+    print("\nAll scan trace tests passed")
+    sys.exit(0)
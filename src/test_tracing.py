@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for hot-path timing
+Traces a simulated hill climb and checks spans, counters, histograms,
+the per-run files and the cost of the disabled path
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+import tracing
+import alignment
+from rig_simulator import SimulatedRig
+
+def test_disabled_is_cheap():
+    """Disabled spans and traced calls record nothing and cost little"""
+    print("=== Testing Disabled Tracing ===")
+    tracing.disable()
+    tracing.start_run()
+
+    @tracing.traced("test.noop")
+    def noop():
+        return 1
+
+    # The disabled path hands out the shared no-op span and records nothing
+    assert tracing.span("test.block") is tracing._NULL_SPAN
+    calls = 100000
+    start = time.perf_counter()
+    for _ in range(calls):
+        with tracing.span("test.block"):
+            noop()
+    per_call_us = (time.perf_counter() - start) / calls * 1e6
+    result = tracing.summary()
+    assert result['spans'] == {}
+    tracing.enable()
+    try:
+        tracing.start_run()
+        assert noop() == 1 and tracing.summary()['spans']['test.noop']['count'] == 1
+    finally:
+        tracing.disable()
+        tracing.start_run()
+    # Timing is machine dependent: reported, not asserted
+    print(f"[OK] {per_call_us:.2f} us per disabled span + traced call")
+
+def test_traced_climb():
+    """Instrument calls, iterations and counters of a simulated climb"""
+    print("\n=== Testing Traced Hill Climb ===")
+    rig = SimulatedRig(seed=2, start={'Y': 30.0, 'Z': -20.0})
+    tracing.enable(chrome=True)
+    tracing.start_run()
+    try:
+        with rig.installed():
+            alignment.hill_climb_all_axes_constrained(rig.meter, rig.stage, rig.position(), 10)
+        result = tracing.summary()
+        spans = result['spans']
+        assert spans['meter.read_power']['count'] == rig.stats['reads']
+        assert spans['stage.move_stage']['count'] + spans.get('stage.move_axis_to', {'count': 0})['count'] \
+            == rig.stats['moves']
+        assert spans['optimizer.hill_climb_all_axes_constrained']['count'] == 1
+        assert result['counters']['optimizer.hill_iterations'] >= 1
+        read = spans['meter.read_power']
+        assert read['min_ms'] <= read['p50_ms'] * 1.2 and read['p50_ms'] <= read['p90_ms'] <= read['p99_ms']
+        assert sum(read['histogram_ms'].values()) == read['count']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = tracing.write_run(tmp, "20250101_120000")
+            assert [os.path.basename(p) for p in paths] == ["trace_summary_20250101_120000.json",
+                                                            "trace_20250101_120000.json"]
+            with open(paths[1]) as f:
+                events = json.load(f)['traceEvents']
+            assert len(events) == sum(s['count'] for s in spans.values())
+            assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events)
+    finally:
+        tracing.disable()
+        tracing.start_run()
+    print(f"[OK] {len(events)} events, {read['count']} meter reads")
+
+if __name__ == "__main__":
+    test_disabled_is_cheap()
+    test_traced_climb()
+    print("\nAll tracing tests passed")
+    sys.exit(0)
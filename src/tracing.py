@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Timing for EDWA
+Spans, counters and per-name duration histograms for the instrument calls,
+optimizer iterations and GUI redraws, to see where the time of a slow scan
+goes. Disabled (the default), span() returns a shared no-op context manager
+and traced functions call straight through, so the instrumentation can stay
+in the hot paths.
+
+    with tracing.span("gui.update_plot"):
+        ...
+
+    @tracing.traced("meter.read_power")
+    def read_power(inst): ...
+
+Enable with the EDWA_TRACE environment variable (1 for the summary,
+"chrome" to also keep events for a Chrome trace) or tracing.enable(). At
+the end of a run write_run() puts trace_summary_<timestamp>.json (and
+trace_<timestamp>.json for chrome://tracing or Perfetto) next to the CSV.
+
+Usage:
+    python tracing.py ../log/scan_20250101_120000/trace_summary_20250101_120000.json
+"""
+
+import os
+import json
+import math
+import time
+import argparse
+import threading
+import functools
+
+TRACE_ENV = "EDWA_TRACE"
+BUCKETS_PER_DECADE = 20   # histogram resolution: edges ~12% apart
+MAX_EVENTS = 200000       # Chrome trace events kept per run
+
+_enabled = False
+_chrome = False
+_lock = threading.Lock()
+_spans = {}      # name -> {'count', 'total', 'min', 'max', 'buckets': {bucket: count}}
+_counters = {}
+_events = []
+_dropped_events = 0
+_run_start = time.perf_counter_ns()
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+def enabled():
+    return _enabled
+
+def enable(chrome=False):
+    """Start collecting (chrome: also keep individual events)"""
+    global _enabled, _chrome
+    _enabled = True
+    _chrome = chrome
+
+def disable():
+    global _enabled, _chrome
+    _enabled = _chrome = False
+
+def _bucket(seconds):
+    return math.floor(math.log10(max(seconds, 1e-9)) * BUCKETS_PER_DECADE)
+
+def _bucket_upper(bucket):
+    return 10 ** ((bucket + 1) / BUCKETS_PER_DECADE)
+
+def _record(name, start_ns, end_ns, args=None):
+    global _dropped_events
+    seconds = (end_ns - start_ns) * 1e-9
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            entry = _spans[name] = {'count': 0, 'total': 0.0, 'min': seconds, 'max': seconds, 'buckets': {}}
+        entry['count'] += 1
+        entry['total'] += seconds
+        entry['min'] = min(entry['min'], seconds)
+        entry['max'] = max(entry['max'], seconds)
+        bucket = _bucket(seconds)
+        entry['buckets'][bucket] = entry['buckets'].get(bucket, 0) + 1
+        if _chrome:
+            if len(_events) < MAX_EVENTS:
+                event = {'name': name, 'cat': name.split('.')[0], 'ph': 'X',
+                         'ts': (start_ns - _run_start) / 1000.0, 'dur': (end_ns - start_ns) / 1000.0,
+                         'pid': os.getpid(), 'tid': threading.get_ident()}
+                if args:
+                    event['args'] = args
+                _events.append(event)
+            else:
+                _dropped_events += 1
+
+def span(name, **args):
+    """Context manager timing a block under name (no-op while disabled)"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+def traced(name):
+    """Decorator timing every call of a function under name"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+def count(name, n=1):
+    """Add n to a counter (no-op while disabled)"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def start_run():
+    """Clear everything collected so far; the next run starts at t=0"""
+    global _dropped_events, _run_start
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _events.clear()
+        _dropped_events = 0
+        _run_start = time.perf_counter_ns()
+
+def _percentile(buckets, total, q):
+    """Upper edge of the histogram bucket holding the q-quantile"""
+    rank = q * total
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= rank:
+            return _bucket_upper(bucket)
+    return None
+
+def summary():
+    """Per-span statistics (ms), histograms and counters of the current run"""
+    with _lock:
+        spans = {name: dict(entry, buckets=dict(entry['buckets'])) for name, entry in _spans.items()}
+        counters = dict(_counters)
+        elapsed = (time.perf_counter_ns() - _run_start) * 1e-9
+    result = {'elapsed_s': elapsed, 'spans': {}, 'counters': counters}
+    for name, entry in sorted(spans.items(), key=lambda item: -item[1]['total']):
+        n = entry['count']
+        result['spans'][name] = {
+            'count': n,
+            'total_s': entry['total'],
+            'mean_ms': entry['total'] / n * 1000,
+            'min_ms': entry['min'] * 1000,
+            'p50_ms': _percentile(entry['buckets'], n, 0.5) * 1000,
+            'p90_ms': _percentile(entry['buckets'], n, 0.9) * 1000,
+            'p99_ms': _percentile(entry['buckets'], n, 0.99) * 1000,
+            'max_ms': entry['max'] * 1000,
+            'histogram_ms': {f"{_bucket_upper(b) * 1000:.4g}": c for b, c in sorted(entry['buckets'].items())},
+        }
+    return result
+
+def write_chrome_trace(path):
+    """Write the kept events in Chrome trace event format"""
+    with _lock:
+        events = list(_events)
+        dropped = _dropped_events
+    with open(path, "w") as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                   'otherData': {'dropped_events': dropped}}, f)
+    return path
+
+def write_run(log_dir, timestamp):
+    """Write this run's summary (and Chrome trace) next to its CSV; returns the paths"""
+    if not _enabled:
+        return []
+    paths = []
+    try:
+        path = os.path.join(log_dir, f"trace_summary_{timestamp}.json")
+        with open(path, "w") as f:
+            json.dump(summary(), f, indent=2)
+        paths.append(path)
+        if _chrome:
+            paths.append(write_chrome_trace(os.path.join(log_dir, f"trace_{timestamp}.json")))
+        print(f"[INFO] Timing trace saved to {', '.join(paths)}")
+    except OSError as e:
+        print(f"[WARNING] Could not write timing trace: {e}")
+    return paths
+
+def format_summary(result, limit=20):
+    """Text table of the slowest spans by total time"""
+    lines = [f"{'span':<32} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>8} {'p90 ms':>8} {'max ms':>8}"]
+    for name, s in list(result['spans'].items())[:limit]:
+        lines.append(f"{name:<32} {s['count']:>7} {s['total_s']:>9.3f} {s['mean_ms']:>9.2f} "
+                     f"{s['p50_ms']:>8.2f} {s['p90_ms']:>8.2f} {s['max_ms']:>8.2f}")
+    for name, value in sorted(result['counters'].items()):
+        lines.append(f"{name:<32} {value:>7}")
+    return "\n".join(lines)
+
+_mode = os.environ.get(TRACE_ENV, "").strip().lower()
+if _mode in ("1", "on", "true", "chrome"):
+    enable(chrome=_mode == "chrome")
+
+def main():
+    parser = argparse.ArgumentParser(description='Show a saved EDWA timing summary')
+    parser.add_argument('summary', help='trace_summary_<timestamp>.json')
+    parser.add_argument('--limit', type=int, default=20, help='Number of spans to show')
+    args = parser.parse_args()
+    with open(args.summary) as f:
+        result = json.load(f)
+    print(f"[INFO] Run time {result['elapsed_s']:.1f} s")
+    print(format_summary(result, args.limit))
+
+if __name__ == "__main__":
+    main()